@@ -12,8 +12,8 @@ UserDep = Annotated[dict, Depends(require_access_token)]
 
 
 @router.post("/login", response_model=LoginDTO)
-def post_login(body: LoginRequest):
-    return login_user(body)
+async def post_login(body: LoginRequest):
+    return await login_user(body)
 
 
 @router.get("/me")
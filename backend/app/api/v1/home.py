@@ -1,19 +1,40 @@
 # app/api/v1/home.py
 from __future__ import annotations
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.core.db import get_db
+from app.core.cache import cache_stats
+from app.core.db import get_async_db
+from app.core.etag import not_modified
 from app.schemas.home import HomeSummaryOut
 from app.services.queries.home.summary import HomeSummaryService
+from app.services.queries.versions import VersionQueryService
 
 router = APIRouter(prefix="/home", tags=["Home"])
 
 @router.get("/summary", response_model=HomeSummaryOut)
-def home_summary(
+async def home_summary(
+    request: Request,
+    response: Response,
     window: str = Query("24h"),
     sections: str | None = Query(None, description="exemplo: runs,kpis"),
-    db: Session = Depends(get_db),
+    timings: bool = Query(False, description="inclui timings_ms por secção"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    svc = HomeSummaryService(db)
-    return svc.build(window=window, sections=sections)
+    # sem change feed o cache pode servir um summary um pouco anterior ao ETag;
+    # o bucket de tempo em windowed() limita isso a ETAG_WINDOW_SECONDS
+    etag = await db.run_sync(lambda s: VersionQueryService(s).windowed("home.summary", window, sections, timings))
+    if nm := not_modified(request, response, etag):
+        return nm
+    svc = HomeSummaryService()
+    # hit (fresco ou stale) responde já no event loop; só o cálculo vai para uma thread
+    out = svc.cached(window=window, sections=sections, timings=timings)
+    if out is None:
+        out = await run_in_threadpool(svc.build, window=window, sections=sections, timings=timings)
+    return out
+
+@router.get("/cache-stats")
+async def home_cache_stats() -> dict:
+    """Contadores dos caches deste processo (hits, stale, misses, refreshes...)."""
+    return cache_stats()
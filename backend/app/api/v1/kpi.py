@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime
 from typing import Literal, Optional
 
+from app.core.db import get_async_db
 from app.core.deps import require_access_token
+from app.core.etag import not_modified
 from app.services.read.kpi.kpi_query import KPIQueryService
 from app.schemas.kpi import (
     EmployeeTimeseriesDTO,
@@ -9,13 +14,19 @@ from app.schemas.kpi import (
     InStorePurchasesDTO,
 )
 from app.services.commands.kpi.report_generate import KPIReportGenerateService
+from app.services.queries.kpi.store_metrics_query_service import (
+    SYNC_CHECK as STORE_CHECK,
+    StoreMetricsQueryService,
+    normalize_since as store_since,
+)
+from app.services.queries.versions import VersionQueryService
 from app.core.config import settings
 
 router = APIRouter(prefix="/kpi", tags=["kpi"])
 
 
 @router.get("/employees/timeseries", response_model=EmployeeTimeseriesDTO)
-def employees_timeseries(
+async def employees_timeseries(
     role: Literal["prep", "invoice"] = Query(...),
     gran: Literal["day", "week", "month", "year"] = Query("day"),
     since: Optional[str] = None,
@@ -23,7 +34,7 @@ def employees_timeseries(
     _=Depends(require_access_token),
 ):
     svc = KPIQueryService()
-    res = svc.employees_timeseries(role=role, gran=gran, since=since, until=until)
+    res = await svc.employees_timeseries(role=role, gran=gran, since=since, until=until)
     return {
         "ok": True,
         "role": res["role"],
@@ -36,7 +47,7 @@ def employees_timeseries(
 
 
 @router.get("/employees/performance", response_model=EmployeePerformanceDTO)
-def employees_performance(
+async def employees_performance(
     role: Literal["prep", "invoice"] = Query(...),
     since: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
     until: Optional[str] = Query(None, description="YYYY-MM-DD (exclusive)"),
@@ -46,7 +57,7 @@ def employees_performance(
     _=Depends(require_access_token),
 ):
     svc = KPIQueryService()
-    res = svc.employees_performance(
+    res = await svc.employees_performance(
         role=role,
         since=since,
         until=until,
@@ -68,7 +79,7 @@ def employees_performance(
 
 
 @router.post("/reports/generate")
-def generate_kpi_report(
+async def generate_kpi_report(
     period: Literal["day", "week", "month", "year"] = Query("day"),
     since: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
     until: Optional[str] = Query(None, description="YYYY-MM-DD (exclusive)"),
@@ -79,16 +90,18 @@ def generate_kpi_report(
         raise HTTPException(status_code=500, detail="N8N webhook URL não configurada")
 
     svc = KPIReportGenerateService()
-    res = svc.get_or_generate(period=period, since=since, until=until, force=force)
+    res = await svc.get_or_generate(period=period, since=since, until=until, force=force)
 
     # mapeamento 1:1 para a estrutura devolvida pelo service
     return {
         "ok": res["ok"],
         "report_id": res["uid"],  # antes: res["report_id"]
+        "source": res["source"],  # "cache" (kpi_reports) | "n8n"
         "period": res["meta"]["period"],
         "since": res["meta"]["since"],
         "until": res["meta"]["until"],
         "tz": res["meta"]["tz"],
+        "upstream": res["meta"].get("upstream"),  # ms/ok/error por chamada (None se veio de cache)
         "n8n": {
             "url": res["n8n"]["url"],
             "status_code": res["n8n"]["status_code"],
@@ -99,17 +112,47 @@ def generate_kpi_report(
     }
 
 
+@router.get("/reports/status")
+async def kpi_report_status(
+    period: Literal["day", "week", "month", "year"] = Query("day"),
+    since: Optional[str] = Query(None, description="YYYY-MM-DD (inclusive)"),
+    until: Optional[str] = Query(None, description="YYYY-MM-DD (exclusive)"),
+    _=Depends(require_access_token),
+):
+    """O último relatório guardado para a janela ainda corresponde aos dados? Não gera nada."""
+    svc = KPIReportGenerateService()
+    return await svc.check_stale(period=period, since=since, until=until)
+
+
 # In Store --------------------
 @router.get("/reports/employees/store-metrics", response_model=InStorePurchasesDTO)
-def instore_purchases(
+async def instore_purchases(
+    request: Request,
+    response: Response,
     since: Optional[str] = Query(
         None,
-        description="Data mínima (YYYY-MM-DD ou ISO) para ir buscar audits ao frontInvoiceAudit",
+        description="Data mínima (YYYY-MM-DD ou ISO) dos eventos do frontInvoiceAudit",
     ),
     _=Depends(require_access_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    svc = KPIQueryService()
-    res = svc.instore_metrics(since=since)
+    # lê os agregados locais (job kpi.sync_store_audit); sem chamada ao upstream
+    def load(s: Session):
+        svc = StoreMetricsQueryService(s)
+        if not svc.covers(since):
+            return None
+        # sem since a janela desliza com o dia: entra no ETag
+        version = VersionQueryService(s).check(STORE_CHECK, since or datetime.now().date().isoformat())
+        if nm := not_modified(request, response, version):
+            return nm
+        return svc.instore_metrics(since=since)
+
+    res = await db.run_sync(load)
+    if isinstance(res, Response):
+        return res
+    if res is None:
+        # since anterior aos eventos guardados (backfill): os agregados locais vinham truncados
+        res = await KPIQueryService().instore_metrics_upstream(since_iso=store_since(since))
 
     return {
         "ok": True,
@@ -1,43 +1,65 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db  # garante que tens este helper
+from app.core.db import get_async_db
 from app.core.deps import require_access_token
+from app.core.etag import not_modified
 from app.services.read.prestashop.prestashop_query import PrestashopQueryService
+from app.services.queries.versions import VersionQueryService
 from app.schemas.prestashop import PageSpeedsListDTO, PaymentsListDTO, DelayedOrdersListDTO, EOLProductsListDTO, \
     AbandonedCartsListDTO
 
 router = APIRouter(prefix="/prestashop", tags=["prestashop"])
 
+# Handlers async: o ETag e a query correm num só run_sync na AsyncSession
+# (aiosqlite), sem ocupar uma thread do pool do Starlette.
+
 @router.get("/payments", response_model=PaymentsListDTO)
-def list_payments(db: Session = Depends(get_db), _=Depends(require_access_token)):
-    svc = PrestashopQueryService(db)
-    items = svc.get_payments()
-    return {"ok": True, "count": len(items), "methods": items}
+async def list_payments(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), _=Depends(require_access_token)):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check("prestashop.payments")):
+            return nm
+        items = PrestashopQueryService(s).get_payments()
+        return {"ok": True, "count": len(items), "methods": items}
+    return await db.run_sync(load)
 
 
 @router.get("/orders/delayed", response_model=DelayedOrdersListDTO)
-def list_delayed_orders(db: Session = Depends(get_db), _=Depends(require_access_token)):
-    svc = PrestashopQueryService(db)
-    items = svc.get_delayed_orders()
-    return {"ok": True, "count": len(items), "orders": items}
+async def list_delayed_orders(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), _=Depends(require_access_token)):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check("prestashop.orders_delayed")):
+            return nm
+        items = PrestashopQueryService(s).get_delayed_orders()
+        return {"ok": True, "count": len(items), "orders": items}
+    return await db.run_sync(load)
 
 
 @router.get("/products/eol", response_model=EOLProductsListDTO)
-def list_product_eol(db: Session = Depends(get_db), _=Depends(require_access_token)):
-    svc = PrestashopQueryService(db)
-    items = svc.get_eol_products()
-    counts = svc.get_eol_counts()
-    return {"ok": True, "count": len(items), "counts": counts, "items": items}
+async def list_product_eol(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), _=Depends(require_access_token)):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check("prestashop.eol_products")):
+            return nm
+        svc = PrestashopQueryService(s)
+        items = svc.get_eol_products()
+        counts = svc.get_eol_counts()
+        return {"ok": True, "count": len(items), "counts": counts, "items": items}
+    return await db.run_sync(load)
 
 @router.get("/pagespeed", response_model=PageSpeedsListDTO)
-def list_pagespeed(db: Session = Depends(get_db), _=Depends(require_access_token)):
-    svc = PrestashopQueryService(db)
-    items = svc.get_pagespeed()
-    return {"ok": True, "count": len(items), "items": items}
+async def list_pagespeed(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), _=Depends(require_access_token)):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check("prestashop.pagespeed")):
+            return nm
+        items = PrestashopQueryService(s).get_pagespeed()
+        return {"ok": True, "count": len(items), "items": items}
+    return await db.run_sync(load)
 
 @router.get("/carts/abandoned", response_model=AbandonedCartsListDTO)
-def list_abandoned_carts(db: Session = Depends(get_db), _=Depends(require_access_token)):
-    svc = PrestashopQueryService(db)
-    items = svc.get_abandoned_carts()
-    return {"ok": True, "count": len(items), "items": items}
\ No newline at end of file
+async def list_abandoned_carts(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), _=Depends(require_access_token)):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check("prestashop.carts_stale")):
+            return nm
+        items = PrestashopQueryService(s).get_abandoned_carts()
+        return {"ok": True, "count": len(items), "items": items}
+    return await db.run_sync(load)
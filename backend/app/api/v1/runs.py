@@ -1,11 +1,15 @@
 from enum import Enum
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.db import get_async_db
+from app.core.etag import not_modified
 from app.services.queries.runs.runs import RunsQueryService
-from app.schemas.runs import RunsListDTO
+from app.services.queries.runs.summary import get_runs_summary
+from app.services.queries.versions import VersionQueryService
+from app.schemas.runs import RunsListDTO, RunsSummaryDTO
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
@@ -17,13 +21,31 @@ class RunsStatusFilter(str, Enum):
     warning = "warning"
 
 @router.get("", response_model=RunsListDTO)
-def list_runs(
+async def list_runs(
+    request: Request,
+    response: Response,
     limit: int = Query(100, gt=0, le=1000),
     status: RunsStatusFilter = Query(RunsStatusFilter.all),
     check_name: Optional[str] = Query(None, description="ex: prestashop.payments"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    svc = RunsQueryService(db)
-    st: Optional[str] = None if status is RunsStatusFilter.all else status.value
-    items = svc.list(limit=limit, status=st, check_name=check_name)
-    return RunsListDTO(ok=True, count=len(items), runs=items)
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).runs(limit, status.value, check_name)):
+            return nm
+        st: Optional[str] = None if status is RunsStatusFilter.all else status.value
+        items = RunsQueryService(s).list(limit=limit, status=st, check_name=check_name)
+        return RunsListDTO(ok=True, count=len(items), runs=items)
+    return await db.run_sync(load)
+
+@router.get("/summary", response_model=RunsSummaryDTO)
+async def runs_summary(
+    request: Request,
+    response: Response,
+    window: str = Query("24h", description="ex: 6h, 24h, 7d"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).windowed("runs.summary", window)):
+            return nm
+        return get_runs_summary(s, window)
+    return await db.run_sync(load)
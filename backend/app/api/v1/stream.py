@@ -0,0 +1,46 @@
+# app/api/v1/stream.py
+from __future__ import annotations
+
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.deps import require_access_token
+from app.services.events.stream import change_stream
+from app.services.events.tickets import issue_ticket, redeem_ticket
+
+log = logging.getLogger("wd.api.stream")
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+
+@router.post("/ticket")
+async def stream_ticket(user: dict = Depends(require_access_token)):
+    # o JWT de acesso vai no header; o ticket é o que segue na query string do EventSource
+    ticket, ttl = issue_ticket(str(user.get("sub") or ""))
+    return {"ticket": ticket, "expires_in": ttl}
+
+
+@router.get("")
+async def stream(
+    request: Request,
+    # o EventSource do browser não envia headers: vai um ticket de uso único (POST /stream/ticket)
+    ticket: str = Query(..., description="Ticket de POST /stream/ticket"),
+):
+    try:
+        redeem_ticket(ticket)
+    except Exception as e:
+        log.info("stream: invalid ticket: %s", e)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Ticket inválido, expirado ou já usado")
+
+    feed = getattr(request.app.state, "change_feed", None)
+    if feed is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Change feed desligado")
+
+    return StreamingResponse(
+        change_stream(feed, request, heartbeat_s=settings.SSE_HEARTBEAT_SECONDS, queue_max=settings.SSE_QUEUE_MAX),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.db import get_async_db
 from app.core.deps import require_access_token
+from app.core.etag import not_modified
 from app.services.queries.tools.patife_query_service import PatifeQueryService
-from app.services.queries.tools.pda_query_service import PdaQueryService
-from app.schemas.tools import PatifeHealthzDTO, Report
+from app.services.queries.tools.pda_query_service import SYNC_CHECK as PDA_CHECK, PdaQueryService
+from app.services.queries.versions import VersionQueryService
+from app.schemas.tools import PatifeHealthzDTO, PatifeSummaryDTO, Report
 from app.schemas.common import Page
 
 
@@ -16,29 +21,69 @@ router = APIRouter(prefix="/tools", tags=["tools"])
 # PDA ---------
 
 @router.get("/pda", response_model=Page[Report])
-def list_pda_logs(
+async def list_pda_logs(
+    request: Request,
+    response: Response,
     _=Depends(require_access_token),
+    db: AsyncSession = Depends(get_async_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="meta.next_cursor da página anterior"),
+    state: Optional[str] = Query(None),
+    code: Optional[str] = Query(None),
 ):
-    service = PdaQueryService()
-    return service.get_pda_report(page=page, page_size=page_size)
+    def load(s: Session):
+        version = VersionQueryService(s).check(PDA_CHECK, page, page_size, cursor, state, code)
+        if nm := not_modified(request, response, version):
+            return nm
+        return PdaQueryService(s).get_pda_report(page=page, page_size=page_size, cursor=cursor, state=state, code=code)
+    return await db.run_sync(load)
 
 
 # Patife ---------
 
+PATIFE_CHECK = "patife.ingest_healthz"
+
 @router.get("/patife/healthz/latest", response_model=PatifeHealthzDTO)
-def patife_latest(_: str = Depends(require_access_token), db: Session = Depends(get_db)):
-    qs = PatifeQueryService(db)
-    return qs.latest()
+async def patife_latest(
+    request: Request,
+    response: Response,
+    _: str = Depends(require_access_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check(PATIFE_CHECK)):
+            return nm
+        return PatifeQueryService(s).latest()
+    return await db.run_sync(load)
 
 
 @router.get("/patife/healthz/history", response_model=Page[PatifeHealthzDTO])
-def patife_history(
+async def patife_history(
+    request: Request,
+    response: Response,
     _: str = Depends(require_access_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
 ):
-    qs = PatifeQueryService(db)
-    return qs.history(page=page, page_size=page_size)
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).check_history(PATIFE_CHECK, page, page_size)):
+            return nm
+        return PatifeQueryService(s).history(page=page, page_size=page_size)
+    return await db.run_sync(load)
+
+
+@router.get("/patife/healthz/summary", response_model=PatifeSummaryDTO)
+async def patife_summary(
+    request: Request,
+    response: Response,
+    _: str = Depends(require_access_token),
+    db: AsyncSession = Depends(get_async_db),
+    window: str = Query("24h", description="ex: 6h, 24h, 7d"),
+):
+    def load(s: Session):
+        if nm := not_modified(request, response, VersionQueryService(s).windowed("patife.summary", window)):
+            return nm
+        return PatifeQueryService(s).summary(window=window)
+    return await db.run_sync(load)
@@ -24,6 +24,8 @@ def _table_exists(conn, name: str) -> bool:
 def init_sqlite_pragmas(engine: Engine) -> None:
     """PRAGMAs seguros para leitura intensiva na SQLite."""
     with _begin(engine) as conn:
+        # só tem efeito numa base nova; bases antigas: app.services.commands.maintenance.vacuum_convert
+        conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL;"))
         conn.execute(text("PRAGMA journal_mode=WAL;"))
         conn.execute(text("PRAGMA synchronous=NORMAL;"))
         conn.execute(text("PRAGMA temp_store=MEMORY;"))
@@ -42,6 +44,11 @@ def _ensure_pagespeed_indexes(conn) -> None:
         CREATE INDEX IF NOT EXISTS ix_{tbl}_obs
         ON {tbl} (observed_at);
     """))
+    # (url, observed_at) para a última amostra de cada URL
+    conn.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS ix_{tbl}_url_obs
+        ON {tbl} (url, observed_at);
+    """))
     # por tipo (para last_status rápido)
     conn.execute(text(f"""
         CREATE INDEX IF NOT EXISTS ix_{tbl}_ptype
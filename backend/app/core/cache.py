@@ -0,0 +1,280 @@
+# app/core/cache.py
+"""
+Cache em memória (por processo) para respostas caras da API.
+
+- single-flight: pedidos concorrentes para a mesma chave em falta esperam
+  por um único cálculo em vez de o repetirem;
+- stale-while-revalidate: depois do TTL a entrada continua a ser servida
+  durante `stale_ttl` enquanto é recalculada em segundo plano;
+- LRU: no máximo `max_entries` chaves;
+- contadores (hits/stale/misses/refreshes/...) em stats().
+
+SingleFlightCache é para código síncrono (thread pool do Starlette): o
+loader tem de abrir a sua própria sessão de BD, porque o refresh corre
+depois de o pedido original ter terminado. AsyncSingleFlightCache é o
+equivalente para loaders async (ex.: chamadas HTTP externas), com TTL por
+entrada e sem stale-while-revalidate.
+
+`follow_changes=False` deixa o cache de fora de invalidate_caches() (o
+change feed só sabe de dados gravados pelo worker).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+log = logging.getLogger("wd.cache")
+
+
+@dataclass(slots=True)
+class _Entry(Generic[V]):
+    value: V
+    stored_at: float
+
+
+@dataclass(slots=True)
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlightCache(Generic[V]):
+    def __init__(self, name: str, *, ttl: float, stale_ttl: float = 0.0,
+                 max_entries: int = 128, refresh_workers: int = 2, follow_changes: bool = True):
+        self.name = name
+        self.follow_changes = follow_changes
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self.max_entries = max(1, int(max_entries))
+        self._data: OrderedDict[Hashable, _Entry[V]] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._gen = 0  # sobe a cada invalidate(): cálculos começados antes não são guardados
+        self._pool = ThreadPoolExecutor(max_workers=max(1, refresh_workers), thread_name_prefix=f"cache-{name}")
+        self._counters = dict.fromkeys(
+            ("hits", "stale_hits", "misses", "coalesced", "loads", "refreshes", "errors", "evictions"), 0
+        )
+        _REGISTRY[name] = self
+
+    # ---------------- API ----------------
+    def get(self, key: Hashable, loader: Callable[[], V]) -> V:
+        with self._lock:
+            entry = self._cached_locked(key, loader)
+            if entry is not None:
+                return entry.value
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._counters["misses"] += 1
+                leader = True
+            else:
+                self._counters["coalesced"] += 1
+                leader = False
+
+        if leader:
+            self._load(key, flight, loader)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, key: Hashable, loader: Callable[[], V]) -> Optional[V]:
+        """
+        Como get(), mas nunca bloqueia: devolve a entrada fresca ou stale (e
+        agenda o refresh) ou None se for preciso calcular. Para handlers async,
+        que só mandam o cálculo para uma thread quando falha.
+        """
+        with self._lock:
+            entry = self._cached_locked(key, loader)
+        return entry.value if entry is not None else None
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Esquece uma chave (ou todas). Um cálculo em curso termina para quem já
+        esperava por ele, mas os pedidos seguintes começam um novo.
+        """
+        with self._lock:
+            self._gen += 1
+            if key is None:
+                self._data.clear()
+                self._flights.clear()
+            else:
+                self._data.pop(key, None)
+                self._flights.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            c = dict(self._counters)
+            c.update(size=len(self._data), inflight=len(self._flights),
+                     ttl=self.ttl, stale_ttl=self.stale_ttl, max_entries=self.max_entries)
+        served = c["hits"] + c["stale_hits"] + c["misses"] + c["coalesced"]
+        c["hit_ratio"] = round((c["hits"] + c["stale_hits"]) / served, 4) if served else None
+        return c
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------- interno ----------------
+    def _cached_locked(self, key: Hashable, loader: Callable[[], V]) -> Optional[_Entry[V]]:
+        """Entrada servível (conta hit/stale e agenda o refresh) ou None. Com o lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry.stored_at
+        if age < self.ttl:
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry
+        if age < self.ttl + self.stale_ttl:
+            self._data.move_to_end(key)
+            self._counters["stale_hits"] += 1
+            if key not in self._flights:
+                flight = self._flights[key] = _Flight()
+                self._counters["refreshes"] += 1
+                self._pool.submit(self._load, key, flight, loader)
+            return entry
+        return None
+
+    def _load(self, key: Hashable, flight: _Flight, loader: Callable[[], V]) -> None:
+        with self._lock:
+            gen = self._gen
+        try:
+            value = loader()
+        except BaseException as e:  # noqa: BLE001 - repassado a quem espera
+            flight.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            log.warning("cache %s: load failed for %r: %r", self.name, key, e)
+        else:
+            flight.value = value
+            with self._lock:
+                self._counters["loads"] += 1
+                if gen != self._gen:
+                    # invalidado durante o cálculo: quem esperava recebe-o, mas não fica em cache
+                    return
+                self._data[key] = _Entry(value, time.monotonic())
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+                    self._counters["evictions"] += 1
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+
+@dataclass(slots=True)
+class _TimedEntry(Generic[V]):
+    value: V
+    expires_at: float
+
+
+class AsyncSingleFlightCache(Generic[V]):
+    def __init__(self, name: str, *, ttl: float, max_entries: int = 128, follow_changes: bool = True):
+        self.name = name
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.follow_changes = follow_changes
+        self._data: OrderedDict[Hashable, _TimedEntry[V]] = OrderedDict()
+        self._flights: dict[Hashable, asyncio.Task] = {}
+        # invalidate() pode vir de outra thread (change feed)
+        self._lock = threading.Lock()
+        self._gen = 0
+        self._counters = dict.fromkeys(("hits", "misses", "coalesced", "loads", "errors", "evictions"), 0)
+        _REGISTRY[name] = self
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[V]], *, ttl: Optional[float] = None) -> V:
+        """
+        Valor em cache ou resultado de loader(); pedidos iguais em simultâneo
+        esperam pela mesma task. `ttl` por entrada (None = o do cache).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() < entry.expires_at:
+                self._data.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry.value
+            task = self._flights.get(key)
+            if task is None or task.done() or task.get_loop() is not loop:
+                self._counters["misses"] += 1
+                task = self._flights[key] = loop.create_task(self._load(key, loader, ttl, self._gen))
+            else:
+                self._counters["coalesced"] += 1
+        # shield: um cliente que desliga não cancela o pedido dos outros
+        return await asyncio.shield(task)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            self._gen += 1
+            if key is None:
+                self._data.clear()
+                self._flights.clear()
+            else:
+                self._data.pop(key, None)
+                self._flights.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            c = dict(self._counters)
+            c.update(size=len(self._data), inflight=len(self._flights), ttl=self.ttl, max_entries=self.max_entries)
+        served = c["hits"] + c["misses"] + c["coalesced"]
+        c["hit_ratio"] = round(c["hits"] / served, 4) if served else None
+        return c
+
+    def close(self) -> None:
+        pass
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[V]], ttl: Optional[float], gen: int) -> V:
+        try:
+            value = await loader()
+        except BaseException as e:
+            with self._lock:
+                self._counters["errors"] += 1
+            log.warning("cache %s: load failed for %r: %r", self.name, key, e)
+            raise
+        else:
+            with self._lock:
+                self._counters["loads"] += 1
+                ttl = self.ttl if ttl is None else ttl
+                if gen == self._gen and ttl > 0:
+                    self._data[key] = _TimedEntry(value, time.monotonic() + ttl)
+                    self._data.move_to_end(key)
+                    while len(self._data) > self.max_entries:
+                        self._data.popitem(last=False)
+                        self._counters["evictions"] += 1
+            return value
+        finally:
+            with self._lock:
+                if self._flights.get(key) is asyncio.current_task():
+                    del self._flights[key]
+
+
+_REGISTRY: dict[str, SingleFlightCache | AsyncSingleFlightCache] = {}
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: c.stats() for name, c in _REGISTRY.items()}
+
+
+def invalidate_caches() -> None:
+    """Esquece as entradas dos caches que seguem o change feed (o worker gravou dados novos)."""
+    for c in _REGISTRY.values():
+        if c.follow_changes:
+            c.invalidate()
+
+
+def close_caches() -> None:
+    for c in _REGISTRY.values():
+        c.close()
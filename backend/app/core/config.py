@@ -1,7 +1,7 @@
 # app/core/config
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import Field, field_validator
 from typing import List, Literal
 
 
@@ -23,6 +23,58 @@ class Settings(BaseSettings):
     # ---------------
     # Database
     DATABASE_URL: str = "sqlite:///./database/database.sqlite"
+    # caminho de leitura async da API (aiosqlite); ligações abertas em simultâneo
+    ASYNC_DB_POOL_SIZE: int = 8
+    # ---------------
+    # Retenção / compactação (job diário, ver app/services/commands/maintenance/compact.py)
+    RETENTION_ENABLED: bool = True
+    # dias de linhas brutas por tabela; as mais antigas são agregadas em snapshot_rollups
+    # e apagadas. Tabela ausente ou 0 = guardar tudo.
+    RETENTION_RAW_DAYS: dict[str, int] = Field(
+        default_factory=lambda: {
+            "page_speeds": 30,
+            "payment_method_status": 30,
+            "delayed_orders": 30,
+            "abandoned_carts": 30,
+            "eol_products": 90,
+            "patife_healthz": 14,
+            "check_runs": 30,
+        }
+    )
+    RETENTION_ROLLUP_DAYS: int = 730  # agregados mais antigos são apagados (0 = nunca)
+    RETENTION_DELETE_CHUNK: int = 2000  # linhas por DELETE/commit
+    RETENTION_CHUNK_PAUSE_MS: int = 50  # pausa entre lotes para não prender o lock de escrita
+    RETENTION_VACUUM_PAGES: int = 5000  # páginas devolvidas ao SO por execução (incremental_vacuum)
+    # ---------------
+    # Cache do /home/summary (por processo, ver app/core/cache.py)
+    HOME_SUMMARY_TTL_SECONDS: int = 30  # fresco
+    HOME_SUMMARY_STALE_SECONDS: int = 300  # depois do TTL serve o antigo e recalcula em segundo plano
+    HOME_SUMMARY_CACHE_MAX: int = 64  # chaves (window, sections) guardadas (LRU)
+    # com o change feed ligado o cache é invalidado quando o worker grava dados,
+    # por isso o TTL passa a ser só uma rede de segurança
+    HOME_SUMMARY_EVENT_TTL_SECONDS: int = 900
+    # secções do summary em paralelo, cada uma na sua ligação só de leitura (WAL: leitores concorrentes)
+    HOME_SUMMARY_PARALLEL: bool = True
+    HOME_SUMMARY_WORKERS: int = 6  # threads (e ligações do read engine) para as secções
+    # ---------------
+    # Change feed worker -> API (snapshot_pointers + check_runs, ver app/services/events/change_feed.py)
+    CHANGE_FEED_ENABLED: bool = True
+    CHANGE_FEED_POLL_MS: int = 250  # PRAGMA data_version por ciclo; só lê as tabelas quando muda
+    SSE_HEARTBEAT_SECONDS: int = 15  # /stream: comentário keep-alive quando não há eventos
+    SSE_QUEUE_MAX: int = 100  # eventos em espera por cliente antes de descartar
+    SSE_TICKET_TTL_SECONDS: int = 30  # POST /stream/ticket: validade do ticket de uso único do EventSource
+    ETAG_WINDOW_SECONDS: int = 60  # summaries com janela relativa: o ETag muda pelo menos a cada N s
+    # ---------------
+    # Runs (check_runs): por omissão gravadas na transação do job; com RUNS_BUFFERED ficam num
+    # buffer do worker e vão em lote a cada RUNS_FLUSH_INTERVAL_S (e no shutdown), ver app/repos/runs/buffer.py
+    RUNS_BUFFERED: bool = False
+    RUNS_FLUSH_INTERVAL_S: int = 30
+    # ---------------
+    # HTTP (pool partilhado por processo, ver app/external/http_pool.py)
+    HTTP_POOL_MAX_CONNECTIONS: int = 20
+    HTTP_POOL_MAX_KEEPALIVE: int = 10
+    HTTP_POOL_KEEPALIVE_S: float = 120.0
+    HTTP_POOL_HTTP2: bool = True
     # ---------------
     # JWT
     JWT_SECRET: str = "jwt_secret_example"
@@ -34,10 +86,16 @@ class Settings(BaseSettings):
     PS_TIMEOUT_S: int = 15
     PS_API_KEY: str = "prestashop-ws-key"
     PS_USER_AGENT: str = "prestashop-allowed-ua"
+    PS_VERIFY_SSL: str = "true"  # só os pedidos ao PrestaShop/PDA (ver app/external/http_pool.py)
     # --> Auth
     PS_AUTH_VALIDATE: str = "https://domain.com/__watchdogs/login.php"
     PS_GENESYS_KEY: str = "ps-api-key"
     PS_AUTH_VERIFY_SSL: str = "true"
+    # --> Snapshots (orders_delayed, carts_stale, eol_products)
+    # "full": uma linha por entidade por run (histórico completo, cresce com o nº de runs)
+    # "delta": estado atual + intervalos de alteração (cresce com o nº de alterações).
+    # Os dois modos não partilham histórico: mudar de modo começa um histórico novo.
+    PS_SNAPSHOT_STORAGE: Literal["full", "delta"] = "full"
     # --> Payments
     PS_CHECK_PAYMENT_URL: str = "https://domain.com/__watchdogs/check_payments.php"
     PS_PAYMENTS_WARNING_HOURS: int = 48  # amarelo
@@ -55,6 +113,19 @@ class Settings(BaseSettings):
     # --> Carregamento de Páginas
     PS_HOME_URL: str = "https://domain.com/home.php"
     PS_PRODUCT_URL: str = "https://domain.com/product/product-1.php"
+    # grupos de URLs a amostrar ({"category": ["https://..."], ...}); vazio = só home + product acima.
+    # O nome do grupo fica em page_speeds.page_type (máx. 16 chars, nomes maiores são recusados no
+    # arranque em vez de truncados: dois grupos podiam acabar com o mesmo page_type); "home" usa os limiares HOME,
+    # os restantes grupos os limiares PRODUCT.
+    PS_PAGESPEED_URLS: dict[str, list[str]] = {}
+    PS_PAGESPEED_CONCURRENCY: int = 6  # sondas em paralelo (total)
+    PS_PAGESPEED_PER_HOST: int = 2  # sondas em paralelo por host
+    PS_PAGESPEED_BUDGET_S: int = 9000  # orçamento do run (cron de 3h)
+    # dias guardados em pagespeed_rollups por balde (0 = sempre); a janela do summary
+    # usa o balde mais fino que ainda a cobre
+    PS_PAGESPEED_ROLLUP_DAYS: dict[str, int] = Field(
+        default_factory=lambda: {"minute": 8, "hour": 90, "day": 0}
+    )
     PS_PAGESPEED_JSONLD_IS_CRITICAL: bool = False
     PS_PAGESPEED_IGNORE_SANITY_WARNINGS: bool = True
     PS_PAGESPEED_IGNORE_WARN_KEYS: list[str] = [
@@ -90,9 +161,27 @@ class Settings(BaseSettings):
     PS_KPI_EMP_PERFORMANCE_URL: str = (
         "https://domain.com/__watchdogs/kpi_employee_performance.php"
     )
+    # cache das chamadas KPI (ver app/services/read/kpi/upstream.py): períodos fechados
+    # ficam na SQLite de vez; o bucket aberto só KPI_CACHE_OPEN_TTL_SECONDS
+    KPI_CACHE_ENABLED: bool = True
+    KPI_CACHE_OPEN_TTL_SECONDS: int = 120
+    KPI_CACHE_CLOSED_GRACE_HOURS: int = 2  # um bucket só conta como fechado N horas depois de acabar
+    KPI_CACHE_MAX: int = 256  # entradas em memória (LRU)
+    # kpi_upstream_cache: respostas guardadas há mais de N dias são apagadas pelo
+    # maintenance.compact (0 = guardar tudo). Os buckets da timeseries ficam
+    # enquanto estiverem dentro da janela por omissão mais longa (gran=year).
+    KPI_CACHE_RETENTION_DAYS: int = 30
+    # timeseries: guarda cada bucket fechado e só pede ao upstream os que faltam + o aberto
+    KPI_INCREMENTAL_SYNC: bool = True
+    # relatórios KPI (POST /kpi/reports/generate): webhook n8n que gera o texto
+    N8N_REPORT_WEBHOOK_URL: str = ""
+    KPI_REPORT_CALL_TIMEOUT_S: float = 30.0  # por chamada ao upstream (as 4 correm em paralelo)
     FRONT_INVOICE_AUDIT_BASE_URL: str = (
         "https://domain.com/custom/frontInvoiceAudit/get-audits.php"
     )
+    # store-metrics lê de store_audit_events/store_audit_daily (job kpi.sync_store_audit)
+    STORE_AUDIT_BACKFILL_DAYS: int = 90  # primeira sync (tabela vazia)
+    STORE_AUDIT_SYNC_OVERLAP_S: int = 300  # volta a pedir este tanto antes do último evento visto
 
     # Tools
     # --- PDA ---
@@ -103,8 +192,21 @@ class Settings(BaseSettings):
     TOOLS_PDA_UPDATE_REPORT: str = (
         "https://www.domain.com/__fastLogixApi/reports/api/updateReport.php"
     )
+    # sync para a tabela local pda_reports: query param com o date_upd mínimo
+    # (vazio = o getReports não filtra e vem sempre a lista inteira). Só ligar
+    # com o nome confirmado no FastLogix; se o filtro for ignorado a sync avisa no log
+    TOOLS_PDA_UPDATED_SINCE_PARAM: str = ""
+    TOOLS_PDA_SYNC_OVERLAP_S: int = 60  # volta a pedir este tanto antes do último date_upd visto
     # --- PATIFE ---
     PATIFE_HEALTHZ: str = "https://domain.com/api/healthz"
 
+    @field_validator("PS_PAGESPEED_URLS")
+    @classmethod
+    def _pagespeed_groups_fit_page_type(cls, v: dict[str, list[str]]) -> dict[str, list[str]]:
+        too_long = [g for g in v if not g or len(g) > 16]
+        if too_long:
+            raise ValueError(f"group names must have 1-16 chars (page_speeds.page_type): {too_long}")
+        return v
+
 
 settings = Settings()
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import settings
@@ -16,6 +17,46 @@ connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith(
 engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, future=True)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, future=True)
+
+# Leituras em paralelo (ex.: secções do /home/summary): pool próprio, cada
+# thread na sua ligação. Em WAL os leitores não se bloqueiam uns aos outros.
+_in_memory = settings.DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
+read_engine = create_engine(
+    settings.DATABASE_URL, connect_args=connect_args, future=True,
+    **({} if _in_memory else dict(pool_size=max(1, settings.HOME_SUMMARY_WORKERS), max_overflow=0)),
+)
+
+
+def _async_url(url: str) -> str:
+    # sqlite:///x -> sqlite+aiosqlite:///x; outros backends já trazem o driver async na URL
+    scheme, sep, rest = url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+# Caminho de leitura async da API: os handlers async fazem await às queries
+# (aiosqlite) em vez de ocuparem uma thread do pool do Starlette por pedido.
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL), future=True,
+    **({} if _in_memory else dict(pool_size=max(1, settings.ASYNC_DB_POOL_SIZE), max_overflow=0)),
+)
+
+
+def _read_only_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA query_only=ON")  # engano num repo não escreve por esta via
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-16384")
+    cur.close()
+
+
+if settings.DATABASE_URL.startswith("sqlite"):
+    event.listen(read_engine, "connect", _read_only_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _read_only_pragmas)
+
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False, future=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -24,3 +65,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    AsyncSession só de leitura. Os repos são síncronos (partilhados com o
+    worker): correm nela com `await db.run_sync(fn)`, num greenlet, e cada
+    query faz await no aiosqlite.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
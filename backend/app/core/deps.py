@@ -13,7 +13,8 @@ log = logging.getLogger("gsm.core.deps")
 _auth = HTTPBearer(auto_error=True)
 
 
-def require_access_token(creds: HTTPAuthorizationCredentials = Depends(_auth)):
+async def require_access_token(creds: HTTPAuthorizationCredentials = Depends(_auth)):
+    # async: só descodifica o JWT, não precisa de ocupar uma thread do pool
     try:
         return decode_token(creds.credentials, expected_typ="access")
     except Exception as e:
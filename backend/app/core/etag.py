@@ -0,0 +1,56 @@
+# app/core/etag.py
+"""
+GET condicional (ETag / If-None-Match) para os endpoints de leitura.
+
+O ETag sai de uma "versão" barata dos dados (ponteiro da snapshot, max(id)
+das runs, ...) lida antes da query pesada; se o cliente já tem essa versão
+responde-se 304 sem tocar no ORM nem na serialização Pydantic.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# muda a cada deploy/alteração dos DTOs: respostas antigas deixam de validar
+ETAG_SALT = "v1"
+
+_CACHE_CONTROL = "private, no-cache"  # o browser guarda, mas revalida sempre
+
+
+def make_etag(*parts) -> str:
+    h = hashlib.blake2b(repr((ETAG_SALT,) + parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{h}"'
+
+
+def time_bucket(seconds: Optional[int] = None) -> int:
+    """
+    Para respostas com janelas relativas a "agora" (summaries): o ETag muda
+    pelo menos uma vez por bucket mesmo sem dados novos.
+    """
+    return int(time.time() // max(1, seconds or settings.ETAG_WINDOW_SECONDS))
+
+
+def _matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # comparação fraca: ignora o prefixo W/
+    want = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == want for t in header.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Põe ETag/Cache-Control na resposta; devolve um 304 pronto se o
+    If-None-Match do pedido já corresponder (o endpoint devolve-o tal e qual).
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
+    inm = request.headers.get("if-none-match")
+    if inm and _matches(inm, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL})
+    return None
@@ -24,6 +24,22 @@ def set_request_id(rid: Optional[str]) -> None:
     _request_id_ctx.set(rid)
 
 
+# -------- segredos na query string ----------
+_SECRET_QS_RE = re.compile(r"(?<=[?&])(access_token|ticket)=[^&\s\"]*")
+
+
+class RedactQueryFilter(logging.Filter):
+    """
+    Tapa access_token/ticket nas query strings dos access logs do uvicorn
+    (o path vem nos args: client, método, path+query, versão, status).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple):
+            record.args = tuple(_SECRET_QS_RE.sub(r"\1=***", a) if isinstance(a, str) else a for a in record.args)
+        return True
+
+
 # -------- helpers ----------
 _DATE_SUFFIX = "%Y-%m-%d"
 _LOG_RE = re.compile(r"^(?P<base>.+)\.log\.(?P<date>\d{4}-\d{2}-\d{2})$")
@@ -95,6 +111,11 @@ def setup_logging() -> None:
     logging.getLogger("httpx").setLevel(os.getenv("HTTPX_LOG_LEVEL", "INFO").upper())
     logging.getLogger("apscheduler").setLevel(os.getenv("APSCHED_LOG_LEVEL", "INFO").upper())
 
+    # access log do uvicorn: sem credenciais da query string (ticket do /stream)
+    access = logging.getLogger("uvicorn.access")
+    if not any(isinstance(f, RedactQueryFilter) for f in access.filters):
+        access.addFilter(RedactQueryFilter())
+
     # Purga por idade (garante “últimos 30 dias” mesmo que falte alguma rotação)
     removed = _purge_old_logs(log_dir, base_name, days=retention_days)
     if removed:
@@ -4,13 +4,20 @@ from collections import defaultdict
 from .types import EmployeeSeries, EmployeePoint, EmployeePerformance
 
 
-def rows_to_series(role: str, rows: list[dict]) -> list[EmployeeSeries]:
-    by_emp = defaultdict(list)
-    names = {}
-    for r in rows:
+class SeriesBuilder:
+    """
+    rows_to_series incremental: add() por linha (ex.: à medida que chegam
+    do upstream), result() no fim. Guarda só os EmployeePoint, não as linhas.
+    """
+
+    def __init__(self) -> None:
+        self._by_emp: dict[int, list[EmployeePoint]] = defaultdict(list)
+        self._names: dict[int, str] = {}
+
+    def add(self, r: dict) -> None:
         emp_id = int(r.get("employee_id") or 0)
-        names[emp_id] = (r.get("employee_name") or f"#{emp_id}").strip()
-        by_emp[emp_id].append(
+        self._names[emp_id] = (r.get("employee_name") or f"#{emp_id}").strip()
+        self._by_emp[emp_id].append(
             EmployeePoint(
                 bucket=str(r.get("bucket") or ""),
                 n_orders=int(r.get("n_orders") or 0),
@@ -18,20 +25,29 @@ def rows_to_series(role: str, rows: list[dict]) -> list[EmployeeSeries]:
                 avg_h=(float(r["avg_h"]) if r.get("avg_h") is not None else None),
             )
         )
-    out = []
-    for emp_id, pts in by_emp.items():
-        pts.sort(key=lambda p: p.bucket)  # bucket já vem ordenado, mas garantimos
-        out.append(
-            EmployeeSeries(
-                role=role,
-                employee_id=emp_id,
-                employee_name=names.get(emp_id, f"#{emp_id}"),
-                points=pts,
+
+    def result(self, role: str) -> list[EmployeeSeries]:
+        out = []
+        for emp_id, pts in self._by_emp.items():
+            pts.sort(key=lambda p: p.bucket)  # bucket já vem ordenado, mas garantimos
+            out.append(
+                EmployeeSeries(
+                    role=role,
+                    employee_id=emp_id,
+                    employee_name=self._names.get(emp_id, f"#{emp_id}"),
+                    points=pts,
+                )
             )
-        )
-    # ordena por nome para UX estável
-    out.sort(key=lambda s: (s.employee_name.lower(), s.employee_id))
-    return out
+        # ordena por nome para UX estável
+        out.sort(key=lambda s: (s.employee_name.lower(), s.employee_id))
+        return out
+
+
+def rows_to_series(role: str, rows: list[dict]) -> list[EmployeeSeries]:
+    builder = SeriesBuilder()
+    for r in rows:
+        builder.add(r)
+    return builder.result(role)
 
 
 def raw_to_performance(role: str, row: dict) -> EmployeePerformance:
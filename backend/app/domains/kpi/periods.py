@@ -0,0 +1,92 @@
+# app/domains/kpi/periods.py
+# Buckets dos KPI (day|week|month|year) e fronteira entre períodos fechados e o aberto.
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+
+def open_bucket_start(gran: str, today: date) -> date:
+    """Início do bucket que contém `today` (semanas começam à segunda, como YEARWEEK modo ISO)."""
+    if gran == "day":
+        return today
+    if gran == "week":
+        return today - timedelta(days=today.weekday())
+    if gran == "month":
+        return today.replace(day=1)
+    return today.replace(month=1, day=1)
+
+
+def parse_day(s: Optional[str]) -> Optional[date]:
+    """'YYYY-MM-DD' (ou ISO com hora) -> date; None se não der."""
+    if not s:
+        return None
+    try:
+        return datetime.fromisoformat(s).date()
+    except ValueError:
+        return None
+
+
+def split_closed(since: Optional[str], until: Optional[str], open_start: date) -> Optional[tuple[str, str]]:
+    """
+    Parte [since, until) em fechado [since, open_start) + aberto [open_start, until).
+    None quando não há as duas partes (tudo fechado, tudo aberto ou datas inválidas).
+    """
+    s, u = parse_day(since), parse_day(until)
+    if s is None or u is None or not (s < open_start < u):
+        return None
+    return since, open_start.isoformat()
+
+
+def is_closed(until: Optional[str], open_start: date) -> bool:
+    """[..., until) acaba antes do bucket aberto: a resposta já não muda."""
+    u = parse_day(until)
+    return u is not None and u <= open_start
+
+
+def next_bucket_start(gran: str, d: date) -> date:
+    """Início do bucket seguinte ao que contém d."""
+    start = open_bucket_start(gran, d)
+    if gran == "day":
+        return start + timedelta(days=1)
+    if gran == "week":
+        return start + timedelta(weeks=1)
+    if gran == "month":
+        return date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+
+def ceil_bucket(gran: str, d: date) -> date:
+    """d se já for início de bucket, senão o início do seguinte."""
+    return d if open_bucket_start(gran, d) == d else next_bucket_start(gran, d)
+
+
+def bucket_starts(gran: str, start: date, end: date) -> list[date]:
+    """Inícios dos buckets completos em [start, end) (start alinhado)."""
+    out, d = [], start
+    while d < end:
+        out.append(d)
+        d = next_bucket_start(gran, d)
+    return out
+
+
+def label_bucket_start(label: str, gran: str) -> Optional[date]:
+    """
+    Rótulo devolvido pelo upstream -> início do bucket. Só formatos de data
+    sem ambiguidade ('YYYY-MM-DD', 'YYYY-MM', 'YYYY'); semanas ('YYYYWW',
+    'YYYY-Www') dependem do modo do YEARWEEK do MySQL e dão None.
+    """
+    s = (label or "").strip()
+    try:
+        if len(s) >= 10 and s[4] == "-" and s[7] == "-":
+            d = date.fromisoformat(s[:10])
+        elif len(s) == 7 and s[4] == "-":
+            d = date(int(s[:4]), int(s[5:]), 1)
+        elif len(s) == 4 and s.isdigit():
+            d = date(int(s), 1, 1)
+        else:
+            return None
+    except ValueError:
+        return None
+    return open_bucket_start(gran, d)
@@ -2,20 +2,52 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import re
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, Iterable, List
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from .types import StoreBucket, StoreEmployeePerformance, StoreDocTypeDaily
 
+try:  # NumPy é opcional: sem ele a agregação fica toda em Python
+    import numpy as np
+    _HAS_NUMPY = True
+except ImportError:  # pragma: no cover
+    _HAS_NUMPY = False
+
+
+# 'YYYY-MM-DD', 'YYYY-MM-DD HH:MM:SS' ou 'YYYY-MM-DDTHH:MM:SS' com hora válida
+_DT_RE = re.compile(r"(\d{4}-\d{1,2}-\d{1,2})(?:[ T](?:[01]?\d|2[0-3]):[0-5]?\d:(?:[0-5]?\d|6[01]))?")
+
+
+@lru_cache(maxsize=4096)
+def _iso_day(ymd: str) -> str:
+    """'2025-11-21' -> '2025-11-21' ('' se a data não existir). Memo por dia distinto."""
+    try:
+        return datetime.strptime(ymd, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        return ""
+
 
 def _parse_date(d: str) -> str:
     """
     Recebe '2025-11-21 00:00:00' ou ISO e devolve 'YYYY-MM-DD'.
+
+    Os timestamps são quase todos distintos, por isso o strptime fica
+    memoizado pela parte da data (_iso_day); o que não tiver a forma
+    esperada segue pelo caminho antigo, com o mesmo resultado.
     """
     d = (d or "").strip()
     if not d:
         return ""
+    m = _DT_RE.fullmatch(d)
+    if m is not None:
+        day = _iso_day(m[1])
+        if day:
+            return day
     for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"):
         try:
             return datetime.strptime(d, fmt).date().isoformat()
@@ -26,106 +58,262 @@ def _parse_date(d: str) -> str:
 
 
 def _to_float(v: Any) -> float:
+    if type(v) is float or type(v) is int:
+        return float(v)
     try:
         return float(str(v).replace(",", "."))
     except Exception:
         return 0.0
 
 
-def to_timeseries_daily(rows: Iterable[Dict[str, Any]]) -> List[StoreBucket]:
-    by_date: Dict[str, Dict[str, float]] = defaultdict(lambda: {"n": 0, "total": 0.0})
+# Acima disto a agregação vai pelo caminho NumPy (se o pacote existir)
+NUMPY_MIN_ROWS = 50_000
 
+StoreAggregates = Tuple[int, List[StoreBucket], List[StoreEmployeePerformance], List[StoreDocTypeDaily]]
+
+
+def aggregate_events(rows: Iterable[Dict[str, Any]]) -> StoreAggregates:
+    """
+    Eventos crus -> (count_events, timeseries_daily, employees,
+    doc_type_daily) numa só passagem: cada evento é lido uma vez (data e
+    total incluídos) e alimenta os três group-bys. O resultado é o de
+    chamar to_timeseries_daily, to_employee_performance e
+    to_doc_type_daily em separado.
+    """
+    if not isinstance(rows, list):
+        rows = list(rows)
+    if _HAS_NUMPY and len(rows) >= NUMPY_MIN_ROWS:
+        return _aggregate_numpy(rows)
+
+    by_date: Dict[str, List[float]] = {}
+    by_doc: Dict[tuple, List[float]] = {}
+    by_emp: Dict[int, List[Any]] = {}
     for r in rows:
         if r.get("event_type") != "document_created":
             continue
-        date_key = _parse_date(r.get("document_creation_date") or "")
-        if not date_key:
-            continue
         total = _to_float(r.get("document_total"))
-        agg = by_date[date_key]
-        agg["n"] += 1
-        agg["total"] += total
-
-    out: List[StoreBucket] = []
-    for date_key in sorted(by_date.keys()):
-        agg = by_date[date_key]
-        out.append(
-            StoreBucket(
-                bucket=date_key,
-                n_orders=int(agg["n"]),
-                total_amount=round(agg["total"], 2),
-            )
-        )
-    return out
+        emp_id = int(r.get("employee_id") or 0)
+        if emp_id > 0:
+            e = by_emp.get(emp_id)
+            if e is None:
+                e = by_emp[emp_id] = ["", 0, 0.0]
+            e[0] = (r.get("employee_name") or e[0] or f"#{emp_id}").strip()
+            e[1] += 1
+            e[2] += total
+        day = _parse_date(r.get("document_creation_date") or "")
+        if not day:
+            continue
+        doc_type = (r.get("document_type") or "").strip() or "UNK"
+        for acc, key in ((by_date, day), (by_doc, (day, doc_type))):
+            slot = acc.get(key)
+            if slot is None:
+                slot = acc[key] = [0, 0.0]
+            slot[0] += 1
+            slot[1] += total
+    return len(rows), *_outputs(by_date, by_emp, by_doc)
+
+
+def _aggregate_numpy(rows: List[Dict[str, Any]]) -> StoreAggregates:
+    """
+    Caminho vectorizado para janelas grandes. Do Python só saem as colunas
+    (uma list comprehension por campo); o parse das datas (pelos code
+    points de 'YYYY-MM-DD[ T]HH:MM:SS', com _iso_day por dia distinto), o
+    dos totais e as somas por grupo (np.bincount) ficam no NumPy. Datas com
+    outra forma passam pelo _parse_date, uma a uma. O bincount soma pela
+    ordem dos eventos, por isso os floats são os do caminho em Python.
+    """
+    created = [r for r in rows if r.get("event_type") == "document_created"]
+    if not created:
+        return len(rows), [], [], []
+    m = len(created)
+
+    raw_totals = [r.get("document_total") for r in created]
+    try:
+        totals = np.char.replace(np.asarray(raw_totals, dtype=str), ",", ".").astype(np.float64)
+    except ValueError:  # valores que não são números: o _to_float põe a 0
+        totals = np.fromiter((_to_float(v) for v in raw_totals), dtype=np.float64, count=m)
+
+    # dia: código por evento em `days` (-1 = sem data)
+    raw_dates = np.asarray([r.get("document_creation_date") or "" for r in created], dtype=str)
+    lens = np.char.str_len(raw_dates)
+    cp = raw_dates.astype("U19").view(np.uint32).reshape(m, 19).astype(np.int64) - 48  # '0' -> 0
+    digit = (cp >= 0) & (cp <= 9)
+    ok = ((lens == 10) | (lens == 19)) & digit[:, [0, 1, 2, 3, 5, 6, 8, 9]].all(axis=1)
+    ok &= (cp[:, 4] == -3) & (cp[:, 7] == -3)  # '-'
+    hh, mi, ss = (cp[:, i] * 10 + cp[:, i + 1] for i in (11, 14, 17))
+    ok &= (lens == 10) | (
+        ((cp[:, 10] == -16) | (cp[:, 10] == 36))  # ' ' ou 'T'
+        & (cp[:, 13] == 10) & (cp[:, 16] == 10)  # ':'
+        & digit[:, [11, 12, 14, 15, 17, 18]].all(axis=1)
+        & (hh < 24) & (mi < 60) & (ss < 62)
+    )
+    ymd = cp[:, 0] * 10_000_000 + cp[:, 1] * 1_000_000 + cp[:, 2] * 100_000 + cp[:, 3] * 10_000
+    ymd += (cp[:, 5] * 10 + cp[:, 6]) * 100 + cp[:, 8] * 10 + cp[:, 9]
+    ymd[~ok] = -1
+    distinct, inverse = np.unique(ymd, return_inverse=True)
+    day_names: List[str] = []
+    day_code: Dict[str, int] = {}
+    for v in distinct.tolist():
+        day = _iso_day(f"{v // 10000:04d}-{v // 100 % 100:02d}-{v % 100:02d}") if v >= 0 else ""
+        day_names.append(day)
+        if day:
+            day_code.setdefault(day, len(day_code))
+    days = np.asarray([day_code.get(d, -1) for d in day_names], dtype=np.int64)[inverse.ravel()]
+    for i in np.flatnonzero(days < 0).tolist():
+        day = _parse_date(str(raw_dates[i]))  # forma fora do padrão ou data inexistente
+        days[i] = day_code.setdefault(day, len(day_code)) if day else -1
+    day_list = list(day_code)
+
+    # tipo e funcionário: normaliza-se cada valor distinto uma vez
+    raw_docs = [r.get("document_type") for r in created]
+    doc_code: Dict[str, int] = {}
+    doc_of = {v: doc_code.setdefault((v or "").strip() or "UNK", len(doc_code)) for v in set(raw_docs)}
+    docs = np.asarray([doc_of[v] for v in raw_docs], dtype=np.int64)
+    doc_list = list(doc_code)
+    raw_emps = [r.get("employee_id") for r in created]
+    emp_of = {v: int(v or 0) for v in set(raw_emps)}
+    emps = np.asarray([emp_of[v] for v in raw_emps], dtype=np.int64)
+
+    dated = days >= 0
+    w = totals[dated]
+    nd, td = (np.bincount(days[dated], weights=x, minlength=len(day_list)) for x in (None, w))
+    cell = days[dated] * len(doc_list) + docs[dated]
+    nt, tt = (np.bincount(cell, weights=x, minlength=len(day_list) * len(doc_list)) for x in (None, w))
+    by_date = {day_list[i]: [int(nd[i]), float(td[i])] for i in np.flatnonzero(nd).tolist()}
+    by_doc = {(day_list[i // len(doc_list)], doc_list[i % len(doc_list)]): [int(nt[i]), float(tt[i])]
+              for i in np.flatnonzero(nt).tolist()}
+
+    # funcionários: o nome fica o do último evento com nome
+    by_emp: Dict[int, List[Any]] = {}
+    has_emp = emps > 0
+    if has_emp.any():
+        ids, emp_idx = np.unique(emps[has_emp], return_inverse=True)
+        emp_idx = emp_idx.ravel()
+        ne = np.bincount(emp_idx, minlength=len(ids))
+        te = np.bincount(emp_idx, weights=totals[has_emp], minlength=len(ids))
+        pos = np.flatnonzero(has_emp)
+        named = np.asarray([bool(created[i].get("employee_name")) for i in pos.tolist()], dtype=bool)
+        last = np.full(len(ids), -1, dtype=np.int64)
+        np.maximum.at(last, emp_idx[named], pos[named])
+        for k, emp_id in enumerate(ids.tolist()):
+            name = created[last[k]]["employee_name"].strip() if last[k] >= 0 else ""
+            by_emp[emp_id] = [name or f"#{emp_id}", int(ne[k]), float(te[k])]
+    return len(rows), *_outputs(by_date, by_emp, by_doc)
+
+
+def _outputs(
+    by_date: Dict[str, List[float]],
+    by_emp: Dict[int, List[Any]],
+    by_doc: Dict[tuple, List[float]],
+) -> Tuple[List[StoreBucket], List[StoreEmployeePerformance], List[StoreDocTypeDaily]]:
+    """Acumuladores [n, total] (e [nome, n, total] por funcionário) -> tipos de domínio."""
+    ts = [StoreBucket(bucket=d, n_orders=int(n), total_amount=round(t, 2)) for d, (n, t) in sorted(by_date.items())]
+    docs = [
+        StoreDocTypeDaily(date=d, document_type=dt, n_orders=int(n), total_amount=round(t, 2),
+                          avg_ticket=round(t / n if n > 0 else 0.0, 2))
+        for (d, dt), (n, t) in sorted(by_doc.items())
+    ]
+    emps = [
+        StoreEmployeePerformance(employee_id=i, employee_name=name or f"#{i}", n_orders=int(n),
+                                 total_amount=round(t, 2), avg_ticket=round(t / n if n > 0 else 0.0, 2))
+        for i, (name, n, t) in by_emp.items()
+    ]
+    # ordena por total desc
+    emps.sort(key=lambda e: (-e.total_amount, e.employee_name.lower(), e.employee_id))
+    return ts, emps, docs
+
+
+def to_timeseries_daily(rows: Iterable[Dict[str, Any]]) -> List[StoreBucket]:
+    return aggregate_events(rows)[1]
 
 
 def to_employee_performance(
     rows: Iterable[Dict[str, Any]],
 ) -> List[StoreEmployeePerformance]:
-    by_emp: Dict[int, Dict[str, Any]] = defaultdict(
-        lambda: {"name": "", "n": 0, "total": 0.0}
+    return aggregate_events(rows)[2]
+
+
+def to_doc_type_daily(rows: Iterable[Dict[str, Any]]) -> List[StoreDocTypeDaily]:
+    return aggregate_events(rows)[3]
+
+
+# ---------------------------------------------------------------------------
+# Event store (store_audit_events / store_audit_daily)
+# ---------------------------------------------------------------------------
+# chave do agregado diário: (dia, event_type, employee_id, document_type)
+DailyKey = Tuple[str, str, int, str]
+
+_ID_FIELDS = ("id", "id_audit", "id_front_invoice_audit")
+
+
+def parse_creation_dt(d: str) -> Optional[datetime]:
+    """'2025-11-21 10:31:00' ou ISO -> datetime (naive, hora local da loja)."""
+    d = (d or "").strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(d, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def event_key(r: Dict[str, Any]) -> str:
+    """
+    Identidade de um evento para deduplicar (a sync volta a pedir uma margem
+    para trás): o id do audit se vier, senão o hash do evento inteiro.
+    """
+    for f in _ID_FIELDS:
+        if r.get(f) not in (None, ""):
+            return f"{f}:{r[f]}"
+    raw = json.dumps(r, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return "sha1:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def daily_key(r: Dict[str, Any]) -> DailyKey:
+    return (
+        _parse_date(r.get("document_creation_date") or ""),
+        str(r.get("event_type") or ""),
+        int(r.get("employee_id") or 0),
+        (r.get("document_type") or "").strip() or "UNK",
     )
 
+
+def fold_daily(rows: Iterable[Dict[str, Any]]) -> Dict[DailyKey, Dict[str, Any]]:
+    """Eventos -> {DailyKey: {"name", "n", "total"}} (o nome fica o do último evento)."""
+    out: Dict[DailyKey, Dict[str, Any]] = {}
     for r in rows:
-        if r.get("event_type") != "document_created":
-            continue
-        emp_id = int(r.get("employee_id") or 0)
-        if emp_id <= 0:
-            continue
-        total = _to_float(r.get("document_total"))
-        slot = by_emp[emp_id]
-        slot["name"] = (r.get("employee_name") or slot["name"] or f"#{emp_id}").strip()
+        slot = out.setdefault(daily_key(r), {"name": "", "n": 0, "total": 0.0})
+        slot["name"] = (r.get("employee_name") or slot["name"] or "").strip()
         slot["n"] += 1
-        slot["total"] += total
-
-    out: List[StoreEmployeePerformance] = []
-    for emp_id, slot in by_emp.items():
-        n = int(slot["n"])
-        total = float(slot["total"])
-        avg = total / n if n > 0 else 0.0
-        out.append(
-            StoreEmployeePerformance(
-                employee_id=emp_id,
-                employee_name=slot["name"] or f"#{emp_id}",
-                n_orders=n,
-                total_amount=round(total, 2),
-                avg_ticket=round(avg, 2),
-            )
-        )
-
-    # ordena por total desc
-    out.sort(key=lambda e: (-e.total_amount, e.employee_name.lower(), e.employee_id))
+        slot["total"] += _to_float(r.get("document_total"))
     return out
 
 
-def to_doc_type_daily(rows: Iterable[Dict[str, Any]]) -> List[StoreDocTypeDaily]:
-    key_agg: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"n": 0, "total": 0.0})
+def from_daily(agg: Dict[DailyKey, Dict[str, Any]]) -> StoreAggregates:
+    """
+    Agregados diários -> (count_events, timeseries_daily, employees,
+    doc_type_daily), com as mesmas regras que as funções to_* aplicam à
+    lista crua de eventos.
+    """
+    count = 0
+    by_date: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+    by_doc: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0])
+    by_emp: Dict[int, List[Any]] = {}
 
-    for r in rows:
-        if r.get("event_type") != "document_created":
+    for (day, event_type, emp_id, doc_type), slot in sorted(agg.items()):
+        count += slot["n"]
+        if event_type != "document_created":
             continue
-        date_key = _parse_date(r.get("document_creation_date") or "")
-        if not date_key:
+        # como em aggregate_events: eventos sem data contam para o funcionário, não para as séries
+        if emp_id > 0:
+            e = by_emp.setdefault(emp_id, ["", 0, 0.0])
+            e[0] = slot["name"] or e[0]  # por dia crescente: fica o mais recente
+            e[1] += slot["n"]
+            e[2] += slot["total"]
+        if not day:
             continue
-        doc_type = (r.get("document_type") or "").strip() or "UNK"
-        total = _to_float(r.get("document_total"))
-        key = (date_key, doc_type)
-        agg = key_agg[key]
-        agg["n"] += 1
-        agg["total"] += total
-
-    out: List[StoreDocTypeDaily] = []
-    for (date_key, doc_type), agg in sorted(key_agg.items()):
-        n = int(agg["n"])
-        total = float(agg["total"])
-        avg = total / n if n > 0 else 0.0
-        out.append(
-            StoreDocTypeDaily(
-                date=date_key,
-                document_type=doc_type,
-                n_orders=n,
-                total_amount=round(total, 2),
-                avg_ticket=round(avg, 2),
-            )
-        )
-    return out
+        for acc in (by_date[day], by_doc[(day, doc_type)]):
+            acc[0] += slot["n"]
+            acc[1] += slot["total"]
+
+    return count, *_outputs(by_date, by_emp, by_doc)
@@ -0,0 +1,43 @@
+# app/domains/maintenance/rules.py
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+from .types import RetentionPolicy
+
+# Os agregados guardam o que os summaries pedem a cada tabela:
+#  - encomendas/carrinhos: entidades distintas por dia (daily_series_since)
+#  - EOL: linhas por dia e status (daily_counts_since)
+#  - pagespeed/patife/runs: contagem + sum/min/max da latência por balde;
+#    patife/runs guardam também o sketch dos percentis (summaries com janela longa)
+# delta_kind = KIND_* de app/repos/shared/delta.py
+POLICIES: tuple[RetentionPolicy, ...] = (
+    RetentionPolicy("page_speeds", ts="observed_at", bucket="hour",
+                    key="page_type", value="ttfb_ms", keep_latest_by="url"),
+    RetentionPolicy("payment_method_status", ts="observed_at", bucket="day",
+                    key="method", value="hours_since_last", keep_latest_by="method"),
+    RetentionPolicy("delayed_orders", ts="observed_at", bucket="day",
+                    distinct="id_order", delta_kind="orders_delayed"),
+    RetentionPolicy("abandoned_carts", ts="observed_at", bucket="day",
+                    distinct="id_cart", delta_kind="carts_stale"),
+    # o ingest EOL é semanal: sem keep_latest_by uma retenção curta apagava a última snapshot (/eol vazio)
+    RetentionPolicy("eol_products", ts="observed_at", bucket="day",
+                    key="status", delta_kind="eol_products", keep_latest_by="product_id"),
+    RetentionPolicy("patife_healthz", ts="time", bucket="hour",
+                    key="status", value="duration_ms", sketch=("duration_ms", "db_latency_ms")),
+    # created_at = CURRENT_TIMESTAMP (UTC): baldes em dias UTC
+    RetentionPolicy("check_runs", ts="created_at", bucket="day",
+                    key="check_name || ':' || status", value="duration_ms", sketch=("duration_ms",), utc=True),
+)
+
+
+def raw_cutoff(now: datetime, days: int) -> datetime:
+    """Início do dia (naive como no SQLite, no fuso de `now`) de now - days; alinhado a hora e a dia."""
+    d = now - timedelta(days=days)
+    return datetime(d.year, d.month, d.day)
+
+
+def next_bucket(start: str, bucket: str) -> datetime:
+    """Início do balde seguinte a `start` (formato de snapshot_rollups.bucket_start)."""
+    if bucket == "day":
+        return datetime.strptime(start[:10], "%Y-%m-%d") + timedelta(days=1)
+    return datetime.strptime(start[:13], "%Y-%m-%d %H") + timedelta(hours=1)
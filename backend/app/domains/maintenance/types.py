@@ -0,0 +1,25 @@
+# app/domains/maintenance/types.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+Bucket = Literal["hour", "day"]
+
+
+@dataclass(frozen=True, slots=True)
+class RetentionPolicy:
+    """
+    Como compactar uma tabela de snapshots: linhas com `ts` anterior ao corte
+    são agregadas por balde (`bucket`) e `key`, e depois apagadas.
+    Colunas/expressões são SQL fixo definido em rules.py (nunca input do utilizador).
+    """
+    source: str                            # nome da tabela (= source em snapshot_rollups)
+    ts: str                                # coluna temporal
+    bucket: Bucket
+    key: Optional[str] = None              # expressão da dimensão (status, método...)
+    distinct: Optional[str] = None         # coluna da entidade para n_distinct
+    value: Optional[str] = None            # métrica para sum/min/max
+    keep_latest_by: Optional[str] = None   # nunca apaga a linha mais recente de cada valor desta coluna
+    delta_kind: Optional[str] = None       # kind em snapshot_intervals quando PS_SNAPSHOT_STORAGE=delta
+    sketch: tuple[str, ...] = ()           # colunas com QuantileSketch em extra["sketch"][col]
+    utc: bool = False                      # `ts` em UTC (CURRENT_TIMESTAMP) e não em hora local: corte e baldes em UTC
@@ -1,5 +1,4 @@
-import json, re
-from bs4 import BeautifulSoup
+from app.domains.prestashop.pagespeed.sanity import extract_sanity_signals
 from app.domains.prestashop.pagespeed.types import PageSpeed, PageType
 from app.domains.prestashop.pagespeed.rules import classify_pagespeed
 from app.shared.status import Status
@@ -8,42 +7,13 @@ from app.core.config import settings
 def _sanity_from_html(html: str, page_type: PageType, *,
                       jsonld_critical: bool = True,
                       ignore_warn_keys: set[str] = frozenset()) -> tuple[dict, int, int]:
-    soup = BeautifulSoup(html, "html.parser")
-    title = (soup.title.string or "").strip() if soup.title else ""
-    md = soup.find("meta", attrs={"name": re.compile("^description$", re.I)})
-    meta_desc = (md.get("content") or "").strip() if md else ""
-
-    h1_ok = soup.find("h1") is not None
-    canonical_ok = soup.find("link", rel=re.compile("^canonical$", re.I)) is not None
-
-    blocking = 0
-    head = soup.find("head")
-    if head:
-        for s in head.find_all("script", src=True):
-            if not s.has_attr("defer") and not s.has_attr("async"):
-                blocking += 1
-
-    jsonld_ok = None
-    if page_type == "product":
-        jsonld_ok = False
-        for tag in soup.find_all("script", type="application/ld+json"):
-            try:
-                data = json.loads(tag.string or "{}")
-            except Exception:
-                continue
-            candidates = data if isinstance(data, list) else [data]
-            for obj in candidates:
-                t = obj.get("@type") or obj.get("@graph", [{}])[0].get("@type")
-                if (t == "Product") or (isinstance(t, list) and "Product" in t):
-                    sku = obj.get("sku")
-                    gtin = obj.get("gtin") or obj.get("gtin13") or obj.get("gtin8") or obj.get("gtin14")
-                    offers = obj.get("offers") or {}
-                    price = (offers.get("price") if isinstance(offers, dict) else None)
-                    if sku and (gtin or price):
-                        jsonld_ok = True
-                        break
-            if jsonld_ok:
-                break
+    sig = extract_sanity_signals(html, want_jsonld=(page_type == "product"))
+    title = sig.title
+    meta_desc = sig.meta_desc
+    h1_ok = sig.h1_ok
+    canonical_ok = sig.canonical_ok
+    blocking = sig.blocking_scripts_in_head
+    jsonld_ok = sig.jsonld_product_ok
 
     sanity = {
         "title_ok": 30 <= len(title) <= 65, "title_len": len(title),
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+# Baldes de pagespeed_rollups, do mais fino para o mais grosso.
+LEVELS: tuple[str, ...] = ("minute", "hour", "day")
+LEVEL_SPAN = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+_FMT = {"minute": "%Y-%m-%d %H:%M:00", "hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d"}
+
+
+def _floor(dt: datetime, level: str) -> datetime:
+    dt = dt.replace(second=0, microsecond=0, tzinfo=None)
+    if level in ("hour", "day"):
+        dt = dt.replace(minute=0)
+    if level == "day":
+        dt = dt.replace(hour=0)
+    return dt
+
+
+def bucket_start(dt: datetime, level: str) -> str:
+    """Início do balde em hora local (wall clock, como o observed_at na SQLite)."""
+    return dt.strftime(_FMT[level])
+
+
+def parse_bucket_start(s: str) -> datetime:
+    return datetime.strptime(s, "%Y-%m-%d") if len(s) == 10 else datetime.strptime(s, "%Y-%m-%d %H:%M:%S")
+
+
+def pick_level(span: timedelta, keep_days: dict[str, int]) -> str:
+    """
+    Balde mais fino cujo histórico ainda cobre a janela (keep_days: dias
+    guardados por nível, 0 = sempre). O início da janela é arredondado
+    para baixo ao balde, por isso o erro no limite é no máximo 1 balde.
+    """
+    for level in LEVELS:
+        days = int(keep_days.get(level, 0) or 0)
+        if days <= 0 or span <= timedelta(days=days):
+            return level
+    return LEVELS[-1]
+
+
+def cover(since: datetime, until: datetime, keep_days: dict[str, int]) -> list[tuple[str, str, str]]:
+    """
+    Intervalos (level, início incl., fim excl.) de baldes que cobrem
+    [since, until] com o menor nº de baldes: dias inteiros ao meio, horas e
+    minutos só nas pontas. A ponta antiga usa o balde mais fino ainda guardado
+    (pick_level), arredondado para baixo; a ponta recente inclui o minuto atual.
+    """
+    cur = _floor(since, pick_level(until - since, keep_days))
+    end = until.replace(tzinfo=None)
+    out: list[tuple[str, datetime, datetime]] = []
+    while cur <= end:
+        for level in reversed(LEVELS):
+            step = LEVEL_SPAN[level]
+            if level == "minute" or (_floor(cur, level) == cur and cur + step <= end):
+                break
+        if out and out[-1][0] == level and out[-1][2] == cur:
+            out[-1] = (level, out[-1][1], cur + step)
+        else:
+            out.append((level, cur, cur + step))
+        cur += step
+    return [(lv, bucket_start(a, lv), bucket_start(b, lv)) for lv, a, b in out]
@@ -0,0 +1,291 @@
+# app/domains/prestashop/pagespeed/sanity.py
+"""
+Extrator de sinais de SEO/sanity numa só passagem sobre eventos do HTMLParser.
+
+Substitui o BeautifulSoup(html, "html.parser") + find/find_all em
+_sanity_from_html: não constrói árvore, só a pilha de tags, e pára assim que
+todos os sinais ficam decididos. A semântica reproduz a do bs4 com o mesmo
+parser (mesma pilha de tags, void elements, entidades e .string), para que o
+dict `sanity` seja idêntico.
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Optional
+
+_META_DESC_RE = re.compile("^description$", re.I)
+_CANONICAL_RE = re.compile("^canonical$", re.I)
+_NONWS_RE = re.compile(r"\S+")
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# elementos que o bs4 fecha logo na abertura (HTMLTreeBuilder.empty_element_tags)
+_VOID = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+})
+_PRESERVE_WS = frozenset({"pre", "textarea"})
+
+
+def _build_entities() -> dict[str, str]:
+    # igual a EntitySubstitution.HTML_ENTITY_TO_CHARACTER (nome sem ';', primeiro ganha)
+    out: dict[str, str] = {}
+    for name, char in sorted(html5.items()):
+        out.setdefault(name[:-1] if name.endswith(";") else name, char)
+    return out
+
+
+_ENTITIES = _build_entities()
+
+
+def jsonld_has_product(raw: Optional[str]) -> bool:
+    """True se o bloco JSON-LD descreve um Product com sku e (gtin ou preço)."""
+    try:
+        data = json.loads(raw or "{}")
+    except Exception:
+        return False
+    candidates = data if isinstance(data, list) else [data]
+    for obj in candidates:
+        t = obj.get("@type") or obj.get("@graph", [{}])[0].get("@type")
+        if (t == "Product") or (isinstance(t, list) and "Product" in t):
+            sku = obj.get("sku")
+            gtin = obj.get("gtin") or obj.get("gtin13") or obj.get("gtin8") or obj.get("gtin14")
+            offers = obj.get("offers") or {}
+            price = (offers.get("price") if isinstance(offers, dict) else None)
+            if sku and (gtin or price):
+                return True
+    return False
+
+
+@dataclass(slots=True)
+class SanitySignals:
+    title: str
+    meta_desc: str
+    h1_ok: bool
+    canonical_ok: bool
+    blocking_scripts_in_head: int
+    jsonld_product_ok: Optional[bool]
+
+
+class _Stop(Exception):
+    pass
+
+
+class _El:
+    __slots__ = ("name", "children", "jsonld")
+
+    def __init__(self, name: str, track: bool, jsonld: bool = False) -> None:
+        self.name = name
+        self.jsonld = jsonld
+        # só guardamos filhos dentro do <title> e dos scripts JSON-LD (.string)
+        self.children: Optional[list] = [] if track else None
+
+
+def _string_of(el: _El) -> Optional[str]:
+    # Tag.string do bs4: um único filho; se for texto devolve-o, se for tag desce
+    if not el.children or len(el.children) != 1:
+        return None
+    child = el.children[0]
+    return child if isinstance(child, str) else _string_of(child)
+
+
+class _SanityParser(HTMLParser):
+    def __init__(self, *, want_jsonld: bool) -> None:
+        super().__init__(convert_charrefs=False)
+        self.want_jsonld = want_jsonld
+
+        self._stack: list[_El] = [_El("[document]", False)]
+        self._open: dict[str, int] = {}
+        self._already_closed: list[str] = []
+        self._data: list[str] = []
+        self._preserve = 0
+        self._tracking = 0
+
+        self._title_el: Optional[_El] = None
+        self.title: Optional[str] = None
+        self.title_done = False
+        self.meta_desc: Optional[str] = None
+        self.h1 = False
+        self.canonical = False
+        self._head_el: Optional[_El] = None
+        self.head_done = False
+        self.blocking = 0
+        self.jsonld_ok = False
+
+    # ---- estado ----
+    def _settled(self) -> bool:
+        return (
+            self.title_done and self.head_done and self.h1 and self.canonical
+            and self.meta_desc is not None
+            and (self.jsonld_ok or not self.want_jsonld)
+        )
+
+    def _end_data(self) -> None:
+        if not self._data:
+            return
+        text = "".join(self._data)
+        self._data = []
+        if not self._preserve and all(c in _ASCII_SPACES for c in text):
+            text = "\n" if "\n" in text else " "
+        cur = self._stack[-1]
+        if cur.children is not None:
+            cur.children.append(text)
+
+    def _push(self, el: _El) -> None:
+        parent = self._stack[-1]
+        if parent.children is not None:
+            parent.children.append(el)
+        self._stack.append(el)
+        self._open[el.name] = self._open.get(el.name, 0) + 1
+        if el.name in _PRESERVE_WS:
+            self._preserve += 1
+        if el.children is not None:
+            self._tracking += 1
+
+    def _pop(self) -> None:
+        el = self._stack.pop()
+        self._open[el.name] -= 1
+        if el.name in _PRESERVE_WS:
+            self._preserve -= 1
+        if el.children is not None:
+            self._tracking -= 1
+            if el is self._title_el:
+                self.title = _string_of(el)
+                self.title_done = True
+            elif el.jsonld and not self.jsonld_ok:
+                self.jsonld_ok = jsonld_has_product(_string_of(el))
+        if el is self._head_el:
+            self.head_done = True
+
+    def _pop_to(self, name: str) -> None:
+        if not self._open.get(name):
+            return
+        while len(self._stack) > 1:
+            top = self._stack[-1].name
+            self._pop()
+            if top == name:
+                break
+
+    # ---- eventos do HTMLParser (mesma semântica do BeautifulSoupHTMLParser) ----
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag)
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self._end_data()
+        a: dict[str, str] = {}
+        for k, v in attrs:
+            a[k] = "" if v is None else v
+
+        jsonld = tag == "script" and self.want_jsonld and a.get("type") == "application/ld+json"
+        track = jsonld or self._tracking > 0 or (tag == "title" and self._title_el is None)
+        el = _El(tag, track, jsonld)
+        if tag == "title" and self._title_el is None:
+            self._title_el = el
+        elif tag == "head" and self._head_el is None:
+            self._head_el = el
+        elif tag == "meta" and self.meta_desc is None:
+            name = a.get("name")
+            if name is not None and _META_DESC_RE.search(name):
+                self.meta_desc = (a.get("content") or "").strip()
+        elif tag == "h1":
+            self.h1 = True
+        elif tag == "link" and not self.canonical and "rel" in a:
+            tokens = _NONWS_RE.findall(a["rel"])
+            self.canonical = any(_CANONICAL_RE.search(t) for t in tokens) or (
+                len(tokens) != 1 and _CANONICAL_RE.search(" ".join(tokens)) is not None
+            )
+        elif tag == "script" and self._head_el is not None and not self.head_done:
+            if "src" in a and "defer" not in a and "async" not in a:
+                self.blocking += 1
+
+        self._push(el)
+        if tag in _VOID and handle_empty_element:
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed.append(tag)
+        if self._settled():
+            raise _Stop
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+        self._end_data()
+        self._pop_to(tag)
+        if self._settled():
+            raise _Stop
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        if name.startswith("x"):
+            n = int(name.lstrip("x"), 16)
+        elif name.startswith("X"):
+            n = int(name.lstrip("X"), 16)
+        else:
+            n = int(name)
+        data = None
+        if n < 256:
+            try:
+                data = bytes([n]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(n)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        char = _ENTITIES.get(name)
+        self.handle_data(char if char is not None else "&%s" % name)
+
+    def _string_node(self, text: str) -> None:
+        self._end_data()
+        self._data.append(text)
+        self._end_data()
+
+    def handle_comment(self, data):
+        self._string_node(data)
+
+    def handle_decl(self, decl):
+        self._string_node(decl[len("DOCTYPE "):])
+
+    def unknown_decl(self, data):
+        self._string_node(data[len("CDATA["):] if data.upper().startswith("CDATA[") else data)
+
+    def handle_pi(self, data):
+        self._string_node(data)
+
+    def finish(self) -> None:
+        self.close()
+        self._end_data()
+        while len(self._stack) > 1:
+            self._pop()
+
+
+def extract_sanity_signals(html: str, *, want_jsonld: bool) -> SanitySignals:
+    """
+    Uma passagem sobre o HTML; pára cedo quando título, meta description, h1,
+    canonical, scripts do <head> (e JSON-LD, se pedido) já estão decididos.
+    """
+    p = _SanityParser(want_jsonld=want_jsonld)
+    try:
+        p.feed(html)
+        p.finish()
+    except _Stop:
+        pass
+    return SanitySignals(
+        title=(p.title or "").strip(),
+        meta_desc=p.meta_desc or "",
+        h1_ok=p.h1,
+        canonical_ok=p.canonical,
+        blocking_scripts_in_head=p.blocking,
+        jsonld_product_ok=p.jsonld_ok if want_jsonld else None,
+    )
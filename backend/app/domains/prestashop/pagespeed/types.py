@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from typing import Literal
 from app.shared.status import Status
 
-PageType = Literal["home", "product"]
+# grupo de URLs: "home", "product" ou qualquer grupo de PS_PAGESPEED_URLS
+PageType = str
 
 @dataclass(slots=True)
 class PageSpeed:
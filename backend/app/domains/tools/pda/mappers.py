@@ -63,4 +63,17 @@ def raw_row_to_domain(row: dict) -> PdaReport:
         state        = str(row.get("state", "")).strip(),
         date_added   = _parse_dt(row.get("date_add")),
         date_updated = _parse_dt(row.get("date_upd")),
-    )
\ No newline at end of file
+    )
+
+
+def context_to_json(ctx: Optional[dict]) -> Optional[str]:
+    """
+    Serializa o contexto para guardar/mostrar (compacto, UTF-8).
+    Se não for serializável, guarda a representação em texto.
+    """
+    if ctx is None:
+        return None
+    try:
+        return json.dumps(ctx, ensure_ascii=False, separators=(",", ":"))
+    except Exception:
+        return json.dumps({"raw": str(ctx)}, ensure_ascii=False)
@@ -0,0 +1,156 @@
+# app/external/http_pool.py
+# Pool HTTP partilhado pelo processo (API ou worker).
+#
+# Um único httpx.AsyncClient por event loop: as ligações ficam em keep-alive e
+# são reutilizadas entre jobs/pedidos, em vez de um handshake TLS novo por
+# cada cliente construído. HTTP/2 é negociado via ALPN quando o servidor o
+# suporta (requer o pacote 'h2'; sem ele fica em HTTP/1.1).
+#
+# A verificação TLS é por cliente, não do pool: quem fala com um host que
+# pode ter o certificado desligado (PS_VERIFY_SSL / PS_AUTH_VERIFY_SSL) pede
+# get_http_client(verify=...) e recebe um AsyncClient à parte; o resto (n8n,
+# frontInvoiceAudit) fica sempre no cliente verificado.
+
+from __future__ import annotations
+
+import asyncio
+import ssl
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import certifi
+import httpx
+
+from app.core.config import settings
+from app.core.logging import logging
+
+log = logging.getLogger("wd.http_pool")
+
+try:  # HTTP/2 é opcional (pacote 'h2')
+    import h2  # noqa: F401
+    _HAS_H2 = True
+except ImportError:  # pragma: no cover
+    _HAS_H2 = False
+
+# retries para GET idempotentes (equivalente ao antigo urllib3.Retry)
+_RETRY_STATUSES = frozenset({502, 503, 504})
+_RETRY_TOTAL = 4
+_RETRY_BACKOFF_S = 0.4
+
+_clients: dict[bool, httpx.AsyncClient] = {}  # verify -> cliente
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def verify_setting(name: str) -> bool:
+    """Flag de verificação TLS ("true"/"false") das settings; ausente = verificar."""
+    return str(getattr(settings, name, "true")).lower() != "false"
+
+
+def _ssl_context(verify: bool) -> ssl.SSLContext | bool:
+    if not verify:
+        return False
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def _build_client(verify: bool) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_S,
+    )
+    http2 = bool(settings.HTTP_POOL_HTTP2 and _HAS_H2)
+    log.info("http pool: creating client (verify=%s, http2=%s, max_conn=%d, keepalive=%ss)",
+             verify, http2, settings.HTTP_POOL_MAX_CONNECTIONS, settings.HTTP_POOL_KEEPALIVE_S)
+    # retries de ligação (connect) ficam no transporte; 502/503/504 no cliente
+    transport = httpx.AsyncHTTPTransport(
+        http2=http2, limits=limits, verify=_ssl_context(verify), retries=2,
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(settings.PS_TIMEOUT_S, connect=3),
+    )
+
+
+def get_http_client(*, verify: bool = True) -> httpx.AsyncClient:
+    """
+    Devolve o AsyncClient partilhado do event loop corrente, com ou sem
+    verificação TLS (ligações separadas). Se o loop mudou (ex.: scripts com
+    vários asyncio.run) cria clientes novos.
+    """
+    global _client_loop
+    loop = asyncio.get_running_loop()
+    if _client_loop is not loop:
+        _clients.clear()
+        _client_loop = loop
+    client = _clients.get(verify)
+    if client is None or client.is_closed:
+        client = _clients[verify] = _build_client(verify)
+    return client
+
+
+async def get_with_retries(
+    url: str,
+    *,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: httpx.Timeout | float | None = None,
+    http: httpx.AsyncClient | None = None,
+) -> httpx.Response:
+    """GET com retries em 502/503/504 e erros de transporte (backoff exponencial)."""
+    http = http or get_http_client()
+    for attempt in range(_RETRY_TOTAL):
+        last = attempt == _RETRY_TOTAL - 1
+        try:
+            resp = await http.get(url, params=params, headers=headers, timeout=timeout)
+        except httpx.TransportError:
+            if last:
+                raise
+        else:
+            if resp.status_code not in _RETRY_STATUSES or last:
+                return resp
+        await asyncio.sleep(_RETRY_BACKOFF_S * (2 ** attempt))
+    raise RuntimeError("unreachable")
+
+
+@asynccontextmanager
+async def stream_with_retries(
+    url: str,
+    *,
+    params: dict | None = None,
+    headers: dict | None = None,
+    timeout: httpx.Timeout | float | None = None,
+    http: httpx.AsyncClient | None = None,
+) -> AsyncIterator[httpx.Response]:
+    """
+    Como get_with_retries, mas a resposta vem em stream (corpo por ler).
+    Os retries só cobrem o pedido e o status: depois de o corpo começar a
+    ser consumido, um erro de transporte sobe para quem lê.
+    """
+    http = http or get_http_client()
+    for attempt in range(_RETRY_TOTAL):
+        last = attempt == _RETRY_TOTAL - 1
+        request = http.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+        try:
+            resp = await http.send(request, stream=True)
+        except httpx.TransportError:
+            if last:
+                raise
+        else:
+            if resp.status_code not in _RETRY_STATUSES or last:
+                try:
+                    yield resp
+                finally:
+                    await resp.aclose()
+                return
+            await resp.aclose()
+        await asyncio.sleep(_RETRY_BACKOFF_S * (2 ** attempt))
+
+
+async def close_http_client() -> None:
+    """Fecha o pool (chamado no shutdown da API/worker)."""
+    global _client_loop
+    for client in _clients.values():
+        if not client.is_closed:
+            await client.aclose()
+    _clients.clear()
+    _client_loop = None
@@ -0,0 +1,198 @@
+# app/external/json_stream.py
+# Descodificação incremental de respostas JSON grandes.
+#
+# Os endpoints __watchdogs devolvem {"...meta...", "data": [ {...}, ... ]}
+# com dezenas de milhares de linhas. resp.json() precisa do corpo inteiro em
+# bytes, depois em str e por fim da árvore de dicts completa; aqui os bytes
+# vão sendo lidos do socket e cada item dos arrays pedidos é entregue assim
+# que está completo (json.JSONDecoder.raw_decode, em C, um item de cada
+# vez). Em memória fica só o troço do corpo ainda por consumir.
+#
+# Só os arrays do nível de topo são partidos; os restantes valores do topo
+# (normalmente escalares de meta) ficam em JsonArrayStream.meta.
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import AsyncIterator, Any, Collection, Optional
+
+_DECODER = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+_AFTER_VALUE = frozenset(" \t\n\r,:]}")
+_TRIM_AT = 1 << 16  # descarta o que já foi consumido a partir daqui
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class JsonArrayStream:
+    """
+    `async for key, item in JsonArrayStream(resp.aiter_bytes(), ("data",))`
+
+    Dá (chave, item) para cada item dos arrays de topo em `arrays`, pela
+    ordem em que chegam; se o documento for ele próprio uma lista, a chave
+    é None. O resto do objeto de topo vai para .meta, que só está completo
+    no fim da iteração (a meta pode vir depois dos dados).
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], arrays: Collection[str] = ("data",)):
+        self.meta: dict[str, Any] = {}
+        self._chunks = chunks.__aiter__()
+        self._arrays = frozenset(arrays)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._keys: dict[str, str] = {}
+
+    def __aiter__(self) -> AsyncIterator[tuple[Optional[str], Any]]:
+        return self._items()
+
+    async def _items(self) -> AsyncIterator[tuple[Optional[str], Any]]:
+        c = await self._peek()
+        if c == "[":
+            self._pos += 1
+            async for item in self._array():
+                yield None, item
+        elif c == "{":
+            self._pos += 1
+            if await self._peek() == "}":
+                self._pos += 1
+            else:
+                while True:
+                    key = await self._value()
+                    if not isinstance(key, str) or await self._peek() != ":":
+                        raise JsonStreamError(f"invalid object key at offset {self._pos}")
+                    self._pos += 1
+                    if key in self._arrays and await self._peek() == "[":
+                        self._pos += 1
+                        async for item in self._array():
+                            yield key, item
+                    else:
+                        self.meta[key] = await self._value()
+                    if await self._end_of("}"):
+                        break
+        else:
+            raise JsonStreamError(f"expected an object or a list, got {c!r}")
+        if await self._peek(eof_ok=True):
+            raise JsonStreamError("trailing data after the JSON document")
+
+    async def _array(self) -> AsyncIterator[Any]:
+        if await self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            items, closed = self._ready_items()
+            for item in items:
+                yield item
+            if closed:
+                return
+            if not items:
+                # o próximo item ainda não chegou inteiro (ou o JSON está errado)
+                yield self._shared_keys(await self._value())
+                if await self._end_of("]"):
+                    return
+
+    def _ready_items(self) -> tuple[list, bool]:
+        """
+        Os itens seguintes que já estão inteiros no buffer, sem awaits (um
+        await por linha custava mais do que o próprio parse). Devolve também
+        se o array fechou.
+
+        O grosso vai num só json.loads: do início até ao último '},' do
+        buffer, entre '[' e ']'. Se esse troço fizer um array válido, o corte
+        caiu mesmo entre dois itens (o estado do parser nesse ponto é o mesmo
+        que no documento inteiro); se não (o '},' era de um objeto aninhado
+        ou de uma string), segue tudo pelo caminho item a item. Num só
+        json.loads as linhas também partilham as chaves, como no resp.json().
+        """
+        buf, pos, n = self._buf, self._pos, len(self._buf)
+        decode, ws = _DECODER.raw_decode, _WS.match
+        out: list = []
+        pos = ws(buf, pos).end()
+        cut = buf.rfind("},", pos)
+        if cut > pos:
+            try:
+                out = json.loads("[" + buf[pos:cut + 1] + "]")
+            except json.JSONDecodeError:
+                out = []
+            else:
+                pos = ws(buf, cut + 2).end()
+        try:
+            while True:
+                try:
+                    item, end = decode(buf, pos)
+                except json.JSONDecodeError:
+                    return out, False
+                sep = ws(buf, end).end()
+                if sep >= n or buf[end] not in _AFTER_VALUE:
+                    return out, False
+                out.append(self._shared_keys(item))
+                pos = sep + 1
+                if buf[sep] == "]":
+                    return out, True
+                if buf[sep] != ",":
+                    raise JsonStreamError(f"expected ',' or ']' at offset {sep}, got {buf[sep]!r}")
+                pos = ws(buf, pos).end()
+        finally:
+            self._pos = pos
+
+    def _shared_keys(self, item: Any) -> Any:
+        # o json.loads partilha as chaves entre linhas; um raw_decode por linha
+        # não, e com as linhas guardadas (cache KPI) isso pesa
+        if type(item) is dict:
+            keys = self._keys
+            item = {keys.setdefault(k, k): v for k, v in item.items()}
+        return item
+
+    async def _end_of(self, close: str) -> bool:
+        """Depois de um valor: ',' (há mais) ou o fecho do contentor."""
+        c = await self._peek()
+        self._pos += 1
+        if c == close:
+            return True
+        if c != ",":
+            raise JsonStreamError(f"expected ',' or {close!r} at offset {self._pos - 1}, got {c!r}")
+        return False
+
+    async def _value(self) -> Any:
+        await self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise JsonStreamError(str(e)) from e
+            else:
+                # '12' ou '3.' no fim do chunk podem continuar no seguinte
+                if self._eof or (end < len(self._buf) and self._buf[end] in _AFTER_VALUE):
+                    self._pos = end
+                    return value
+            await self._more()
+
+    async def _peek(self, *, eof_ok: bool = False) -> str:
+        """Salta espaços e devolve o próximo carácter ('' no fim, se eof_ok)."""
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                if eof_ok:
+                    return ""
+                raise JsonStreamError("unexpected end of JSON document")
+            await self._more()
+
+    async def _more(self) -> None:
+        if self._pos >= _TRIM_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            self._buf += self._text.decode(b"", final=True)
+        else:
+            self._buf += self._text.decode(chunk)
@@ -1,68 +1,62 @@
 from __future__ import annotations
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
-import certifi
+
+import httpx
 
 from app.core.logging import logging
 from app.core.config import settings
+from app.external.http_pool import get_http_client, get_with_retries, verify_setting
 
 log = logging.getLogger("wd.pda_client")
 
 class PdaClient:
+    """
+    Cliente assíncrono do PDA. Usa o AsyncClient partilhado do processo
+    (app.external.http_pool): o pedido não ocupa uma thread enquanto espera.
+    """
     def __init__(self,
-         timeout: str | None = None,
+         timeout: int | None = None,
          user_agent: str | None = None,
          pda_key: str | None = None,
+         http: httpx.AsyncClient | None = None,
     ) -> None:
         self.timeout = timeout or settings.PS_TIMEOUT_S
         self.user_agent = user_agent or settings.PS_USER_AGENT
         self.pda_key = pda_key or settings.TOOLS_PDA_API_KEY
+        self._timeout = httpx.Timeout(self.timeout, connect=3)
+        self._http = http
 
-        self._session = requests.Session()
-        retries = Retry(
-            total = 4,
-            connect = 4,
-            read = 2,
-            backoff_factor = 0.4,
-            status_forcelist=(502, 503, 504),
-            allowed_methods=frozenset(["GET"]),
-            raise_on_status=False,
-        )
-
-        adapter = HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=8)
-        self._session.mount("https://", adapter)
-        self._session.mount("http://", adapter)
-        verify_env = str(getattr(settings, "PS_VERIFY_SSL", "true")).lower()
-        self._verify = certifi.where() if verify_env != "false" else False
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http or get_http_client(verify=verify_setting("PS_VERIFY_SSL"))
 
-    # -------------------------------c
+    # -------------------------------
     # Fetch reports
     # -------------------------------
-    def fetch_reports(self):
+    async def fetch_reports(self, updated_since: str | None = None) -> list[dict]:
+        """
+        Lista de relatórios; com updated_since ('YYYY-MM-DD HH:MM:SS') só os
+        alterados desde então (se o getReports aceitar o filtro). Falhas de
+        rede/HTTP/JSON levantam exceção: a sync não pode confundir erro com
+        "nada mudou".
+        """
         url = settings.TOOLS_PDA_GET_REPORTS
         headers = {
             "User-Agent": self.user_agent,
             "Accept": "application/json",
             "Authorization": f"Bearer {self.pda_key}",
         }
+        params = None
+        if updated_since and settings.TOOLS_PDA_UPDATED_SINCE_PARAM:
+            params = {settings.TOOLS_PDA_UPDATED_SINCE_PARAM: updated_since}
 
-        log.info("PdaClient.fetch_reports - Fetching reports from: %s", url)
-
-        try:
-            resp = self._session.get(url, headers=headers, timeout=self.timeout, verify=self._verify)
-        except Exception:
-            log.exception("PdaClient.fetch_reports - Failed to fetch report")
-            return {}
+        log.info("PdaClient.fetch_reports - Fetching reports from: %s (since=%s)", url, updated_since)
 
+        resp = await get_with_retries(url, params=params, headers=headers, timeout=self._timeout, http=self.http)
         if resp.status_code >= 400:
-            log.warning("PrestashopClient.login: error body=%s", (resp.text[:500] if resp.text else "<empty>"))
-
-        data = {}
-
-        try:
-            data = resp.json() if resp.content else {}
-        except Exception:
-            log.exception("PdaClient.fetch_reportsnon-JSON response: %r", resp.text[:500] if resp.text else "<empty>")
+            log.warning("PdaClient.fetch_reports: error body=%s", (resp.text[:500] if resp.text else "<empty>"))
+            resp.raise_for_status()
 
-        return data
\ No newline at end of file
+        data = resp.json() if resp.content else []
+        if not isinstance(data, list):
+            raise ValueError(f"PdaClient.fetch_reports: expected a list, got {type(data).__name__}")
+        return data
@@ -1,23 +1,34 @@
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
-import certifi
 import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
 
 from app.core.logging import logging
 from app.core.config import settings
+from app.external.http_pool import get_http_client, get_with_retries, stream_with_retries, verify_setting
+from app.external.json_stream import JsonArrayStream
 
 
 log = logging.getLogger("wd.prestashop_client")
 
 
 class PrestashopClient:
+    """
+    Cliente assíncrono para os endpoints PrestaShop/__watchdogs.
+
+    Não abre ligações próprias: usa o AsyncClient partilhado do processo
+    (app.external.http_pool), por isso construir um PrestashopClient por
+    job/pedido é barato e reaproveita as ligações em keep-alive.
+    """
+
     def __init__(
         self,
         base_url: str | None = None,
         api_key: str | None = None,
         timeout: int | None = None,
         user_agent: str | None = None,
+        http: httpx.AsyncClient | None = None,
     ) -> None:
         self.base_url = base_url or settings.PS_BASE_URL
         # Sec
@@ -25,29 +36,35 @@ class PrestashopClient:
         self.user_agent = user_agent or settings.PS_USER_AGENT
         # Misc
         self.timeout = timeout or settings.PS_TIMEOUT_S
-
-        # --- HTTP session com retries e CA bundle explícito ---
-        self._session = requests.Session()
-        retries = Retry(
-            total=4,
-            connect=4,
-            read=2,
-            backoff_factor=0.4,
-            status_forcelist=(502, 503, 504),
-            allowed_methods=frozenset(["GET"]),
-            raise_on_status=False,
-        )
-        adapter = HTTPAdapter(max_retries=retries,
-                              pool_connections=4, pool_maxsize=8)
-        self._session.mount("https://", adapter)
-        self._session.mount("http://", adapter)
-        verify_env = str(getattr(settings, "PS_VERIFY_SSL", "true")).lower()
-        self._verify = certifi.where() if verify_env != "false" else False
+        self._timeout = httpx.Timeout(self.timeout, connect=3)
+        self._http = http
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # PS_VERIFY_SSL só vale para o PrestaShop, não para o pool inteiro
+        return self._http or get_http_client(verify=verify_setting("PS_VERIFY_SSL"))
+
+    async def _get(self, url: str, *, params: dict | None = None, headers: dict | None = None) -> httpx.Response:
+        """GET com retries em 502/503/504 e erros de transporte (backoff exponencial)."""
+        return await get_with_retries(url, params=params, headers=headers, timeout=self._timeout, http=self.http)
+
+    @asynccontextmanager
+    async def _stream_json(self, url: str, *, params: dict, headers: dict,
+                           arrays: tuple[str, ...] = ("data",)) -> AsyncIterator[JsonArrayStream]:
+        """
+        GET em stream: os itens dos arrays `arrays` são descodificados à
+        medida que chegam (ver app.external.json_stream), sem o corpo inteiro
+        em memória.
+        """
+        async with stream_with_retries(url, params=params, headers=headers,
+                                       timeout=self._timeout, http=self.http) as resp:
+            resp.raise_for_status()
+            yield JsonArrayStream(resp.aiter_bytes(), arrays)
 
     # -------------------------------
     # Login
     # -------------------------------
-    def login(self, email: str, password: str) -> dict:
+    async def login(self, email: str, password: str) -> dict:
         url = settings.PS_AUTH_VALIDATE
         headers = {
             "X-Genesys-Key": settings.PS_GENESYS_KEY,  # cuidado: não logar isto
@@ -64,18 +81,16 @@ class PrestashopClient:
         except Exception:
             timeout = 20
 
-        verify = certifi.where() if str(getattr(settings, "PS_AUTH_VERIFY_SSL", "true")
-                                        ).lower() != "false" else False
+        http = self._http or get_http_client(verify=verify_setting("PS_AUTH_VERIFY_SSL"))
 
         # Fazer o request
         try:
             log.warning("email: %s passowd: %s", email, password)
-            resp = self._session.post(
+            resp = await http.post(
                 url,
                 json={"email": email, "password": password},
                 headers=headers,
                 timeout=timeout,
-                verify=verify,
             )
         except Exception:
             log.exception("PrestashopClient.login: request failed")
@@ -105,20 +120,14 @@ class PrestashopClient:
     # -------------------------------c
     # Payments
     # -------------------------------
-    def fetch_payments(self) -> list[dict]:
+    async def fetch_payments(self) -> list[dict]:
         params = {"PHP_AUTH_USER": self.api_key}
         headers = {
             "User-Agent": self.user_agent,
             "Accept": "application/json",
         }
 
-        resp = self._session.get(
-            settings.PS_CHECK_PAYMENT_URL,
-            params=params,
-            headers=headers,
-            timeout=(3, self.timeout),
-            verify=self._verify,
-        )
+        resp = await self._get(settings.PS_CHECK_PAYMENT_URL, params=params, headers=headers)
         resp.raise_for_status()
 
         data = resp.json()
@@ -131,84 +140,68 @@ class PrestashopClient:
     # -------------------------------
     # Delayed orders
     # -------------------------------
-    def fetch_delayed_orders(self) -> list[dict]:
+    async def fetch_delayed_orders(self) -> list[dict]:
+        return [r async for r in self.iter_delayed_orders()]
+
+    async def iter_delayed_orders(self) -> AsyncIterator[dict]:
+        """Linhas uma a uma, à medida que chegam (lista no topo, ou "items"/"data")."""
         params = {"PHP_AUTH_USER": self.api_key}
         headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
-        resp = self._session.get(
-            settings.PS_CHECK_ORDERS_URL,
-            params=params,
-            headers=headers,
-            timeout=(3, self.timeout),
-            verify=self._verify,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-
-        if isinstance(data, list):
-            rows = data
-        else:
-            rows = data.get("items") or data.get("data") or []
-
-        if not isinstance(rows, list):
-            raise RuntimeError(
-                f"Unexpected response for delayed orders: {type(rows)}")
-
-        return rows
+        async with self._stream_json(settings.PS_CHECK_ORDERS_URL, params=params, headers=headers,
+                                     arrays=("items", "data")) as stream:
+            source = None  # como o `items or data` antigo: fica o primeiro array com linhas
+            async for key, row in stream:
+                source = source or key or "list"
+                if (key or "list") == source:
+                    yield row
+            for key in ("items", "data"):
+                if stream.meta.get(key):
+                    raise RuntimeError(
+                        f"Unexpected response for delayed orders: {type(stream.meta[key])}")
 
     # -------------------------------
     # EOL Products
     # -------------------------------
-    def fetch_eol_products(self) -> list[dict]:
+    async def fetch_eol_products(self) -> list[dict]:
+        return [r async for r in self.iter_eol_products()]
+
+    async def iter_eol_products(self) -> AsyncIterator[dict]:
         params = {"PHP_AUTH_USER": self.api_key}
         headers = {
             "User-Agent": self.user_agent,
             "Accept": "application/json",
         }
 
-        resp = self._session.get(
-            settings.PS_CHECK_EOL_PRODUCTS,
-            params=params,
-            headers=headers,
-            timeout=(3, self.timeout),
-            verify=self._verify,
-        )
-        resp.raise_for_status()
-        data = resp.json() or {}
-
         # formato típico: {"counts": {...}, "warning": [...], "critical": [...]}
-        if isinstance(data, dict):
-            rows: list[dict] = []
-
-            for key in ("warning", "critical"):
-                part = data.get(key)
-                if isinstance(part, list):
+        async with self._stream_json(settings.PS_CHECK_EOL_PRODUCTS, params=params, headers=headers,
+                                     arrays=("warning", "critical", "items", "data")) as stream:
+            severity_rows = 0
+            fallback = None
+            async for key, it in stream:
+                if key in ("warning", "critical"):
                     # garante "severity" quando vier omitido
-                    for it in part:
-                        if isinstance(it, dict) and "severity" not in it:
-                            it["severity"] = key
-                    rows.extend(part)
-
-            # fallbacks (se o endpoint algum dia devolver outra chave)
-            if not rows:
-                rows = data.get("items") or data.get("data") or []
-
-            if not isinstance(rows, list):
-                raise RuntimeError(
-                    f"Unexpected EOL products response type: {type(rows)}")
-
-            return rows
-
-        # fallback raríssimo: resposta é uma lista já plana
-        if isinstance(data, list):
-            return data
-
-        raise RuntimeError(f"Unexpected EOL products response: {data!r}")
+                    if isinstance(it, dict) and "severity" not in it:
+                        it["severity"] = key
+                    severity_rows += 1
+                    yield it
+                elif key is None:
+                    # fallback raríssimo: resposta é uma lista já plana
+                    yield it
+                elif not severity_rows and fallback in (None, key):
+                    # fallbacks (se o endpoint algum dia devolver outra chave)
+                    fallback = key
+                    yield it
+            if not severity_rows and fallback is None:
+                for key in ("items", "data"):
+                    if stream.meta.get(key):
+                        raise RuntimeError(
+                            f"Unexpected EOL products response type: {type(stream.meta[key])}")
 
     # -------------------------------
     # Pages Speed Test
     # -------------------------------
-    def fetch_pagespeed(self, page_type: str = "product") -> dict:
-        endpoint = settings.PS_HOME_URL if page_type == "home" else settings.PS_PRODUCT_URL
+    async def fetch_pagespeed(self, page_type: str = "product", url: str | None = None) -> dict:
+        endpoint = url or (settings.PS_HOME_URL if page_type == "home" else settings.PS_PRODUCT_URL)
         headers = {
             "User-Agent": self.user_agent,
             "Accept": "text/html",
@@ -217,45 +210,30 @@ class PrestashopClient:
             "Pragma": "no-cache",
         }
 
+        # passagem única: o mesmo stream mede TTFB/total e guarda o HTML
         started = time.perf_counter()
-        resp = self._session.get(
-            endpoint, headers=headers, timeout=(3, self.timeout), verify=self._verify, stream=True
-        )
-        status = resp.status_code
-
-        size = 0
+        body = bytearray()
         first_chunk_at = None
 
-        for chunk in resp.iter_content(chunk_size=16384):
-            if not chunk:
-                continue
-            if first_chunk_at is None:
-                first_chunk_at = time.perf_counter()
-            size += len(chunk)
-
-        ended = time.perf_counter()
-        resp.close()
-
-        # fallback: se size==0, uma segunda request simples
-        if size == 0:
-            resp2 = self._session.get(
-                endpoint, headers=headers, timeout=(3, self.timeout), verify=self._verify, stream=False
-            )
-            status = resp2.status_code
-            body2 = resp2.content or b""
-            size = len(body2)
-            ttfb_ms = int(resp2.elapsed.total_seconds() * 1000)
-            total_ms = ttfb_ms
-            headers_l = {k.lower(): v for k, v in resp2.headers.items()}
-            html_text = body2.decode(errors="ignore")
-        else:
-            ttfb_ms = int(((first_chunk_at or ended) - started) * 1000)
-            total_ms = int((ended - started) * 1000)
+        async with self.http.stream("GET", endpoint, headers=headers, timeout=self._timeout) as resp:
+            status = resp.status_code
+            async for chunk in resp.aiter_bytes(chunk_size=16384):
+                if not chunk:
+                    continue
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                body += chunk
+            ended = time.perf_counter()
             headers_l = {k.lower(): v for k, v in resp.headers.items()}
-            resp_full = self._session.get(
-                endpoint, headers=headers, timeout=(3, self.timeout), verify=self._verify, stream=False
-            )
-            html_text = resp_full.text
+            encoding = resp.charset_encoding or "utf-8"
+
+        size = len(body)
+        ttfb_ms = int(((first_chunk_at or ended) - started) * 1000)
+        total_ms = int((ended - started) * 1000)
+        try:
+            html_text = body.decode(encoding, errors="replace")
+        except LookupError:  # charset desconhecido no Content-Type
+            html_text = body.decode("utf-8", errors="replace")
 
         headers_out = {
             "content_type": headers_l.get("content-type", ""),
@@ -267,7 +245,7 @@ class PrestashopClient:
         }
 
         return {
-            "page_type": "home" if page_type == "home" else "product",
+            "page_type": page_type,
             "url": endpoint,
             "status_code": status,
             "ttfb_ms": ttfb_ms,
@@ -280,7 +258,7 @@ class PrestashopClient:
     # -------------------------------
     # Stale Carts
     # -------------------------------
-    def fetch_carts_stale(
+    async def fetch_carts_stale(
         self,
         hours: int | None = None,
         limit: int | None = None,
@@ -301,13 +279,7 @@ class PrestashopClient:
         params.update({"hours": hours, "limit": limit})
 
         headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
-        resp = self._session.get(
-            settings.PS_CHECK_CARTS_STALE_URL,
-            params=params,
-            headers=headers,
-            timeout=(3, self.timeout),
-            verify=self._verify,
-        )
+        resp = await self._get(settings.PS_CHECK_CARTS_STALE_URL, params=params, headers=headers)
         resp.raise_for_status()
         data = resp.json()
         rows = data.get("data") or []
@@ -319,7 +291,7 @@ class PrestashopClient:
     # -------------------------------
     # KPI Employees: timeseries
     # -------------------------------
-    def fetch_kpi_employee_timeseries(
+    async def fetch_kpi_employee_timeseries(
         self,
         *,
         role: str,
@@ -327,6 +299,24 @@ class PrestashopClient:
         since: str | None = None,
         until: str | None = None,
     ) -> dict:
+        meta: dict = {}
+        rows = [r async for r in self.iter_kpi_employee_timeseries(
+            role=role, gran=gran, since=since, until=until, meta=meta)]
+        return {"meta": meta, "rows": rows}
+
+    async def iter_kpi_employee_timeseries(
+        self,
+        *,
+        role: str,
+        gran: str,
+        since: str | None = None,
+        until: str | None = None,
+        meta: dict | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Linhas da timeseries à medida que chegam do socket. `meta` (role,
+        gran, since, until da resposta) só é preenchido no fim.
+        """
         params = {
             "PHP_AUTH_USER": self.api_key,
             "role": role,   # "prep" | "invoice"
@@ -336,26 +326,24 @@ class PrestashopClient:
             "limit": 50000,
         }
         headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
-        resp = self._session.get(
+        async with self._stream_json(
             settings.PS_KPI_EMP_TIMESERIES_URL,   # <-- corrigido (sem PS_)
-            params=params,
+            params=_drop_none(params),
             headers=headers,
-            timeout=(3, self.timeout),
-            verify=self._verify,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        rows = data.get("data") or []
-        if not isinstance(rows, list):
-            raise RuntimeError(f"Unexpected KPI timeseries response: {data!r}")
-        return {"meta": {k: data.get(k) for k in ("role", "gran", "since", "until")}, "rows": rows}
+        ) as stream:
+            async for key, row in stream:
+                if key is None:
+                    raise RuntimeError("Unexpected KPI timeseries response: top-level list")
+                yield row
+            if stream.meta.get("data"):
+                raise RuntimeError(f"Unexpected KPI timeseries response: {stream.meta!r}")
+            if meta is not None:
+                meta.update({k: stream.meta.get(k) for k in ("role", "gran", "since", "until")})
 
     # -------------------------------
     # KPI Employees: performance (ranking)
     # -------------------------------
-    # app/external/prestashop_client.py
-
-    def fetch_kpi_employee_performance(
+    async def fetch_kpi_employee_performance(
             self,
             *,
             role: str,
@@ -376,12 +364,10 @@ class PrestashopClient:
             "min_orders": 1,  # <<< garante resultados mesmo com poucas encomendas no dia
         }
         headers = {"User-Agent": self.user_agent, "Accept": "application/json"}
-        resp = self._session.get(
+        resp = await self._get(
             settings.PS_KPI_EMP_PERFORMANCE_URL,
-            params=params,
+            params=_drop_none(params),
             headers=headers,
-            timeout=(3, self.timeout),
-            verify=self._verify,
         )
         resp.raise_for_status()
         data = resp.json()
@@ -392,3 +378,8 @@ class PrestashopClient:
         meta = {k: data.get(k) for k in (
             "role", "since", "until", "order_by", "order_dir", "limit")}
         return {"meta": meta, "rows": rows}
+
+
+def _drop_none(params: dict) -> dict:
+    # requests ignorava params a None; httpx envia-os como string vazia
+    return {k: v for k, v in params.items() if v is not None}
@@ -2,8 +2,11 @@ from app.core.db import Base
 
 from .runs import CheckRun
 from .prestashop import PaymentMethodStatus, DelayedOrderSnapshot, EOLProductSnapshot, PageSpeedSnapshot
-from .kpi import KPIReport
+from .kpi import KPIReport, KPIUpstreamCache, KPITimeseriesBucket, StoreAuditEvent, StoreAuditDaily
 from .patife import PatifeHealthz
+from .pda import PdaReportMirror
+from .rollups import SnapshotRollup, PageSpeedRollup
+from .snapshots import SnapshotState, SnapshotInterval, SnapshotObservation, SnapshotPointer
 
 __all__ = [
     "Base",
@@ -13,5 +16,16 @@ __all__ = [
     "EOLProductSnapshot",
     "PageSpeedSnapshot",
     "KPIReport",
-    "PatifeHealthz"
+    "KPIUpstreamCache",
+    "KPITimeseriesBucket",
+    "StoreAuditEvent",
+    "StoreAuditDaily",
+    "PatifeHealthz",
+    "PdaReportMirror",
+    "SnapshotState",
+    "SnapshotInterval",
+    "SnapshotObservation",
+    "SnapshotPointer",
+    "SnapshotRollup",
+    "PageSpeedRollup",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, DateTime, Integer, Text, Index
+from sqlalchemy import Column, String, Date, DateTime, Float, Integer, Text, Index, JSON
 from sqlalchemy.sql import func
 from app.core.db import Base
 
@@ -21,3 +21,66 @@ class KPIReport(Base):
     __table_args__ = (
         Index("ix_kpi_reports_key", "period", "since", "until", "prompt_version"),
     )
+
+
+class KPIUpstreamCache(Base):
+    """
+    Respostas dos endpoints KPI do PrestaShop para períodos fechados (não
+    mudam): guardadas de vez e servidas sem voltar ao upstream.
+    """
+    __tablename__ = "kpi_upstream_cache"
+
+    key = Column(String(64), primary_key=True)          # sha256 de (kind, params)
+    kind = Column(String(16), nullable=False)           # timeseries|performance
+    params = Column(JSON, nullable=False)               # para diagnóstico
+    payload = Column(JSON, nullable=False)              # {"meta": {...}, "rows": [...]}
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class KPITimeseriesBucket(Base):
+    """
+    Sincronização incremental da timeseries KPI: as linhas (todos os
+    funcionários) de cada bucket fechado, para não voltar a pedir a janela
+    inteira ao upstream. rows=[] também conta (bucket sem encomendas).
+    """
+    __tablename__ = "kpi_timeseries_buckets"
+
+    role = Column(String(16), primary_key=True)          # prep|invoice
+    gran = Column(String(8), primary_key=True)           # day|week|month|year
+    bucket_start = Column(String(10), primary_key=True)  # 'YYYY-MM-DD' (segunda, dia 1, 1 jan)
+    rows = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class StoreAuditEvent(Base):
+    """
+    Eventos do frontInvoiceAudit (loja física), só acrescentados pelo job
+    kpi.sync_store_audit. `key` deduplica a margem que a sync volta a pedir.
+    """
+    __tablename__ = "store_audit_events"
+
+    key = Column(String(64), primary_key=True)           # id do audit ou sha1 do evento
+    event_type = Column(String(32), nullable=False)
+    created_at = Column(DateTime, nullable=True)          # document_creation_date (hora local)
+    employee_id = Column(Integer, nullable=False, default=0)
+    document_type = Column(String(16), nullable=False)
+    document_total = Column(Float, nullable=False, default=0.0)
+    payload = Column(JSON, nullable=False)                # evento como veio
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_store_audit_events_created", "created_at"),
+    )
+
+
+class StoreAuditDaily(Base):
+    """Agregado diário dos eventos, atualizado pela sync à medida que chegam."""
+    __tablename__ = "store_audit_daily"
+
+    day = Column(String(10), primary_key=True)            # 'YYYY-MM-DD' ('' = sem data)
+    event_type = Column(String(32), primary_key=True)
+    employee_id = Column(Integer, primary_key=True)
+    document_type = Column(String(16), primary_key=True)
+    employee_name = Column(String(128), nullable=False, default="")
+    n = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,34 @@
+from __future__ import annotations
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from app.core.db import Base
+
+
+class PdaReportMirror(Base):
+    """
+    Cópia local dos relatórios do PDA (FastLogix), mantida pelo job
+    pda.sync_reports (incremental por date_upd). O /tools/pda lê daqui.
+    """
+    __tablename__ = "pda_reports"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # id no FastLogix
+    code = Column(String(64), nullable=False)
+    message = Column(Text, nullable=False, default="")
+    context_json = Column(Text, nullable=True)  # já serializado (uma vez, na sync)
+    error_text = Column(Text, nullable=False, default="")
+    stack_text = Column(Text, nullable=False, default="")
+    log_mode = Column(String(32), nullable=False, default="")
+    ts_client = Column(DateTime(timezone=True), nullable=True)
+    state = Column(String(32), nullable=False, default="")
+    date_added = Column(DateTime(timezone=True), nullable=True)
+    date_updated = Column(DateTime(timezone=True), nullable=True)
+    # ordem da listagem (date_upd, ou date_add se vier vazio); chave do keyset com o id
+    sort_at = Column(DateTime(timezone=True), nullable=False)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_pda_reports_sort", "sort_at", "id"),
+        Index("ix_pda_reports_state_sort", "state", "sort_at", "id"),
+        Index("ix_pda_reports_code_sort", "code", "sort_at", "id"),
+        Index("ix_pda_reports_updated", "date_updated"),
+    )
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from sqlalchemy import Column, Integer, String, Float, JSON, Index
+from app.core.db import Base
+
+
+class SnapshotRollup(Base):
+    """
+    Agregados horários/diários das linhas brutas apagadas pela retenção
+    (ver app/services/commands/maintenance/compact.py).
+    `source` = tabela de origem; `key` = dimensão do grupo (status, método, check...).
+    """
+    __tablename__ = "snapshot_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(32), nullable=False)
+    bucket = Column(String(8), nullable=False)         # "hour" | "day"
+    bucket_start = Column(String(19), nullable=False)  # "YYYY-MM-DD" ou "YYYY-MM-DD HH:00:00" (hora local; UTC em check_runs)
+    key = Column(String(128), nullable=False, default="")
+    n = Column(Integer, nullable=False, default=0)     # linhas agregadas
+    n_distinct = Column(Integer, nullable=True)        # entidades distintas no balde
+    v_sum = Column(Float, nullable=True)
+    v_min = Column(Float, nullable=True)
+    v_max = Column(Float, nullable=True)
+    extra = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        Index("ux_rollups_source_bucket_key", "source", "bucket", "bucket_start", "key", unique=True),
+    )
+
+
+class PageSpeedRollup(Base):
+    """
+    Agregados do TTFB mantidos na ingestão do pagespeed: um por balde
+    (minuto/hora/dia), grupo e URL; url "" = o grupo inteiro.
+    `sketch` = QuantileSketch.to_dict() (app/shared/quantiles.py), juntável entre baldes.
+    """
+    __tablename__ = "pagespeed_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket = Column(String(8), nullable=False)         # "minute" | "hour" | "day"
+    bucket_start = Column(String(19), nullable=False)  # hora local, ver domains/prestashop/pagespeed/rollups.py
+    page_type = Column(String(16), nullable=False)
+    url = Column(String(1024), nullable=False, default="")
+    n = Column(Integer, nullable=False, default=0)
+    v_sum = Column(Float, nullable=False, default=0)
+    v_min = Column(Float, nullable=True)
+    v_max = Column(Float, nullable=True)
+    sketch = Column(JSON, nullable=False)
+
+    __table_args__ = (
+        Index("ux_psrollups_bucket_type_url_start", "bucket", "page_type", "url", "bucket_start", unique=True),
+        Index("ix_psrollups_bucket_start", "bucket", "bucket_start"),
+    )
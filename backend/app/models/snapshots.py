@@ -0,0 +1,64 @@
+from __future__ import annotations
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from app.core.db import Base
+
+# Armazenamento "delta" dos snapshots (PS_SNAPSHOT_STORAGE=delta): em vez de
+# uma linha por entidade por run, guarda o estado atual + intervalos de validade.
+# `kind` identifica o check ("orders_delayed", "carts_stale", "eol_products").
+
+
+class SnapshotState(Base):
+    """Estado atual: uma linha por entidade presente na última run."""
+    __tablename__ = "snapshot_state"
+
+    kind = Column(String(32), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    status = Column(String(16), nullable=False)  # ok|warning|critical
+    data = Column(JSON, nullable=False)          # valores da última run (inclui contadores de idade)
+    since = Column(DateTime(timezone=True), nullable=False)         # início do intervalo aberto
+    last_seen_at = Column(DateTime(timezone=True), nullable=False)  # observed_at da última run
+
+
+class SnapshotInterval(Base):
+    """
+    Uma linha por versão de uma entidade: de valid_from até valid_to (ambos
+    observed_at de runs em que foi vista com os mesmos valores).
+    valid_to NULL = intervalo aberto (termina na última run).
+    """
+    __tablename__ = "snapshot_intervals"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False)
+    data = Column(JSON, nullable=False)  # valores na última run do intervalo (quando fechado)
+    valid_from = Column(DateTime(timezone=True), nullable=False)
+    valid_to = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_snapint_kind_entity_open", "kind", "entity_id", "valid_to"),
+        Index("ix_snapint_kind_from", "kind", "valid_from"),
+        Index("ix_snapint_kind_to", "kind", "valid_to"),
+    )
+
+
+class SnapshotObservation(Base):
+    """Instantes das runs por kind (necessários para reconstruir contagens por run/dia)."""
+    __tablename__ = "snapshot_observations"
+
+    kind = Column(String(32), primary_key=True)
+    observed_at = Column(DateTime(timezone=True), primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+
+
+class SnapshotPointer(Base):
+    """
+    Última snapshot publicada por check (gravada na mesma transação das linhas).
+    Os read repos resolvem a run atual por PK em vez de max(observed_at).
+    """
+    __tablename__ = "snapshot_pointers"
+
+    check_name = Column(String(64), primary_key=True)  # ex.: 'prestashop.orders_delayed'
+    observed_at = Column(DateTime(timezone=True), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    worst = Column(String(16), nullable=False, default="ok")  # ok|warning|critical
@@ -1,3 +1,5 @@
+from datetime import date
+
 from sqlalchemy.orm import Session
 from app.models.kpi import KPIReport
 
@@ -7,3 +9,13 @@ class KPIReportsReadRepo:
 
     def get_by_id(self, report_id: str) -> KPIReport | None:
         return self.db.query(KPIReport).filter(KPIReport.report_id == report_id).first()
+
+    def latest_for(self, period: str, since: date, until: date, prompt_version: int) -> KPIReport | None:
+        """Último relatório gerado para a mesma janela (ix_kpi_reports_key)."""
+        return (
+            self.db.query(KPIReport)
+            .filter(KPIReport.period == period, KPIReport.since == since,
+                    KPIReport.until == until, KPIReport.prompt_version == prompt_version)
+            .order_by(KPIReport.generated_at.desc())
+            .first()
+        )
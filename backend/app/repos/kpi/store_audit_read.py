@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.domains.kpi.store.mappers import DailyKey
+from app.models.kpi import StoreAuditDaily, StoreAuditEvent
+
+
+class StoreAuditReadRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def daily_from(self, day: str) -> dict[DailyKey, dict]:
+        """Agregados dos dias >= day, mais os eventos sem data (day ''), no formato de fold_daily."""
+        t = StoreAuditDaily
+        rows = self.db.execute(
+            select(t.day, t.event_type, t.employee_id, t.document_type, t.employee_name, t.n, t.total)
+            .where(or_(t.day >= day, t.day == ""))
+        ).all()
+        return {(r.day, r.event_type, r.employee_id, r.document_type): {"name": r.employee_name, "n": r.n, "total": r.total}
+                for r in rows}
+
+    def payloads_between(self, start: datetime, end: datetime) -> list[dict]:
+        """Eventos crus com start <= document_creation_date < end (dia parcial do `since`)."""
+        t = StoreAuditEvent
+        return list(self.db.execute(
+            select(t.payload).where(t.created_at >= start, t.created_at < end)
+        ).scalars())
+
+    def oldest_created_at(self) -> Optional[datetime]:
+        """Evento mais antigo guardado (a sync guarda tudo a partir do backfill, que é <= a isto)."""
+        return self.db.execute(select(func.min(StoreAuditEvent.created_at))).scalar()
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.domains.kpi.store.mappers import DailyKey
+from app.models.kpi import StoreAuditDaily, StoreAuditEvent
+from app.repos.shared.bulk import bulk_insert
+
+
+class StoreAuditWriteRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def last_created_at(self) -> Optional[datetime]:
+        """Maior document_creation_date guardado (marca d'água da sync)."""
+        return self.db.execute(select(func.max(StoreAuditEvent.created_at))).scalar()
+
+    def known_keys(self, keys: list[str], *, chunk_size: int = 900) -> set[str]:
+        """Quais destas chaves já estão guardadas (em lotes: limite de parâmetros da SQLite)."""
+        out: set[str] = set()
+        for i in range(0, len(keys), chunk_size):
+            batch = keys[i:i + chunk_size]
+            out.update(self.db.execute(select(StoreAuditEvent.key).where(StoreAuditEvent.key.in_(batch))).scalars())
+        return out
+
+    def append(self, rows: list[dict]) -> int:
+        """Acrescenta eventos (já deduplicados). Não faz commit."""
+        return bulk_insert(self.db, StoreAuditEvent, rows)
+
+    def add_daily(self, deltas: dict[DailyKey, dict]) -> None:
+        """
+        Soma n/total aos agregados diários e cria os que faltam, com um
+        executemany para cada caso. Não faz commit.
+        """
+        if not deltas:
+            return
+        t = StoreAuditDaily
+        days = sorted({k[0] for k in deltas})
+        existing = set(self.db.execute(
+            select(t.day, t.event_type, t.employee_id, t.document_type).where(t.day.in_(days))
+        ).tuples())
+
+        new, bump = [], []
+        for key, d in deltas.items():
+            day, event_type, emp_id, doc_type = key
+            if key in existing:
+                bump.append(dict(k_day=day, k_type=event_type, k_emp=emp_id, k_doc=doc_type,
+                                 d_n=d["n"], d_total=d["total"], d_name=d["name"]))
+            else:
+                new.append(dict(day=day, event_type=event_type, employee_id=emp_id, document_type=doc_type,
+                                employee_name=d["name"], n=d["n"], total=d["total"]))
+        bulk_insert(self.db, t, new)
+        if bump:
+            stmt = (
+                update(t.__table__)
+                .where(t.day == bindparam("k_day"), t.event_type == bindparam("k_type"),
+                       t.employee_id == bindparam("k_emp"), t.document_type == bindparam("k_doc"))
+                .values(n=t.n + bindparam("d_n"), total=t.total + bindparam("d_total"),
+                        employee_name=func.coalesce(func.nullif(bindparam("d_name"), ""), t.employee_name))
+            )
+            self.db.connection().execute(stmt, bump)
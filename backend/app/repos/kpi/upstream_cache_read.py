@@ -0,0 +1,23 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.kpi import KPITimeseriesBucket, KPIUpstreamCache
+
+
+class KPIUpstreamCacheReadRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_payload(self, key: str) -> Optional[dict]:
+        return self.db.execute(select(KPIUpstreamCache.payload).where(KPIUpstreamCache.key == key)).scalar()
+
+    def buckets(self, role: str, gran: str, start: str, end: str) -> dict[str, list]:
+        """{bucket_start: rows} guardados em [start, end)."""
+        q = (
+            select(KPITimeseriesBucket.bucket_start, KPITimeseriesBucket.rows)
+            .where(KPITimeseriesBucket.role == role, KPITimeseriesBucket.gran == gran,
+                   KPITimeseriesBucket.bucket_start >= start, KPITimeseriesBucket.bucket_start < end)
+        )
+        return {b: rows for b, rows in self.db.execute(q).all()}
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.models.kpi import KPITimeseriesBucket, KPIUpstreamCache
+
+
+class KPIUpstreamCacheWriteRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def put(self, key: str, kind: str, params: dict, payload: dict) -> None:
+        """Guarda (ou substitui) a resposta de um período fechado. Não faz commit."""
+        values = dict(kind=kind, params=params, payload=payload)
+        res = self.db.execute(update(KPIUpstreamCache).where(KPIUpstreamCache.key == key).values(**values))
+        if res.rowcount == 0:
+            self.db.execute(insert(KPIUpstreamCache).values(key=key, **values))
+
+    def put_buckets(self, role: str, gran: str, buckets: dict[str, list]) -> None:
+        """Guarda as linhas de buckets fechados (substitui se já existirem). Não faz commit."""
+        t = KPITimeseriesBucket
+        for start, rows in buckets.items():
+            res = self.db.execute(
+                update(t).where(t.role == role, t.gran == gran, t.bucket_start == start).values(rows=rows)
+            )
+            if res.rowcount == 0:
+                self.db.execute(insert(t).values(role=role, gran=gran, bucket_start=start, rows=rows))
+
+    def delete_fetched_before(self, cutoff: datetime) -> int:
+        """Apaga respostas guardadas antes de `cutoff` (voltam a ser pedidas se fizerem falta). Não faz commit."""
+        res = self.db.execute(delete(KPIUpstreamCache).where(KPIUpstreamCache.fetched_at < cutoff))
+        return res.rowcount or 0
+
+    def delete_buckets_before(self, start: str) -> int:
+        """Apaga buckets com bucket_start < `start` ('YYYY-MM-DD'). Não faz commit."""
+        res = self.db.execute(delete(KPITimeseriesBucket).where(KPITimeseriesBucket.bucket_start < start))
+        return res.rowcount or 0
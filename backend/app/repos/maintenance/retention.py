@@ -0,0 +1,194 @@
+# app/repos/maintenance/retention.py
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, delete, func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.domains.maintenance.rules import next_bucket
+from app.domains.maintenance.types import RetentionPolicy
+from app.models.rollups import PageSpeedRollup, SnapshotRollup
+from app.repos.shared.delta import DeltaSnapshotRepo
+from app.shared.quantiles import QuantileSketch
+
+log = logging.getLogger("wd.maintenance.retention")
+
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+# No dia em que PS_SNAPSHOT_STORAGE muda entre full e delta o mesmo balde tem linhas
+# brutas e intervalos: o segundo INSERT soma-se ao primeiro em vez de violar
+# ux_rollups_source_bucket_key. n_distinct fica no maior dos dois (as mesmas
+# entidades costumam estar nos dois lados; somar contava-as duas vezes).
+_MERGE = """
+    ON CONFLICT (source, bucket, bucket_start, key) DO UPDATE SET
+        n = n + excluded.n,
+        n_distinct = max(coalesce(n_distinct, excluded.n_distinct), coalesce(excluded.n_distinct, n_distinct)),
+        v_sum = CASE WHEN v_sum IS NULL THEN excluded.v_sum ELSE v_sum + coalesce(excluded.v_sum, 0) END,
+        v_min = min(coalesce(v_min, excluded.v_min), coalesce(excluded.v_min, v_min)),
+        v_max = max(coalesce(v_max, excluded.v_max), coalesce(excluded.v_max, v_max))
+"""
+
+
+def _bucket_expr(p: RetentionPolicy) -> str:
+    return f"date({p.ts})" if p.bucket == "day" else f"strftime('%Y-%m-%d %H:00:00', {p.ts})"
+
+
+class RetentionRepo:
+    """SQL da compactação. Não faz commit: o comando decide as fronteiras das transações."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def watermark(self, p: RetentionPolicy) -> Optional[datetime]:
+        """Início do primeiro balde ainda não agregado (None = nada agregado)."""
+        last = self.db.execute(
+            select(func.max(SnapshotRollup.bucket_start))
+            .where(SnapshotRollup.source == p.source, SnapshotRollup.bucket == p.bucket)
+        ).scalar()
+        return next_bucket(last, p.bucket) if last else None
+
+    def rollup_raw(self, p: RetentionPolicy, lo: Optional[datetime], hi: datetime) -> int:
+        """INSERT ... SELECT dos baldes em [lo, hi) da tabela bruta. Devolve nº de baldes."""
+        v = p.value
+        sql = f"""
+            INSERT INTO {SnapshotRollup.__tablename__}
+                (source, bucket, bucket_start, key, n, n_distinct, v_sum, v_min, v_max)
+            SELECT :source, :bucket, {_bucket_expr(p)} AS b, {f"coalesce({p.key}, '')" if p.key else "''"} AS k,
+                   count(*),
+                   {f"count(DISTINCT {p.distinct})" if p.distinct else "NULL"},
+                   {f"sum({v}), min({v}), max({v})" if v else "NULL, NULL, NULL"}
+            FROM {p.source}
+            WHERE {p.ts} < :hi {"AND " + p.ts + " >= :lo" if lo else ""}
+            GROUP BY b, k
+            {_MERGE}
+        """
+        params = {"source": p.source, "bucket": p.bucket, "hi": hi.strftime(_TS_FMT)}
+        if lo:
+            params["lo"] = lo.strftime(_TS_FMT)
+        n = self.db.execute(text(sql), params).rowcount or 0
+        if n and p.sketch:
+            self._attach_sketches(p, params)
+        return n
+
+    def _attach_sketches(self, p: RetentionPolicy, params: dict) -> None:
+        """Preenche extra["sketch"] dos baldes acabados de criar (percentis sobrevivem ao DELETE)."""
+        sql = f"""
+            SELECT {_bucket_expr(p)} AS b, {f"coalesce({p.key}, '')" if p.key else "''"} AS k, {", ".join(p.sketch)}
+            FROM {p.source}
+            WHERE {p.ts} < :hi {"AND " + p.ts + " >= :lo" if "lo" in params else ""}
+        """
+        acc: dict[tuple[str, str], list[QuantileSketch]] = {}
+        for b, k, *vals in self.db.execute(text(sql), params):
+            sks = acc.get((b, k))
+            if sks is None:
+                sks = acc[(b, k)] = [QuantileSketch() for _ in p.sketch]
+            for sk, v in zip(sks, vals):
+                sk.add(v)
+        t = SnapshotRollup.__table__
+        self.db.execute(
+            update(t)
+            .where(t.c.source == p.source, t.c.bucket == p.bucket,
+                   t.c.bucket_start == bindparam("b"), t.c.key == bindparam("k"))
+            .values(extra=bindparam("x")),
+            [{"b": b, "k": k, "x": {"sketch": {c: sk.to_dict() for c, sk in zip(p.sketch, sks)}}}
+             for (b, k), sks in acc.items()],
+        )
+
+    def rollup_delta(self, p: RetentionPolicy, lo: Optional[datetime], hi: datetime) -> int:
+        """Agregados diários reconstruídos de snapshot_intervals (modo delta)."""
+        repo = DeltaSnapshotRepo(self.db, p.delta_kind)
+        since = lo or datetime(1970, 1, 1)
+        by_day = dict(repo.daily_status_counts_since(since, until=hi))
+        distinct = dict(repo.daily_distinct_since(since, until=hi)) if p.distinct else {}
+        rows = []
+        for day, by_status in by_day.items():
+            if p.key == "status":
+                rows += [dict(source=p.source, bucket=p.bucket, bucket_start=day, key=st, n=n, n_distinct=None)
+                         for st, n in by_status.items()]
+            else:
+                rows.append(dict(source=p.source, bucket=p.bucket, bucket_start=day, key="",
+                                 n=sum(by_status.values()), n_distinct=distinct.get(day)))
+        if rows:
+            # junta-se ao que rollup_raw já tenha posto no mesmo balde (dia da troca full <-> delta)
+            self.db.execute(text(f"""
+                INSERT INTO {SnapshotRollup.__tablename__} (source, bucket, bucket_start, key, n, n_distinct)
+                VALUES (:source, :bucket, :bucket_start, :key, :n, :n_distinct)
+                {_MERGE}
+            """), rows)
+        return len(rows)
+
+    def delete_raw_chunk(self, p: RetentionPolicy, cutoff: datetime, limit: int) -> int:
+        keep = (
+            f"AND id NOT IN (SELECT max(id) FROM {p.source} GROUP BY {p.keep_latest_by})"
+            if p.keep_latest_by else ""
+        )
+        ids = self.db.execute(
+            text(f"SELECT id FROM {p.source} WHERE {p.ts} < :cutoff {keep} LIMIT :n"),
+            {"cutoff": cutoff.strftime(_TS_FMT), "n": limit},
+        ).scalars().all()
+        if ids:
+            self.db.execute(text(f"DELETE FROM {p.source} WHERE id IN ({','.join(map(str, ids))})"))
+        return len(ids)
+
+    def delete_delta_chunk(self, p: RetentionPolicy, cutoff: datetime, limit: int) -> int:
+        return DeltaSnapshotRepo(self.db, p.delta_kind).prune_chunk(cutoff, limit)
+
+    def delete_rollups_before(self, day: datetime, *, sources: Optional[Iterable[str]] = None,
+                              exclude: Iterable[str] = ()) -> int:
+        q = delete(SnapshotRollup).where(SnapshotRollup.bucket_start < day.strftime("%Y-%m-%d"))
+        if sources is not None:
+            sources = list(sources)
+            if not sources:
+                return 0
+            q = q.where(SnapshotRollup.source.in_(sources))
+        exclude = list(exclude)
+        if exclude:
+            q = q.where(SnapshotRollup.source.not_in(exclude))
+        return self.db.execute(q).rowcount or 0
+
+    def delete_pagespeed_rollups_before(self, bucket: str, day: datetime) -> int:
+        res = self.db.execute(
+            delete(PageSpeedRollup)
+            .where(PageSpeedRollup.bucket == bucket, PageSpeedRollup.bucket_start < day.strftime("%Y-%m-%d"))
+        )
+        return res.rowcount or 0
+
+    # ---- espaço em disco ----
+    def vacuum(self, pages: int) -> str:
+        """
+        Devolve páginas livres ao SO com incremental_vacuum(pages) e trunca o
+        WAL. Numa base antiga (auto_vacuum != INCREMENTAL) só faz o checkpoint:
+        a conversão é um VACUUM completo (lock exclusivo, ~2x o disco) e fica
+        para convert_incremental, fora do job agendado.
+        Corre fora da transação da sessão.
+        """
+        engine = self.db.get_bind()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+            if mode == 2:
+                conn.execute(text(f"PRAGMA incremental_vacuum({int(pages)})"))
+                action = "incremental"
+            else:
+                log.warning("auto_vacuum=%s: skipping vacuum; convert with "
+                            "python -m app.services.commands.maintenance.vacuum_convert", mode)
+                action = "skipped"
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        return action
+
+    def convert_incremental(self) -> bool:
+        """
+        Passa a base para auto_vacuum=INCREMENTAL (VACUUM completo: reescreve
+        o ficheiro com lock exclusivo). False se já estava convertida.
+        """
+        engine = self.db.get_bind()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+                return False
+            conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        return True
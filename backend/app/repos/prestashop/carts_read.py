@@ -2,7 +2,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, select
 
+from app.core.config import settings
 from app.models.prestashop import AbandonedCartSnapshot
+from app.repos.shared.delta import DeltaSnapshotRepo, KIND_CARTS
+from app.repos.shared.pointers import SnapshotPointerRepo, CARTS_STALE
+from app.repos.shared.rollups import RollupReadRepo
 
 def _row(r: AbandonedCartSnapshot) -> dict:
     return {
@@ -15,10 +19,25 @@ def _row(r: AbandonedCartSnapshot) -> dict:
     }
 
 class CartsReadRepo:
-    def __init__(self, db: Session): self.db = db
+    def __init__(self, db: Session):
+        self.db = db
+        self._delta = DeltaSnapshotRepo(db, KIND_CARTS) if settings.PS_SNAPSHOT_STORAGE == "delta" else None
 
     def latest(self) -> list[dict]:
-        ts = self.db.query(func.max(AbandonedCartSnapshot.observed_at)).scalar()
+        if self._delta is not None:
+            rows = [{
+                "id_cart": r.entity_id,
+                "id_customer": r.data.get("id_customer"),
+                "items": r.data.get("items"),
+                "hours_stale": r.data.get("hours_stale"),
+                "status": r.status,
+                "observed_at": r.last_seen_at,
+            } for r in self._delta.current()]
+            rows.sort(key=lambda r: (r["hours_stale"] or 0, r["id_cart"]), reverse=True)
+            return rows
+        ptr = SnapshotPointerRepo(self.db).get(CARTS_STALE)
+        ts = ptr.observed_at if ptr is not None else \
+            self.db.query(func.max(AbandonedCartSnapshot.observed_at)).scalar()
         if not ts:
             return []
         q = (self.db.query(AbandonedCartSnapshot)
@@ -28,16 +47,26 @@ class CartsReadRepo:
         return [_row(r) for r in q.all()]
 
     def distinct_count_since(self, since_dt) -> int:
+        if self._delta is not None:
+            return self._delta.distinct_since(since_dt)
         q = select(func.count(func.distinct(AbandonedCartSnapshot.id_cart))).where(AbandonedCartSnapshot.observed_at >= since_dt)
         return int(self.db.execute(q).scalar() or 0)
 
     def daily_series_since(self, since_dt) -> list[dict]:
-        day = func.date(AbandonedCartSnapshot.observed_at)
-        q = (
-            select(day.label("d"), func.count(func.distinct(AbandonedCartSnapshot.id_cart)).label("cnt"))
-            .where(AbandonedCartSnapshot.observed_at >= since_dt)
-            .group_by(day)
-            .order_by(day)
+        if self._delta is not None:
+            series = [{"ts": d, "count": n} for d, n in self._delta.daily_distinct_since(since_dt)]
+        else:
+            day = func.date(AbandonedCartSnapshot.observed_at)
+            q = (
+                select(day.label("d"), func.count(func.distinct(AbandonedCartSnapshot.id_cart)).label("cnt"))
+                .where(AbandonedCartSnapshot.observed_at >= since_dt)
+                .group_by(day)
+                .order_by(day)
+            )
+            rows = self.db.execute(q).all()
+            series = [{"ts": str(r.d), "count": int(r.cnt)} for r in rows]
+        # dias já compactados pela retenção
+        return RollupReadRepo(self.db).backfill_daily(
+            series, AbandonedCartSnapshot.__tablename__, since_dt,
+            lambda by: {"count": int(by[""].n_distinct or 0)},
         )
-        rows = self.db.execute(q).all()
-        return [{"ts": str(r.d), "count": int(r.cnt)} for r in rows]
\ No newline at end of file
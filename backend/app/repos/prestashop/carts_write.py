@@ -1,13 +1,20 @@
 # app/repos/prestashop/carts_write.py
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.prestashop import AbandonedCartSnapshot
 from app.domains.prestashop.carts.types import AbandonedCart
+from app.repos.shared.bulk import bulk_insert
+from app.repos.shared.delta import DeltaSnapshotRepo, KIND_CARTS
 
 class CartsWriteRepo:
     def __init__(self, db: Session): self.db = db
-    def insert_many(self, items: list[AbandonedCart], observed_at):
-        rows = [AbandonedCartSnapshot(
+    def insert_many(self, items: list[AbandonedCart], observed_at) -> int:
+        if settings.PS_SNAPSHOT_STORAGE == "delta":
+            rows = ((i.id_cart, i.status.value,
+                     dict(id_customer=i.id_customer, items=i.items, hours_stale=i.hours_stale)) for i in items)
+            return DeltaSnapshotRepo(self.db, KIND_CARTS).record(observed_at, rows, volatile=("hours_stale",))
+        rows = (dict(
             id_cart=i.id_cart, id_customer=i.id_customer, items=i.items,
             hours_stale=i.hours_stale, status=i.status.value, observed_at=observed_at
-        ) for i in items]
-        self.db.add_all(rows); return len(rows)
+        ) for i in items)
+        return bulk_insert(self.db, AbandonedCartSnapshot, rows)
@@ -1,21 +1,55 @@
 # repos/prestashop/eol_read.py
 from sqlalchemy import select, func, desc, case
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.prestashop import EOLProductSnapshot as EPS
+from app.repos.shared.delta import DeltaSnapshotRepo, KIND_EOL, dt_from_json
+from app.repos.shared.pointers import SnapshotPointerRepo, EOL_PRODUCTS
+from app.repos.shared.rollups import RollupReadRepo
+
+_SEV = {"critical": 0, "warning": 1}
 
 class EOLOutReadRepo:
     def __init__(self, db: Session):
         self.db = db
+        self._delta = DeltaSnapshotRepo(db, KIND_EOL) if settings.PS_SNAPSHOT_STORAGE == "delta" else None
+
+    def _latest_obs(self):
+        """observed_at da última run: ponteiro publicado pelo ingest (PK); max() só sem ponteiro."""
+        ptr = SnapshotPointerRepo(self.db).get(EOL_PRODUCTS)
+        if ptr is not None:
+            return ptr.observed_at
+        return self.db.execute(select(func.max(EPS.observed_at))).scalar()
+
+    def _delta_latest_by_product(self) -> list[dict]:
+        out = []
+        for r in self._delta.current():
+            d = r.data
+            out.append({
+                "id_product": r.entity_id,
+                "name": d.get("name"),
+                "reference": d.get("reference"),
+                "ean13": d.get("ean13"),
+                "upc": d.get("upc"),
+                "price": float(d.get("price") or 0),
+                "last_in_stock_at": dt_from_json(d.get("last_in_stock_at")),
+                "days_since": d.get("days_since"),
+                "status": r.status,
+                "observed_at": r.last_seen_at,
+            })
+        out.sort(key=lambda r: (_SEV.get(r["status"], 2), -(r["days_since"] or 0), -r["price"]))
+        return out
 
     def latest_by_product(self) -> list[dict]:
-        subq = (
-            select(
-                EPS.product_id.label("pid"),
-                func.max(EPS.observed_at).label("max_obs"),
-            )
-            .group_by(EPS.product_id)
-            .subquery()
-        )
+        """
+        Produtos da última run do ingest (que já deduplica por produto).
+        Produtos que deixaram de vir no feed EOL não aparecem.
+        """
+        if self._delta is not None:
+            return self._delta_latest_by_product()
+        max_obs = self._latest_obs()
+        if max_obs is None:
+            return []
 
         sev = case(
             (EPS.status == "critical", 0),
@@ -25,7 +59,7 @@ class EOLOutReadRepo:
 
         q = (
             select(EPS, sev)
-            .join(subq, (EPS.product_id == subq.c.pid) & (EPS.observed_at == subq.c.max_obs))
+            .where(EPS.observed_at == max_obs)
             .order_by(sev, desc(EPS.days_since), desc(EPS.price))
         )
 
@@ -46,8 +80,19 @@ class EOLOutReadRepo:
         return out
 
     def counts(self) -> dict:
-        q = select(EPS.status, func.count()).group_by(EPS.status)
-        by = {k: v for k, v in self.db.execute(q).all()}
+        # linhas brutas só depois do último dia compactado (o que fica antes, p.ex. por
+        # keep_latest_by, já está nos agregados) + linhas já compactadas pela retenção
+        rollups = RollupReadRepo(self.db)
+        horizon = rollups.horizon(EPS.__tablename__, "day")
+        if self._delta is not None:
+            by = self._delta.status_counts(since=horizon)
+        else:
+            q = select(EPS.status, func.count()).group_by(EPS.status)
+            if horizon is not None:
+                q = q.where(EPS.observed_at >= horizon)
+            by = {k: v for k, v in self.db.execute(q).all()}
+        for k, n in rollups.totals(EPS.__tablename__).items():
+            by[k] = by.get(k, 0) + n
         total = sum(by.values())
         return {
             "warning": int(by.get("warning", 0)),
@@ -57,6 +102,8 @@ class EOLOutReadRepo:
         }
 
     def latest_status_per_product_since(self, since_dt) -> list[str]:
+        if self._delta is not None:
+            return [r["status"] for r in self._delta.latest_per_entity(since=since_dt)]
         mx = (
             select(EPS.product_id.label("pid"), func.max(EPS.observed_at).label("last_seen"))
             .where(EPS.observed_at >= since_dt)
@@ -70,17 +117,29 @@ class EOLOutReadRepo:
         return [r[0] for r in self.db.execute(q).all()]
 
     def daily_counts_since(self, since_dt) -> list[dict]:
-        day = func.date(EPS.observed_at)
-        warn_cnt = func.sum(case((EPS.status == "warning", 1), else_=0)).label("warn_cnt")
-        crit_cnt = func.sum(case((EPS.status == "critical", 1), else_=0)).label("crit_cnt")
-        q = (
-            select(day.label("d"), warn_cnt, crit_cnt)
-            .where(EPS.observed_at >= since_dt)
-            .group_by(day)
-            .order_by(day)
+        if self._delta is not None:
+            series = [
+                {"ts": d, "warn": by.get("warning", 0), "critical": by.get("critical", 0)}
+                for d, by in self._delta.daily_status_counts_since(since_dt)
+            ]
+        else:
+            day = func.date(EPS.observed_at)
+            warn_cnt = func.sum(case((EPS.status == "warning", 1), else_=0)).label("warn_cnt")
+            crit_cnt = func.sum(case((EPS.status == "critical", 1), else_=0)).label("crit_cnt")
+            q = (
+                select(day.label("d"), warn_cnt, crit_cnt)
+                .where(EPS.observed_at >= since_dt)
+                .group_by(day)
+                .order_by(day)
+            )
+            rows = self.db.execute(q).all()
+            series = [
+                {"ts": str(r.d), "warn": int(r.warn_cnt or 0), "critical": int(r.crit_cnt or 0)}
+                for r in rows
+            ]
+        # dias já compactados pela retenção
+        return RollupReadRepo(self.db).backfill_daily(
+            series, EPS.__tablename__, since_dt,
+            lambda by: {"warn": by["warning"].n if "warning" in by else 0,
+                        "critical": by["critical"].n if "critical" in by else 0},
         )
-        rows = self.db.execute(q).all()
-        return [
-            {"ts": str(r.d), "warn": int(r.warn_cnt or 0), "critical": int(r.crit_cnt or 0)}
-            for r in rows
-        ]
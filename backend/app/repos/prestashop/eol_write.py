@@ -1,30 +1,46 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.prestashop import EOLProductSnapshot
 from app.domains.prestashop.eol.types import EOLProduct
+from app.repos.shared.bulk import bulk_insert
+from app.repos.shared.delta import DeltaSnapshotRepo, KIND_EOL
 from app.shared.status import Status
 
 def _status_str(s: Status | str) -> str:
     return s.value if isinstance(s, Status) else str(s)
 
+def _to_row(item: EOLProduct, observed_at: datetime) -> dict:
+    return dict(
+        product_id=item.id_product,
+        name=item.name,
+        reference=item.reference,
+        ean13=item.ean13,
+        upc=item.upc,
+        price=item.price,
+        last_in_stock_at=item.last_in_stock_at,
+        days_since=item.days_since,
+        status=_status_str(item.status),
+        observed_at=observed_at,
+    )
+
+def _to_data(item: EOLProduct) -> dict:
+    row = _to_row(item, None)
+    for k in ("product_id", "status", "observed_at"):
+        row.pop(k)
+    return row
+
 class EOLOutWriteRepo:
     def __init__(self, db: Session): self.db = db
 
     def insert_snapshot(self, item: EOLProduct, observed_at: datetime) -> None:
-        self.db.add(EOLProductSnapshot(
-            product_id=item.id_product,
-            name=item.name,
-            reference=item.reference,
-            ean13=item.ean13,
-            upc=item.upc,
-            price=item.price,
-            last_in_stock_at=item.last_in_stock_at,
-            days_since=item.days_since,
-            status=_status_str(item.status),
-            observed_at=observed_at,
-        ))
+        self.db.add(EOLProductSnapshot(**_to_row(item, observed_at)))
 
     def insert_many(self, items: list[EOLProduct], observed_at: datetime) -> int:
-        for it in items:
-            self.insert_snapshot(it, observed_at)
-        return len(items)
+        if settings.PS_SNAPSHOT_STORAGE == "delta":
+            return DeltaSnapshotRepo(self.db, KIND_EOL).record(
+                observed_at,
+                ((it.id_product, _status_str(it.status), _to_data(it)) for it in items),
+                volatile=("days_since",),
+            )
+        return bulk_insert(self.db, EOLProductSnapshot, (_to_row(it, observed_at) for it in items))
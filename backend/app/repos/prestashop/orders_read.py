@@ -1,17 +1,55 @@
 from sqlalchemy import select, func, case, desc
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.prestashop import DelayedOrderSnapshot as DOS
+from app.repos.shared.delta import DeltaSnapshotRepo, KIND_ORDERS, dt_from_json
+from app.repos.shared.pointers import SnapshotPointerRepo, ORDERS_DELAYED
+from app.repos.shared.rollups import RollupReadRepo
+
+_SEV = {"critical": 0, "warning": 1}
 
 class OrdersReadRepo:
-    def __init__(self, db: Session): self.db = db
+    def __init__(self, db: Session):
+        self.db = db
+        self._delta = DeltaSnapshotRepo(db, KIND_ORDERS) if settings.PS_SNAPSHOT_STORAGE == "delta" else None
+
+    def _latest_obs(self):
+        """observed_at da última run: ponteiro publicado pelo ingest (PK); max() só sem ponteiro."""
+        ptr = SnapshotPointerRepo(self.db).get(ORDERS_DELAYED)
+        if ptr is not None:
+            return ptr.observed_at
+        return self.db.execute(select(func.max(DOS.observed_at))).scalar()
+
+    def _delta_latest(self) -> list[dict]:
+        out = []
+        for r in self._delta.current():
+            d = r.data
+            out.append({
+                "id_order": r.entity_id,
+                "reference": d.get("reference"),
+                "date_add": dt_from_json(d.get("date_add")),
+                "days_passed": d.get("days_passed"),
+                "id_state": d.get("id_state"),
+                "state_name": d.get("state_name"),
+                "dropshipping": d.get("dropshipping"),
+                "status": r.status,
+                "observed_at": r.last_seen_at,
+            })
+        return out
 
     def latest_by_run(self, include_ok: bool = False) -> list[dict]:
         """
         Devolve TODOS os snapshots da run mais recente (mesmo observed_at).
         Por defeito exclui 'ok' (apenas atrasadas: warning|critical).
         """
-        # max(observed_at) global = última run
-        max_obs = select(func.max(DOS.observed_at)).scalar_subquery()
+        if self._delta is not None:
+            rows = [r for r in self._delta_latest() if include_ok or r["status"] in _SEV]
+            rows.sort(key=lambda r: (_SEV.get(r["status"], 2), -(r["days_passed"] or 0)))
+            return rows
+
+        max_obs = self._latest_obs()
+        if max_obs is None:
+            return []
 
         sev = case(
             (DOS.status == "critical", 0),
@@ -58,7 +96,11 @@ class OrdersReadRepo:
         return out
 
     def latest_counts_by_type(self) -> dict:
-        max_obs = select(func.max(DOS.observed_at)).scalar_subquery()
+        if self._delta is not None:
+            late = [r for r in self._delta_latest() if r["status"] in _SEV]
+            ds = sum(1 for r in late if r["dropshipping"])
+            return {"total": len(late), "std": len(late) - ds, "dropship": ds}
+        max_obs = self._latest_obs()
         std_cnt = func.sum(case((DOS.dropshipping.is_(False), 1), else_=0)).label("std_cnt")
         ds_cnt = func.sum(case((DOS.dropshipping.is_(True), 1), else_=0)).label("ds_cnt")
         total = func.count().label("total")
@@ -75,12 +117,19 @@ class OrdersReadRepo:
         }
 
     def daily_series_since(self, since_dt) -> list[dict]:
-        day = func.date(DOS.observed_at)
-        q = (
-            select(day.label("d"), func.count(func.distinct(DOS.id_order)).label("cnt"))
-            .where(DOS.observed_at >= since_dt)
-            .group_by(day)
-            .order_by(day)
+        if self._delta is not None:
+            series = [{"ts": d, "total": n} for d, n in self._delta.daily_distinct_since(since_dt)]
+        else:
+            day = func.date(DOS.observed_at)
+            q = (
+                select(day.label("d"), func.count(func.distinct(DOS.id_order)).label("cnt"))
+                .where(DOS.observed_at >= since_dt)
+                .group_by(day)
+                .order_by(day)
+            )
+            rows = self.db.execute(q).all()
+            series = [{"ts": str(r.d), "total": int(r.cnt)} for r in rows]
+        # dias já compactados pela retenção
+        return RollupReadRepo(self.db).backfill_daily(
+            series, DOS.__tablename__, since_dt, lambda by: {"total": int(by[""].n_distinct or 0)}
         )
-        rows = self.db.execute(q).all()
-        return [{"ts": str(r.d), "total": int(r.cnt)} for r in rows]
\ No newline at end of file
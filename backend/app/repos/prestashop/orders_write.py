@@ -1,25 +1,46 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.prestashop import DelayedOrderSnapshot
 from app.domains.prestashop.orders.types import DelayedOrder
+from app.repos.shared.bulk import bulk_insert
+from app.repos.shared.delta import DeltaSnapshotRepo, KIND_ORDERS
 from app.shared.status import Status  # 👈
 
 def _status_str(s: Status | str) -> str:
     return s.value if isinstance(s, Status) else str(s)
 
+def _to_row(item: DelayedOrder, observed_at: datetime) -> dict:
+    return dict(
+        id_order=item.id_order,
+        reference=item.reference,
+        date_add=item.date_add,
+        days_passed=item.days_passed,
+        id_state=item.id_state,
+        state_name=item.state_name,
+        dropshipping=item.dropshipping,
+        status=_status_str(item.status),
+        observed_at=observed_at,
+    )
+
+def _to_data(item: DelayedOrder) -> dict:
+    row = _to_row(item, None)
+    for k in ("id_order", "status", "observed_at"):
+        row.pop(k)
+    return row
+
 class OrdersWriteRepo:
     def __init__(self, db: Session):
         self.db = db
 
     def insert_snapshot(self, item: DelayedOrder, observed_at: datetime) -> None:
-        self.db.add(DelayedOrderSnapshot(
-            id_order=item.id_order,
-            reference=item.reference,
-            date_add=item.date_add,
-            days_passed=item.days_passed,
-            id_state=item.id_state,
-            state_name=item.state_name,
-            dropshipping=item.dropshipping,
-            status=_status_str(item.status),
-            observed_at=observed_at,
-        ))
+        self.db.add(DelayedOrderSnapshot(**_to_row(item, observed_at)))
+
+    def insert_many(self, items: list[DelayedOrder], observed_at: datetime) -> int:
+        if settings.PS_SNAPSHOT_STORAGE == "delta":
+            return DeltaSnapshotRepo(self.db, KIND_ORDERS).record(
+                observed_at,
+                ((it.id_order, _status_str(it.status), _to_data(it)) for it in items),
+                volatile=("days_passed",),
+            )
+        return bulk_insert(self.db, DelayedOrderSnapshot, (_to_row(it, observed_at) for it in items))
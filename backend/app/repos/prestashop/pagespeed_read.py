@@ -4,6 +4,8 @@ from typing import Iterable, List, Dict
 from sqlalchemy import select, func, Integer
 from sqlalchemy.orm import Session
 from app.models.prestashop import PageSpeedSnapshot as PSS
+from app.models.rollups import PageSpeedRollup as PSR
+from app.shared.quantiles import QuantileSketch
 
 class PageSpeedReadRepo:
     def __init__(self, db: Session):
@@ -12,19 +14,20 @@ class PageSpeedReadRepo:
         self._has_severity = hasattr(PSS, "severity")
         self._has_status_code = hasattr(PSS, "status_code")
 
-    def latest_by_page_type(self) -> list[dict]:
+    def latest_by_url(self) -> list[dict]:
+        """Última amostra de cada URL (ordenada por grupo e URL)."""
         sub = (
             select(
-                PSS.page_type,
+                PSS.url,
                 func.max(PSS.observed_at).label("max_obs"),
             )
-            .group_by(PSS.page_type)
+            .group_by(PSS.url)
             .subquery()
         )
         q = (
             self.db.query(PSS)
-            .join(sub, (PSS.page_type == sub.c.page_type) & (PSS.observed_at == sub.c.max_obs))
-            .order_by(PSS.page_type.asc())
+            .join(sub, (PSS.url == sub.c.url) & (PSS.observed_at == sub.c.max_obs))
+            .order_by(PSS.page_type.asc(), PSS.url.asc())
         )
         rows = []
         for r in q.all():
@@ -51,6 +54,18 @@ class PageSpeedReadRepo:
         )
         return [int(r[0] or 0) for r in self.db.execute(q).all()]
 
+    def ttfb_by_group_since(self, since_dt) -> dict[str, dict[str, list[int]]]:
+        """TTFB por grupo e URL desde since_dt: {page_type: {url: [ttfb, ...]}}."""
+        q = (
+            select(PSS.page_type, PSS.url, PSS.ttfb_ms)
+            .where(PSS.observed_at >= since_dt)
+            .order_by(PSS.observed_at.asc())
+        )
+        out: dict[str, dict[str, list[int]]] = {}
+        for ptype, url, ttfb in self.db.execute(q).all():
+            out.setdefault(ptype, {}).setdefault(url, []).append(int(ttfb or 0))
+        return out
+
     def last_status(self, page_type: str) -> str | None:
         if self._has_status:
             q = (
@@ -65,16 +80,21 @@ class PageSpeedReadRepo:
             return "error" if str(val).lower().strip() == "error" else "ok"
 
         if self._has_severity:
+            # o grupo pode ter vários URLs por run: olha para todo o último lote
+            last_obs = (
+                select(func.max(PSS.observed_at))
+                .where(PSS.page_type == page_type)
+                .scalar_subquery()
+            )
             q = (
                 select(PSS.severity)
                 .where(PSS.page_type == page_type)
-                .order_by(PSS.observed_at.desc())
-                .limit(1)
+                .where(PSS.observed_at == last_obs)
             )
-            sev = self.db.execute(q).scalar()
-            if sev is None:
+            sevs = [str(v or "").lower().strip() for v in self.db.execute(q).scalars().all()]
+            if not sevs:
                 return None
-            return "error" if str(sev).lower().strip() == "critical" else "ok"
+            return "error" if "critical" in sevs else "ok"
 
         if self._has_status_code:
             q = (
@@ -135,3 +155,34 @@ class PageSpeedReadRepo:
 
         # ordena por bsec
         return [by_bucket[k] for k in sorted(by_bucket.keys())]
+
+    # ---------------- agregados (pagespeed_rollups) ----------------
+    def rollup_sketches(self, ranges: Iterable[tuple[str, str, str]]) -> dict[str, dict[str, QuantileSketch]]:
+        """
+        Sketch do TTFB por grupo e URL, juntando os baldes de cada intervalo
+        (level, início, fim): {page_type: {url: sketch}}; url "" = grupo.
+        """
+        out: dict[str, dict[str, QuantileSketch]] = {}
+        for level, lo, hi in ranges:
+            q = (
+                select(PSR.page_type, PSR.url, PSR.sketch)
+                .where(PSR.bucket == level, PSR.bucket_start >= lo, PSR.bucket_start < hi)
+            )
+            for ptype, url, sketch in self.db.execute(q).all():
+                per_url = out.setdefault(ptype, {})
+                sk = QuantileSketch.from_dict(sketch)
+                if url in per_url:
+                    per_url[url].merge(sk)
+                else:
+                    per_url[url] = sk
+        return out
+
+    def rollup_series(self, page_types: Iterable[str], level: str, start: str) -> list[tuple[str, str, int, float]]:
+        """(bucket_start, page_type, n, soma do TTFB) dos agregados de grupo, por ordem de balde."""
+        q = (
+            select(PSR.bucket_start, PSR.page_type, PSR.n, PSR.v_sum)
+            .where(PSR.bucket == level, PSR.url == "", PSR.bucket_start >= start)
+            .where(PSR.page_type.in_(list(page_types)))
+            .order_by(PSR.bucket_start)
+        )
+        return [tuple(r) for r in self.db.execute(q).all()]
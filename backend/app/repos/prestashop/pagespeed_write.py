@@ -1,22 +1,112 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.orm import Session
 from app.models.prestashop import PageSpeedSnapshot
+from app.models.rollups import PageSpeedRollup
 from app.domains.prestashop.pagespeed.types import PageSpeed
+from app.domains.prestashop.pagespeed.rollups import LEVELS, bucket_start
+from app.repos.shared.bulk import bulk_insert
+from app.shared.quantiles import QuantileSketch
+
+_PSR = PageSpeedRollup.__table__
+
+def _to_row(item: PageSpeed, observed_at) -> dict:
+    return dict(
+        page_type=item.page_type,
+        url=item.url,
+        status_code=item.status_code,
+        severity=item.status.value,
+        ttfb_ms=item.ttfb_ms,
+        total_ms=item.total_ms,
+        html_bytes=item.html_bytes,
+        headers=item.headers,
+        sanity=item.sanity,
+        observed_at=observed_at,
+    )
+
+def _rollup_values(sk: QuantileSketch) -> dict:
+    return dict(n=sk.count, v_sum=sk.sum, v_min=sk.min, v_max=sk.max, sketch=sk.to_dict())
 
 class PageSpeedWriteRepo:
     def __init__(self, db: Session):
         self.db = db
 
     def insert_snapshot(self, item: PageSpeed, observed_at) -> None:
-        row = PageSpeedSnapshot(
-            page_type=item.page_type,
-            url=item.url,
-            status_code=item.status_code,
-            severity=item.status.value,
-            ttfb_ms=item.ttfb_ms,
-            total_ms=item.total_ms,
-            html_bytes=item.html_bytes,
-            headers=item.headers,
-            sanity=item.sanity,
-            observed_at=observed_at,
+        self.db.add(PageSpeedSnapshot(**_to_row(item, observed_at)))
+
+    def insert_many(self, items: list[PageSpeed], observed_at) -> int:
+        return bulk_insert(self.db, PageSpeedSnapshot, (_to_row(it, observed_at) for it in items))
+
+    # ---------------- agregados (pagespeed_rollups) ----------------
+    def add_to_rollups(self, samples: Iterable[tuple[datetime, str, str, int]]) -> int:
+        """
+        Junta amostras (observed_at, page_type, url, ttfb_ms) aos agregados de
+        cada balde, por URL e por grupo (url ""). Lê-modifica-escreve os
+        baldes tocados: só o worker escreve nesta tabela.
+        Não faz commit. Devolve o nº de baldes tocados.
+        """
+        acc: dict[tuple[str, str, str, str], QuantileSketch] = {}
+        for obs, ptype, url, ttfb in samples:
+            v = int(ttfb or 0)
+            for level in LEVELS:
+                start = bucket_start(obs, level)
+                for u in ("", url):
+                    key = (level, start, ptype, u)
+                    sk = acc.get(key)
+                    if sk is None:
+                        sk = acc[key] = QuantileSketch()
+                    sk.add(v)
+        if not acc:
+            return 0
+
+        # baldes já existentes: um SELECT por nível, limitado ao intervalo tocado
+        existing: dict[tuple[str, str, str, str], tuple[int, dict]] = {}
+        for level in LEVELS:
+            starts = [k[1] for k in acc if k[0] == level]
+            q = (
+                select(_PSR.c.id, _PSR.c.bucket_start, _PSR.c.page_type, _PSR.c.url, _PSR.c.sketch)
+                .where(_PSR.c.bucket == level, _PSR.c.bucket_start.between(min(starts), max(starts)))
+                .where(_PSR.c.page_type.in_({k[2] for k in acc}))
+            )
+            for r in self.db.execute(q).all():
+                existing[(level, r.bucket_start, r.page_type, r.url)] = (r.id, r.sketch)
+
+        updates, inserts = [], []
+        for (level, start, ptype, url), sk in acc.items():
+            old = existing.get((level, start, ptype, url))
+            if old is not None:
+                sk = QuantileSketch.from_dict(old[1]).merge(sk)
+                updates.append({"rid": old[0], **_rollup_values(sk)})
+            else:
+                inserts.append(dict(bucket=level, bucket_start=start, page_type=ptype, url=url, **_rollup_values(sk)))
+        if updates:
+            self.db.execute(
+                update(_PSR).where(_PSR.c.id == bindparam("rid")).values(
+                    n=bindparam("n"), v_sum=bindparam("v_sum"), v_min=bindparam("v_min"),
+                    v_max=bindparam("v_max"), sketch=bindparam("sketch"),
+                ),
+                updates,
+            )
+        bulk_insert(self.db, PageSpeedRollup, inserts)
+        return len(acc)
+
+    def has_rollups(self) -> bool:
+        return self.db.execute(select(_PSR.c.id).limit(1)).first() is not None
+
+    def backfill_rollups(self, chunk: int = 5000) -> int:
+        """Constrói os agregados a partir das linhas brutas existentes (uma vez, após o deploy)."""
+        q = (
+            select(PageSpeedSnapshot.observed_at, PageSpeedSnapshot.page_type,
+                   PageSpeedSnapshot.url, PageSpeedSnapshot.ttfb_ms)
+            .order_by(PageSpeedSnapshot.id)
+            .execution_options(yield_per=chunk)
         )
-        self.db.add(row)
+        n = 0
+        for part in self.db.execute(q).partitions(chunk):
+            self.add_to_rollups(part)
+            n += len(part)
+        return n
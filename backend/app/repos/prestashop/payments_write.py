@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.models.prestashop import PaymentMethodStatus
 from app.domains.prestashop.payments.types import PaymentMethod
+from app.repos.shared.bulk import bulk_insert
 from app.shared.status import Status  # Enum
 
 def _status_str(s: Status | str) -> str:
@@ -15,30 +16,21 @@ def _finite_or_none(v: float | None) -> float | None:
         return None
     return v if isfinite(v) else None  # evita 'inf' no SQLite
 
+def _to_row(item: PaymentMethod, observed_at: datetime) -> dict:
+    return dict(
+        method=item.method,
+        last_payment_at=item.last_payment_at,
+        hours_since_last=_finite_or_none(item.hours_since_last),
+        status=_status_str(item.status),           # <-- guarda string
+        observed_at=observed_at,
+    )
+
 class PaymentsWriteRepo:
     def __init__(self, db: Session):
         self.db = db
 
     def insert_snapshot(self, item: PaymentMethod, observed_at: datetime) -> None:
-        row = PaymentMethodStatus(
-            method=item.method,
-            last_payment_at=item.last_payment_at,
-            hours_since_last=_finite_or_none(item.hours_since_last),
-            status=_status_str(item.status),           # <-- guarda string
-            observed_at=observed_at,
-        )
-        self.db.add(row)
+        self.db.add(PaymentMethodStatus(**_to_row(item, observed_at)))
 
     def insert_many(self, items: list[PaymentMethod], observed_at: datetime) -> int:
-        rows = [
-            PaymentMethodStatus(
-                method=i.method,
-                last_payment_at=i.last_payment_at,
-                hours_since_last=_finite_or_none(i.hours_since_last),
-                status=_status_str(i.status),          # <-- guarda string
-                observed_at=observed_at,
-            )
-            for i in items
-        ]
-        self.db.add_all(rows)
-        return len(rows)
+        return bulk_insert(self.db, PaymentMethodStatus, (_to_row(i, observed_at) for i in items))
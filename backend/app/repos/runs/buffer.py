@@ -0,0 +1,42 @@
+# app/repos/runs/buffer.py
+"""
+Buffer em memória das runs (RUNS_BUFFERED): RunsWriteRepo.record_run
+acumula aqui (só depois do commit da transação do job; num rollback a run
+é descartada) e o job runs.flush grava tudo num só INSERT/commit a cada
+RUNS_FLUSH_INTERVAL_S. O worker volta a fazer flush no shutdown (também em
+SIGTERM e atexit); só um crash duro (SIGKILL, falta de luz) perde as runs
+ainda por gravar, que são no máximo as de um intervalo.
+
+As runs buffered chegam à API (change feed, /runs) com esse atraso; as
+snapshots continuam a ser avisadas na transação do job.
+"""
+from __future__ import annotations
+
+import threading
+
+
+class RunBuffer:
+    def __init__(self) -> None:
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()  # jobs síncronos correm no thread pool do scheduler
+
+    def add(self, row: dict) -> None:
+        with self._lock:
+            self._rows.append(row)
+
+    def drain(self) -> list[dict]:
+        with self._lock:
+            rows, self._rows = self._rows, []
+        return rows
+
+    def requeue(self, rows: list[dict]) -> None:
+        """Devolve um lote que não foi gravado (à frente, para manter a ordem)."""
+        with self._lock:
+            self._rows[:0] = rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+
+RUN_BUFFER = RunBuffer()
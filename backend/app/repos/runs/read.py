@@ -46,3 +46,9 @@ class RunsReadRepo:
                 "created_at": getattr(r, "created_at", None),
             })
         return out
+
+    def durations_since(self, since) -> List[tuple]:
+        """(check_name, status, duration_ms) de cada run desde `since`."""
+        c = CheckRun
+        q = select(c.check_name, c.status, c.duration_ms).where(c.created_at >= since)
+        return [tuple(r) for r in self.db.execute(q).all()]
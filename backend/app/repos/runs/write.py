@@ -1,21 +1,84 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+
+from app.core.config import settings
 from app.models.runs import CheckRun
+from app.repos.runs.buffer import RUN_BUFFER
+from app.repos.shared.bulk import bulk_insert
+
+
+_STAGED = "runs_buffered"  # chave em Session.info
+
+
+def _status(status: str) -> str:
+    s = (status or "").lower().strip()
+    return "ok" if s == "ok" else "error"
+
+
+# Runs buffered ficam na sessão até ao commit de quem as registou: só entram no
+# RUN_BUFFER se a transação do job (snapshots incluídas) chegar à base de dados.
+# Commit falhado, rollback ou close sem commit -> a run desaparece com as snapshots.
+@event.listens_for(Session, "after_commit")
+def _push_staged_runs(session: Session) -> None:
+    for row in session.info.pop(_STAGED, ()):
+        RUN_BUFFER.add(row)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_staged_runs(session: Session, transaction) -> None:
+    # depois do after_commit (já vazio); savepoints não contam
+    if transaction.parent is None:
+        session.info.pop(_STAGED, None)
+
 
 class RunsWriteRepo:
     def __init__(self, db: Session):
         self.db = db
 
-    def insert_run(self, check_name: str, status: str, duration_ms: int, payload_json: dict | None) -> int:
-        s = (status or "").lower().strip()
-        status_value = "ok" if s == "ok" else "error"
+    def record_run(self, check_name: str, status: str, duration_ms: int, payload_json: dict | None) -> None:
+        """
+        Regista a run sem commit: entra na transação de quem chama (a mesma
+        das snapshots do job). Com RUNS_BUFFERED vai para o buffer do
+        processo e é gravada em lote pelo job runs.flush (ver
+        app/repos/runs/buffer.py) quando a transação fizer commit.
+        """
+        if settings.RUNS_BUFFERED:
+            if not self.db.in_transaction():
+                self.db.begin()  # como o db.add: a run fica presa a esta transação
+            # created_at da run, não do flush; UTC como o CURRENT_TIMESTAMP do server_default
+            self.db.info.setdefault(_STAGED, []).append({
+                "check_name": check_name,
+                "status": _status(status),
+                "duration_ms": duration_ms,
+                "payload_json": payload_json or {},
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0),
+            })
+            return
+        self.db.add(CheckRun(
+            check_name=check_name,
+            status=_status(status),
+            duration_ms=duration_ms,
+            payload_json=payload_json or {},
+        ))
 
+    def insert_run(self, check_name: str, status: str, duration_ms: int, payload_json: dict | None) -> int:
+        """Run numa transação própria (commit aqui); devolve o id. Prefira record_run."""
         row = CheckRun(
             check_name=check_name,
-            status=status_value,
+            status=_status(status),
             duration_ms=duration_ms,
             payload_json=payload_json or {},
         )
         self.db.add(row)
+        self.db.flush()  # o id vem do INSERT; sem refresh depois do commit
+        run_id = row.id
         self.db.commit()
-        self.db.refresh(row)
-        return row.id
+        return run_id
+
+    def insert_many(self, rows: list[dict]) -> int:
+        """Runs já preparadas (buffer), em lote; sem commit."""
+        return bulk_insert(self.db, CheckRun, rows)
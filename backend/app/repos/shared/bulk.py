@@ -0,0 +1,32 @@
+# app/repos/shared/bulk.py
+from __future__ import annotations
+
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def bulk_insert(db: Session, model, rows: Iterable[dict], *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    INSERT em lote (executemany do Core) na transação corrente da sessão.
+
+    Não cria objetos ORM nem passa pelo unit-of-work; não faz commit
+    (fica a cargo do comando, como nos restantes write repos).
+    Todas as linhas devem ter as mesmas chaves. Devolve o nº de linhas inseridas.
+    """
+    stmt = insert(model.__table__)
+    n = 0
+    for batch in _chunks(rows, max(1, chunk_size)):
+        db.execute(stmt, batch)
+        n += len(batch)
+    return n
@@ -0,0 +1,67 @@
+# app/repos/shared/changes.py
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.runs import CheckRun
+from app.models.snapshots import SnapshotPointer
+
+
+class ChangeReadRepo:
+    """
+    Leituras do "bus" de alterações worker -> API: snapshot_pointers (uma
+    linha por check, atualizada na transação da ingestão) e check_runs
+    (append-only, uma linha por execução de job).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def data_version(self) -> Optional[int]:
+        """
+        PRAGMA data_version da ligação atual: muda quando outra ligação faz
+        commit. None fora da SQLite (aí lê-se sempre tudo).
+        """
+        if self.db.get_bind().dialect.name != "sqlite":
+            return None
+        return int(self.db.execute(text("PRAGMA data_version")).scalar() or 0)
+
+    def pointers(self) -> dict[str, tuple]:
+        """{check_name: (observed_at, row_count, worst)}"""
+        q = select(SnapshotPointer.check_name, SnapshotPointer.observed_at,
+                   SnapshotPointer.row_count, SnapshotPointer.worst)
+        return {r.check_name: (r.observed_at, r.row_count, r.worst) for r in self.db.execute(q).all()}
+
+    def pointer(self, check_name: str) -> Optional[tuple]:
+        """(observed_at, row_count, worst) de um check, por PK."""
+        r = self.db.execute(
+            select(SnapshotPointer.observed_at, SnapshotPointer.row_count, SnapshotPointer.worst)
+            .where(SnapshotPointer.check_name == check_name)
+        ).first()
+        return tuple(r) if r is not None else None
+
+    def run_bounds(self, check_name: Optional[str] = None) -> tuple[int, int]:
+        """
+        (min(id), max(id)) das runs: muda com cada run nova e quando a
+        compactação apaga as antigas (ids crescentes, apaga-se por baixo).
+        """
+        q = select(func.min(CheckRun.id), func.max(CheckRun.id))
+        if check_name is not None:
+            q = q.where(CheckRun.check_name == check_name)
+        lo, hi = self.db.execute(q).one()
+        return int(lo or 0), int(hi or 0)
+
+    def max_run_id(self) -> int:
+        return int(self.db.execute(select(func.max(CheckRun.id))).scalar() or 0)
+
+    def runs_after(self, run_id: int, limit: int = 500) -> list:
+        q = (
+            select(CheckRun.id, CheckRun.check_name, CheckRun.status, CheckRun.created_at)
+            .where(CheckRun.id > run_id)
+            .order_by(CheckRun.id)
+            .limit(limit)
+        )
+        return self.db.execute(q).all()
@@ -0,0 +1,223 @@
+# app/repos/shared/delta.py
+"""
+Armazenamento de snapshots por alterações (PS_SNAPSHOT_STORAGE=delta).
+
+Cada run deixa de gravar uma cópia de todas as linhas: a entidade tem um
+estado atual (snapshot_state) e um intervalo por versão (snapshot_intervals).
+Uma entidade vista com os mesmos valores só atualiza o estado; um intervalo
+novo abre quando o status ou os valores mudam, ou quando a entidade volta a
+aparecer. Os instantes das runs ficam em snapshot_observations, o que
+permite reconstruir "que linhas existiam na run X" sem as guardar:
+a entidade estava na run t  <=>  valid_from <= t <= coalesce(valid_to, última run).
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.snapshots import SnapshotInterval, SnapshotObservation, SnapshotState
+from app.repos.shared.bulk import bulk_insert
+
+KIND_ORDERS = "orders_delayed"
+KIND_CARTS = "carts_stale"
+KIND_EOL = "eol_products"
+
+_SS = SnapshotState.__table__
+_SI = SnapshotInterval.__table__
+_SO = SnapshotObservation.__table__
+_CHUNK = 500
+
+
+def to_json_value(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+
+def dt_from_json(v: Optional[str]) -> Optional[datetime]:
+    # como o DateTime do SQLite: hora local, sem tzinfo
+    return datetime.fromisoformat(v).replace(tzinfo=None) if v else None
+
+
+class DeltaSnapshotRepo:
+    def __init__(self, db: Session, kind: str):
+        self.db = db
+        self.kind = kind
+
+    # ---------------- escrita ----------------
+    def record(self, observed_at: datetime, rows: Iterable[tuple[int, str, dict]],
+               *, volatile: tuple[str, ...] = ()) -> int:
+        """
+        Regista uma run: rows = (entity_id, status, data). As chaves em
+        `volatile` (contadores de idade que mudam a cada run) não abrem
+        intervalo novo; ficam só com o valor mais recente.
+        Não faz commit. Devolve o nº de entidades observadas.
+        """
+        def key(status: str, data: dict) -> tuple:
+            return status, {k: v for k, v in data.items() if k not in volatile}
+
+        new = {eid: (status, {k: to_json_value(v) for k, v in data.items()}) for eid, status, data in rows}
+        cur = {
+            r.entity_id: r
+            for r in self.db.execute(
+                select(_SS.c.entity_id, _SS.c.status, _SS.c.data, _SS.c.last_seen_at)
+                .where(_SS.c.kind == self.kind)
+            ).all()
+        }
+
+        touched: list[dict] = []
+        opened: list[tuple[int, str, dict]] = []
+        closed = [old for eid, old in cur.items() if eid not in new]
+        for eid, (status, data) in new.items():
+            old = cur.get(eid)
+            if old is not None and key(old.status, old.data) == key(status, data):
+                touched.append({"e": eid, "d": data})
+            else:
+                if old is not None:
+                    closed.append(old)
+                opened.append((eid, status, data))
+
+        if closed:
+            # o intervalo fecha na última run em que a entidade foi vista, com os valores dessa run
+            self.db.execute(
+                update(_SI)
+                .where(_SI.c.kind == self.kind, _SI.c.entity_id == bindparam("e"), _SI.c.valid_to.is_(None))
+                .values(valid_to=bindparam("vt"), data=bindparam("d")),
+                [{"e": o.entity_id, "vt": o.last_seen_at, "d": o.data} for o in closed],
+            )
+            ids = [o.entity_id for o in closed]
+            for i in range(0, len(ids), _CHUNK):
+                self.db.execute(
+                    delete(_SS).where(_SS.c.kind == self.kind, _SS.c.entity_id.in_(ids[i:i + _CHUNK]))
+                )
+        if touched:
+            self.db.execute(
+                update(_SS)
+                .where(_SS.c.kind == self.kind, _SS.c.entity_id == bindparam("e"))
+                .values(data=bindparam("d"), last_seen_at=observed_at),
+                touched,
+            )
+        if opened:
+            bulk_insert(self.db, SnapshotInterval, (
+                dict(kind=self.kind, entity_id=eid, status=st, data=d, valid_from=observed_at, valid_to=None)
+                for eid, st, d in opened
+            ))
+            bulk_insert(self.db, SnapshotState, (
+                dict(kind=self.kind, entity_id=eid, status=st, data=d, since=observed_at, last_seen_at=observed_at)
+                for eid, st, d in opened
+            ))
+        self.db.execute(insert(_SO).values(kind=self.kind, observed_at=observed_at, row_count=len(new)))
+        return len(new)
+
+    # ---------------- leitura ----------------
+    def _last_obs(self):
+        return select(func.max(_SO.c.observed_at)).where(_SO.c.kind == self.kind).scalar_subquery()
+
+    def _end(self):
+        # fim efetivo do intervalo: intervalos abertos vão até à última run
+        return func.coalesce(_SI.c.valid_to, self._last_obs())
+
+    def _observed(self, *cols, since=None, until=None):
+        """(run x intervalo) para cada entidade presente em cada run em [since, until)."""
+        q = (
+            select(*cols)
+            .select_from(_SO)
+            .join(_SI, (_SI.c.kind == _SO.c.kind)
+                  & (_SI.c.valid_from <= _SO.c.observed_at)
+                  & (self._end() >= _SO.c.observed_at))
+            .where(_SO.c.kind == self.kind)
+        )
+        if since is not None:
+            q = q.where(_SO.c.observed_at >= since)
+        if until is not None:
+            q = q.where(_SO.c.observed_at < until)
+        return q
+
+    def current(self) -> list:
+        """Entidades da última run: (entity_id, status, data, last_seen_at)."""
+        q = (
+            select(_SS.c.entity_id, _SS.c.status, _SS.c.data, _SS.c.last_seen_at)
+            .where(_SS.c.kind == self.kind)
+        )
+        return self.db.execute(q).all()
+
+    def latest_per_entity(self, since=None) -> list[dict]:
+        """
+        Última versão de cada entidade alguma vez vista (ou vista desde `since`):
+        {entity_id, status, data, observed_at}.
+        """
+        end = self._end()
+        last = select(_SI.c.entity_id.label("eid"), func.max(_SI.c.valid_from).label("vf")) \
+            .where(_SI.c.kind == self.kind)
+        if since is not None:
+            last = last.where(end >= since)
+        last = last.group_by(_SI.c.entity_id).subquery()
+        q = (
+            select(_SI.c.entity_id, _SI.c.status, _SI.c.data, _SI.c.valid_to)
+            .join(last, (_SI.c.entity_id == last.c.eid) & (_SI.c.valid_from == last.c.vf))
+            .where(_SI.c.kind == self.kind)
+        )
+        rows = self.db.execute(q).all()
+        open_state = {r.entity_id: r for r in self.current()} if any(r.valid_to is None for r in rows) else {}
+        out = []
+        for r in rows:
+            st = open_state.get(r.entity_id) if r.valid_to is None else None
+            if st is not None:
+                out.append({"entity_id": r.entity_id, "status": st.status, "data": st.data, "observed_at": st.last_seen_at})
+            else:
+                out.append({"entity_id": r.entity_id, "status": r.status, "data": r.data, "observed_at": r.valid_to})
+        return out
+
+    def distinct_since(self, since) -> int:
+        q = (
+            select(func.count(func.distinct(_SI.c.entity_id)))
+            .where(_SI.c.kind == self.kind, self._end() >= since)
+        )
+        return int(self.db.execute(q).scalar() or 0)
+
+    def daily_distinct_since(self, since, until=None) -> list[tuple[str, int]]:
+        """Entidades distintas vistas por dia (equivale a count(distinct id) por date(observed_at))."""
+        day = func.date(_SO.c.observed_at)
+        q = self._observed(day.label("d"), func.count(func.distinct(_SI.c.entity_id)).label("cnt"),
+                           since=since, until=until) \
+            .group_by(day).order_by(day)
+        return [(str(r.d), int(r.cnt)) for r in self.db.execute(q).all()]
+
+    def daily_status_counts_since(self, since, until=None) -> list[tuple[str, dict[str, int]]]:
+        """Linhas por dia e status, como se houvesse uma linha por entidade por run."""
+        day = func.date(_SO.c.observed_at)
+        q = self._observed(day.label("d"), _SI.c.status, func.count().label("cnt"), since=since, until=until) \
+            .group_by(day, _SI.c.status).order_by(day)
+        out: dict[str, dict[str, int]] = {}
+        for r in self.db.execute(q).all():
+            out.setdefault(str(r.d), {})[r.status] = int(r.cnt)
+        return list(out.items())
+
+    def status_counts(self, since=None) -> dict[str, int]:
+        """Total de linhas por status em todas as runs (desde `since`, se vier)."""
+        q = self._observed(_SI.c.status, func.count(), since=since).group_by(_SI.c.status)
+        return {k: int(v) for k, v in self.db.execute(q).all()}
+
+    # ---------------- retenção ----------------
+    def prune_chunk(self, cutoff: datetime, limit: int) -> int:
+        """
+        Apaga até `limit` intervalos fechados antes de `cutoff` e os instantes
+        de run anteriores (não afetam a reconstrução de dias >= cutoff).
+        """
+        ids = self.db.execute(
+            select(_SI.c.id)
+            .where(_SI.c.kind == self.kind, _SI.c.valid_to.is_not(None), _SI.c.valid_to < cutoff)
+            .limit(limit)
+        ).scalars().all()
+        if ids:
+            self.db.execute(delete(_SI).where(_SI.c.id.in_(ids)))
+        # o último instante fica sempre: é o que a leitura da snapshot atual usa
+        self.db.execute(delete(_SO).where(_SO.c.kind == self.kind, _SO.c.observed_at < cutoff,
+                                          _SO.c.observed_at < self._last_obs()))
+        return len(ids)
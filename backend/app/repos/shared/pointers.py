@@ -0,0 +1,32 @@
+# app/repos/shared/pointers.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models.snapshots import SnapshotPointer
+
+# chaves = CHECK_NAME dos comandos de ingest
+ORDERS_DELAYED = "prestashop.orders_delayed"
+CARTS_STALE = "prestashop.carts_stale"
+EOL_PRODUCTS = "prestashop.eol_products"
+
+
+class SnapshotPointerRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def publish(self, check_name: str, observed_at: datetime, row_count: int, worst: str) -> None:
+        """Aponta o check para a run acabada de gravar. Não faz commit (vai com as linhas)."""
+        values = dict(observed_at=observed_at, row_count=row_count, worst=worst)
+        res = self.db.execute(
+            update(SnapshotPointer).where(SnapshotPointer.check_name == check_name).values(**values)
+        )
+        if res.rowcount == 0:
+            self.db.execute(insert(SnapshotPointer).values(check_name=check_name, **values))
+
+    def get(self, check_name: str) -> Optional[SnapshotPointer]:
+        return self.db.get(SnapshotPointer, check_name)
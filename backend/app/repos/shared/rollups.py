@@ -0,0 +1,71 @@
+# app/repos/shared/rollups.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.domains.maintenance.rules import next_bucket
+from app.models.rollups import SnapshotRollup as SR
+from app.shared.quantiles import QuantileSketch
+
+
+class RollupReadRepo:
+    """Leitura de snapshot_rollups (histórico já compactado pela retenção)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def since(self, source: str, bucket: str, since_dt) -> dict[str, dict[str, SR]]:
+        """{bucket_start: {key: rollup}} para baldes a partir do dia/hora de since_dt."""
+        start = since_dt.strftime("%Y-%m-%d") if bucket == "day" else since_dt.strftime("%Y-%m-%d %H:00:00")
+        q = (
+            select(SR)
+            .where(SR.source == source, SR.bucket == bucket, SR.bucket_start >= start)
+            .order_by(SR.bucket_start)
+        )
+        out: dict[str, dict[str, SR]] = {}
+        for r in self.db.execute(q).scalars().all():
+            out.setdefault(r.bucket_start, {})[r.key] = r
+        return out
+
+    def totals(self, source: str) -> dict[str, int]:
+        """Linhas agregadas por key em todo o histórico compactado."""
+        q = select(SR.key, func.sum(SR.n)).where(SR.source == source).group_by(SR.key)
+        return {k: int(n or 0) for k, n in self.db.execute(q).all()}
+
+    def backfill_daily(self, series: list[dict], source: str, since_dt,
+                       make: Callable[[dict[str, SR]], dict]) -> list[dict]:
+        """
+        Completa uma série diária ({"ts": "YYYY-MM-DD", ...}) com os dias que já
+        só existem em agregados. Dias agregados ganham à série bruta: o que
+        fica em bruto de um dia compactado (keep_latest_by, último instante do
+        modo delta) é só parte desse dia.
+        """
+        rolled = self.since(source, "day", since_dt)
+        if not rolled:
+            return series
+        raw = [r for r in series if r["ts"] not in rolled]
+        return sorted(raw + [{"ts": day, **make(by_key)} for day, by_key in rolled.items()], key=lambda r: r["ts"])
+
+    def horizon(self, source: str, bucket: str) -> Optional[datetime]:
+        """
+        Fim do histórico agregado: as linhas brutas a partir daqui ainda existem,
+        as anteriores só como agregado. None = nada agregado.
+        """
+        last = self.db.execute(
+            select(func.max(SR.bucket_start)).where(SR.source == source, SR.bucket == bucket)
+        ).scalar()
+        return next_bucket(last, bucket) if last else None
+
+    def sketches_since(self, source: str, bucket: str, since_dt, column: str) -> dict[str, QuantileSketch]:
+        """Sketch de `column` por key, junto de todos os baldes desde since_dt."""
+        out: dict[str, QuantileSketch] = {}
+        for by_key in self.since(source, bucket, since_dt).values():
+            for key, r in by_key.items():
+                d = ((r.extra or {}).get("sketch") or {}).get(column)
+                if d:
+                    out.setdefault(key, QuantileSketch()).merge(QuantileSketch.from_dict(d))
+        return out
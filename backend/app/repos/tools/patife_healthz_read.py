@@ -26,3 +26,11 @@ class PatifeHealthzReadRepo:
         rows = self.db.execute(stmt.offset(
             (page - 1) * page_size).limit(page_size)).scalars().all()
         return rows, total
+
+    def latencies_since(self, since: datetime.datetime) -> list[tuple[str, float | None, float | None]]:
+        """(status, duration_ms, db_latency_ms) de cada amostra desde `since`."""
+        stmt = (
+            select(PatifeHealthz.status, PatifeHealthz.duration_ms, PatifeHealthz.db_latency_ms)
+            .where(PatifeHealthz.time >= since)
+        )
+        return [tuple(r) for r in self.db.execute(stmt).all()]
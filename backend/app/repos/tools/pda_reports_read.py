@@ -0,0 +1,51 @@
+# app/repos/tools/pda_reports_read.py
+# Repositório de leitura da cópia local dos relatórios PDA.
+
+from __future__ import annotations
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import desc, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.pda import PdaReportMirror
+
+
+class PdaReportsReadRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _filtered(self, stmt, state: Optional[str], code: Optional[str]):
+        if state:
+            stmt = stmt.where(PdaReportMirror.state == state)
+        if code:
+            stmt = stmt.where(PdaReportMirror.code == code)
+        return stmt
+
+    def page(
+        self,
+        *,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        offset: int = 0,
+        state: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> List[PdaReportMirror]:
+        """
+        Mais recentes primeiro (sort_at, id). Com `after` (keyset) continua a
+        seguir a essa linha sem OFFSET; senão usa `offset` (saltos de página).
+        """
+        t = PdaReportMirror
+        stmt = self._filtered(select(t), state, code).order_by(desc(t.sort_at), desc(t.id))
+        if after is not None:
+            at, rid = after
+            # row value: a SQLite usa o índice (sort_at, id) como limite do range
+            stmt = stmt.where(tuple_(t.sort_at, t.id) < tuple_(at, rid))
+        elif offset:
+            stmt = stmt.offset(offset)
+        return list(self.db.execute(stmt.limit(limit)).scalars().all())
+
+    def count(self, *, state: Optional[str] = None, code: Optional[str] = None) -> int:
+        return self.db.execute(
+            self._filtered(select(func.count()).select_from(PdaReportMirror), state, code)
+        ).scalar_one()
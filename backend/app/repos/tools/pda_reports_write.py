@@ -0,0 +1,48 @@
+# app/repos/tools/pda_reports_write.py
+# Repositório de escrita da cópia local dos relatórios PDA.
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.pda import PdaReportMirror
+from app.repos.shared.bulk import DEFAULT_CHUNK_SIZE, _chunks, bulk_insert
+
+
+class PdaReportsWriteRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def last_updated(self) -> Optional[datetime]:
+        """Maior date_upd já guardado (marca d'água da sync incremental)."""
+        return self.db.execute(select(func.max(PdaReportMirror.date_updated))).scalar()
+
+    def upsert_many(self, rows: Iterable[dict]) -> tuple[int, int]:
+        """
+        Insere os ids novos e atualiza os existentes cujo date_upd mudou.
+        Devolve (inseridos, atualizados). Não faz commit.
+        """
+        t = PdaReportMirror
+        inserted = updated = 0
+        for batch in _chunks(rows, DEFAULT_CHUNK_SIZE):
+            known = dict(self.db.execute(
+                select(t.id, t.date_updated).where(t.id.in_([r["id"] for r in batch]))
+            ).all())
+            new = [r for r in batch if r["id"] not in known]
+            inserted += bulk_insert(self.db, t, new)
+            for r in batch:
+                if r["id"] in known and known[r["id"]] != r["date_updated"]:
+                    self.db.execute(update(t).where(t.id == r["id"]).values(**r))
+                    updated += 1
+        return inserted, updated
+
+    def delete_missing(self, keep_ids: set[int]) -> int:
+        """Sync completa: apaga os relatórios que já não vêm do PDA. Não faz commit."""
+        t = PdaReportMirror
+        gone = [i for i in self.db.execute(select(t.id)).scalars() if i not in keep_ids]
+        for batch in _chunks(({"id": i} for i in gone), DEFAULT_CHUNK_SIZE):
+            self.db.execute(delete(t).where(t.id.in_([r["id"] for r in batch])))
+        return len(gone)
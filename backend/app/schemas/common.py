@@ -11,7 +11,18 @@ class PageMeta(BaseModel):
     total: Optional[int] = None
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None  # paginação keyset (ex.: /tools/pda): passar como ?cursor=
 
 class Page(BaseModel, Generic[T]):
     items: List[T]
     meta: PageMeta
+
+class LatencyStatsDTO(BaseModel):
+    """Percentis de uma latência (ms), calculados com QuantileSketch (erro relativo ~1%)."""
+    count: int = 0
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
@@ -14,3 +14,4 @@ class HomeSummaryOut(BaseModel):
     checks: List[CheckCardOut] = Field(default_factory=list)
     kpis: Dict[str, Any] = Field(default_factory=dict)
     errors: Dict[str, Optional[str]] = Field(default_factory=dict)
+    timings_ms: Optional[Dict[str, float]] = None  # por secção + total; só com ?timings=true
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List, Literal
+from typing import List
 from app.shared.status import Status, StatusLiteral
 
 
@@ -57,7 +57,7 @@ class EOLProductsListDTO(BaseModel):
     
 class PageSpeedDTO(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
-    page_type: Literal["home", "product"]
+    page_type: str
     url: str
     status: Status
     status_code: int
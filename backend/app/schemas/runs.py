@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Literal
 from pydantic import BaseModel, Field
 
+from app.schemas.common import LatencyStatsDTO
+
 class CheckRunDTO(BaseModel):
     id: int
     check_name: str
@@ -13,3 +15,14 @@ class RunsListDTO(BaseModel):
     ok: bool
     count: int
     runs: List[CheckRunDTO]
+
+class CheckDurationDTO(BaseModel):
+    check_name: str
+    runs: int
+    errors: int
+    duration_ms: LatencyStatsDTO
+
+class RunsSummaryDTO(BaseModel):
+    ok: bool
+    window: str
+    checks: List[CheckDurationDTO]
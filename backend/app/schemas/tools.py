@@ -1,6 +1,8 @@
 from __future__ import annotations
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
+
+from app.schemas.common import LatencyStatsDTO
 
 # -------------------------------c
 # PDA
@@ -11,7 +13,7 @@ class Report(BaseModel):
     id: int
     code: str
     message: str
-    context_json: str
+    context_json: Optional[str] = None  # None = relatório sem contexto
     error_text: str
     stack_text: str
     log_mode: str
@@ -49,3 +51,11 @@ class PatifeHealthzDTO(BaseModel):
     sapi: Optional[str] = None
     env: Optional[str] = None
     app: Optional[str] = None
+
+
+class PatifeSummaryDTO(BaseModel):
+    window: str
+    samples: int
+    by_status: Dict[str, int]
+    duration_ms: LatencyStatsDTO
+    db_latency_ms: LatencyStatsDTO
@@ -7,10 +7,10 @@ from app.shared.jwt import create_access_token
 from app.core.config import settings
 
 
-def login_user(req: LoginRequest) -> LoginDTO:
+async def login_user(req: LoginRequest) -> LoginDTO:
     client = PrestashopClient()
     try:
-        user = client.login(req.email, req.password)
+        user = await client.login(req.email, req.password)
     except:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Dados inválidos")
 
@@ -2,21 +2,35 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
+import logging
+import time
 from dataclasses import asdict, is_dataclass
 from datetime import date, datetime, timedelta
-from typing import Any, Optional, Tuple, Literal
+from typing import Any, Awaitable, Optional, Tuple, Literal
 from zoneinfo import ZoneInfo
 
-import requests
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.core.db import SessionLocal
+from app.domains.kpi.periods import parse_day
+from app.external.http_pool import get_http_client
+from app.models.kpi import KPIReport
+from app.repos.kpi.reports_read import KPIReportsReadRepo
+from app.repos.kpi.reports_write import KPIReportsWriteRepo
 from app.services.read.kpi.kpi_query import KPIQueryService
+from app.services.read.kpi.upstream import is_settled
 
 
+log = logging.getLogger("wd.kpi.report")
+
 Period = Literal["day", "week", "month", "year"]
 
+PROMPT_VERSION = 1
+
 
 # -----------------------------
 # Helpers de datas e hashing
@@ -69,11 +83,45 @@ def _json_default(o: Any):
         return repr(o)
 
 
+def _resolve_window(period: Period, since: Optional[str], until: Optional[str]) -> Tuple[str, str]:
+    since = _norm_date(since)
+    until = _norm_date(until)
+    if since is None or until is None:
+        s, u = _default_window_for_period(period)
+        since = since or s
+        until = until or u
+    return since, until
+
+
 def _hash_payload(payload: dict) -> str:
+    # generated_at/tempos mudam a cada chamada: ficam de fora para o hash só depender dos dados
+    meta = {k: v for k, v in (payload.get("meta") or {}).items() if k not in _VOLATILE_META}
+    payload = {**payload, "meta": meta}
     s = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_json_default)
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
+# campos de meta que não são dados: ficam fora do hash
+_VOLATILE_META = ("generated_at", "upstream")
+
+
+async def _timed(name: str, call: Awaitable[dict], timeout: float) -> tuple[Optional[dict], dict]:
+    """(resultado ou None, {"ms", "ok", "error"}) de uma chamada ao upstream."""
+    t0 = time.perf_counter()
+    try:
+        res = await asyncio.wait_for(call, timeout=timeout)
+    except asyncio.TimeoutError:
+        res, err = None, f"timeout after {timeout:g}s"
+    except Exception as e:
+        res, err = None, f"{type(e).__name__}: {e}"
+    else:
+        err = None
+    ms = round((time.perf_counter() - t0) * 1000, 1)
+    if err:
+        log.warning("kpi report: %s failed after %.0fms: %s", name, ms, err)
+    return res, {"ms": ms, "ok": err is None, "error": err}
+
+
 def _orders_per_hour(avg_min: float | None) -> float | None:
     if avg_min is None or avg_min <= 0:
         return None
@@ -161,48 +209,59 @@ class KPIReportGenerateService:
     API pública:
       - build_payload(period, since, until) -> (payload, since_iso, until_iso)
       - get_or_generate(period, since, until, force=False) -> dict
+      - check_stale(period, since, until) -> dict
+
+    O relatório fica em kpi_reports com report_id = uid (inclui o hash dos
+    dados). Janela já fechada: devolve o guardado sem ir ao upstream. Janela
+    aberta: refaz o payload (os períodos fechados vêm dos caches de
+    app/services/read/kpi/upstream.py, só o aberto vai ao PrestaShop) e só
+    chama o n8n se o hash mudou.
     """
 
     def __init__(self) -> None:
         self.kpi = KPIQueryService()
 
     # ---------- payload ----------
-    def build_payload(
+    async def build_payload(
         self,
         *,
         period: Period = "day",
         since: Optional[str] = None,
         until: Optional[str] = None,
     ) -> tuple[dict, str, str]:
-        # normalizar datas
-        since = _norm_date(since)
-        until = _norm_date(until)
-
-        if since is None or until is None:
-            s, u = _default_window_for_period(period)
-            since = since or s
-            until = until or u
+        since, until = _resolve_window(period, since, until)
 
         # Para o gráfico usamos gran igual ao período pedido
         gran = period
 
-        # --- Timeseries (prep, invoice) ---
-        inv_ts = self.kpi.employees_timeseries(role="invoice", gran=gran, since=since, until=until)
-        prep_ts = self.kpi.employees_timeseries(role="prep",    gran=gran, since=since, until=until)
+        # as 4 chamadas ao upstream em paralelo, cada uma com o seu timeout
+        timeout = settings.KPI_REPORT_CALL_TIMEOUT_S
+        calls = {
+            "invoice.timeseries": self.kpi.employees_timeseries(role="invoice", gran=gran, since=since, until=until),
+            "prep.timeseries": self.kpi.employees_timeseries(role="prep", gran=gran, since=since, until=until),
+            "invoice.performance": self.kpi.employees_performance(
+                role="invoice", since=since, until=until, order_by="avg", order_dir="asc", limit=1000
+            ),
+            "prep.performance": self.kpi.employees_performance(
+                role="prep", since=since, until=until, order_by="avg", order_dir="asc", limit=1000
+            ),
+        }
+        t0 = time.perf_counter()
+        done = await asyncio.gather(*(_timed(name, c, timeout) for name, c in calls.items()))
+        results = {name: res for name, (res, _) in zip(calls, done)}
+        upstream = {name: info for name, (_, info) in zip(calls, done)}
+        upstream["total_ms"] = round((time.perf_counter() - t0) * 1000, 1)
 
-        inv_series_plain = _cast_series(inv_ts["series"])
-        prep_series_plain = _cast_series(prep_ts["series"])
+        def series(name: str) -> list[dict]:
+            res = results[name]
+            return _cast_series(res["series"]) if res else []
 
-        # --- Performance "flat" (prep, invoice) ---
-        inv_pf = self.kpi.employees_performance(
-            role="invoice", since=since, until=until, order_by="avg", order_dir="asc", limit=1000
-        )
-        prep_pf = self.kpi.employees_performance(
-            role="prep",    since=since, until=until, order_by="avg", order_dir="asc", limit=1000
-        )
+        def perf(name: str) -> list[dict]:
+            res = results[name]
+            return [_with_orders_per_hour(_asdict_performance(x)) for x in res["items"]] if res else []
 
-        inv_perf_plain = [_with_orders_per_hour(_asdict_performance(x)) for x in inv_pf["items"]]
-        prep_perf_plain = [_with_orders_per_hour(_asdict_performance(x)) for x in prep_pf["items"]]
+        inv_series_plain, prep_series_plain = series("invoice.timeseries"), series("prep.timeseries")
+        inv_perf_plain, prep_perf_plain = perf("invoice.performance"), perf("prep.performance")
 
         payload = {
             "meta": {
@@ -211,8 +270,10 @@ class KPIReportGenerateService:
                 "until": until,
                 "tz": settings.TIMEZONE,
                 "generated_at": datetime.now(ZoneInfo(settings.TIMEZONE)).isoformat(),
-                "prompt_version": 1,
+                "prompt_version": PROMPT_VERSION,
                 "version": 1,
+                # tempo/erro por chamada; secções que falharam vêm vazias
+                "upstream": upstream,
             },
             "invoice": {
                 "performance": inv_perf_plain,   # lista de dicts (orders_per_hour incluído)
@@ -225,8 +286,8 @@ class KPIReportGenerateService:
         }
         return payload, since, until
 
-    # ---------- exec + cache opcional ----------
-    def get_or_generate(
+    # ---------- exec + cache ----------
+    async def get_or_generate(
         self,
         *,
         period: Period = "day",
@@ -235,21 +296,24 @@ class KPIReportGenerateService:
         force: bool = False,
     ) -> dict:
         """
-        - Monta e “hashea” o payload
-        - Se force=False, poderias procurar em cache/BD por UID (aqui deixado como comentário)
-        - Se não existir (ou force=True), POST para o n8n
-        - Retorna metadados da execução e eventual resposta do n8n
+        - Janela fechada e relatório guardado (force=False): devolve-o sem mais nada
+        - Senão monta e “hashea” o payload; mesmo hash que o guardado -> devolve-o
+        - Se não existir (ou force=True), POST para o n8n e guarda a resposta
+        - Retorna metadados da execução e a resposta do n8n (ou a guardada)
         """
-        payload, since_iso, until_iso = self.build_payload(period=period, since=since, until=until)
+        since_iso, until_iso = _resolve_window(period, since, until)
+        stored = None if force else await run_in_threadpool(_db_latest, period, since_iso, until_iso)
+        if stored is not None and is_settled(until_iso) and _generated_after_close(stored, until_iso):
+            return _cached_result(stored, period, since_iso, until_iso)
+
+        payload, since_iso, until_iso = await self.build_payload(period=period, since=since_iso, until=until_iso)
 
         data_hash = _hash_payload(payload)
         uid = f"kpi:{period}:{since_iso}:{until_iso}:{data_hash[:12]}"
 
-        # (Opcional) cache/BD — exemplo de como ficaria:
-        # if not force and self.repo:
-        #     found = self.repo.get_by_uid(uid)
-        #     if found:
-        #         return {"ok": True, "uid": uid, "source": "cache", "payload": found.payload}
+        failed = _failed_calls(payload)
+        if stored is not None and stored.data_hash == data_hash:
+            return _cached_result(stored, period, since_iso, until_iso)
 
         # Preparar URL do n8n
         url = (settings.N8N_REPORT_WEBHOOK_URL or "").strip()
@@ -261,14 +325,17 @@ class KPIReportGenerateService:
         n8n_error = None
         n8n_response_json: Any = None
 
-        if url:
+        if failed:
+            # um relatório com secções em falta seria enganador (e ficava em cache)
+            n8n_error = "upstream incompleto: " + ", ".join(failed)
+        elif url:
             headers = {
                 "Content-Type": "application/json",
                 "X-Report-UID": uid,
                 "User-Agent": settings.PS_USER_AGENT,
             }
             try:
-                resp = requests.post(url, json=payload, headers=headers, timeout=30)
+                resp = await get_http_client().post(url, json=payload, headers=headers, timeout=30)
                 n8n_status = resp.status_code
                 try:
                     n8n_response_json = resp.json()
@@ -278,18 +345,22 @@ class KPIReportGenerateService:
             except Exception as e:
                 n8n_error = str(e)
 
-        # (Opcional) guardar em BD:
-        # if self.repo:
-        #     self.repo.create(uid=uid, period=period, since=since_iso, until=until_iso, payload=payload)
+        # só se guarda o que o n8n gerou com sucesso
+        if url and n8n_error is None:
+            await run_in_threadpool(
+                _db_save, uid, period, since_iso, until_iso, data_hash, n8n_response_json,
+            )
 
-        res = {
+        return {
             "ok": n8n_error is None,
             "uid": uid,
+            "source": "n8n",
             "meta": {
                 "period": period,
                 "since": since_iso,
                 "until": until_iso,
                 "tz": settings.TIMEZONE,
+                "upstream": payload["meta"]["upstream"],
             },
             "n8n": {
                 "url": url or None,
@@ -308,4 +379,118 @@ class KPIReportGenerateService:
                 },
             },
         }
-        return res
+
+    async def check_stale(
+        self,
+        *,
+        period: Period = "day",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> dict:
+        """
+        O relatório guardado ainda corresponde aos dados? Sem relatório ->
+        stale; janela fechada -> nunca; senão compara o hash do payload atual
+        (só o período aberto vai ao upstream). Não chama o n8n.
+        """
+        since_iso, until_iso = _resolve_window(period, since, until)
+        stored = await run_in_threadpool(_db_latest, period, since_iso, until_iso)
+        settled = is_settled(until_iso) and stored is not None and _generated_after_close(stored, until_iso)
+        current, failed = None, []
+        if stored is not None and not settled:
+            payload, _, _ = await self.build_payload(period=period, since=since_iso, until=until_iso)
+            current, failed = _hash_payload(payload), _failed_calls(payload)
+        return {
+            "period": period,
+            "since": since_iso,
+            "until": until_iso,
+            "report_id": stored.report_id if stored is not None else None,
+            "generated_at": stored.generated_at.isoformat() if stored is not None else None,
+            "settled": settled,
+            # None: não deu para saber (alguma chamada ao upstream falhou)
+            "stale": None if failed else stored is None or (not settled and current != stored.data_hash),
+            "failed": failed,
+        }
+
+
+# -----------------------------
+# Persistência (kpi_reports)
+# -----------------------------
+def _db_latest(period: str, since: str, until: str) -> Optional[KPIReport]:
+    s, u = parse_day(since), parse_day(until)
+    if s is None or u is None:
+        return None
+    db = SessionLocal()
+    try:
+        found = KPIReportsReadRepo(db).latest_for(period, s, u, PROMPT_VERSION)
+        if found is not None:
+            db.expunge(found)
+        return found
+    finally:
+        db.close()
+
+
+def _db_save(uid: str, period: str, since: str, until: str, data_hash: str, response: Any) -> None:
+    s, u = parse_day(since), parse_day(until)
+    if s is None or u is None:
+        return
+    usage = (response.get("usage") if isinstance(response, dict) else None) or {}
+    db = SessionLocal()
+    try:
+        KPIReportsWriteRepo(db).upsert(KPIReport(
+            report_id=uid,
+            period=period,
+            since=s,
+            until=u,
+            tz=settings.TIMEZONE,
+            prompt_version=PROMPT_VERSION,
+            model=(response.get("model") if isinstance(response, dict) else None),
+            data_hash=data_hash,
+            report_text=json.dumps(response, ensure_ascii=False, default=_json_default),
+            token_input=usage.get("input_tokens") or usage.get("prompt_tokens"),
+            token_output=usage.get("output_tokens") or usage.get("completion_tokens"),
+            generated_at=datetime.now(ZoneInfo(settings.TIMEZONE)),
+        ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        # o relatório segue para o cliente na mesma; só não fica em cache
+        log.warning("kpi report: failed to store %s", uid, exc_info=True)
+    finally:
+        db.close()
+
+
+def _failed_calls(payload: dict) -> list[str]:
+    upstream = payload["meta"].get("upstream") or {}
+    return [name for name, info in upstream.items() if isinstance(info, dict) and not info["ok"]]
+
+
+def _generated_after_close(stored: KPIReport, until: str) -> bool:
+    """O relatório foi gerado já com a janela fechada (e não com dados ainda a mudar)?"""
+    u = parse_day(until)
+    at = stored.generated_at
+    if u is None or at is None:
+        return False
+    tz = ZoneInfo(settings.TIMEZONE)
+    at = at.replace(tzinfo=tz) if at.tzinfo is None else at.astimezone(tz)
+    return (at - timedelta(hours=settings.KPI_CACHE_CLOSED_GRACE_HOURS)).date() >= u
+
+
+def _cached_result(stored: KPIReport, period: str, since: str, until: str) -> dict:
+    try:
+        response = json.loads(stored.report_text)
+    except ValueError:
+        response = {"text": stored.report_text}
+    return {
+        "ok": True,
+        "uid": stored.report_id,
+        "source": "cache",
+        "meta": {
+            "period": period,
+            "since": since,
+            "until": until,
+            "tz": stored.tz,
+            "generated_at": stored.generated_at.isoformat() if stored.generated_at else None,
+        },
+        "n8n": {"url": None, "status_code": None, "error": None, "response": response},
+        "preview_sizes": None,
+    }
@@ -0,0 +1,93 @@
+# app/services/commands/kpi/sync_store_audit.py
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from time import perf_counter
+import logging
+
+from app.core.config import settings
+from app.domains.kpi.store.mappers import event_key, fold_daily, parse_creation_dt
+from app.repos.kpi.store_audit_write import StoreAuditWriteRepo
+from app.repos.runs.write import RunsWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
+from app.services.read.kpi.front_invoice_audit_client import FrontInvoiceAuditClient
+
+CHECK_NAME = "kpi.sync_store_audit"
+log = logging.getLogger("wd.jobs.kpi.sync_store_audit")
+
+
+def _to_row(r: dict, key: str) -> dict:
+    try:
+        total = float(str(r.get("document_total")).replace(",", "."))
+    except (TypeError, ValueError):
+        total = 0.0
+    return dict(
+        key=key,
+        event_type=str(r.get("event_type") or "")[:32],
+        created_at=parse_creation_dt(r.get("document_creation_date") or ""),
+        employee_id=int(r.get("employee_id") or 0),
+        document_type=((r.get("document_type") or "").strip() or "UNK")[:16],
+        document_total=total,
+        payload=r,
+    )
+
+
+async def run(db_session_factory) -> bool:
+    """
+    Worker entrypoint — pede ao frontInvoiceAudit os eventos desde o último
+    document_creation_date guardado (menos STORE_AUDIT_SYNC_OVERLAP_S; na
+    primeira vez, STORE_AUDIT_BACKFILL_DAYS), acrescenta os novos a
+    store_audit_events e soma-os a store_audit_daily na mesma transação.
+    """
+    db = db_session_factory()
+    runs = RunsWriteRepo(db)
+    repo = StoreAuditWriteRepo(db)
+    t0 = perf_counter()
+
+    try:
+        tz = ZoneInfo(settings.TIMEZONE)
+        now_dt = datetime.now(tz)
+        mark = repo.last_created_at()
+        if mark is not None:
+            since = mark - timedelta(seconds=settings.STORE_AUDIT_SYNC_OVERLAP_S)
+        else:
+            since = datetime.combine(now_dt.date() - timedelta(days=settings.STORE_AUDIT_BACKFILL_DAYS),
+                                     datetime.min.time())
+
+        raw = await FrontInvoiceAuditClient().fetch_events(since_iso=since.strftime("%Y-%m-%dT%H:%M:%S"))
+
+        # dedup: contra a BD (margem repetida) e dentro da própria resposta
+        keyed: dict[str, dict] = {}
+        for r in raw:
+            keyed.setdefault(event_key(r), r)
+        known = repo.known_keys(list(keyed))
+        new = {k: r for k, r in keyed.items() if k not in known}
+
+        repo.append([_to_row(r, k) for k, r in new.items()])
+        repo.add_daily(fold_daily(new.values()))
+        if new:
+            # avisa a API (change feed / ETag do store-metrics)
+            SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, len(new), "ok")
+
+        duration_ms = int((perf_counter() - t0) * 1000)
+        runs.record_run(CHECK_NAME, "ok", duration_ms, {
+            "since": since.isoformat(),
+            "fetched": len(raw),
+            "new": len(new),
+        })
+        db.commit()
+        log.info("store audit sync: fetched=%d new=%d since=%s (%sms)", len(raw), len(new), since, duration_ms)
+        return True
+
+    except Exception as e:
+        db.rollback()
+        duration_ms = int((perf_counter() - t0) * 1000)
+        log.exception("store audit sync failed")
+        runs.record_run(CHECK_NAME, "error", duration_ms, {"error": str(e)})
+        db.commit()
+        return False
+
+    finally:
+        db.close()
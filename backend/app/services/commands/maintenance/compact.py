@@ -0,0 +1,109 @@
+# app/services/commands/maintenance/compact.py
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from time import perf_counter, sleep
+from zoneinfo import ZoneInfo
+import logging
+
+from app.core.config import settings
+from app.domains.maintenance.rules import POLICIES, raw_cutoff
+from app.domains.maintenance.types import RetentionPolicy
+from app.repos.kpi.upstream_cache_write import KPIUpstreamCacheWriteRepo
+from app.repos.maintenance.retention import RetentionRepo
+from app.repos.runs.write import RunsWriteRepo
+
+CHECK_NAME = "maintenance.compact"
+log = logging.getLogger("wd.jobs.maintenance.compact")
+
+
+def _delete_all(db, delete_chunk, cutoff: datetime) -> int:
+    """DELETE em lotes, um commit por lote, com pausa para a API conseguir escrever."""
+    chunk = max(1, settings.RETENTION_DELETE_CHUNK)
+    total = 0
+    while True:
+        n = delete_chunk(cutoff, chunk)
+        db.commit()
+        total += n
+        if n < chunk:
+            return total
+        sleep(settings.RETENTION_CHUNK_PAUSE_MS / 1000)
+
+
+def _compact(db, repo: RetentionRepo, p: RetentionPolicy, cutoff: datetime) -> dict:
+    # 1) agrega os baldes ainda não agregados abaixo do corte (transação própria)
+    lo = repo.watermark(p)
+    rolled = repo.rollup_raw(p, lo, cutoff)
+    delta = p.delta_kind is not None and settings.PS_SNAPSHOT_STORAGE == "delta"
+    if delta:
+        rolled += repo.rollup_delta(p, lo, cutoff)
+    db.commit()
+    # 2) apaga o que já está agregado; se falhar a meio, a próxima execução continua
+    deleted = _delete_all(db, lambda c, n: repo.delete_raw_chunk(p, c, n), cutoff)
+    if delta:
+        deleted += _delete_all(db, lambda c, n: repo.delete_delta_chunk(p, c, n), cutoff)
+    return {"rolled": rolled, "deleted": deleted, "cutoff": cutoff.isoformat()}
+
+
+def run(db_session_factory) -> bool:
+    """
+    Worker entrypoint — retenção das tabelas de snapshots: agrega em
+    snapshot_rollups as linhas mais antigas que RETENTION_RAW_DAYS, apaga-as
+    em lotes e devolve o espaço com incremental_vacuum. Também limpa a cache
+    KPI do upstream (KPI_CACHE_RETENTION_DAYS).
+    """
+    if not settings.RETENTION_ENABLED:
+        return True
+    db = db_session_factory()
+    runs = RunsWriteRepo(db)
+    repo = RetentionRepo(db)
+    t0 = perf_counter()
+    try:
+        now = datetime.now(ZoneInfo(settings.TIMEZONE))
+        now_utc = datetime.now(timezone.utc)
+        payload: dict = {}
+        for p in POLICIES:
+            days = int(settings.RETENTION_RAW_DAYS.get(p.source, 0) or 0)
+            if days <= 0:
+                continue
+            payload[p.source] = _compact(db, repo, p, raw_cutoff(now_utc if p.utc else now, days))
+
+        if settings.RETENTION_ROLLUP_DAYS > 0:
+            # baldes de fontes em UTC (check_runs) cortam pelo dia UTC
+            keep = timedelta(days=settings.RETENTION_ROLLUP_DAYS)
+            utc_sources = [p.source for p in POLICIES if p.utc]
+            payload["rollups_deleted"] = (
+                repo.delete_rollups_before(now - keep, exclude=utc_sources)
+                + repo.delete_rollups_before(now_utc - keep, sources=utc_sources)
+            )
+            db.commit()
+
+        for bucket, days in settings.PS_PAGESPEED_ROLLUP_DAYS.items():
+            if int(days or 0) > 0:
+                payload[f"pagespeed_{bucket}_deleted"] = repo.delete_pagespeed_rollups_before(
+                    bucket, raw_cutoff(now, int(days)))
+        db.commit()
+
+        kpi = KPIUpstreamCacheWriteRepo(db)
+        if settings.KPI_CACHE_RETENTION_DAYS > 0:
+            # fetched_at é CURRENT_TIMESTAMP da SQLite (UTC, sem tz)
+            payload["kpi_cache_deleted"] = kpi.delete_fetched_before(
+                now_utc.replace(tzinfo=None) - timedelta(days=settings.KPI_CACHE_RETENTION_DAYS))
+        # a janela por omissão mais longa é a de gran=year: desde 1 jan de há 5 anos (kpi_query)
+        payload["kpi_buckets_deleted"] = kpi.delete_buckets_before(date(now.year - 5, 1, 1).isoformat())
+        db.commit()
+
+        payload["vacuum"] = repo.vacuum(settings.RETENTION_VACUUM_PAGES)
+        dur = int((perf_counter() - t0) * 1000)
+        runs.record_run(CHECK_NAME, "ok", dur, payload)
+        db.commit()
+        log.info("%s done in %dms: %s", CHECK_NAME, dur, payload)
+        return True
+    except Exception as e:
+        db.rollback()
+        runs.record_run(CHECK_NAME, "error", int((perf_counter() - t0) * 1000), {"error": repr(e)})
+        db.commit()
+        log.exception("%s failed", CHECK_NAME)
+        return False
+    finally:
+        db.close()
@@ -0,0 +1,39 @@
+# app/services/commands/maintenance/vacuum_convert.py
+"""
+Conversão única de uma base antiga para auto_vacuum=INCREMENTAL, para o
+maintenance.compact passar a devolver espaço ao SO:
+
+    python -m app.services.commands.maintenance.vacuum_convert
+
+É um VACUUM completo: reescreve o ficheiro com lock exclusivo e precisa de
+~2x o tamanho da base em disco. Correr com o worker (e de preferência a API)
+parado.
+"""
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+
+from app.repos.maintenance.retention import RetentionRepo
+
+log = logging.getLogger("wd.maintenance.vacuum_convert")
+
+
+def run(db_session_factory) -> bool:
+    db = db_session_factory()
+    t0 = perf_counter()
+    try:
+        converted = RetentionRepo(db).convert_incremental()
+        log.info("vacuum_convert: %s in %dms", "converted" if converted else "already incremental",
+                 int((perf_counter() - t0) * 1000))
+        return converted
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    from app.core.db import SessionLocal
+    from app.core.logging import setup_logging
+
+    setup_logging()
+    run(SessionLocal)
@@ -13,6 +13,7 @@ from app.domains.tools.patife.mappers import raw_to_domain
 from app.models.patife import PatifeHealthz
 from app.repos.tools.patife_healthz_write import PatifeHealthzWriteRepo
 from app.repos.runs.write import RunsWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
 
 CHECK_NAME = "patife.ingest_healthz"
 log = logging.getLogger("wd.jobs.patife.ingest_healthz")
@@ -30,7 +31,7 @@ def run(db_session_factory) -> bool:
 
     try:
         tz = ZoneInfo(settings.TIMEZONE)
-        now_dt = datetime.now(tz)  # útil se precisares para logs/telemetria
+        now_dt = datetime.now(tz)
 
         # 1) Chamada externa
         client = PatifeClient()
@@ -69,13 +70,14 @@ def run(db_session_factory) -> bool:
 
         # 4) Persistir
         repo.insert_snapshot(row)
-        db.commit()
+        # avisa a API (change feed) na mesma transação
+        SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, 1, "ok" if d.is_online else "critical")
 
         duration_ms = int((perf_counter() - t0) * 1000)
 
-        # 5) Registar run (status: ok quando online; warning quando offline)
+        # 5) Registar run na mesma transação (status: ok quando online; warning quando offline)
         run_status = "ok" if d.is_online else "warning"
-        runs.insert_run(
+        runs.record_run(
             CHECK_NAME,
             run_status,
             duration_ms,
@@ -99,7 +101,7 @@ def run(db_session_factory) -> bool:
         db.rollback()
         duration_ms = int((perf_counter() - t0) * 1000)
         log.exception("Patife healthz worker failed")
-        runs.insert_run(
+        runs.record_run(
             CHECK_NAME,
             "error",
             duration_ms,
@@ -0,0 +1,111 @@
+# app/services/commands/pda/sync_reports.py
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from time import perf_counter
+import logging
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.domains.tools.pda.mappers import context_to_json, raw_row_to_domain
+from app.external.pda_client import PdaClient
+from app.models.pda import PdaReportMirror
+from app.repos.runs.write import RunsWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
+from app.repos.tools.pda_reports_write import PdaReportsWriteRepo
+
+CHECK_NAME = "pda.sync_reports"
+log = logging.getLogger("wd.jobs.pda.sync_reports")
+
+
+def _local(dt: datetime | None) -> datetime | None:
+    """Hora local sem tzinfo, como a SQLite devolve: compara com a marca d'água guardada."""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(ZoneInfo(settings.TIMEZONE)).replace(tzinfo=None)
+
+
+def _to_row(raw: dict, now_dt: datetime) -> dict:
+    d = raw_row_to_domain(raw)
+    updated, added = _local(d.date_updated), _local(d.date_added)
+    return dict(
+        id=d.id,
+        code=d.code[:64],
+        message=d.message,
+        context_json=context_to_json(d.context),
+        error_text=d.error_text,
+        stack_text=d.stack_text,
+        log_mode=d.log_mode[:32],
+        ts_client=_local(d.ts_client),
+        state=d.state[:32],
+        date_added=added,
+        date_updated=updated,
+        sort_at=updated or added or _local(now_dt),
+        synced_at=now_dt,
+    )
+
+
+async def run(db_session_factory, full: bool = False) -> bool:
+    """
+    Worker entrypoint — copia para pda_reports os relatórios alterados desde o
+    último date_upd guardado (menos TOOLS_PDA_SYNC_OVERLAP_S). Com full=True
+    pede a lista inteira e apaga os que já não existem no PDA.
+    """
+    db = db_session_factory()
+    runs = RunsWriteRepo(db)
+    repo = PdaReportsWriteRepo(db)
+    t0 = perf_counter()
+
+    try:
+        now_dt = datetime.now(ZoneInfo(settings.TIMEZONE))
+        mark = None if full else repo.last_updated()
+        since = (mark - timedelta(seconds=settings.TOOLS_PDA_SYNC_OVERLAP_S)) if mark else None
+
+        raw = await PdaClient().fetch_reports(
+            updated_since=since.strftime("%Y-%m-%d %H:%M:%S") if since else None
+        )
+        rows = [_to_row(r, now_dt) for r in raw]
+        if since is not None:
+            # se o getReports ignorar o filtro, só o que mudou é escrito na mesma
+            fetched = len(rows)
+            rows = [r for r in rows if r["date_updated"] is None or r["date_updated"] >= since]
+            if settings.TOOLS_PDA_UPDATED_SINCE_PARAM and fetched > len(rows):
+                log.warning("PDA sync: getReports ignored %s=%s (%d of %d rows older than since); "
+                            "check TOOLS_PDA_UPDATED_SINCE_PARAM",
+                            settings.TOOLS_PDA_UPDATED_SINCE_PARAM, since, fetched - len(rows), fetched)
+
+        inserted, updated = repo.upsert_many(rows)
+        deleted = repo.delete_missing({r["id"] for r in rows}) if full else 0
+        changed = inserted + updated + deleted
+        if changed:
+            total = db.execute(select(func.count()).select_from(PdaReportMirror)).scalar_one()
+            # avisa a API (change feed / ETag); row_count = total na cópia local
+            SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, total, "ok")
+
+        duration_ms = int((perf_counter() - t0) * 1000)
+        runs.record_run(CHECK_NAME, "ok", duration_ms, {
+            "full": full,
+            "since": since.isoformat() if since else None,
+            "fetched": len(raw),
+            "inserted": inserted,
+            "updated": updated,
+            "deleted": deleted,
+        })
+        db.commit()
+        log.info("PDA sync: fetched=%d inserted=%d updated=%d deleted=%d (%sms)",
+                 len(raw), inserted, updated, deleted, duration_ms)
+        return True
+
+    except Exception as e:
+        db.rollback()
+        duration_ms = int((perf_counter() - t0) * 1000)
+        log.exception("PDA sync failed")
+        runs.record_run(CHECK_NAME, "error", duration_ms, {"full": full, "error": str(e)})
+        db.commit()
+        return False
+
+    finally:
+        db.close()
@@ -6,18 +6,19 @@ import logging
 from app.external.prestashop_client import PrestashopClient
 from app.domains.prestashop.carts.mappers import raw_to_domain
 from app.repos.prestashop.carts_write import CartsWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
 from app.repos.runs.write import RunsWriteRepo
 from app.core.config import settings
 
 CHECK_NAME = "prestashop.carts_stale"
 log = logging.getLogger("wd.jobs.ps.carts_stale")
 
-def run(db_session_factory):
+async def run(db_session_factory):
     db = db_session_factory(); runs = RunsWriteRepo(db); repo = CartsWriteRepo(db)
     t0 = perf_counter()
     try:
         client = PrestashopClient()
-        raw = client.fetch_carts_stale(
+        raw = await client.fetch_carts_stale(
             hours=settings.PS_CART_STALE_WARN_H,
             limit=settings.PS_CART_STALE_LIMIT,
             max_days=settings.PS_CART_STALE_MAX_DAYS,
@@ -25,16 +26,19 @@ def run(db_session_factory):
         )
         items = [raw_to_domain(r) for r in raw]
         now = datetime.now(ZoneInfo(settings.TIMEZONE))
-        repo.insert_many(items, observed_at=now); db.commit()
-        dur = int((perf_counter() - t0) * 1000)
         order = {"ok": 0, "warning": 1, "critical": 2}
         worst = max((i.status.value for i in items), default="ok", key=lambda s: order[s])
-        runs.insert_run(CHECK_NAME, "ok", dur, {"count": len(items), "worst": worst})
+        repo.insert_many(items, observed_at=now)
+        SnapshotPointerRepo(db).publish(CHECK_NAME, now, len(items), worst)
+        dur = int((perf_counter() - t0) * 1000)
+        runs.record_run(CHECK_NAME, "ok", dur, {"count": len(items), "worst": worst})
+        db.commit()
         log.info("%s wrote %d snapshots", CHECK_NAME, len(items))
         return True
     except Exception as e:
         db.rollback()
-        runs.insert_run(CHECK_NAME, "error", int((perf_counter()-t0)*1000), {"error": repr(e)})
+        runs.record_run(CHECK_NAME, "error", int((perf_counter()-t0)*1000), {"error": repr(e)})
+        db.commit()
         log.exception("%s failed", CHECK_NAME)
         return False
     finally:
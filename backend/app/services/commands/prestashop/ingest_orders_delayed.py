@@ -7,12 +7,13 @@ from app.core.config import settings
 from app.external.prestashop_client import PrestashopClient
 from app.repos.runs.write import RunsWriteRepo
 from app.repos.prestashop.orders_write import OrdersWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
 from app.domains.prestashop.orders.mappers import map_order_row_to_entity
 
 CHECK_NAME = "prestashop.orders_delayed"
 log = logging.getLogger("wd.jobs.ps.orders")
 
-def run(db_session_factory):
+async def run(db_session_factory):
     db = db_session_factory()
     runs = RunsWriteRepo(db)
     repo = OrdersWriteRepo(db)
@@ -22,29 +23,29 @@ def run(db_session_factory):
         now_dt = datetime.now(tz)
 
         client = PrestashopClient()
-        rows = client.fetch_delayed_orders()
-
+        # mapeadas à medida que chegam: as linhas cruas não ficam todas em memória
         items = [
             map_order_row_to_entity(
                 r, tz,
                 settings.PS_ORDERS_WARN_DS_STD, settings.PS_ORDERS_CRIT_DS_STD,
                 settings.PS_ORDERS_WARN_DS_DROPSHIP, settings.PS_ORDERS_CRIT_DS_DROPSHIP,
             )
-            for r in rows
+            async for r in client.iter_delayed_orders()
         ]
 
-        for it in items:
-            repo.insert_snapshot(it, observed_at=now_dt)
-        db.commit()
-        dur = int((time.perf_counter() - t0) * 1000)
         order = {"ok": 0, "warning": 1, "critical": 2}
         worst = max((it.status.value for it in items), default="ok", key=lambda s: order[s])
-        runs.insert_run(CHECK_NAME, "ok", dur, {"count": len(items), "worst": worst})
+        repo.insert_many(items, observed_at=now_dt)
+        SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, len(items), worst)
+        dur = int((time.perf_counter() - t0) * 1000)
+        runs.record_run(CHECK_NAME, "ok", dur, {"count": len(items), "worst": worst})
+        db.commit()
         return True
     except Exception as e:
         db.rollback()
         dur = int((time.perf_counter() - t0) * 1000)
-        runs.insert_run(CHECK_NAME, "error", dur, {"error": str(e)})
+        runs.record_run(CHECK_NAME, "error", dur, {"error": str(e)})
+        db.commit()
         log.exception("%s failed: %s", CHECK_NAME, e)
         return False
     finally:
@@ -1,54 +1,130 @@
+import asyncio
 from time import perf_counter
 from datetime import datetime
+from urllib.parse import urlsplit
 from zoneinfo import ZoneInfo
 import logging
 
 from app.external.prestashop_client import PrestashopClient
 from app.domains.prestashop.pagespeed.mappers import raw_to_domain
+from app.domains.prestashop.pagespeed.types import PageSpeed
 from app.repos.prestashop.pagespeed_write import PageSpeedWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
 from app.repos.runs.write import RunsWriteRepo
 from app.core.config import settings
 
 CHECK_NAME = "prestashop.pagespeed"
 log = logging.getLogger("wd.jobs.ps.pagespeed")
 
-def run(db_session_factory):
+
+def pagespeed_targets() -> list[tuple[str, str]]:
+    """
+    Lista (grupo, url) a amostrar, sem duplicados.
+    Sem PS_PAGESPEED_URLS fica o comportamento antigo: home + 1 produto.
+    """
+    groups = settings.PS_PAGESPEED_URLS or {
+        "home": [settings.PS_HOME_URL],
+        "product": [settings.PS_PRODUCT_URL],
+    }
+    seen: set[str] = set()
+    out: list[tuple[str, str]] = []
+    for group, urls in groups.items():
+        for url in urls or []:
+            url = (url or "").strip()
+            if url and url not in seen:
+                seen.add(url)
+                out.append((group, url))
+    return out
+
+
+async def _probe_all(client: PrestashopClient, targets: list[tuple[str, str]], deadline: float) -> tuple[list[PageSpeed], list[dict], int]:
+    """
+    Sonda os URLs com concorrência limitada (global + por host).
+    Devolve (items, erros, n_saltados); URLs que já não cabem no orçamento são saltados.
+    """
+    sem_all = asyncio.Semaphore(max(1, settings.PS_PAGESPEED_CONCURRENCY))
+    sem_host: dict[str, asyncio.Semaphore] = {}
+    skipped = 0
+
+    async def probe(group: str, url: str) -> PageSpeed | None:
+        nonlocal skipped
+        host = urlsplit(url).netloc
+        sem = sem_host.setdefault(host, asyncio.Semaphore(max(1, settings.PS_PAGESPEED_PER_HOST)))
+        # host primeiro: quem espera por um host ocupado não prende vagas globais
+        async with sem, sem_all:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                skipped += 1
+                return None
+            r = await asyncio.wait_for(client.fetch_pagespeed(group, url=url), timeout=remaining)
+        # parse do HTML fora do loop, para não distorcer o TTFB das sondas em curso
+        return await asyncio.to_thread(
+            raw_to_domain,
+            page_type=r["page_type"],
+            url=r["url"],
+            status_code=r["status_code"],
+            ttfb_ms=r["ttfb_ms"],
+            total_ms=r["total_ms"],
+            html_bytes=r["html_bytes"],
+            headers=r["headers"],
+            html_text=r["html_text"],
+        )
+
+    results = await asyncio.gather(*(probe(g, u) for g, u in targets), return_exceptions=True)
+
+    items: list[PageSpeed] = []
+    errors: list[dict] = []
+    for (group, url), res in zip(targets, results):
+        if isinstance(res, BaseException):
+            errors.append({"group": group, "url": url, "error": repr(res)[:200]})
+        elif res is not None:
+            items.append(res)
+    return items, errors, skipped
+
+
+async def run(db_session_factory):
     db = db_session_factory()
     runs = RunsWriteRepo(db)
     repo = PageSpeedWriteRepo(db)
     t0 = perf_counter()
     try:
         client = PrestashopClient()
-        results_raw = [client.fetch_pagespeed("home"), client.fetch_pagespeed("product")]
-
-        items = [
-            raw_to_domain(
-                page_type=r["page_type"],
-                url=r["url"],
-                status_code=r["status_code"],
-                ttfb_ms=r["ttfb_ms"],
-                total_ms=r["total_ms"],
-                html_bytes=r["html_bytes"],
-                headers=r["headers"],
-                html_text=r["html_text"],
-            )
-            for r in results_raw
-        ]
+        targets = pagespeed_targets()
+        items, errors, skipped = await _probe_all(client, targets, t0 + settings.PS_PAGESPEED_BUDGET_S)
+        if not items:
+            raise RuntimeError(f"all {len(targets)} pagespeed probes failed: {errors[:3]!r}")
 
         now_dt = datetime.now(ZoneInfo(settings.TIMEZONE))
-        for it in items:
-            repo.insert_snapshot(it, observed_at=now_dt)
-        db.commit()
-        dur_ms = int((perf_counter() - t0) * 1000)
         order = {"ok": 0, "warning": 1, "critical": 2}
         worst = max((it.status.value for it in items), default="ok", key=lambda s: order[s])
-        runs.insert_run(CHECK_NAME, "ok", dur_ms,
-                        {"home": items[0].ttfb_ms, "product": items[1].ttfb_ms, "worst": worst})
+        if not repo.has_rollups():
+            # primeira run com pagespeed_rollups: agrega o histórico bruto que já existe
+            log.info("%s: backfilled rollups from %d raw rows", CHECK_NAME, repo.backfill_rollups())
+        repo.insert_many(items, observed_at=now_dt)
+        repo.add_to_rollups((now_dt, it.page_type, it.url, it.ttfb_ms) for it in items)
+        SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, len(items), worst)
+        dur_ms = int((perf_counter() - t0) * 1000)
+
+        # TTFB mediano por grupo (mantém as chaves "home"/"product" do payload antigo)
+        by_group: dict[str, list[int]] = {}
+        for it in items:
+            by_group.setdefault(it.page_type, []).append(it.ttfb_ms)
+        payload: dict = {g: sorted(v)[len(v) // 2] for g, v in by_group.items()}
+        payload.update({
+            "count": len(items), "targets": len(targets),
+            "errors": len(errors), "skipped": skipped, "worst": worst,
+        })
+        if errors:
+            payload["error_sample"] = errors[:5]
+            log.warning("%s: %d/%d probes failed", CHECK_NAME, len(errors), len(targets))
+        runs.record_run(CHECK_NAME, "ok", dur_ms, payload)
+        db.commit()
         return True
     except Exception as e:
         db.rollback()
         dur_ms = int((perf_counter() - t0) * 1000)
-        runs.insert_run(CHECK_NAME, "error", dur_ms, {"error": repr(e)})
+        runs.record_run(CHECK_NAME, "error", dur_ms, {"error": repr(e)})
+        db.commit()
         log.exception("%s failed", CHECK_NAME)   # <— isto imprime stacktrace
         return False
     finally:
@@ -3,6 +3,7 @@ from datetime import datetime
 from app.domains.prestashop.payments.types import PaymentMethod
 from app.repos.runs.write import RunsWriteRepo
 from app.repos.prestashop.payments_write import PaymentsWriteRepo
+from app.repos.shared.pointers import SnapshotPointerRepo
 from app.external.prestashop_client import PrestashopClient
 from app.domains.prestashop.payments.mappers import raw_row_to_domain
 from app.core.config import settings
@@ -15,7 +16,7 @@ CHECK_NAME = "prestashop.payments"
 log = logging.getLogger("wd.jobs.ps.payments")
 EPOCH = datetime(1970, 1, 1, tzinfo=ZoneInfo(settings.TIMEZONE))
 
-def run(db_session_factory):
+async def run(db_session_factory):
     db = db_session_factory()
     runs = RunsWriteRepo(db)
     repo = PaymentsWriteRepo(db)
@@ -23,7 +24,7 @@ def run(db_session_factory):
 
     try:
         client = PrestashopClient()
-        rows = client.fetch_payments()
+        rows = await client.fetch_payments()
 
         tz = ZoneInfo(settings.TIMEZONE)
         now_dt = datetime.now(tz)
@@ -48,20 +49,21 @@ def run(db_session_factory):
         uniq = list(dedup.values())
 
         # grava só 1 por método
-        for it in uniq:
-            repo.insert_snapshot(it, observed_at=now_dt)
-        db.commit()
-        duration_ms = int((perf_counter() - t0) * 1000)
         order = {"ok": 0, "warning": 1, "critical": 2}
         worst = max((it.status.value for it in uniq), default="ok", key=lambda s: order[s])
-        runs.insert_run(CHECK_NAME, "ok", duration_ms,
+        repo.insert_many(uniq, observed_at=now_dt)
+        SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, len(uniq), worst)
+        duration_ms = int((perf_counter() - t0) * 1000)
+        runs.record_run(CHECK_NAME, "ok", duration_ms,
                         {"count_raw": len(items), "count_unique": len(uniq), "worst": worst})
+        db.commit()
         return True
 
     except Exception as e:
         db.rollback()
         duration_ms = int((perf_counter() - t0) * 1000)
-        runs.insert_run(CHECK_NAME, "error", duration_ms, {"error": str(e)})
+        runs.record_run(CHECK_NAME, "error", duration_ms, {"error": str(e)})
+        db.commit()
         return False
 
     finally:
@@ -0,0 +1,30 @@
+# app/services/commands/runs/flush.py
+import logging
+
+from app.repos.runs.buffer import RUN_BUFFER
+from app.repos.runs.write import RunsWriteRepo
+
+log = logging.getLogger("wd.jobs.runs.flush")
+
+
+def run(db_session_factory) -> int:
+    """
+    Grava as runs em buffer (RUNS_BUFFERED) num só commit. Se falhar, o
+    lote volta ao buffer para o próximo flush. Devolve o nº de runs gravadas.
+    """
+    rows = RUN_BUFFER.drain()
+    if not rows:
+        return 0
+    db = db_session_factory()
+    try:
+        n = RunsWriteRepo(db).insert_many(rows)
+        db.commit()
+        log.debug("runs flush: %d runs", n)
+        return n
+    except Exception:
+        db.rollback()
+        RUN_BUFFER.requeue(rows)
+        log.exception("runs flush failed; %d runs kept in the buffer", len(rows))
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,127 @@
+# app/services/events/change_feed.py
+"""
+Bus local de alterações worker -> API, sem broker externo.
+
+O worker já grava, na mesma transação das linhas, o ponteiro do check em
+snapshot_pointers (SnapshotPointerRepo.publish) e, no fim de cada job, uma
+linha em check_runs. A API corre uma thread que faz PRAGMA data_version
+numa ligação dedicada (custa ~µs e só muda quando outra ligação faz
+commit); quando muda, compara os ponteiros e lê as runs novas, e avisa os
+subscritores com uma lista de ChangeEvent.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.repos.shared.changes import ChangeReadRepo
+
+log = logging.getLogger("wd.events.feed")
+
+Listener = Callable[[list["ChangeEvent"]], None]
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    kind: str                # "snapshot" (dados novos) | "run" (job terminou)
+    check_name: str
+    observed_at: str         # ISO; hora local como gravada na BD
+    status: str              # worst da snapshot ou status da run
+    row_count: Optional[int] = None
+
+    def as_dict(self) -> dict:
+        return {"kind": self.kind, "check_name": self.check_name, "observed_at": self.observed_at,
+                "status": self.status, "row_count": self.row_count}
+
+
+def _iso(dt) -> str:
+    return dt.isoformat() if isinstance(dt, datetime) else str(dt or "")
+
+
+class ChangeFeed:
+    def __init__(self, engine: Engine, *, poll_ms: int = 250):
+        self._engine = engine
+        self._poll_s = max(0.01, poll_ms / 1000)
+        self._listeners: list[Listener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.events_total = 0
+
+    def subscribe(self, fn: Listener) -> Callable[[], None]:
+        """Regista fn(events); devolve a função que cancela a subscrição."""
+        with self._lock:
+            self._listeners.append(fn)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if fn in self._listeners:
+                    self._listeners.remove(fn)
+        return unsubscribe
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # ---------------- interno ----------------
+    def _emit(self, events: list[ChangeEvent]) -> None:
+        self.events_total += len(events)
+        with self._lock:
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(events)
+            except Exception:
+                log.exception("change feed listener failed")
+
+    def _run(self) -> None:
+        # ligação dedicada: data_version só compara bem dentro da mesma ligação
+        with self._engine.connect() as conn:
+            db = Session(bind=conn)
+            repo = ChangeReadRepo(db)
+            version = repo.data_version()
+            pointers = repo.pointers()
+            last_run = repo.max_run_id()
+            db.rollback()
+            log.info("change feed started (poll %.0fms, %d checks)", self._poll_s * 1000, len(pointers))
+
+            while not self._stop.wait(self._poll_s):
+                try:
+                    v = repo.data_version()
+                    if v is not None and v == version:
+                        continue
+                    version = v
+                    events: list[ChangeEvent] = []
+
+                    current = repo.pointers()
+                    for name, (obs, n, worst) in current.items():
+                        if pointers.get(name) != (obs, n, worst):
+                            events.append(ChangeEvent("snapshot", name, _iso(obs), worst, n))
+                    pointers = current
+
+                    for r in repo.runs_after(last_run):
+                        events.append(ChangeEvent("run", r.check_name, _iso(r.created_at), r.status))
+                        last_run = r.id
+                    db.rollback()  # fecha a leitura para a próxima ver os commits seguintes
+
+                    if events:
+                        self._emit(events)
+                except Exception:
+                    db.rollback()
+                    log.exception("change feed poll failed")
+            db.close()
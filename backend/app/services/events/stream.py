@@ -0,0 +1,56 @@
+# app/services/events/stream.py
+"""
+Server-Sent Events a partir do ChangeFeed: cada cliente recebe um evento
+`check` por snapshot/run nova, com {kind, check_name, observed_at, status,
+row_count}. O feed corre numa thread; os eventos passam para o event loop
+por call_soon_threadsafe e ficam numa fila limitada por cliente.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+
+from starlette.requests import Request
+
+from app.services.events.change_feed import ChangeEvent, ChangeFeed
+
+log = logging.getLogger("wd.events.stream")
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def change_stream(feed: ChangeFeed, request: Request, *,
+                        heartbeat_s: float = 15.0, queue_max: int = 100) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[ChangeEvent] = asyncio.Queue(maxsize=max(1, queue_max))
+
+    def push(events: list[ChangeEvent]) -> None:
+        for e in events:
+            try:
+                queue.put_nowait(e)
+            except asyncio.QueueFull:
+                # cliente lento: perde eventos; ao reconectar o frontend refaz tudo
+                log.warning("sse client queue full, dropping %s", e.check_name)
+
+    def on_events(events: list[ChangeEvent]) -> None:
+        loop.call_soon_threadsafe(push, events)
+
+    unsubscribe = feed.subscribe(on_events)
+    try:
+        # retry = espera do EventSource antes de reconectar
+        yield f"retry: 5000\n{_sse('ready', {})}"
+        while True:
+            try:
+                e = await asyncio.wait_for(queue.get(), timeout=heartbeat_s)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"  # comentário: mantém proxies e a ligação abertos
+                continue
+            yield _sse("check", e.as_dict())
+    finally:
+        unsubscribe()
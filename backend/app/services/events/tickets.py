@@ -0,0 +1,42 @@
+# app/services/events/tickets.py
+"""
+Tickets do /stream. O EventSource do browser não envia headers, por isso a
+credencial tem de ir na query string, e a query string acaba nos access
+logs (uvicorn, proxies). Em vez do JWT de acesso vai um ticket pedido com
+POST /stream/ticket: assinado (typ "stream"), válido SSE_TICKET_TTL_SECONDS
+e de uso único. Os jti já usados ficam em memória até expirarem.
+
+Com vários processos da API o uso único é por processo; o ticket continua
+a valer só segundos e só para o /stream.
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+from app.core.config import settings
+from app.shared.jwt import DecodedToken, create_stream_ticket, decode_token
+
+_used: dict[str, int] = {}  # jti -> exp (epoch s)
+_lock = threading.Lock()
+
+
+def issue_ticket(sub: str) -> tuple[str, int]:
+    ttl = max(1, settings.SSE_TICKET_TTL_SECONDS)
+    return create_stream_ticket(sub=sub, seconds=ttl), ttl
+
+
+def redeem_ticket(ticket: str) -> DecodedToken:
+    """Valida e gasta o ticket; ValueError/jwt.InvalidTokenError se não servir."""
+    data = decode_token(ticket, expected_typ="stream")
+    jti = data.get("jti")
+    if not jti:
+        raise ValueError("stream ticket without jti")
+    now = int(time.time())
+    with _lock:
+        for k in [k for k, exp in _used.items() if exp < now]:
+            del _used[k]
+        if jti in _used:
+            raise ValueError("stream ticket already used")
+        _used[jti] = int(data.get("exp") or now)
+    return data
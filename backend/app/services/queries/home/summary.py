@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 from zoneinfo import ZoneInfo
 import time
 import logging
 
 from sqlalchemy.orm import Session
 
+from app.core.cache import SingleFlightCache
 from app.core.config import settings
+from app.core.db import ReadSessionLocal, SessionLocal
 from app.schemas.home import HomeSummaryOut, CheckCardOut
 from app.services.queries.runs.runs import RunsQueryService
 from app.services.queries.payments.summary import get_payments_summary
@@ -22,8 +25,49 @@ WINDOW_MAX_POINTS: Dict[str, int] = {
 }
 
 log = logging.getLogger("watchdogs.home")
-_CACHE: Dict[Tuple[str, str], Tuple[float, HomeSummaryOut]] = {}
-_TTL = getattr(settings, "HOME_SUMMARY_TTL_SECONDS", 30)  # default 30s
+# por processo: cada worker do uvicorn tem o seu (e o seu change feed, que o invalida)
+_CACHE: SingleFlightCache[HomeSummaryOut] = SingleFlightCache(
+    "home.summary",
+    ttl=settings.HOME_SUMMARY_EVENT_TTL_SECONDS if settings.CHANGE_FEED_ENABLED else settings.HOME_SUMMARY_TTL_SECONDS,
+    stale_ttl=settings.HOME_SUMMARY_STALE_SECONDS,
+    max_entries=settings.HOME_SUMMARY_CACHE_MAX,
+)
+
+# checks cujos dados a secção kpis lê; snapshots/runs de outros (pda, store audit, manutenção)
+# não mexem nos números do summary
+HOME_CHECKS = frozenset({
+    "prestashop.payments",
+    "prestashop.orders_delayed",
+    "prestashop.pagespeed",
+    "prestashop.carts_stale",
+    "prestashop.eol_products",
+})
+_last_run_status: Dict[str, str] = {}  # só a thread do change feed mexe aqui
+
+
+def changes_affect_home(events: Iterable[Any]) -> bool:
+    """
+    Se algum ChangeEvent muda o summary: qualquer evento de HOME_CHECKS, ou
+    uma run de outro check cujo status mudou (o cartão em `checks` muda de
+    cor). Runs iguais à anterior desses checks só mexem no last_run_at do
+    cartão, que fica para o TTL (HOME_SUMMARY_EVENT_TTL_SECONDS).
+    """
+    hit = False
+    for e in events:
+        if e.check_name in HOME_CHECKS:
+            hit = True
+        elif e.kind == "run":
+            if _last_run_status.get(e.check_name) != e.status:
+                hit = True
+            _last_run_status[e.check_name] = e.status
+    return hit
+
+
+def invalidate_on_changes(events: Iterable[Any]) -> None:
+    """Subscritor do ChangeFeed: invalida o cache só quando o summary muda."""
+    if changes_affect_home(events):
+        _CACHE.invalidate()
+
 
 def _parse_sections(sections: Optional[str]) -> set[str]:
     if not sections:
@@ -111,83 +155,125 @@ def _pick_bucket_minutes(window: str) -> int:
         return 60
     return 5
 
+def _checks(db: Session) -> list[CheckCardOut]:
+    latest = RunsQueryService(db).list(limit=500)
+    by_check: Dict[str, CheckCardOut] = {}
+    for r in latest:
+        name = getattr(r, "check_name", None)
+        if not name or name in by_check:
+            continue
+        by_check[name] = CheckCardOut(
+            name=name,
+            last_status=_coerce_run_status(getattr(r, "status", None)),
+            last_run_ms=int(getattr(r, "duration_ms", 0) or 0),
+            last_run_at=as_iso_utc(getattr(r, "created_at", None)),
+        )
+    return sorted(by_check.values(), key=lambda x: x.name.lower())
+
+
+Section = Tuple[str, Callable[[Session], Any]]
+
+# secções independentes em paralelo; partilhado por todos os pedidos (limita as ligações de leitura)
+_POOL = ThreadPoolExecutor(max_workers=max(1, settings.HOME_SUMMARY_WORKERS), thread_name_prefix="home-section")
+
+
+def _timed(fn: Callable[[Session], Any], db: Session) -> Tuple[Any, Optional[str], float]:
+    """(valor, erro, ms) — o erro fica na secção, não derruba o summary."""
+    t = time.perf_counter()
+    try:
+        return fn(db), None, (time.perf_counter() - t) * 1000
+    except Exception as e:
+        return None, str(e)[:200], (time.perf_counter() - t) * 1000
+
+
+def _on_read_session(fn: Callable[[Session], Any]) -> Tuple[Any, Optional[str], float]:
+    db = ReadSessionLocal()
+    try:
+        return _timed(fn, db)
+    finally:
+        db.close()
+
+
 class HomeSummaryService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[Session] = None):
+        # build()/cached() não usam self.db: o loader do cache abre a sua sessão
         self.db = db
 
-    def build(self, *, window: str, sections: Optional[str]) -> HomeSummaryOut:
+    def _key_loader(self, window: str, sections: Optional[str]) -> Tuple[Tuple[str, str], Callable[[], HomeSummaryOut]]:
         want = _parse_sections(sections)
-        key = (window or "24h", ",".join(sorted(want)))
+        window = window or "24h"
 
-        # cache hit?
-        now_ts = time.time()
-        hit = _CACHE.get(key)
-        if hit and (now_ts - hit[0] < _TTL):
-            return hit[1]
-
-        t0 = time.perf_counter()
-        now_iso = datetime.now(timezone.utc).isoformat()
-        out = HomeSummaryOut(now_iso=now_iso, last_update_iso=now_iso)
-        errors: Dict[str, Optional[str]] = {}
-
-        # -------- Runs / Checks --------
-        t_runs = None
-        if "runs" in want:
-            t1 = time.perf_counter()
+        def load() -> HomeSummaryOut:
+            # sessão própria: o refresh em segundo plano sobrevive ao pedido que o disparou
+            db = SessionLocal()
             try:
-                runs_svc = RunsQueryService(self.db)
-                latest = runs_svc.list(limit=500)
-                by_check: Dict[str, CheckCardOut] = {}
-                for r in latest:
-                    name = getattr(r, "check_name", None)
-                    if not name or name in by_check:
-                        continue
-                    by_check[name] = CheckCardOut(
-                        name=name,
-                        last_status=_coerce_run_status(getattr(r, "status", None)),
-                        last_run_ms=int(getattr(r, "duration_ms", 0) or 0),
-                        last_run_at=as_iso_utc(getattr(r, "created_at", None)),
-                    )
-                out.checks = sorted(by_check.values(), key=lambda x: x.name.lower())
-                errors["runs"] = None
-            except Exception as e:
-                errors["runs"] = str(e)[:200]
+                return HomeSummaryService(db)._build(window=window, want=want)
             finally:
-                t_runs = (time.perf_counter() - t1) * 1000
+                db.close()
+
+        return (window, ",".join(sorted(want))), load
+
+    @staticmethod
+    def _present(out: HomeSummaryOut, timings: bool) -> HomeSummaryOut:
+        # os tempos são os da construção que está em cache
+        return out if timings else out.model_copy(update={"timings_ms": None})
 
-        # -------- KPIs --------
+    def build(self, *, window: str, sections: Optional[str], timings: bool = False) -> HomeSummaryOut:
+        key, load = self._key_loader(window, sections)
+        return self._present(_CACHE.get(key, load), timings)
+
+    def cached(self, *, window: str, sections: Optional[str], timings: bool = False) -> Optional[HomeSummaryOut]:
+        """Só do cache, sem bloquear (None = tem de ser calculado com build())."""
+        key, load = self._key_loader(window, sections)
+        out = _CACHE.peek(key, load)
+        return self._present(out, timings) if out is not None else None
+
+    def _sections(self, window: str, want: set[str]) -> list[Section]:
+        sections: list[Section] = []
+        if "runs" in want:
+            sections.append(("runs", _checks))
         if "kpis" in want:
-            if out.kpis is None:
-                out.kpis = {}
-
-            def _safe(label, fn):
-                t_start = time.perf_counter()
-                try:
-                    out.kpis[label] = fn()
-                    errors[label] = None
-                except Exception as e:
-                    errors[label] = str(e)[:200]
-                return (time.perf_counter() - t_start) * 1000
-
-            # closures p/ medir tempo
             bp = _pick_bucket_minutes(window)
             mp = WINDOW_MAX_POINTS.get(window, 240)
+            sections += [
+                ("payments", lambda db: get_payments_summary(db, window)),
+                ("orders_delayed", lambda db: get_orders_summary(db, window)),
+                ("pagespeed", lambda db: get_pagespeed_summary(db, window, bucket_minutes=bp, max_points=mp)),
+                ("carts_stale", lambda db: get_carts_summary(db, window)),
+                ("eol", lambda db: get_eol_summary(db, window)),
+            ]
+        return sections
 
-            t_pay = _safe("payments", lambda: get_payments_summary(self.db, window))
-            t_ord = _safe("orders_delayed", lambda: get_orders_summary(self.db, window))
-            t_ps  = _safe("pagespeed", lambda: get_pagespeed_summary(self.db, window, bucket_minutes=bp, max_points=mp))
-            t_cart= _safe("carts_stale", lambda: get_carts_summary(self.db, window))
-            t_eol = _safe("eol", lambda: get_eol_summary(self.db, window))
+    def _build(self, *, window: str, want: set[str], parallel: Optional[bool] = None) -> HomeSummaryOut:
+        t0 = time.perf_counter()
+        now_iso = datetime.now(timezone.utc).isoformat()
+        out = HomeSummaryOut(now_iso=now_iso, last_update_iso=now_iso)
+        errors: Dict[str, Optional[str]] = {}
+        timings: Dict[str, float] = {}
 
-            # logging sintético (não altera resposta)
-            log.info("home.summary window=%s timings_ms runs=%s payments=%.1f orders=%.1f pagespeed=%.1f carts=%.1f eol=%.1f total=%.1f",
-                     window,
-                     f"{t_runs:.1f}" if t_runs is not None else "-",
-                     t_pay, t_ord, t_ps, t_cart, t_eol,
-                     (time.perf_counter() - t0) * 1000)
+        sections = self._sections(window, want)
+        if parallel is None:
+            parallel = settings.HOME_SUMMARY_PARALLEL
+        if parallel and len(sections) > 1:
+            # cada secção na sua ligação só de leitura: total ~ max(secção) em vez da soma
+            futures = [(label, _POOL.submit(_on_read_session, fn)) for label, fn in sections]
+            results = [(label, f.result()) for label, f in futures]
+        else:
+            results = [(label, _timed(fn, self.db)) for label, fn in sections]
 
-        out.errors = errors
+        for label, (value, error, ms) in results:
+            errors[label] = error
+            timings[label] = round(ms, 1)
+            if error is not None:
+                continue
+            if label == "runs":
+                out.checks = value
+            else:
+                out.kpis[label] = value
 
-        # guarda no cache
-        _CACHE[key] = (time.time(), out)
+        timings["total"] = round((time.perf_counter() - t0) * 1000, 1)
+        out.errors = errors
+        out.timings_ms = timings
+        log.info("home.summary window=%s parallel=%s timings_ms %s", window, bool(parallel),
+                 " ".join(f"{k}={v:.1f}" for k, v in timings.items()))
         return out
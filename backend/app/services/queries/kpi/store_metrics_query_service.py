@@ -0,0 +1,73 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.domains.kpi.store.mappers import fold_daily, from_daily, parse_creation_dt
+from app.repos.kpi.store_audit_read import StoreAuditReadRepo
+
+SYNC_CHECK = "kpi.sync_store_audit"  # ver app/services/commands/kpi/sync_store_audit.py
+
+
+def _default_since() -> str:
+    """Janela padrão para KPIs de loja: últimos 30 dias."""
+    since = datetime.now().date() - timedelta(days=30)
+    # timestamp completo, como o endpoint do frontInvoiceAudit recebia
+    return f"{since.isoformat()}T00:00:00"
+
+
+def normalize_since(since: Optional[str]) -> str:
+    """Aceita YYYY-MM-DD ou ISO; se não der para ler, a janela padrão."""
+    if not since:
+        return _default_since()
+    since_iso = since if "T" in since else f"{since}T00:00:00"
+    return since_iso if parse_creation_dt(since_iso) else _default_since()
+
+
+class StoreMetricsQueryService:
+    """
+    KPIs da loja física (frontInvoiceAudit) a partir dos agregados locais
+    (store_audit_daily), sem chamar o upstream no pedido.
+
+    A BD só tem os eventos desde o backfill da primeira sync
+    (STORE_AUDIT_BACKFILL_DAYS); um since anterior ao evento mais antigo
+    guardado não é coberto (covers() False) e vai ao upstream
+    (KPIQueryService.instore_metrics_upstream), como antes.
+    """
+    def __init__(self, db: Session):
+        self.repo = StoreAuditReadRepo(db)
+
+    def covers(self, since: Optional[str] = None) -> bool:
+        oldest = self.repo.oldest_created_at()
+        return oldest is not None and parse_creation_dt(normalize_since(since)) >= oldest
+
+    def instore_metrics(self, *, since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retorna dict com:
+        - since
+        - count_events
+        - timeseries_daily
+        - employees
+        - doc_type_daily
+        """
+        since_iso = normalize_since(since)
+        start = parse_creation_dt(since_iso)
+        day = start.date().isoformat()
+
+        if start.time() == datetime.min.time():
+            agg = self.repo.daily_from(day)
+        else:
+            # since a meio do dia: esse dia sai dos eventos crus, os seguintes dos agregados
+            next_day = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+            agg = self.repo.daily_from(next_day.date().isoformat())
+            agg.update(fold_daily(self.repo.payloads_between(start, next_day)))
+
+        count, ts_daily, emp_perf, doc_type_daily = from_daily(agg)
+        return {
+            "since": since_iso,
+            "count_events": count,
+            "timeseries_daily": ts_daily,
+            "employees": emp_perf,
+            "doc_type_daily": doc_type_daily,
+        }
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+import calendar
 import re
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.domains.prestashop.pagespeed.rollups import LEVELS, bucket_start, cover, parse_bucket_start, pick_level
 from app.repos.prestashop.pagespeed_read import PageSpeedReadRepo
+from app.shared.quantiles import QuantileSketch
 
 TZ = ZoneInfo(settings.TIMEZONE)
 _WIN_RE = re.compile(r"^\s*(\d+)\s*([smhdw])\s*$")
@@ -20,19 +23,40 @@ def _parse_window(window: str) -> timedelta:
     seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[unit]
     return timedelta(seconds=n * seconds)
 
-def _pct(values: list[int], p: float) -> int:
-    vals = [int(v) for v in values if v is not None]
-    if not vals:
-        return 0
-    vals.sort()
-    idx = int(round(p * (len(vals) - 1)))
-    return vals[idx]
+def _q(sk: QuantileSketch | None, p: float) -> int:
+    v = sk.quantile(p) if sk is not None else None
+    return int(round(v)) if v is not None else 0
 
 def _downsample_tail(series: list[dict], max_points: int) -> list[dict]:
     if max_points <= 0 or len(series) <= max_points:
         return series
     return series[-max_points:]  # fica só com os mais recentes
 
+def _series(rows: list[tuple[str, str, int, float]], bucket_minutes: int) -> list[dict]:
+    """
+    Reagrupa os baldes dos agregados em baldes de N minutos: média do TTFB
+    por (bucket, page_type), ts em segundos desde epoch como antes no SQL.
+    """
+    bucket_len = max(1, int(bucket_minutes * 60))
+    acc: dict[int, dict[str, list[float]]] = {}
+    for start, ptype, n, v_sum in rows:
+        sec = calendar.timegm(parse_bucket_start(start).timetuple())
+        slot = acc.setdefault(sec // bucket_len * bucket_len, {}).setdefault(ptype, [0, 0.0])
+        slot[0] += n
+        slot[1] += v_sum
+    out = []
+    for bsec in sorted(acc):
+        item = {"ts": datetime.fromtimestamp(bsec, tz=timezone.utc).isoformat()}
+        for ptype, (n, v_sum) in acc[bsec].items():
+            item[f"{ptype}_ttfb_ms"] = int(round(v_sum / n)) if n else 0
+        out.append(item)
+    return out
+
+def _series_level(bucket_minutes: int, window_level: str) -> str:
+    # balde mais grosso que divide bucket_minutes, mas nunca mais fino do que o histórico permite
+    level = "day" if bucket_minutes % 1440 == 0 else "hour" if bucket_minutes % 60 == 0 else "minute"
+    return max(level, window_level, key=LEVELS.index)
+
 def get_pagespeed_summary(
     db: Session,
     window: str,
@@ -40,33 +64,50 @@ def get_pagespeed_summary(
     bucket_minutes: int = 5,
     max_points: int = 240,
 ) -> dict:
+    """
+    Percentis e série a partir de pagespeed_rollups (mantidos na ingestão);
+    as linhas brutas só são lidas para o last_status de cada grupo.
+    """
     repo = PageSpeedReadRepo(db)
     now = datetime.now(TZ)
-    since = now - _parse_window(window)
+    span = _parse_window(window)
+    since = now - span
+    keep = settings.PS_PAGESPEED_ROLLUP_DAYS
 
-    # percentis por tipo de página (mantenho por amostragem direta)
-    home_vals = repo.ttfb_since("home", since)
-    prod_vals = repo.ttfb_since("product", since)
+    # sketches por grupo e URL (url "" = grupo inteiro): dias inteiros + horas/minutos nas pontas
+    by_group = repo.rollup_sketches(cover(since, now, keep))
 
-    home = {
-        "p50_ttfb_ms": _pct(home_vals, 0.50),
-        "p90_ttfb_ms": _pct(home_vals, 0.90),
-        "p95_ttfb_ms": _pct(home_vals, 0.95),
-        "last_status": repo.last_status("home") or "ok",
-    }
-    product = {
-        "p50_ttfb_ms": _pct(prod_vals, 0.50),
-        "p90_ttfb_ms": _pct(prod_vals, 0.90),
-        "p95_ttfb_ms": _pct(prod_vals, 0.95),
-        "last_status": repo.last_status("product") or "ok",
-    }
+    groups = {}
+    for group in sorted(set(by_group) | {"home", "product"}):
+        per_url = by_group.get(group, {})
+        total = per_url.get("")
+        urls = {u: sk for u, sk in per_url.items() if u}
+        groups[group] = {
+            "p50_ttfb_ms": _q(total, 0.50),
+            "p90_ttfb_ms": _q(total, 0.90),
+            "p95_ttfb_ms": _q(total, 0.95),
+            "last_status": repo.last_status(group) or "ok",
+            "urls": len(urls),
+            "samples": total.count if total is not None else 0,
+            # p95 por URL, piores primeiro (ajuda a encontrar a página que regrediu)
+            "worst_urls": sorted(
+                ({"url": u, "p95_ttfb_ms": _q(sk, 0.95), "samples": sk.count} for u, sk in urls.items()),
+                key=lambda x: x["p95_ttfb_ms"],
+                reverse=True,
+            )[:5],
+        }
+
+    home = {k: groups["home"][k] for k in ("p50_ttfb_ms", "p90_ttfb_ms", "p95_ttfb_ms", "last_status")}
+    product = {k: groups["product"][k] for k in ("p50_ttfb_ms", "p90_ttfb_ms", "p95_ttfb_ms", "last_status")}
 
-    # série já agrupada no SQL e limitada ao tail
-    raw_series = repo.series_bucketted(["home", "product"], since, bucket_minutes)
-    series = _downsample_tail(raw_series, max_points)
+    # série a partir dos agregados de grupo, limitada ao tail
+    s_level = _series_level(bucket_minutes, pick_level(span, keep))
+    rows = repo.rollup_series(["home", "product"], s_level, bucket_start(since, s_level))
+    series = _downsample_tail(_series(rows, bucket_minutes), max_points)
 
     return {
         "home": home,
         "product": product,
+        "groups": groups,
         "series": series,
     }
@@ -0,0 +1,62 @@
+# app/services/queries/runs/summary.py
+from __future__ import annotations
+from datetime import datetime, timedelta, timezone
+import re
+from sqlalchemy.orm import Session
+
+from app.repos.runs.read import RunsReadRepo
+from app.repos.shared.rollups import RollupReadRepo
+from app.schemas.common import LatencyStatsDTO
+from app.schemas.runs import CheckDurationDTO, RunsSummaryDTO
+from app.services.queries.runs.runs import _coerce_run_status
+from app.shared.quantiles import QuantileSketch
+
+_WIN_RE = re.compile(r"^\s*(\d+)\s*([smhdw])\s*$")
+_SOURCE, _BUCKET = "check_runs", "day"  # ver app/domains/maintenance/rules.py
+
+def _parse_window(window: str) -> timedelta:
+    m = _WIN_RE.match(window or "")
+    if not m:
+        return timedelta(hours=24)
+    n = int(m.group(1))
+    unit = m.group(2).lower()
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[unit]
+    return timedelta(seconds=n * seconds)
+
+def get_runs_summary(db: Session, window: str) -> RunsSummaryDTO:
+    """
+    Duração das runs por check na janela (p50/p90/p95/p99). Linhas brutas
+    desde o fim do histórico compactado; antes disso junta os sketches dos
+    agregados diários da retenção.
+    """
+    # check_runs.created_at é UTC (CURRENT_TIMESTAMP), tal como os baldes dos agregados
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - _parse_window(window)
+    rollups = RollupReadRepo(db)
+    horizon = rollups.horizon(_SOURCE, _BUCKET)
+
+    sketches: dict[str, QuantileSketch] = {}
+    errors: dict[str, int] = {}
+    if horizon is not None and since < horizon:
+        # key = "check_name:status"
+        for key, sk in rollups.sketches_since(_SOURCE, _BUCKET, since, "duration_ms").items():
+            name, _, status = key.rpartition(":")
+            sketches.setdefault(name, QuantileSketch()).merge(sk)
+            if _coerce_run_status(status) == "error":
+                errors[name] = errors.get(name, 0) + sk.count
+
+    raw_since = max(since, horizon) if horizon is not None else since
+    for name, status, duration_ms in RunsReadRepo(db).durations_since(raw_since):
+        sketches.setdefault(name, QuantileSketch()).add(int(duration_ms or 0))
+        if _coerce_run_status(status) == "error":
+            errors[name] = errors.get(name, 0) + 1
+
+    checks = [
+        CheckDurationDTO(
+            check_name=name,
+            runs=sk.count,
+            errors=errors.get(name, 0),
+            duration_ms=LatencyStatsDTO(**sk.summary()),
+        )
+        for name, sk in sorted(sketches.items())
+    ]
+    return RunsSummaryDTO(ok=True, window=window, checks=checks)
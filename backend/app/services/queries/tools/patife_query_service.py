@@ -1,15 +1,36 @@
 from __future__ import annotations
+from datetime import datetime, timedelta
 from typing import List
+from zoneinfo import ZoneInfo
+import re
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.repos.shared.rollups import RollupReadRepo
 from app.repos.tools.patife_healthz_read import PatifeHealthzReadRepo
-from app.schemas.tools import PatifeHealthzDTO
-from app.schemas.common import Page, PageMeta
+from app.schemas.tools import PatifeHealthzDTO, PatifeSummaryDTO
+from app.schemas.common import LatencyStatsDTO, Page, PageMeta
+from app.shared.quantiles import QuantileSketch
+
+TZ = ZoneInfo(settings.TIMEZONE)
+_WIN_RE = re.compile(r"^\s*(\d+)\s*([smhdw])\s*$")
+_SOURCE, _BUCKET = "patife_healthz", "hour"  # ver app/domains/maintenance/rules.py
+
+
+def _parse_window(window: str) -> timedelta:
+    m = _WIN_RE.match(window or "")
+    if not m:
+        return timedelta(hours=24)
+    n = int(m.group(1))
+    unit = m.group(2).lower()
+    seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[unit]
+    return timedelta(seconds=n * seconds)
 
 
 class PatifeQueryService:
     def __init__(self, db: Session):
         self.repo_r = PatifeHealthzReadRepo(db)
+        self.rollups = RollupReadRepo(db)
 
     def latest(self) -> PatifeHealthzDTO | None:
         r = self.repo_r.get_latest()
@@ -88,3 +109,36 @@ class PatifeQueryService:
                 has_prev=has_prev,
             ),
         )
+
+    def summary(self, window: str) -> PatifeSummaryDTO:
+        """
+        Percentis de duration_ms e db_latency_ms na janela: amostras brutas
+        desde o fim do histórico compactado + sketches dos agregados horários.
+        """
+        since = (datetime.now(TZ) - _parse_window(window)).replace(tzinfo=None)
+        horizon = self.rollups.horizon(_SOURCE, _BUCKET)
+        dur, dbl = QuantileSketch(), QuantileSketch()
+        by_status: dict[str, int] = {}
+
+        if horizon is not None and since < horizon:
+            for by_key in self.rollups.since(_SOURCE, _BUCKET, since).values():
+                for status, r in by_key.items():
+                    by_status[status] = by_status.get(status, 0) + r.n
+            for sk in self.rollups.sketches_since(_SOURCE, _BUCKET, since, "duration_ms").values():
+                dur.merge(sk)
+            for sk in self.rollups.sketches_since(_SOURCE, _BUCKET, since, "db_latency_ms").values():
+                dbl.merge(sk)
+
+        raw_since = max(since, horizon) if horizon is not None else since
+        for status, duration_ms, db_latency_ms in self.repo_r.latencies_since(raw_since):
+            by_status[status] = by_status.get(status, 0) + 1
+            dur.add(duration_ms)
+            dbl.add(db_latency_ms)
+
+        return PatifeSummaryDTO(
+            window=window,
+            samples=sum(by_status.values()),
+            by_status=by_status,
+            duration_ms=LatencyStatsDTO(**dur.summary()),
+            db_latency_ms=LatencyStatsDTO(**dbl.summary()),
+        )
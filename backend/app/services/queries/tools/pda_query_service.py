@@ -1,69 +1,104 @@
 from __future__ import annotations
-from typing import List
-import json
-from app.domains.tools.pda.mappers import raw_row_to_domain
-from app.external.pda_client import PdaClient
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.pda import PdaReportMirror
+from app.repos.shared.pointers import SnapshotPointerRepo
+from app.repos.tools.pda_reports_read import PdaReportsReadRepo
 from app.schemas.tools import Report
 from app.schemas.common import Page, PageMeta
 
-def _paginate(items: List, page: int, page_size: int):
-    total = len(items)
-    start = (page - 1) * page_size
-    end = start + page_size
-    slice_ = items[start:end]
-    has_prev = page > 1
-    has_next = end < total
-    return slice_, total, has_prev, has_next
+SYNC_CHECK = "pda.sync_reports"  # ver app/services/commands/pda/sync_reports.py
+
+
+def _encode_cursor(r: PdaReportMirror) -> str:
+    return urlsafe_b64encode(f"{r.sort_at.isoformat()}|{r.id}".encode()).decode().rstrip("=")
+
 
-def _json_dumps_safe(obj) -> str:
+def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Cursor opaco -> (sort_at, id); None se vier vazio ou estragado (volta ao page)."""
+    if not cursor:
+        return None
     try:
-        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, rid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(at), int(rid)
     except Exception:
-        return json.dumps({"raw": str(obj)}, ensure_ascii=False)
+        return None
+
+
+def _to_dto(r: PdaReportMirror) -> Report:
+    return Report(
+        id=r.id,
+        code=r.code,
+        message=r.message,
+        context_json=r.context_json,
+        error_text=r.error_text,
+        stack_text=r.stack_text,
+        log_mode=r.log_mode,
+        ts_client=(r.ts_client.isoformat() if r.ts_client else ""),
+        state=r.state,
+        date_added=(r.date_added.isoformat() if r.date_added else ""),
+        date_updated=(r.date_updated.isoformat() if r.date_updated else ""),
+    )
 
 
 class PdaQueryService:
     """
-    Serviço para consultas ao PDA.
+    Serviço para consultas ao PDA, sobre a cópia local pda_reports (o job
+    pda.sync_reports mantém-na em dia). Paginação keyset: com `cursor`
+    (meta.next_cursor da página anterior) não há OFFSET nem leitura da lista
+    inteira, e o custo de uma página não depende do nº de relatórios.
     """
-    def __init__(self, client: PdaClient | None = None):
+    def __init__(self, db: Session):
         """
         Inicializa o serviço.
         """
-        self._pda_client = client or PdaClient()
+        self.repo = PdaReportsReadRepo(db)
+        self.pointers = SnapshotPointerRepo(db)
 
-    def get_pda_report(self, page: int = 1, page_size: int = 50) -> List[Report]:
+    def get_pda_report(
+        self,
+        page: int = 1,
+        page_size: int = 50,
+        *,
+        cursor: Optional[str] = None,
+        state: Optional[str] = None,
+        code: Optional[str] = None,
+    ) -> Page[Report]:
         """
-        Obtém os relatórios do PDA.
+        Obtém uma página de relatórios do PDA (mais recentes primeiro).
         """
-        raw_rows = self._pda_client.fetch_reports() 
-        domain_rows = [raw_row_to_domain(row) for row in raw_rows]
-        page_rows, total, has_prev, has_next = _paginate(domain_rows, page, page_size)
-        
-        items = [
-            Report(
-                id=dr.id,
-                code=dr.code,
-                message=dr.message,
-                context_json=(None if dr.context is None else _json_dumps_safe(dr.context)),
-                error_text=dr.error_text,
-                stack_text=dr.stack_text,
-                log_mode=dr.log_mode,
-                ts_client=(dr.ts_client.isoformat() if dr.ts_client else ""),
-                state=dr.state,
-                date_added=(dr.date_added.isoformat() if dr.date_added else ""),
-                date_updated=(dr.date_updated.isoformat() if dr.date_updated else ""),
-            )
-            for dr in page_rows
-        ]
-        
+        after = _decode_cursor(cursor)
+        rows = self.repo.page(
+            limit=page_size + 1,
+            after=after,
+            offset=0 if after else (page - 1) * page_size,
+            state=state or None,
+            code=code or None,
+        )
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
         return Page[Report](
-            items=items,
+            items=[_to_dto(r) for r in rows],
             meta=PageMeta(
                 page=page,
                 page_size=page_size,
-                total=total,
+                total=self._total(state, code),
                 has_next=has_next,
-                has_prev=has_prev,
+                has_prev=page > 1,
+                next_cursor=(_encode_cursor(rows[-1]) if has_next and rows else None),
             ),
-        )
\ No newline at end of file
+        )
+
+    def _total(self, state: Optional[str], code: Optional[str]) -> int:
+        # sem filtros: o total que a sync publicou no ponteiro (sem COUNT à tabela)
+        if not state and not code:
+            p = self.pointers.get(SYNC_CHECK)
+            if p is not None:
+                return p.row_count
+        return self.repo.count(state=state or None, code=code or None)
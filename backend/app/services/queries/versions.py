@@ -0,0 +1,35 @@
+# app/services/queries/versions.py
+"""
+Versões baratas dos dados por detrás de cada endpoint de leitura (usadas
+para o ETag). Só leituras por PK/índice: nada de carregar as linhas.
+"""
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.core.etag import make_etag, time_bucket
+from app.repos.shared.changes import ChangeReadRepo
+
+COMPACT_CHECK = "maintenance.compact"
+
+
+class VersionQueryService:
+    def __init__(self, db: Session):
+        self.repo = ChangeReadRepo(db)
+
+    def check(self, check_name: str, *params) -> str:
+        """Última snapshot publicada do check (snapshot_pointers)."""
+        return make_etag(check_name, self.repo.pointer(check_name), *params)
+
+    def check_history(self, check_name: str, *params) -> str:
+        """Histórico paginado: também muda quando a compactação apaga linhas antigas."""
+        return make_etag(check_name, self.repo.pointer(check_name),
+                         self.repo.run_bounds(COMPACT_CHECK)[1], *params)
+
+    def runs(self, *params) -> str:
+        return make_etag("runs", self.repo.run_bounds(), *params)
+
+    def windowed(self, name: str, *params) -> str:
+        """Summaries com janela relativa a agora: runs + ponteiros + bucket de tempo."""
+        return make_etag(name, self.repo.run_bounds(), sorted(self.repo.pointers().items()),
+                         time_bucket(), *params)
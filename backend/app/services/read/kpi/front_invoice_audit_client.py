@@ -5,9 +5,10 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, List, Dict, Optional
 
-import requests
+import httpx
 
 from app.core.config import settings
+from app.external.http_pool import get_with_retries
 
 
 class FrontInvoiceAuditClient:
@@ -20,7 +21,7 @@ class FrontInvoiceAuditClient:
         self.token = settings.PS_API_KEY
         self.headers = {"User-Agent": "Kontrolsat-LOCAL-CRON"}
 
-    def fetch_events(
+    async def fetch_events(
         self,
         *,
         since_iso: Optional[str] = None,
@@ -35,8 +36,8 @@ class FrontInvoiceAuditClient:
         if since_iso:
             params["data_created_since"] = since_iso
 
-        resp = requests.get(
-            self.base_url, params=params, timeout=15, headers=self.headers
+        resp = await get_with_retries(
+            self.base_url, params=params, timeout=httpx.Timeout(15, connect=3), headers=self.headers
         )
         resp.raise_for_status()
         data = resp.json()
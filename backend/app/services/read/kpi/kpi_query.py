@@ -1,14 +1,10 @@
 from datetime import date, timedelta, datetime
 from typing import Any, Dict, Literal, Optional
 from app.core.config import settings
-from app.domains.kpi.store.mappers import (
-    to_doc_type_daily,
-    to_employee_performance,
-    to_timeseries_daily,
-)
-from app.external.prestashop_client import PrestashopClient
-from app.domains.kpi.employees.mappers import rows_to_series, raw_to_performance
+from app.domains.kpi.employees.mappers import SeriesBuilder, raw_to_performance
+from app.domains.kpi.store.mappers import aggregate_events
 from app.services.read.kpi.front_invoice_audit_client import FrontInvoiceAuditClient
+from app.services.read.kpi.upstream import KPIUpstream
 
 Gran = Literal["day", "week", "month", "year"]
 Role = Literal["prep", "invoice"]
@@ -48,10 +44,11 @@ def _norm_date(s: Optional[str]) -> Optional[str]:
 
 
 class KPIQueryService:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, upstream: Optional[KPIUpstream] = None) -> None:
+        # um cliente por serviço (o pool HTTP é partilhado por processo)
+        self.upstream = upstream or KPIUpstream()
 
-    def employees_timeseries(
+    async def employees_timeseries(
         self,
         role: Role,
         gran: Gran,
@@ -66,11 +63,13 @@ class KPIQueryService:
             since = since or s
             until = until or u
 
-        client = PrestashopClient()
-        data = client.fetch_kpi_employee_timeseries(
-            role=role, gran=gran, since=since, until=until
+        # cache: períodos fechados não voltam ao upstream, o aberto tem TTL curto
+        # as linhas vão direto para o builder (sem cache, à medida que chegam do socket)
+        builder = SeriesBuilder()
+        data = await self.upstream.employee_timeseries(
+            role=role, gran=gran, since=since, until=until, on_row=builder.add
         )
-        series = rows_to_series(role=data["meta"]["role"], rows=data["rows"])
+        series = builder.result(role=data["meta"]["role"])
 
         # flatten para alinhar com o router
         return {
@@ -81,7 +80,7 @@ class KPIQueryService:
             "series": series,
         }
 
-    def employees_performance(
+    async def employees_performance(
         self,
         role: Role,
         since: Optional[str] = None,
@@ -98,8 +97,7 @@ class KPIQueryService:
             since = since or s
             until = until or u
 
-        client = PrestashopClient()
-        payload = client.fetch_kpi_employee_performance(
+        payload = await self.upstream.employee_performance(
             role=role,
             since=since,
             until=until,
@@ -122,55 +120,17 @@ class KPIQueryService:
         }
 
     # Store --------
-    def _default_since_for_store(self) -> str:
+    async def instore_metrics_upstream(self, *, since_iso: str) -> Dict[str, Any]:
         """
-        Janela padrão para KPIs de loja.
-        Aqui usei 30 dias; muda se achares pouco/muito.
+        KPIs da loja física pedidos ao frontInvoiceAudit, para um since mais
+        antigo do que os eventos guardados localmente (ver
+        StoreMetricsQueryService.covers). Mesmo formato que instore_metrics.
         """
-        today = datetime.now().date()
-        since = today - timedelta(days=30)
-        # queremos timestamp completo para o endpoint
-        return f"{since.isoformat()}T00:00:00"
-
-    def instore_metrics(
-        self,
-        *,
-        since: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """
-        KPIs da loja física (frontInvoiceAudit).
-
-        Retorna dict com:
-        - since_iso
-        - count_events
-        - timeseries_daily
-        - employees
-        - totals_by_doc_type_daily
-        """
-        client = FrontInvoiceAuditClient()
-
-        if since:
-            # aceitar YYYY-MM-DD ou ISO
-            try:
-                # se vier só dia:
-                if "T" not in since:
-                    since_iso = f"{since}T00:00:00"
-                else:
-                    since_iso = since
-            except Exception:
-                since_iso = self._default_since_for_store()
-        else:
-            since_iso = self._default_since_for_store()
-
-        rows = client.fetch_events(since_iso=since_iso)
-
-        ts_daily = to_timeseries_daily(rows)
-        emp_perf = to_employee_performance(rows)
-        doc_type_daily = to_doc_type_daily(rows)
-
+        rows = await FrontInvoiceAuditClient().fetch_events(since_iso=since_iso)
+        count, ts_daily, emp_perf, doc_type_daily = aggregate_events(rows)
         return {
             "since": since_iso,
-            "count_events": len(rows),
+            "count_events": count,
             "timeseries_daily": ts_daily,
             "employees": emp_perf,
             "doc_type_daily": doc_type_daily,
@@ -0,0 +1,320 @@
+# app/services/read/kpi/upstream.py
+"""
+Chamadas aos endpoints KPI do PrestaShop com cache.
+
+- períodos fechados (até ao início do bucket aberto, com uma margem de
+  KPI_CACHE_CLOSED_GRACE_HOURS) não mudam: ficam na SQLite
+  (kpi_upstream_cache) e em memória, e não voltam a ir ao upstream;
+- o bucket aberto fica em memória KPI_CACHE_OPEN_TTL_SECONDS;
+- pedidos iguais em simultâneo (várias tabs) esperam pela mesma chamada.
+
+A timeseries é partida em [since, início do bucket aberto) + o resto e
+juntada de novo; se o upstream agrupar de forma diferente e um bucket
+aparecer nas duas partes, pede-se o intervalo inteiro (sem a parte fixa).
+
+Com KPI_INCREMENTAL_SYNC a parte fechada não é guardada por intervalo mas
+bucket a bucket (kpi_timeseries_buckets): a janela desliza todos os dias e
+só os buckets que ainda não estão na BD (normalmente o que fechou desde a
+última vez) e o aberto vão ao upstream. Pontas que não começam/acabam num
+bucket (ex.: semana a meio) são pedidas à parte com a chave exata.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from zoneinfo import ZoneInfo
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import AsyncSingleFlightCache
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.domains.kpi.periods import (
+    bucket_starts,
+    ceil_bucket,
+    is_closed,
+    label_bucket_start,
+    next_bucket_start,
+    open_bucket_start,
+    parse_day,
+    split_closed,
+)
+from app.external.prestashop_client import PrestashopClient
+from app.repos.kpi.upstream_cache_read import KPIUpstreamCacheReadRepo
+from app.repos.kpi.upstream_cache_write import KPIUpstreamCacheWriteRepo
+
+log = logging.getLogger("wd.kpi.upstream")
+
+TZ = ZoneInfo(settings.TIMEZONE)
+_CLOSED_MEM_TTL = 6 * 3600  # em memória; na SQLite fica de vez
+_BUCKET_FETCHES = 4  # chamadas em paralelo ao preencher buckets um a um
+
+_MEM: AsyncSingleFlightCache[dict] = AsyncSingleFlightCache(
+    "kpi.upstream",
+    ttl=settings.KPI_CACHE_OPEN_TTL_SECONDS,
+    max_entries=settings.KPI_CACHE_MAX,
+    follow_changes=False,  # dados do PrestaShop, não do worker
+)
+
+Fetch = Callable[[], Awaitable[dict]]
+
+
+def _key(kind: str, params: dict) -> str:
+    raw = json.dumps([kind, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _today() -> date:
+    return (datetime.now(TZ) - timedelta(hours=settings.KPI_CACHE_CLOSED_GRACE_HOURS)).date()
+
+
+def is_settled(until: Optional[str]) -> bool:
+    """True se [.., until) já fechou (com a margem): os dados do upstream não mudam mais."""
+    return is_closed(until, open_bucket_start("day", _today()))
+
+
+def _db_get(key: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        return KPIUpstreamCacheReadRepo(db).get_payload(key)
+    finally:
+        db.close()
+
+
+def _db_put(key: str, kind: str, params: dict, payload: dict) -> None:
+    db = SessionLocal()
+    try:
+        KPIUpstreamCacheWriteRepo(db).put(key, kind, params, payload)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # a resposta segue na mesma; só não fica guardada
+        log.warning("kpi cache: failed to store %s %s", kind, params, exc_info=True)
+    finally:
+        db.close()
+
+
+def _db_buckets(role: str, gran: str, start: date, end: date) -> dict[str, list]:
+    db = SessionLocal()
+    try:
+        return KPIUpstreamCacheReadRepo(db).buckets(role, gran, start.isoformat(), end.isoformat())
+    finally:
+        db.close()
+
+
+def _db_put_buckets(role: str, gran: str, buckets: dict[str, list]) -> None:
+    db = SessionLocal()
+    try:
+        KPIUpstreamCacheWriteRepo(db).put_buckets(role, gran, buckets)
+        db.commit()
+    except Exception:
+        db.rollback()
+        log.warning("kpi cache: failed to store %d %s buckets", len(buckets), gran, exc_info=True)
+    finally:
+        db.close()
+
+
+def _overlap(*parts: list[dict]) -> bool:
+    seen: set = set()
+    for rows in parts:
+        keys = {(r.get("employee_id"), r.get("bucket")) for r in rows}
+        if seen & keys:
+            return True
+        seen |= keys
+    return False
+
+
+def _runs(days: list[date], gran: str) -> list[tuple[date, date]]:
+    """Buckets em falta -> intervalos [início, fim) contíguos."""
+    out: list[tuple[date, date]] = []
+    for d in days:
+        end = next_bucket_start(gran, d)
+        if out and out[-1][1] == d:
+            out[-1] = (out[-1][0], end)
+        else:
+            out.append((d, end))
+    return out
+
+
+class KPIUpstream:
+    def __init__(self, client: PrestashopClient | None = None):
+        self.client = client or PrestashopClient()
+
+    async def employee_timeseries(self, *, role: str, gran: str, since: Optional[str], until: Optional[str],
+                                  on_row: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        {"meta", "rows"} da timeseries. Com `on_row` as linhas são entregues
+        uma a uma e o resultado traz só o "meta": sem cache vão direto do
+        socket para on_row, sem nunca existir a lista inteira.
+        """
+        def fetch(s: Optional[str], u: Optional[str]) -> Fetch:
+            return lambda: self.client.fetch_kpi_employee_timeseries(role=role, gran=gran, since=s, until=u)
+
+        if on_row is not None:
+            if not settings.KPI_CACHE_ENABLED and hasattr(self.client, "iter_kpi_employee_timeseries"):
+                meta: dict = {}
+                async for r in self.client.iter_kpi_employee_timeseries(
+                        role=role, gran=gran, since=since, until=until, meta=meta):
+                    on_row(r)
+                return {"meta": meta}
+            data = await self.employee_timeseries(role=role, gran=gran, since=since, until=until)
+            for r in data["rows"]:
+                on_row(r)
+            return {"meta": data["meta"]}
+
+        if not settings.KPI_CACHE_ENABLED:
+            return await fetch(since, until)()
+
+        params = dict(role=role, gran=gran, since=since, until=until)
+        open_start = open_bucket_start(gran, _today())
+        if settings.KPI_INCREMENTAL_SYNC:
+            return await self._incremental(params, open_start, fetch)
+        if is_closed(until, open_start):
+            return await self._closed("timeseries", params, fetch(since, until))
+        split = split_closed(since, until, open_start)
+        if split is None:
+            return await self._open("timeseries", params, fetch(since, until))
+
+        mid = split[1]
+        closed, opened = await asyncio.gather(
+            self._closed("timeseries", {**params, "until": mid}, fetch(since, mid)),
+            self._open("timeseries", {**params, "since": mid}, fetch(mid, until)),
+        )
+        if _overlap(closed["rows"], opened["rows"]):
+            log.warning("kpi cache: %s buckets cross %s, fetching the whole range", gran, mid)
+            return await self._open("timeseries", params, fetch(since, until))
+        return {"meta": {**closed["meta"], "since": since, "until": until},
+                "rows": closed["rows"] + opened["rows"]}
+
+    async def employee_performance(
+        self, *, role: str, since: Optional[str], until: Optional[str],
+        order_by: str, order_dir: str, limit: int,
+    ) -> dict:
+        async def fetch() -> dict:
+            return await self.client.fetch_kpi_employee_performance(
+                role=role, since=since, until=until, order_by=order_by, order_dir=order_dir, limit=limit,
+            )
+
+        if not settings.KPI_CACHE_ENABLED:
+            return await fetch()
+        # ranking agregado sobre o intervalo todo: não se parte, só se guarda se estiver fechado
+        params = dict(role=role, since=since, until=until, order_by=order_by, order_dir=order_dir, limit=limit)
+        if is_settled(until):
+            return await self._closed("performance", params, fetch)
+        return await self._open("performance", params, fetch)
+
+    # ---------------- interno ----------------
+    async def _open(self, kind: str, params: dict, fetch: Fetch) -> dict:
+        return await _MEM.get(("open", _key(kind, params)), fetch)
+
+    async def _closed(self, kind: str, params: dict, fetch: Fetch) -> dict:
+        key = _key(kind, params)
+
+        async def load() -> dict:
+            payload = await run_in_threadpool(_db_get, key)
+            if payload is None:
+                payload = await fetch()
+                await run_in_threadpool(_db_put, key, kind, params, payload)
+            return payload
+
+        return await _MEM.get(("closed", key), load, ttl=_CLOSED_MEM_TTL)
+
+    async def _incremental(self, params: dict, open_start: date,
+                           fetch: Callable[[Optional[str], Optional[str]], Fetch]) -> dict:
+        """
+        [since, until) = ponta inicial + buckets fechados completos (BD) +
+        ponta final fechada ou bucket aberto. Cada parte com o seu cache.
+        """
+        role, gran, since, until = params["role"], params["gran"], params["since"], params["until"]
+        s, u = parse_day(since), parse_day(until)
+        if s is None or u is None or s >= u:
+            return await self._open("timeseries", params, fetch(since, until))
+
+        parts: list[Awaitable[dict]] = []
+
+        def closed(a: date, b: date) -> None:
+            a_, b_ = a.isoformat(), b.isoformat()
+            parts.append(self._closed("timeseries", {**params, "since": a_, "until": b_}, fetch(a_, b_)))
+
+        closed_end = min(u, open_start)
+        if s < closed_end:
+            first, last = ceil_bucket(gran, s), open_bucket_start(gran, closed_end)
+            if first < last:
+                if s < first:
+                    closed(s, first)
+                parts.append(self._buckets(role, gran, first, last, fetch))
+                if last < closed_end:
+                    closed(last, closed_end)
+            else:
+                closed(s, closed_end)
+        if u > open_start:
+            a_ = max(s, open_start).isoformat()
+            parts.append(self._open("timeseries", {**params, "since": a_}, fetch(a_, until)))
+
+        results = await asyncio.gather(*parts)
+        if _overlap(*(r["rows"] for r in results)):
+            log.warning("kpi cache: %s buckets cross part boundaries in %s..%s, fetching the whole range",
+                        gran, since, until)
+            return await self._open("timeseries", params, fetch(since, until))
+        meta = {**(results[0].get("meta") or {}), "since": since, "until": until}
+        return {"meta": meta, "rows": [r for res in results for r in res["rows"]]}
+
+    async def _buckets(self, role: str, gran: str, first: date, last: date,
+                       fetch: Callable[[Optional[str], Optional[str]], Fetch]) -> dict:
+        """Buckets fechados completos em [first, last): da BD, e os que faltam do upstream."""
+        async def load() -> dict:
+            have = await run_in_threadpool(_db_buckets, role, gran, first, last)
+            starts = bucket_starts(gran, first, last)
+            missing = [d for d in starts if d.isoformat() not in have]
+            if missing:
+                fetched = await self._fill(gran, missing, fetch)
+                await run_in_threadpool(_db_put_buckets, role, gran, fetched)
+                have.update(fetched)
+                log.info("kpi cache: fetched %d/%d %s buckets for %s", len(missing), len(starts), gran, role)
+            return {"meta": {"role": role, "gran": gran},
+                    "rows": [r for d in starts for r in have[d.isoformat()]]}
+
+        key = _key("timeseries.buckets", dict(role=role, gran=gran, since=first.isoformat(), until=last.isoformat()))
+        return await _MEM.get(("closed", key), load, ttl=_CLOSED_MEM_TTL)
+
+    async def _fill(self, gran: str, missing: list[date],
+                    fetch: Callable[[Optional[str], Optional[str]], Fetch]) -> dict[str, list]:
+        """
+        Pede os buckets em falta: uma chamada por troço contíguo quando os
+        rótulos dizem a que bucket pertence cada linha; senão (semanas, ou
+        rótulos noutro formato) uma chamada por bucket.
+        """
+        out: dict[str, list] = {}
+        single: list[date] = []
+        for a, b in _runs(missing, gran):
+            if b == next_bucket_start(gran, a):
+                single.append(a)
+                continue
+            if gran == "week":
+                single.extend(bucket_starts(gran, a, b))
+                continue
+            res = await fetch(a.isoformat(), b.isoformat())()
+            grouped: dict[str, list] = {d.isoformat(): [] for d in bucket_starts(gran, a, b)}
+            for r in res.get("rows") or []:
+                d = label_bucket_start(str(r.get("bucket") or ""), gran)
+                if d is None or d.isoformat() not in grouped:
+                    break
+                grouped[d.isoformat()].append(r)
+            else:
+                out.update(grouped)
+                continue
+            single.extend(bucket_starts(gran, a, b))
+
+        sem = asyncio.Semaphore(_BUCKET_FETCHES)
+
+        async def one(d: date) -> None:
+            async with sem:
+                res = await fetch(d.isoformat(), next_bucket_start(gran, d).isoformat())()
+            out[d.isoformat()] = list(res.get("rows") or [])
+
+        await asyncio.gather(*(one(d) for d in single))
+        return out
@@ -82,9 +82,9 @@ class PrestashopQueryService:
     def get_eol_counts(self) -> dict:
         return self._eol.counts()
 
-    # PageSpeed (home + product)
+    # PageSpeed (última amostra de cada URL)
     def get_pagespeed(self) -> list[PageSpeedDTO]:
-        rows = self._pagespeed.latest_by_page_type()
+        rows = self._pagespeed.latest_by_url()
         return [
             PageSpeedDTO(
                 page_type=r["page_type"],
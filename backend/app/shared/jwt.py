@@ -1,3 +1,4 @@
+import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional, TypedDict
 import jwt
@@ -12,6 +13,7 @@ class DecodedToken(TypedDict, total=False):
     typ: str
     exp: int
     iat: int
+    jti: str             # só nos tickets do /stream
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -35,6 +37,13 @@ def create_refresh_token(*, sub: str, role: str, name: str | None = None) -> str
         payload["name"] = name
     return _encode(payload, settings.JWT_REFRESH_EXPIRE_MIN)
 
+def create_stream_ticket(*, sub: str, seconds: int) -> str:
+    # ticket de uso único para o EventSource do /stream (vai na query string, por isso dura segundos)
+    now = _now_utc()
+    payload = {"sub": sub, "typ": "stream", "jti": secrets.token_urlsafe(16),
+               "iat": int(now.timestamp()), "exp": int((now + timedelta(seconds=seconds)).timestamp())}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=ALGO)
+
 def decode_token(token: str, *, expected_typ: Optional[str] = None) -> DecodedToken:
     data = jwt.decode(token, settings.JWT_SECRET, algorithms=[ALGO])
     if expected_typ and data.get("typ") != expected_typ:
@@ -0,0 +1,167 @@
+# app/shared/quantiles.py
+"""
+Sketch de quantis no estilo DDSketch: erro relativo garantido (ALPHA) e
+junção exata de sketches (somar contagens por bin). Serve para guardar
+percentis de latência por balde e juntar baldes na leitura sem voltar às
+amostras brutas.
+
+Cada valor v > 0 vai para o bin i = ceil(log_gamma(v)), com
+gamma = (1 + alpha) / (1 - alpha); o valor devolvido para o bin i
+está a menos de alpha (relativo) de qualquer valor que lá caiu.
+Valores <= 0 (ex.: sondas falhadas com TTFB 0) contam num bin próprio.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable, Optional
+
+ALPHA = 0.01      # 1% de erro relativo
+MAX_BINS = 2048   # chega para 1µs..1 dia com alpha=1%; acima disso junta os bins mais baixos
+
+
+class QuantileSketch:
+    __slots__ = ("alpha", "_gamma_ln", "bins", "zero", "count", "sum", "min", "max")
+
+    def __init__(self, alpha: float = ALPHA):
+        self.alpha = float(alpha)
+        self._gamma_ln = math.log((1 + self.alpha) / (1 - self.alpha))
+        self.bins: dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    # ---------------- escrita ----------------
+    def add(self, v: float, n: int = 1) -> "QuantileSketch":
+        if v is None or n <= 0:
+            return self
+        v = float(v)
+        if v > 0:
+            i = math.ceil(math.log(v) / self._gamma_ln)
+            self.bins[i] = self.bins.get(i, 0) + n
+            if len(self.bins) > MAX_BINS:
+                self._collapse()
+        else:
+            self.zero += n
+        self.count += n
+        self.sum += v * n
+        self.min = v if self.min is None or v < self.min else self.min
+        self.max = v if self.max is None or v > self.max else self.max
+        return self
+
+    def extend(self, values: Iterable[float]) -> "QuantileSketch":
+        # caminho rápido do add() para listas grandes (backfills, benchmarks)
+        vals = [float(v) for v in values if v is not None]
+        if not vals:
+            return self
+        bins, log, ceil, g = self.bins, math.log, math.ceil, self._gamma_ln
+        zero = 0
+        for v in vals:
+            if v > 0:
+                i = ceil(log(v) / g)
+                bins[i] = bins.get(i, 0) + 1
+            else:
+                zero += 1
+        if len(bins) > MAX_BINS:
+            self._collapse()
+        lo, hi = min(vals), max(vals)
+        self.zero += zero
+        self.count += len(vals)
+        self.sum += math.fsum(vals)
+        self.min = lo if self.min is None or lo < self.min else self.min
+        self.max = hi if self.max is None or hi > self.max else self.max
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.count == 0:
+            return self
+        if abs(other.alpha - self.alpha) > 1e-12:
+            raise ValueError(f"cannot merge sketches with different alpha ({self.alpha} != {other.alpha})")
+        for i, n in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + n
+        if len(self.bins) > MAX_BINS:
+            self._collapse()
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = other.min if self.min is None or other.min < self.min else self.min
+        self.max = other.max if self.max is None or other.max > self.max else self.max
+        return self
+
+    def _collapse(self) -> None:
+        # perde precisão só na cauda baixa (a que não interessa para p90/p95)
+        keys = sorted(self.bins)
+        extra = keys[: len(keys) - MAX_BINS + 1]
+        n = sum(self.bins.pop(k) for k in extra)
+        self.bins[extra[-1]] = self.bins.get(extra[-1], 0) + n
+
+    # ---------------- leitura ----------------
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Valor na posição round(q * (count - 1)) das amostras ordenadas
+        (mesma convenção do antigo _pct), a menos de alpha. None se vazio.
+        """
+        if self.count == 0:
+            return None
+        rank = int(round(min(max(q, 0.0), 1.0) * (self.count - 1)))
+        if rank == 0:
+            return self.min
+        if rank == self.count - 1:
+            return self.max
+        if rank < self.zero:
+            return self.min if self.min is not None and self.min <= 0 else 0.0
+        seen = self.zero
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            if seen > rank:
+                v = 2 * math.exp(i * self._gamma_ln) / (1 + math.exp(self._gamma_ln))
+                return min(max(v, self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self, ps: Iterable[float] = (0.50, 0.90, 0.95, 0.99)) -> dict[str, Any]:
+        """{count, mean, p50, ..., max} arredondados a ms (None se vazio)."""
+        def r(v: Optional[float]) -> Optional[float]:
+            return round(v, 1) if v is not None else None
+
+        out: dict[str, Any] = {"count": self.count, "mean": r(self.mean())}
+        for p in ps:
+            out[f"p{int(round(p * 100))}"] = r(self.quantile(p))
+        out["max"] = r(self.max)
+        return out
+
+    # ---------------- (de)serialização ----------------
+    def to_dict(self) -> dict[str, Any]:
+        """Forma compacta para colunas JSON: bins esparsos como duas listas."""
+        keys = sorted(self.bins)
+        return {
+            "a": self.alpha, "n": self.count, "s": self.sum, "lo": self.min, "hi": self.max,
+            "z": self.zero, "k": keys, "c": [self.bins[k] for k in keys],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "QuantileSketch":
+        sk = cls(alpha=(d or {}).get("a", ALPHA))
+        if not d:
+            return sk
+        sk.bins = dict(zip(d.get("k", []), d.get("c", [])))
+        sk.zero = int(d.get("z", 0))
+        sk.count = int(d.get("n", 0))
+        sk.sum = float(d.get("s", 0.0))
+        sk.min = d.get("lo")
+        sk.max = d.get("hi")
+        return sk
+
+    @classmethod
+    def of(cls, values: Iterable[float], alpha: float = ALPHA) -> "QuantileSketch":
+        return cls(alpha).extend(values)
+
+    @classmethod
+    def merged(cls, sketches: Iterable["QuantileSketch"], alpha: float = ALPHA) -> "QuantileSketch":
+        out = cls(alpha)
+        for sk in sketches:
+            out.merge(sk)
+        return out
@@ -7,9 +7,14 @@ from contextlib import asynccontextmanager
 
 from app.core.logging import setup_logging
 from app.core.middleware import RequestContextMiddleware
-from app.core.db import engine
+from app.core.db import async_engine, engine
 from app import models
 from app.core.bootstrap import bootstrap_database
+from app.external.http_pool import close_http_client
+from app.core.cache import close_caches
+from app.core.config import settings
+from app.services.events.change_feed import ChangeFeed
+from app.services.queries.home.summary import invalidate_on_changes
 # Routers
 from app.api.v1.auth import router as auth_router
 from app.api.v1.health import router as health_router
@@ -19,6 +24,7 @@ from app.api.v1.tools import router as tools_router
 from app.api.v1.kpi import router as kpi_router
 from app.api.v1.runs import router as runs_router
 from app.api.v1.home import router as home_router
+from app.api.v1.stream import router as stream_router
 
 
 setup_logging()
@@ -49,6 +55,21 @@ app.add_middleware(
 @app.on_event("startup")
 async def on_startup():
     models.Base.metadata.create_all(bind=engine)
+    if settings.CHANGE_FEED_ENABLED:
+        feed = ChangeFeed(engine, poll_ms=settings.CHANGE_FEED_POLL_MS)
+        feed.subscribe(invalidate_on_changes)  # só os checks que o /home/summary lê
+        feed.start()
+        app.state.change_feed = feed
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    feed = getattr(app.state, "change_feed", None)
+    if feed is not None:
+        feed.stop()
+    await close_http_client()
+    close_caches()
+    await async_engine.dispose()
 
 # Register routes
 app.include_router(health_router, prefix="/api/v1")
@@ -59,3 +80,4 @@ app.include_router(kpi_router, prefix="/api/v1")
 app.include_router(alerts_router, prefix="/api/v1")
 app.include_router(runs_router, prefix="/api/v1")
 app.include_router(home_router, prefix="/api/v1")
+app.include_router(stream_router, prefix="/api/v1")
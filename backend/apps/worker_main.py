@@ -1,15 +1,21 @@
 # apps/worker_main.py
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from workers.scheduler import register_jobs
-from app.core.db import SessionLocal
+from app.core.db import SessionLocal, engine
+from app import models
 from app.core.logging import setup_logging
-import logging, asyncio
+from app.external.http_pool import close_http_client
+from app.services.commands.runs.flush import run as flush_runs
+import atexit, logging, asyncio, signal
 from datetime import timezone
 
 def main():
     setup_logging()
     log = logging.getLogger("wd.worker")
 
+    # o worker pode arrancar antes da API: garante as tabelas (incl. as novas)
+    models.Base.metadata.create_all(bind=engine)
+
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
@@ -18,6 +24,14 @@ def main():
     register_jobs(sched, SessionLocal)
     sched.start()
 
+    # runs em buffer (RUNS_BUFFERED): gravadas no shutdown, incluindo SIGTERM (docker stop)
+    # e saídas que não passem pelo finally
+    atexit.register(flush_runs, SessionLocal)
+    try:
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)
+    except NotImplementedError:  # Windows (dev)
+        pass
+
     log.info("worker started; scheduler running (every 10 min)")
     try:
         loop.run_forever()
@@ -28,6 +42,11 @@ def main():
             sched.shutdown(wait=False)
         except Exception:
             pass
+        n = flush_runs(SessionLocal)
+        if n:
+            log.info("worker stopping: flushed %d buffered runs", n)
+        # fecha as ligações keep-alive do pool HTTP partilhado
+        loop.run_until_complete(close_http_client())
         loop.stop()
         loop.close()
 
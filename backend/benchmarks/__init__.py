@@ -0,0 +1,3 @@
+# benchmarks/
+# Micro-benchmarks locais (sem rede externa). Correr a partir de backend/:
+#   python -m benchmarks.bench_<nome>
@@ -0,0 +1,191 @@
+# benchmarks/bench_async_reads.py
+"""
+Capacidade de um worker uvicorn: handlers sync (thread pool do Starlette,
+40 threads) vs o caminho async (AsyncSession/aiosqlite + httpx partilhado).
+
+    python -m benchmarks.bench_async_reads [--seconds 4] [--clients 10,50,200] [--upstream-ms 200]
+
+Dois endpoints, em cada nível de concorrência:
+  - /tools/pda: o PDA é um servidor HTTP local que responde ao fim de
+    --upstream-ms (o caso "chamada externa bloqueante"). Desde a cópia
+    local pda_reports o endpoint real já não chama o PDA (ver
+    bench_pda_pages): o "depois" passa a medir só a SQLite;
+  - /prestashop/orders/delayed: só SQLite (--orders linhas na última run).
+"Antes" é uma cópia dos handlers sync antigos (get_db + requests); "depois"
+é a app real. Os pedidos vão por httpx.ASGITransport no mesmo event loop,
+como num worker uvicorn, e cada cliente repete pedidos durante --seconds.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Upstream(ThreadingHTTPServer):
+    request_queue_size = 1024  # o default (5) perde SYNs com muitos clientes e mede retransmissões
+    daemon_threads = True
+
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+_UPSTREAM = _Upstream(("127.0.0.1", 0), BaseHTTPRequestHandler)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ["CHANGE_FEED_ENABLED"] = "false"
+os.environ["TOOLS_PDA_GET_REPORTS"] = f"http://127.0.0.1:{_UPSTREAM.server_port}/reports"
+os.environ["HTTP_POOL_HTTP2"] = "false"
+os.environ.setdefault("HTTP_POOL_MAX_CONNECTIONS", "200")
+
+from datetime import datetime, timedelta  # noqa: E402
+from zoneinfo import ZoneInfo  # noqa: E402
+
+import httpx  # noqa: E402
+import requests  # noqa: E402
+from fastapi import Depends, FastAPI, Query  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.bootstrap import init_sqlite_pragmas  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, SessionLocal, async_engine, engine, get_db  # noqa: E402
+from app.domains.tools.pda.mappers import raw_row_to_domain  # noqa: E402
+from app.external.http_pool import close_http_client  # noqa: E402
+from app.models.prestashop import DelayedOrderSnapshot  # noqa: E402
+from app.repos.shared.bulk import bulk_insert  # noqa: E402
+from app.repos.shared.pointers import ORDERS_DELAYED, SnapshotPointerRepo  # noqa: E402
+from app.services.read.prestashop.prestashop_query import PrestashopQueryService  # noqa: E402
+from app.shared.jwt import create_access_token, decode_token  # noqa: E402
+from apps.api_main import app as async_app  # noqa: E402
+
+_REPORTS = json.dumps([
+    {"id": i, "code": f"E{i}", "message": "falha", "context_json": "{}", "state": "new",
+     "date_added": "2026-01-01 10:00:00"} for i in range(30)
+]).encode()
+
+
+def _upstream(delay_s: float) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay_s)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(_REPORTS)))
+            self.end_headers()
+            self.wfile.write(_REPORTS)
+
+        def log_message(self, *a):
+            pass
+
+    _UPSTREAM.RequestHandlerClass = Handler
+    threading.Thread(target=_UPSTREAM.serve_forever, daemon=True).start()
+
+
+def _legacy_app() -> FastAPI:
+    # cópia dos handlers antes do caminho async: tudo `def`, logo uma thread por pedido
+    legacy = FastAPI()
+
+    def require(authorization: str = Query(None, include_in_schema=False)):
+        return decode_token(_TOKEN, expected_typ="access")
+
+    @legacy.get("/api/v1/prestashop/orders/delayed")
+    def delayed(db: Session = Depends(get_db), _=Depends(require)):
+        items = PrestashopQueryService(db).get_delayed_orders()
+        return {"ok": True, "count": len(items), "orders": items}
+
+    @legacy.get("/api/v1/tools/pda")
+    def pda(_=Depends(require)):
+        s = requests.Session()  # o PdaClient antigo criava uma Session por pedido
+        rows = s.get(settings.TOOLS_PDA_GET_REPORTS, timeout=15).json()
+        return {"items": [raw_row_to_domain(r).id for r in rows][:50]}
+
+    return legacy
+
+
+def _seed(orders: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    init_sqlite_pragmas(engine)
+    rnd = random.Random(2)
+    now = datetime.now(ZoneInfo(settings.TIMEZONE)).replace(microsecond=0)
+    db = SessionLocal()
+    bulk_insert(db, DelayedOrderSnapshot, (
+        dict(id_order=i, reference=f"R{i}", date_add=now - timedelta(days=5), days_passed=rnd.randint(3, 40),
+             id_state=3, state_name="x", dropshipping=False, status=rnd.choice(("warning", "critical")), observed_at=now)
+        for i in range(orders)
+    ))
+    SnapshotPointerRepo(db).publish(ORDERS_DELAYED, now, orders, "critical")
+    db.commit()
+    db.close()
+
+
+async def _load(app: FastAPI, url: str, clients: int, seconds: float) -> tuple[float, float, float, int]:
+    lat: list[float] = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {_TOKEN}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        stop = time.perf_counter() + seconds
+
+        async def one():
+            nonlocal errors
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                r = await client.get(url, headers=headers)
+                if r.status_code != 200:
+                    errors += 1
+                lat.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(clients)))
+        elapsed = time.perf_counter() - t0
+    lat.sort()
+    return len(lat) / elapsed, lat[len(lat) // 2], lat[int(len(lat) * .99)], errors
+
+
+_TOKEN = create_access_token(sub="bench", role="admin")
+
+
+async def _main(args) -> None:
+    legacy = _legacy_app()
+    print(f"1 worker, {args.seconds:.0f}s por medição, PDA upstream {args.upstream_ms}ms, {args.orders} encomendas, "
+          f"HTTP_POOL_MAX_CONNECTIONS={settings.HTTP_POOL_MAX_CONNECTIONS}")
+    for url in ("/api/v1/tools/pda", "/api/v1/prestashop/orders/delayed"):
+        print(f"  {url}")
+        for c in (int(x) for x in args.clients.split(",")):
+            row = []
+            for label, app in (("sync", legacy), ("async", async_app)):
+                rps, p50, p99, err = await _load(app, url, c, args.seconds)
+                row.append(f"{label}: {rps:6.0f} req/s p50={p50:6.0f}ms p99={p99:6.0f}ms" + (f" err={err}" if err else ""))
+            print(f"    {c:>4} clientes  " + "   |   ".join(row))
+    await close_http_client()
+    await async_engine.dispose()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--seconds", type=float, default=4)
+    ap.add_argument("--clients", default="10,50,200")
+    ap.add_argument("--upstream-ms", type=int, default=200)
+    ap.add_argument("--orders", type=int, default=300)
+    args = ap.parse_args()
+    try:
+        _seed(args.orders)
+        _upstream(args.upstream_ms / 1000)
+        asyncio.run(_main(args))
+    finally:
+        _UPSTREAM.shutdown()
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
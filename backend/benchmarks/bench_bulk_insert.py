@@ -0,0 +1,105 @@
+# benchmarks/bench_bulk_insert.py
+"""
+Escrita de snapshots EOL em SQLite: caminho ORM antigo (db.add por linha +
+flush no commit) vs bulk_insert (executemany do Core em lotes, mesma transação).
+
+    python -m benchmarks.bench_bulk_insert [--rows 50000] [--chunk 1000]
+
+Usa uma base SQLite temporária em ficheiro (WAL, como em produção) e um
+engine próprio, por isso não toca na DATABASE_URL configurada.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.domains.prestashop.eol.types import EOLProduct
+from app.models.prestashop import EOLProductSnapshot
+from app.repos.prestashop.eol_write import _to_row
+from app.repos.shared.bulk import bulk_insert
+from app.shared.status import Status
+
+
+def _items(n: int) -> list[EOLProduct]:
+    now = datetime.now(timezone.utc)
+    statuses = (Status.OK, Status.WARNING, Status.CRITICAL)
+    return [
+        EOLProduct(
+            id_product=i, name=f"Produto {i}", reference=f"REF-{i:06d}",
+            ean13=f"560{i:010d}", upc="", price=Decimal("19.90") + i % 100,
+            last_in_stock_at=now - timedelta(days=i % 400), days_since=i % 400,
+            status=statuses[i % 3],
+        )
+        for i in range(n)
+    ]
+
+
+def _session_factory(path: str):
+    engine = create_engine(f"sqlite:///{path}", future=True)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.close()
+
+    Base.metadata.create_all(engine, tables=[EOLProductSnapshot.__table__])
+    return engine, sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, future=True)
+
+
+def _orm_insert(db, items, observed_at, _chunk: int) -> int:
+    # réplica do insert_many antigo: um objeto ORM por linha
+    for it in items:
+        db.add(EOLProductSnapshot(**_to_row(it, observed_at)))
+    return len(items)
+
+
+def _bulk_insert(db, items, observed_at, chunk: int) -> int:
+    # o mesmo que EOLOutWriteRepo.insert_many, com o tamanho de lote configurável
+    return bulk_insert(db, EOLProductSnapshot, (_to_row(it, observed_at) for it in items), chunk_size=chunk)
+
+
+def _run(label: str, fn, items, chunk: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine, Session = _session_factory(path)
+    observed_at = datetime.now(timezone.utc)
+    try:
+        db = Session()
+        t0 = time.perf_counter()
+        n = fn(db, items, observed_at, chunk)
+        db.commit()
+        dt = time.perf_counter() - t0
+        stored = db.scalar(select(func.count()).select_from(EOLProductSnapshot))
+        db.close()
+        assert n == stored == len(items), f"{label}: {n=} {stored=}"
+        print(f"  {label:<22} {dt * 1000:8.0f}ms  {len(items) / dt:9.0f} linhas/s")
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--chunk", type=int, default=1000)
+    args = ap.parse_args()
+
+    items = _items(args.rows)
+    print(f"{args.rows} snapshots EOL, lotes de {args.chunk}")
+    _run("ORM (db.add)", _orm_insert, items, args.chunk)
+    _run("bulk_insert (Core)", _bulk_insert, items, args.chunk)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_change_feed.py
+"""
+Change feed worker -> API: latência entre o commit da ingestão (noutro
+processo) e a invalidação do cache do /home/summary, e hit ratio com
+clientes concorrentes.
+
+    python -m benchmarks.bench_change_feed [--clients 20] [--runs 5] [--every 2]
+
+Um subprocesso faz de worker: a cada --every segundos grava uma linha de
+pagespeed + SnapshotPointerRepo.publish e faz commit, imprimindo a hora do
+commit; entre cada uma grava também uma run ok do pda.sync_reports, que
+não deve invalidar. Na API (este processo) corre o ChangeFeed e N clientes em ciclo
+sobre HomeSummaryService.build com o TTL longo do modo com feed.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ["CHANGE_FEED_ENABLED"] = "true"
+
+from app import models  # noqa: E402,F401
+from app.core.bootstrap import init_sqlite_pragmas  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.services.events.change_feed import ChangeFeed  # noqa: E402
+from app.services.queries.home import summary as home  # noqa: E402
+
+_WORKER = r"""
+import sys, time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from app.core.db import SessionLocal
+from app.models.prestashop import PageSpeedSnapshot
+from app.models.runs import CheckRun
+from app.repos.shared.pointers import SnapshotPointerRepo
+runs, every = int(sys.argv[1]), float(sys.argv[2])
+for i in range(runs):
+    time.sleep(every)
+    db = SessionLocal()
+    now = datetime.now(ZoneInfo("Europe/Lisbon"))
+    db.add(PageSpeedSnapshot(page_type="home", url="https://x/", ttfb_ms=300 + i, severity="ok", observed_at=now))
+    SnapshotPointerRepo(db).publish("prestashop.pagespeed", now, 1, "ok")
+    db.commit()
+    print(time.time(), flush=True)
+    # runs de checks que o summary não lê (pda a cada 5 min): não devem invalidar
+    time.sleep(every / 2)
+    db.add(CheckRun(check_name="pda.sync_reports", status="ok", duration_ms=10, payload_json={}))
+    db.commit()
+    db.close()
+"""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--clients", type=int, default=20)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--every", type=float, default=2.0)
+    ap.add_argument("--poll-ms", type=int, default=250)
+    args = ap.parse_args()
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        init_sqlite_pragmas(engine)
+
+        seen: list[float] = []
+        feed = ChangeFeed(engine, poll_ms=args.poll_ms)
+        feed.subscribe(home.invalidate_on_changes)
+        feed.subscribe(lambda events: seen.extend(time.time() for e in events if e.kind == "snapshot"))
+        feed.start()
+
+        builds = 0
+        orig = home.HomeSummaryService._build
+
+        def counted(self, **kw):
+            nonlocal builds
+            builds += 1
+            return orig(self, **kw)
+        home.HomeSummaryService._build = counted
+
+        worker = subprocess.Popen([sys.executable, "-c", _WORKER, str(args.runs), str(args.every)],
+                                  stdout=subprocess.PIPE, text=True, env=os.environ.copy())
+        stop = threading.Event()
+
+        def client():
+            while not stop.is_set():
+                db = SessionLocal()
+                try:
+                    home.HomeSummaryService(db).build(window="24h", sections=None)
+                finally:
+                    db.close()
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for t in threads:
+            t.start()
+        commits = [float(line) for line in worker.stdout]
+        worker.wait()
+        time.sleep(1)
+        stop.set()
+        for t in threads:
+            t.join()
+        feed.stop()
+
+        lat = [(s - c) * 1000 for c, s in zip(commits, seen)]
+        st = home._CACHE.stats()
+        print(f"{args.clients} clientes, {len(commits)} runs do worker a cada {args.every:.0f}s, poll {args.poll_ms}ms")
+        print(f"  commit -> invalidação: p50={statistics.median(lat):.0f}ms max={max(lat):.0f}ms")
+        # +1: a 1.ª run do pda depois do arranque (status anterior desconhecido)
+        print(f"  rebuilds={builds} (1 inicial + 1 por run + 1 = {len(commits) + 2})  pedidos="
+              f"{st['hits'] + st['stale_hits'] + st['misses'] + st['coalesced']}  hit_ratio={st['hit_ratio']}")
+    finally:
+        home._CACHE.close()
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
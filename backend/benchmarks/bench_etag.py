@@ -0,0 +1,105 @@
+# benchmarks/bench_etag.py
+"""
+Polling por worker com e sem GET condicional (ETag / If-None-Match).
+
+    python -m benchmarks.bench_etag [--seconds 5] [--orders 500] [--runs 5000]
+
+Usa uma SQLite temporária com uma run de encomendas atrasadas (--orders
+linhas, ponteiro publicado) e histórico de runs, e chama a app num único
+thread via TestClient, como um worker uvicorn a servir dashboards em
+polling. Para cada endpoint mede pedidos/s (a) sem validador, (b) com o
+If-None-Match da resposta anterior (304) e (c) o tamanho das respostas.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ["CHANGE_FEED_ENABLED"] = "false"
+
+from datetime import datetime, timedelta  # noqa: E402
+from zoneinfo import ZoneInfo  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.models.prestashop import DelayedOrderSnapshot  # noqa: E402
+from app.models.runs import CheckRun  # noqa: E402
+from app.repos.shared.bulk import bulk_insert  # noqa: E402
+from app.repos.shared.pointers import ORDERS_DELAYED, SnapshotPointerRepo  # noqa: E402
+from app.shared.jwt import create_access_token  # noqa: E402
+from apps.api_main import app  # noqa: E402
+
+ENDPOINTS = (
+    "/api/v1/prestashop/orders/delayed",
+    "/api/v1/runs?limit=500",
+    "/api/v1/runs/summary?window=24h",
+)
+
+
+def _seed(orders: int, runs: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(5)
+    now = datetime.now(ZoneInfo(settings.TIMEZONE)).replace(microsecond=0)
+    db = SessionLocal()
+    bulk_insert(db, DelayedOrderSnapshot, (
+        dict(id_order=i, reference=f"REF{i:06d}", date_add=now - timedelta(days=rnd.randint(3, 40)),
+             days_passed=rnd.randint(3, 40), id_state=rnd.choice((2, 3, 9)), state_name="Em processamento",
+             dropshipping=bool(i % 7 == 0), status=rnd.choice(("warning", "critical")), observed_at=now)
+        for i in range(orders)
+    ))
+    SnapshotPointerRepo(db).publish(ORDERS_DELAYED, now, orders, "critical")
+    bulk_insert(db, CheckRun, (
+        dict(check_name=f"check.{i % 8}", status="ok", duration_ms=rnd.randint(50, 5000),
+             payload_json={"n": i}, created_at=now - timedelta(minutes=2 * i))
+        for i in range(runs)
+    ))
+    db.commit()
+    db.close()
+
+
+def _rate(client: TestClient, url: str, headers: dict, seconds: float) -> tuple[float, int, int]:
+    n, status, size = 0, 0, 0
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        r = client.get(url, headers=headers)
+        n, status, size = n + 1, r.status_code, len(r.content)
+    return n / seconds, status, size
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--seconds", type=float, default=5)
+    ap.add_argument("--orders", type=int, default=500)
+    ap.add_argument("--runs", type=int, default=5000)
+    args = ap.parse_args()
+
+    try:
+        _seed(args.orders, args.runs)
+        auth = {"Authorization": f"Bearer {create_access_token(sub='bench', role='admin')}"}
+        client = TestClient(app)  # sem `with`: não arranca o change feed nem o bootstrap
+        print(f"1 worker (thread única), {args.seconds:.0f}s por medição, {args.orders} encomendas, {args.runs} runs")
+        print(f"  {'endpoint':<36} {'sem ETag':>14} {'If-None-Match':>18} {'ganho':>7}")
+        for url in ENDPOINTS:
+            etag = client.get(url, headers=auth).headers["ETag"]
+            full, s1, b1 = _rate(client, url, auth, args.seconds)
+            cond, s2, b2 = _rate(client, url, {**auth, "If-None-Match": etag}, args.seconds)
+            assert (s1, s2) == (200, 304), (s1, s2)
+            print(f"  {url:<36} {full:7.0f} req/s {b1 // 1024:>3}KB {cond:7.0f} req/s 304 {b2:>3}B {cond / full:6.1f}x")
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/bench_home_cache.py
+"""
+Carga no /home/summary com N clientes concorrentes: cache antiga (dict +
+TTL, sem lock) vs SingleFlightCache (single-flight + stale-while-revalidate).
+
+    python -m benchmarks.bench_home_cache [--clients 50] [--seconds 10] [--ttl 2]
+
+Cada cliente é uma thread que chama HomeSummaryService.build em ciclo com
+uma pequena pausa, como o thread pool do Starlette faria. Usa uma SQLite
+temporária com algum histórico (runs + pagespeed) e conta quantas vezes o
+summary foi realmente reconstruído na BD por janela de TTL.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ.setdefault("HOME_SUMMARY_TTL_SECONDS", "2")
+os.environ.setdefault("HOME_SUMMARY_STALE_SECONDS", "60")
+
+from datetime import datetime, timedelta  # noqa: E402
+from zoneinfo import ZoneInfo  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.models.runs import CheckRun  # noqa: E402
+from app.repos.shared.bulk import bulk_insert  # noqa: E402
+from app.repos.prestashop.pagespeed_write import PageSpeedWriteRepo  # noqa: E402
+from app.services.queries.home import summary as home  # noqa: E402
+
+
+def _seed() -> None:
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(3)
+    now = datetime.now(ZoneInfo(settings.TIMEZONE))
+    db = SessionLocal()
+    bulk_insert(db, CheckRun, (
+        dict(check_name=f"check.{i % 8}", status="ok", duration_ms=rnd.randint(50, 5000),
+             payload_json={}, created_at=now - timedelta(minutes=5 * i))
+        for i in range(5000)
+    ))
+    PageSpeedWriteRepo(db).add_to_rollups(
+        (now - timedelta(minutes=10 * i), g, f"https://x/{g}/{u}", rnd.randint(100, 2000))
+        for i in range(1000) for g in ("home", "product") for u in range(5)
+    )
+    db.commit()
+    db.close()
+
+
+class _Counter:
+    def __init__(self):
+        self.n = 0
+        self.lock = threading.Lock()
+
+    def wrap(self, fn):
+        def inner(*a, **kw):
+            with self.lock:
+                self.n += 1
+            return fn(*a, **kw)
+        return inner
+
+
+def _legacy_build(cache: dict, ttl: float, window: str, sections: str):
+    # cópia da lógica antiga: dict do módulo, TTL cego, sem coalescência
+    want = home._parse_sections(sections)
+    key = (window, ",".join(sorted(want)))
+    hit = cache.get(key)
+    if hit and time.time() - hit[0] < ttl:
+        return hit[1]
+    db = SessionLocal()
+    try:
+        out = home.HomeSummaryService(db)._build(window=window, want=want)
+    finally:
+        db.close()
+    cache[key] = (time.time(), out)
+    return out
+
+
+def _load(label: str, call, clients: int, seconds: float, builds: _Counter, ttl: float) -> None:
+    stop = time.monotonic() + seconds
+    lat: list[float] = []
+    lock = threading.Lock()
+
+    def client():
+        rnd = random.Random()
+        while time.monotonic() < stop:
+            t0 = time.perf_counter()
+            call()
+            with lock:
+                lat.append((time.perf_counter() - t0) * 1000)
+            time.sleep(rnd.uniform(0.01, 0.05))
+
+    builds.n = 0
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lat.sort()
+    windows = max(1.0, seconds / ttl)
+    print(f"  {label:<18} pedidos={len(lat):>6}  rebuilds={builds.n:>4} ({builds.n / windows:5.2f}/janela TTL)  "
+          f"p50={lat[len(lat) // 2]:6.1f}ms  p99={lat[int(len(lat) * .99)]:7.1f}ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--seconds", type=float, default=10)
+    args = ap.parse_args()
+    ttl = float(settings.HOME_SUMMARY_TTL_SECONDS)
+
+    try:
+        _seed()
+        builds = _Counter()
+        home.HomeSummaryService._build = builds.wrap(home.HomeSummaryService._build)
+        print(f"{args.clients} clientes, {args.seconds:.0f}s, TTL={ttl:.0f}s, window=24h sections=runs,kpis")
+
+        legacy: dict = {}
+        _load("dict + TTL (antes)", lambda: _legacy_build(legacy, ttl, "24h", None),
+              args.clients, args.seconds, builds, ttl)
+
+        def current():
+            db = SessionLocal()
+            try:
+                return home.HomeSummaryService(db).build(window="24h", sections=None)
+            finally:
+                db.close()
+
+        _load("SingleFlightCache", current, args.clients, args.seconds, builds, ttl)
+        print("  stats:", home._CACHE.stats())
+    finally:
+        home._CACHE.close()
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_home_sections.py
+"""
+/home/summary sem cache: secções em série na mesma Session vs em paralelo
+(thread pool + uma ligação só de leitura por secção).
+
+    python -m benchmarks.bench_home_sections [--hours 24] [--every 5] [--repeat 10]
+
+Semeia uma SQLite temporária com --hours de runs a cada --every minutos
+(pagamentos, encomendas atrasadas, carrinhos, EOL, pagespeed e check_runs)
+e chama HomeSummaryService._build nos dois modos, comparando o total com a
+soma e o máximo das secções.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+
+from datetime import datetime, timedelta  # noqa: E402
+from zoneinfo import ZoneInfo  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.bootstrap import init_sqlite_pragmas  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, SessionLocal, engine, read_engine  # noqa: E402
+from app.models.prestashop import (  # noqa: E402
+    AbandonedCartSnapshot, DelayedOrderSnapshot, EOLProductSnapshot, PaymentMethodStatus,
+)
+from app.models.runs import CheckRun  # noqa: E402
+from app.repos.prestashop.pagespeed_write import PageSpeedWriteRepo  # noqa: E402
+from app.repos.shared.bulk import bulk_insert  # noqa: E402
+from app.services.queries.home.summary import HomeSummaryService, _CACHE  # noqa: E402
+
+SEV = ("ok", "warning", "critical")
+
+
+def _seed(hours: int, every: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    init_sqlite_pragmas(engine)
+    rnd = random.Random(11)
+    now = datetime.now(ZoneInfo(settings.TIMEZONE)).replace(microsecond=0)
+    obs = [now - timedelta(minutes=every * i) for i in range(hours * 60 // every)]
+    db = SessionLocal()
+    bulk_insert(db, PaymentMethodStatus, (
+        dict(method=m, last_payment_at=t, hours_since_last=rnd.random() * 5, status=rnd.choice(SEV), observed_at=t)
+        for t in obs for m in ("mbway", "card", "paypal", "multibanco", "transfer")
+    ))
+    bulk_insert(db, DelayedOrderSnapshot, (
+        dict(id_order=i, reference=f"R{i}", date_add=t, days_passed=rnd.randint(2, 30), id_state=3,
+             state_name="x", dropshipping=False, status=rnd.choice(SEV), observed_at=t)
+        for t in obs for i in range(120)
+    ))
+    bulk_insert(db, AbandonedCartSnapshot, (
+        dict(id_cart=i, id_customer=i, items=3, hours_stale=rnd.randint(1, 90), status=rnd.choice(SEV), observed_at=t)
+        for t in obs for i in range(80)
+    ))
+    bulk_insert(db, EOLProductSnapshot, (
+        dict(product_id=i, name=f"P{i}", reference=f"P{i}", ean13="", upc="", price=1, last_in_stock_at=t,
+             days_since=rnd.randint(1, 400), status=rnd.choice(SEV), observed_at=t)
+        for t in obs for i in range(150)
+    ))
+    bulk_insert(db, CheckRun, (
+        dict(check_name=f"check.{i % 8}", status="ok", duration_ms=rnd.randint(50, 5000),
+             payload_json={}, created_at=t)
+        for t in obs for i in range(8)
+    ))
+    PageSpeedWriteRepo(db).add_to_rollups(
+        (t, g, f"https://x/{g}/{u}", rnd.randint(100, 2000)) for t in obs for g in ("home", "product") for u in range(5)
+    )
+    db.commit()
+    db.close()
+
+
+def _run(parallel: bool, window: str, repeat: int) -> tuple[list[dict], dict]:
+    db = SessionLocal()
+    try:
+        runs = [HomeSummaryService(db)._build(window=window, want={"runs", "kpis"}, parallel=parallel)
+                for _ in range(repeat)]
+    finally:
+        db.close()
+    return [r.timings_ms for r in runs], runs[-1].model_dump(exclude={"now_iso", "last_update_iso", "timings_ms"})
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--hours", type=int, default=24)
+    ap.add_argument("--every", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--window", default="24h")
+    args = ap.parse_args()
+
+    try:
+        _seed(args.hours, args.every)
+        print(f"{args.hours}h de runs a cada {args.every}min, window={args.window}, "
+              f"{settings.HOME_SUMMARY_WORKERS} workers, mediana de {args.repeat}")
+        _run(True, args.window, 1)  # aquece as ligações do read engine
+        results = {}
+        for parallel in (False, True):
+            timings, body = _run(parallel, args.window, args.repeat)
+            results[parallel] = body
+            sections = {k: statistics.median(t[k] for t in timings) for k in timings[0] if k != "total"}
+            total = statistics.median(t["total"] for t in timings)
+            print(f"  {'paralelo' if parallel else 'série':<9} total={total:7.1f}ms  soma={sum(sections.values()):7.1f}ms  "
+                  f"max={max(sections.values()):6.1f}ms  " + " ".join(f"{k}={v:.1f}" for k, v in sections.items()))
+        assert results[False] == results[True], "respostas diferentes entre modos"
+        print("  respostas iguais nos dois modos")
+    finally:
+        _CACHE.close()
+        engine.dispose()
+        read_engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
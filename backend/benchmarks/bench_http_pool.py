@@ -0,0 +1,146 @@
+# benchmarks/bench_http_pool.py
+"""
+Compara o cliente antigo (requests.Session nova por job) com o pool httpx
+partilhado (app.external.http_pool) contra um stub HTTP local.
+
+O stub conta ligações TCP aceites: cada ligação nova corresponde a um
+handshake (TCP + TLS em produção). Simula uma hora de jobs do worker,
+comprimida no tempo, e reporta handshakes/hora e latência p95 por pedido.
+
+    python -m benchmarks.bench_http_pool [--jobs-per-hour 40] [--hours 3]
+
+Nota: o stub é HTTP/1.1 em claro, portanto o custo de TLS não entra na
+latência; o número de handshakes é o que interessa comparar. Em produção a
+reutilização entre jobs só acontece se o intervalo entre pedidos ao mesmo
+host for menor que HTTP_POOL_KEEPALIVE_S.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from app.core.config import settings
+from app.external import http_pool
+from app.external.prestashop_client import PrestashopClient
+
+# pedidos por job (pagespeed faz mais do que um; os restantes fazem 1)
+_REQUESTS_PER_JOB = 2
+_PAYLOAD = json.dumps({"data": [{"payment": "mbway", "last_order": "2025-01-01 10:00:00"}] * 20}).encode()
+
+
+class _CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(0.002)  # latência "do PHP"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(_PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def _p95(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100)[94] if len(samples) >= 2 else samples[0]
+
+
+def _legacy_job(url: str, latencies: list[float]) -> None:
+    # réplica do __init__ antigo do PrestashopClient: sessão nova por instância
+    session = requests.Session()
+    retries = Retry(total=4, connect=4, read=2, backoff_factor=0.4,
+                    status_forcelist=(502, 503, 504), allowed_methods=frozenset(["GET"]))
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    for _ in range(_REQUESTS_PER_JOB):
+        t0 = time.perf_counter()
+        r = session.get(url, params={"PHP_AUTH_USER": "x"}, timeout=(3, 15))
+        r.json()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    session.close()
+
+
+async def _pooled_job(latencies: list[float]) -> None:
+    client = PrestashopClient(api_key="x")
+    for _ in range(_REQUESTS_PER_JOB):
+        t0 = time.perf_counter()
+        await client.fetch_payments()
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+
+def _run_legacy(server: _CountingServer, url: str, jobs: int) -> tuple[int, list[float]]:
+    server.connections = 0
+    lat: list[float] = []
+    for _ in range(jobs):
+        _legacy_job(url, lat)
+    return server.connections, lat
+
+
+def _run_pooled(server: _CountingServer, jobs: int) -> tuple[int, list[float]]:
+    server.connections = 0
+    lat: list[float] = []
+
+    async def main():
+        try:
+            for _ in range(jobs):
+                await _pooled_job(lat)
+        finally:
+            await http_pool.close_http_client()
+
+    asyncio.run(main())
+    return server.connections, lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--jobs-per-hour", type=int, default=40,
+                    help="jobs com pedidos HTTP por hora (worker + rotas KPI)")
+    ap.add_argument("--hours", type=int, default=3)
+    args = ap.parse_args()
+
+    server = _CountingServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/check_payments.php"
+    settings.PS_CHECK_PAYMENT_URL = url
+
+    jobs = args.jobs_per_hour * args.hours
+    print(f"stub: {url}  jobs={jobs} ({args.jobs_per_hour}/h x {args.hours}h), "
+          f"{_REQUESTS_PER_JOB} pedidos/job")
+
+    for name, fn in (("requests.Session por job", lambda: _run_legacy(server, url, jobs)),
+                     ("httpx pool partilhado", lambda: _run_pooled(server, jobs))):
+        conns, lat = fn()
+        print(f"  {name:<26} handshakes/h={conns / args.hours:7.1f}  "
+              f"p50={statistics.median(lat):6.2f}ms  p95={_p95(lat):6.2f}ms")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
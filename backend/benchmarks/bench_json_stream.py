@@ -0,0 +1,143 @@
+# benchmarks/bench_json_stream.py
+"""
+Timeseries KPI com 50k linhas: resp.json() + rows_to_series (antes) vs
+descodificação em stream (app.external.json_stream) direta para o
+SeriesBuilder, em RSS de pico e tempo até à primeira linha.
+
+    python -m benchmarks.bench_json_stream [--rows 50000] [--chunk-kb 64] [--link-mbps 200]
+
+O endpoint kpi_employee_timeseries é servido por um stub HTTP local
+(ThreadingHTTPServer) que manda o corpo em chunks de --chunk-kb ao ritmo de
+--link-mbps. Cada variante corre num processo à parte (o ru_maxrss só
+sobe), e o RSS é medido acima do processo já com tudo importado:
+
+  antes   GET + resp.json() + rows_to_series (o caminho anterior)
+  lista   fetch_kpi_employee_timeseries em stream, mas com as linhas todas
+          numa lista (o que o KPIUpstream guarda quando há cache)
+  depois  KPIUpstream.employee_timeseries(on_row=SeriesBuilder.add) sem
+          cache, como o KPIQueryService
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VARIANTS = ("antes", "lista", "depois")
+
+
+# ---------------- stub ----------------
+def _fixture(n: int) -> bytes:
+    rnd = random.Random(4)
+    rows = [{"employee_id": i % 40 + 1, "employee_name": f"Funcionário {i % 40 + 1}",
+             "bucket": f"2025-{i // 40 % 12 + 1:02d}-{i // 480 % 28 + 1:02d}",
+             "n_orders": rnd.randint(1, 90), "avg_min": round(rnd.uniform(1, 30), 3),
+             "avg_h": round(rnd.uniform(0.01, 0.5), 4)} for i in range(n)]
+    return json.dumps({"role": "prep", "gran": "day", "since": "2025-01-01", "until": "2026-01-01",
+                       "data": rows}).encode()
+
+
+def _serve(body: bytes, chunk: int, bytes_per_s: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for i in range(0, len(body), chunk):
+                self.wfile.write(body[i:i + chunk])
+                self.wfile.flush()
+                time.sleep(chunk / bytes_per_s)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------------- variantes (processo filho) ----------------
+async def _child(variant: str) -> dict:
+    from app.domains.kpi.employees.mappers import SeriesBuilder, rows_to_series
+    from app.external.http_pool import close_http_client, get_with_retries
+    from app.external.prestashop_client import PrestashopClient
+    from app.services.read.kpi.upstream import KPIUpstream
+
+    client = PrestashopClient()
+    kw = dict(role="prep", gran="day", since="2025-01-01", until="2026-01-01")
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    first = None
+    t0 = time.perf_counter()
+    if variant == "antes":
+        resp = await get_with_retries(os.environ["PS_KPI_EMP_TIMESERIES_URL"], params=kw, timeout=60)
+        data = resp.json()
+        first = time.perf_counter()
+        series = rows_to_series(role=data["role"], rows=data["data"])
+    elif variant == "lista":
+        data = await client.fetch_kpi_employee_timeseries(**kw)
+        first = time.perf_counter()
+        series = rows_to_series(role=data["meta"]["role"], rows=data["rows"])
+    else:
+        builder = SeriesBuilder()
+
+        def on_row(r: dict) -> None:
+            nonlocal first
+            if first is None:
+                first = time.perf_counter()
+            builder.add(r)
+
+        data = await KPIUpstream(client).employee_timeseries(**kw, on_row=on_row)
+        series = builder.result(role=data["meta"]["role"])
+    total = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    await close_http_client()
+    return {"first_ms": (first - t0) * 1000, "total_ms": total * 1000, "rss_kb": peak - base,
+            "points": sum(len(s.points) for s in series), "digest": hash(repr(series))}
+
+
+# ---------------- orquestração ----------------
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--chunk-kb", type=int, default=64)
+    ap.add_argument("--link-mbps", type=float, default=200)
+    ap.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child(args.child))))
+        return
+
+    body = _fixture(args.rows)
+    server = _serve(body, args.chunk_kb * 1024, args.link_mbps * 1e6 / 8)
+    url = f"http://127.0.0.1:{server.server_address[1]}/kpi_employee_timeseries.php"
+    env = {**os.environ, "PS_KPI_EMP_TIMESERIES_URL": url, "KPI_CACHE_ENABLED": "false",
+           "PYTHONHASHSEED": "0"}
+    print(f"{args.rows} linhas, corpo {len(body) / 1e6:.1f} MB, chunks de {args.chunk_kb} KB a "
+          f"{args.link_mbps:.0f} Mbit/s")
+    print(f"  {'':<7} {'1.ª linha':>10} {'total':>9} {'RSS pico':>10}")
+    digests = set()
+    try:
+        for v in VARIANTS:
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_json_stream", "--child", v],
+                                 env=env, capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            digests.add((r["points"], r["digest"]))
+            print(f"  {v:<7} {r['first_ms']:8.0f}ms {r['total_ms']:7.0f}ms {r['rss_kb'] / 1024:8.1f}MB")
+    finally:
+        server.shutdown()
+    assert len(digests) == 1, digests
+    print("  mesmas séries nas três variantes")
+
+
+if __name__ == "__main__":
+    main()
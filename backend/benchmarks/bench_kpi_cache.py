@@ -0,0 +1,122 @@
+# benchmarks/bench_kpi_cache.py
+"""
+Chamadas ao upstream KPI com N tabs em polling: sem cache vs KPIUpstream
+(períodos fechados na SQLite + bucket aberto com TTL + coalescência).
+
+    python -m benchmarks.bench_kpi_cache [--tabs 20] [--minutes 10] [--tick 0.5]
+
+O PrestaShop é simulado (50 ms por chamada, uma linha por funcionário e
+bucket do intervalo pedido). Cada "minuto" dura --tick segundos e o TTL do
+bucket aberto é 2 ticks, a mesma proporção de 120 s de TTL para 60 s de
+refetch do frontend. Cada tab pede, por minuto, a timeseries (gran=day,
+últimos 30 dias) e a performance, como as páginas de KPI.
+Também confirma que a timeseries partida (fechado + aberto) é igual à
+pedida de uma vez, para day e week.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ["KPI_CACHE_OPEN_TTL_SECONDS"] = "1"
+
+from datetime import date, timedelta  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.db import Base, engine  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.domains.kpi.periods import open_bucket_start  # noqa: E402
+from app.services.read.kpi import upstream  # noqa: E402
+from app.services.read.kpi.kpi_query import KPIQueryService  # noqa: E402
+
+EMPLOYEES = 12
+
+
+def _bucket(d: date, gran: str) -> str:
+    return open_bucket_start(gran, d).isoformat()
+
+
+class FakeClient:
+    calls = 0
+
+    async def fetch_kpi_employee_timeseries(self, *, role, gran, since, until):
+        FakeClient.calls += 1
+        await asyncio.sleep(0.05)
+        s, u = date.fromisoformat(since), date.fromisoformat(until)
+        buckets = sorted({_bucket(s + timedelta(days=i), gran) for i in range((u - s).days)})
+        rows = [{"employee_id": e, "employee_name": f"E{e}", "bucket": b, "n_orders": e + len(b),
+                 "avg_min": 3.5, "avg_h": 0.06} for e in range(EMPLOYEES) for b in buckets]
+        return {"meta": {"role": role, "gran": gran, "since": since, "until": until}, "rows": rows}
+
+    async def fetch_kpi_employee_performance(self, *, role, since, until, order_by, order_dir, limit):
+        FakeClient.calls += 1
+        await asyncio.sleep(0.05)
+        rows = [{"employee_id": e, "employee_name": f"E{e}", "n_orders": 10, "avg_min": 3.0} for e in range(EMPLOYEES)]
+        return {"meta": {"role": role, "since": since, "until": until, "order_by": order_by,
+                         "order_dir": order_dir, "limit": limit}, "rows": rows}
+
+
+async def _poll(tabs: int, minutes: int, tick: float) -> int:
+    svc = KPIQueryService()
+    FakeClient.calls = 0
+    for _ in range(minutes):
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            asyncio.gather(svc.employees_timeseries(role="prep", gran="day", since=None, until=None),
+                           svc.employees_performance(role="prep"))
+            for _ in range(tabs)
+        ))
+        await asyncio.sleep(max(0.0, tick - (time.perf_counter() - t0)))
+    return FakeClient.calls
+
+
+async def _same_as_whole() -> None:
+    today = date.today()
+    for gran, since in (("day", today - timedelta(days=30)), ("week", today - timedelta(weeks=26))):
+        until = (today + timedelta(days=1)).isoformat()
+        whole = await FakeClient().fetch_kpi_employee_timeseries(role="prep", gran=gran, since=since.isoformat(), until=until)
+        split = await upstream.KPIUpstream(FakeClient()).employee_timeseries(
+            role="prep", gran=gran, since=since.isoformat(), until=until)
+        key = lambda r: (r["employee_id"], r["bucket"])  # noqa: E731
+        assert sorted(whole["rows"], key=key) == sorted(split["rows"], key=key), gran
+    print("  timeseries partida == pedido inteiro (day, week)")
+
+
+async def _main(args) -> None:
+    upstream.PrestashopClient = FakeClient  # KPIUpstream() sem cliente usa este
+    n = args.tabs * args.minutes * 2
+    settings.KPI_CACHE_ENABLED = False
+    before = await _poll(args.tabs, args.minutes, args.tick)
+    settings.KPI_CACHE_ENABLED = True
+    after = await _poll(args.tabs, args.minutes, args.tick)
+    print(f"{args.tabs} tabs x {args.minutes} minutos x 2 endpoints = {n} pedidos à API")
+    print(f"  sem cache: {before} chamadas ao upstream")
+    print(f"  com cache: {after} chamadas ao upstream ({after / args.minutes:.1f}/minuto, TTL = 2 minutos)")
+    print("  stats:", upstream._MEM.stats())
+    await _same_as_whole()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--tabs", type=int, default=20)
+    ap.add_argument("--minutes", type=int, default=10)
+    ap.add_argument("--tick", type=float, default=0.5)
+    args = ap.parse_args()
+    try:
+        Base.metadata.create_all(bind=engine)
+        asyncio.run(_main(args))
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
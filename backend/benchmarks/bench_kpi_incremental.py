@@ -0,0 +1,128 @@
+# benchmarks/bench_kpi_incremental.py
+"""
+Timeseries KPI com a janela por omissão a deslizar dia a dia: cache por
+intervalo (user-017) vs sincronização incremental por bucket
+(KPI_INCREMENTAL_SYNC), em linhas e chamadas ao upstream.
+
+    python -m benchmarks.bench_kpi_incremental [--days 30] [--employees 12]
+
+O PrestaShop é simulado (uma linha por funcionário e bucket do intervalo
+pedido; semanas com rótulo 'YYYY-Www', como um YEARWEEK formatado). Para
+cada dia simulado e cada gran pede-se a janela de _default_since_until
+com o "hoje" desse dia e o bucket aberto já expirado, e confirma-se que o
+resultado é igual ao intervalo pedido de uma vez.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+os.environ["KPI_CACHE_OPEN_TTL_SECONDS"] = "0"  # o aberto vai sempre ao upstream
+os.environ["KPI_CACHE_CLOSED_GRACE_HOURS"] = "0"
+
+from datetime import date, timedelta  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, engine  # noqa: E402
+from app.domains.kpi.periods import open_bucket_start  # noqa: E402
+from app.services.read.kpi import upstream  # noqa: E402
+
+GRANS = ("day", "week", "month", "year")
+
+
+def _label(d: date, gran: str) -> str:
+    b = open_bucket_start(gran, d)
+    if gran == "week":
+        y, w, _ = b.isocalendar()
+        return f"{y}-W{w:02d}"
+    return {"day": b.isoformat(), "month": b.isoformat()[:7], "year": str(b.year)}[gran]
+
+
+class FakeClient:
+    employees = 12
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+
+    async def fetch_kpi_employee_timeseries(self, *, role, gran, since, until):
+        s, u = date.fromisoformat(since), date.fromisoformat(until)
+        n: dict[str, int] = {}
+        for i in range((u - s).days):
+            lab = _label(s + timedelta(days=i), gran)
+            n[lab] = n.get(lab, 0) + 1  # n_orders depende dos dias pedidos: pontas parciais contam
+        rows = [{"employee_id": e, "employee_name": f"E{e}", "bucket": b, "n_orders": (e + 1) * days,
+                 "avg_min": 3.5, "avg_h": 0.06} for e in range(self.employees) for b, days in sorted(n.items())]
+        self.calls += 1
+        self.rows += len(rows)
+        return {"meta": {"role": role, "gran": gran, "since": since, "until": until}, "rows": rows}
+
+
+def _window(gran: str, today: date) -> tuple[str, str]:
+    # como kpi_query._default_since_until, com "hoje" simulado
+    since = {
+        "day": today - timedelta(days=30),
+        "week": today - timedelta(weeks=26),
+        "month": date(today.year - 1, today.month, 1),
+        "year": date(today.year - 5, 1, 1),
+    }[gran]
+    return since.isoformat(), (today + timedelta(days=1)).isoformat()
+
+
+async def _run(days: int, incremental: bool, start: date) -> dict[str, FakeClient]:
+    settings.KPI_INCREMENTAL_SYNC = incremental
+    upstream._MEM.invalidate()
+    out = {}
+    for gran in GRANS:
+        client = out[gran] = FakeClient()
+        oracle = FakeClient()
+        for i in range(days):
+            today = start + timedelta(days=i)
+            upstream._today = lambda today=today: today
+            since, until = _window(gran, today)
+            got = await upstream.KPIUpstream(client).employee_timeseries(
+                role="prep", gran=gran, since=since, until=until)
+            whole = await oracle.fetch_kpi_employee_timeseries(role="prep", gran=gran, since=since, until=until)
+            key = lambda r: (r["employee_id"], r["bucket"])  # noqa: E731
+            assert sorted(got["rows"], key=key) == sorted(whole["rows"], key=key), (gran, today)
+    return out
+
+
+async def _main(args) -> None:
+    FakeClient.employees = args.employees
+    start = date(2025, 3, 12)  # quarta-feira: semana e mês começam a meio
+    legacy = await _run(args.days, False, start)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    incr = await _run(args.days, True, start)
+    print(f"{args.days} dias simulados, {args.employees} funcionários, 1 pedido por dia e gran")
+    print(f"  {'gran':<6} {'por intervalo':>24} {'incremental':>24}")
+    for gran in GRANS:
+        a, b = legacy[gran], incr[gran]
+        print(f"  {gran:<6} {a.calls:>6} chamadas {a.rows:>8} linhas {b.calls:>6} chamadas {b.rows:>8} linhas")
+    print("  resultado == intervalo pedido de uma vez em todos os dias")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--employees", type=int, default=12)
+    args = ap.parse_args()
+    try:
+        Base.metadata.create_all(bind=engine)
+        asyncio.run(_main(args))
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_kpi_report.py
+"""
+KPIReportGenerateService.build_payload: as 4 chamadas ao upstream em
+sequência (antes) vs em paralelo, e uma chamada presa até ao timeout.
+
+    python -m benchmarks.bench_kpi_report [--delays 0.3,0.5,0.8,1.2] [--runs 3]
+
+O PrestaShop é simulado com uma latência fixa por chamada (--delays, pela
+ordem invoice.timeseries, prep.timeseries, invoice.performance,
+prep.performance). Sem cache KPI, para medir só o upstream.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ["KPI_CACHE_ENABLED"] = "false"
+
+from app.core.config import settings  # noqa: E402
+from app.services.commands.kpi import report_generate as rg  # noqa: E402
+from app.services.read.kpi import upstream  # noqa: E402
+
+
+class FakeClient:
+    delays: dict[tuple[str, str], float] = {}
+
+    async def fetch_kpi_employee_timeseries(self, *, role, gran, since, until):
+        await asyncio.sleep(self.delays[("timeseries", role)])
+        rows = [{"employee_id": e, "employee_name": f"E{e}", "bucket": since, "n_orders": 5,
+                 "avg_min": 3.0, "avg_h": 0.05} for e in range(10)]
+        return {"meta": {"role": role, "gran": gran, "since": since, "until": until}, "rows": rows}
+
+    async def fetch_kpi_employee_performance(self, *, role, since, until, order_by, order_dir, limit):
+        await asyncio.sleep(self.delays[("performance", role)])
+        rows = [{"employee_id": e, "employee_name": f"E{e}", "n_orders": 10, "avg_min": 3.0} for e in range(10)]
+        return {"meta": {"role": role, "since": since, "until": until, "order_by": order_by,
+                         "order_dir": order_dir, "limit": limit}, "rows": rows}
+
+
+async def _sequential(svc: rg.KPIReportGenerateService, since: str, until: str) -> None:
+    # a ordem e os awaits do build_payload anterior
+    for role in ("invoice", "prep"):
+        await svc.kpi.employees_timeseries(role=role, gran="day", since=since, until=until)
+    for role in ("invoice", "prep"):
+        await svc.kpi.employees_performance(role=role, since=since, until=until,
+                                            order_by="avg", order_dir="asc", limit=1000)
+
+
+async def _main(args) -> None:
+    d = [float(x) for x in args.delays.split(",")]
+    FakeClient.delays = {("timeseries", "invoice"): d[0], ("timeseries", "prep"): d[1],
+                         ("performance", "invoice"): d[2], ("performance", "prep"): d[3]}
+    upstream.PrestashopClient = FakeClient
+    since, until = rg._resolve_window("day", None, None)
+    svc = rg.KPIReportGenerateService()
+
+    seq, par = [], []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        await _sequential(svc, since, until)
+        seq.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        payload, _, _ = await svc.build_payload(period="day")
+        par.append(time.perf_counter() - t0)
+    print(f"latências simuladas {d} (soma {sum(d):.1f}s, máx {max(d):.1f}s), {args.runs} runs")
+    print(f"  sequencial: {min(seq):.2f}s   paralelo: {min(par):.2f}s")
+    print("  meta.upstream:", payload["meta"]["upstream"])
+
+    settings.KPI_REPORT_CALL_TIMEOUT_S = max(d[:3]) + 0.2
+    FakeClient.delays[("performance", "prep")] = 60.0
+    t0 = time.perf_counter()
+    payload, _, _ = await svc.build_payload(period="day")
+    print(f"  prep.performance presa, timeout {settings.KPI_REPORT_CALL_TIMEOUT_S:.1f}s: "
+          f"{time.perf_counter() - t0:.2f}s, falhadas={rg._failed_calls(payload)}, "
+          f"prep.performance={len(payload['prep']['performance'])} linhas")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--delays", default="0.3,0.5,0.8,1.2")
+    ap.add_argument("--runs", type=int, default=3)
+    asyncio.run(_main(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
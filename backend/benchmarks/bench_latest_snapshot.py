@@ -0,0 +1,176 @@
+# benchmarks/bench_latest_snapshot.py
+"""
+Latência dos read repos "última run" à medida que o histórico cresce:
+max(observed_at) / group-by sobre todo o histórico (implementação anterior)
+vs ponteiro por check em snapshot_pointers (lookup por PK).
+
+    python -m benchmarks.bench_latest_snapshot [--repeat 5]
+
+Gera um ano de histórico sintético numa SQLite temporária (WAL), com a
+cadência do worker: encomendas 1x/hora (~30 linhas), carrinhos 1x/dia (50),
+EOL 1x/semana (~3000 produtos). Mede em 1 semana, 1, 3, 6 e 12 meses.
+
+Nota EOL: a versão anterior devolvia a última linha de cada produto alguma
+vez visto; com o ponteiro devolve só os produtos da última run (os ~5% que
+saem do feed em cada run deixam de aparecer), daí a contagem menor.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import case, create_engine, desc, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import Base
+from app.models.prestashop import AbandonedCartSnapshot, DelayedOrderSnapshot as DOS, EOLProductSnapshot as EPS
+from app.models.snapshots import SnapshotPointer
+from app.repos.prestashop.carts_read import CartsReadRepo
+from app.repos.prestashop.eol_read import EOLOutReadRepo
+from app.repos.prestashop.orders_read import OrdersReadRepo
+from app.repos.shared import pointers
+from app.repos.shared.bulk import bulk_insert
+from app.repos.shared.pointers import SnapshotPointerRepo
+
+TZ = ZoneInfo("Europe/Lisbon")
+START = datetime(2024, 1, 1, tzinfo=TZ)
+CHECKPOINTS = (("1 semana", 7), ("1 mês", 30), ("3 meses", 91), ("6 meses", 182), ("12 meses", 365))
+_STATUSES = ("ok", "warning", "critical")
+
+
+# ---- implementação anterior (cópia) ----
+def _legacy_orders(db) -> int:
+    max_obs = select(func.max(DOS.observed_at)).scalar_subquery()
+    sev = case((DOS.status == "critical", 0), (DOS.status == "warning", 1), else_=2)
+    q = (select(DOS).where(DOS.observed_at == max_obs)
+         .where(DOS.status.in_(["warning", "critical"])).order_by(sev, desc(DOS.days_passed)))
+    return len(db.execute(q).all())
+
+
+def _legacy_carts(db) -> int:
+    ts = db.query(func.max(AbandonedCartSnapshot.observed_at)).scalar()
+    q = (db.query(AbandonedCartSnapshot).where(AbandonedCartSnapshot.observed_at == ts)
+         .order_by(AbandonedCartSnapshot.hours_stale.desc(), AbandonedCartSnapshot.id_cart.desc()))
+    return len(q.all())
+
+
+def _legacy_eol(db) -> int:
+    subq = (select(EPS.product_id.label("pid"), func.max(EPS.observed_at).label("max_obs"))
+            .group_by(EPS.product_id).subquery())
+    sev = case((EPS.status == "critical", 0), (EPS.status == "warning", 1), else_=2)
+    q = (select(EPS).join(subq, (EPS.product_id == subq.c.pid) & (EPS.observed_at == subq.c.max_obs))
+         .order_by(sev, desc(EPS.days_since), desc(EPS.price)))
+    return len(db.execute(q).all())
+
+
+# ---- histórico sintético ----
+class _History:
+    def __init__(self, Session, seed: int = 7):
+        self.Session = Session
+        self.rnd = random.Random(seed)
+        self.t_orders = self.t_carts = self.t_eol = START
+
+    def _orders(self, t):
+        ids = self.rnd.sample(range(1, 5000), 30)
+        return [dict(id_order=i, reference=f"R{i}", date_add=t - timedelta(days=3), days_passed=3,
+                     id_state=3, state_name="Em processamento", dropshipping=i % 4 == 0,
+                     status=self.rnd.choice(_STATUSES), observed_at=t) for i in ids]
+
+    def _carts(self, t):
+        return [dict(id_cart=i, id_customer=i, items=2, hours_stale=self.rnd.randint(6, 300),
+                     status=self.rnd.choice(_STATUSES), observed_at=t) for i in range(50)]
+
+    def _eol(self, t):
+        return [dict(product_id=i, name=f"Produto {i}", reference=f"REF{i}", ean13="", upc="",
+                     price=10 + i % 90, last_in_stock_at=t - timedelta(days=40), days_since=40,
+                     status=self.rnd.choice(_STATUSES), observed_at=t)
+                for i in range(3000) if self.rnd.random() < .95]
+
+    def grow_to(self, until: datetime) -> None:
+        db = self.Session()
+        ptr = SnapshotPointerRepo(db)
+        for attr, model, step, gen, name in (
+            ("t_orders", DOS, timedelta(hours=1), self._orders, pointers.ORDERS_DELAYED),
+            ("t_carts", AbandonedCartSnapshot, timedelta(days=1), self._carts, pointers.CARTS_STALE),
+            ("t_eol", EPS, timedelta(weeks=1), self._eol, pointers.EOL_PRODUCTS),
+        ):
+            t = getattr(self, attr)
+            while t + step <= until:
+                t += step
+                n = bulk_insert(db, model, gen(t))
+                ptr.publish(name, t, n, "critical")
+            setattr(self, attr, t)
+        db.commit()
+        db.close()
+
+
+def _session_factory(path: str):
+    engine = create_engine(f"sqlite:///{path}", future=True)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.close()
+
+    Base.metadata.create_all(engine, tables=[
+        DOS.__table__, AbandonedCartSnapshot.__table__, EPS.__table__, SnapshotPointer.__table__,
+    ])
+    return engine, sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, future=True)
+
+
+def _median_ms(fn, db, repeat: int) -> float:
+    fn(db)  # aquece a cache de páginas
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(db)
+        out.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(out)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    settings.PS_SNAPSHOT_STORAGE = "full"
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine, Session = _session_factory(path)
+    hist = _History(Session)
+    cases = (
+        ("orders", _legacy_orders, lambda db: len(OrdersReadRepo(db).latest_by_run())),
+        ("carts", _legacy_carts, lambda db: len(CartsReadRepo(db).latest())),
+        ("eol", _legacy_eol, lambda db: len(EOLOutReadRepo(db).latest_by_product())),
+    )
+    try:
+        print(f"{'histórico':<10} {'linhas':>8}  " + "  ".join(f"{n + ' max/ptr':>20}" for n, *_ in cases))
+        for label, days in CHECKPOINTS:
+            hist.grow_to(START + timedelta(days=days))
+            db = Session()
+            rows = sum(db.scalar(select(func.count()).select_from(m)) for m in (DOS, AbandonedCartSnapshot, EPS))
+            cols = []
+            for name, legacy, current in cases:
+                n_old, n_new = legacy(db), current(db)
+                assert n_new == n_old if name != "eol" else n_new <= n_old, (name, n_old, n_new)
+                cols.append(f"{_median_ms(legacy, db, args.repeat):8.2f}/{_median_ms(current, db, args.repeat):6.2f}ms")
+            db.close()
+            print(f"{label:<10} {rows:>8}  " + "  ".join(f"{c:>20}" for c in cols))
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# benchmarks/bench_pagespeed_sanity.py
+"""
+CPU e memória de pico por página: sanity via BeautifulSoup (implementação
+anterior) vs extrator de passagem única (app.domains.prestashop.pagespeed.sanity).
+
+    python -m benchmarks.bench_pagespeed_sanity [--fixtures DIR] [--repeat 5]
+
+Sem --fixtures gera páginas sintéticas ao estilo PrestaShop (home ~450 KB,
+produto ~320 KB e ~900 KB, e um de 900 KB com o <h1> no fim, que obriga a
+ler a página toda). Com --fixtures usa os *.html da pasta; o ficheiro
+é tratado como "product" se o nome contiver "product", senão "home".
+Confirma também que os dois caminhos devolvem exatamente o mesmo resultado.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.domains.prestashop.pagespeed.mappers import _sanity_from_html
+
+
+def _legacy_sanity(html: str, page_type: str, *, jsonld_critical: bool = True,
+                   ignore_warn_keys: set[str] = frozenset()) -> tuple[dict, int, int]:
+    # cópia da versão anterior de _sanity_from_html (BeautifulSoup + find/find_all)
+    soup = BeautifulSoup(html, "html.parser")
+    title = (soup.title.string or "").strip() if soup.title else ""
+    md = soup.find("meta", attrs={"name": re.compile("^description$", re.I)})
+    meta_desc = (md.get("content") or "").strip() if md else ""
+
+    h1_ok = soup.find("h1") is not None
+    canonical_ok = soup.find("link", rel=re.compile("^canonical$", re.I)) is not None
+
+    blocking = 0
+    head = soup.find("head")
+    if head:
+        for s in head.find_all("script", src=True):
+            if not s.has_attr("defer") and not s.has_attr("async"):
+                blocking += 1
+
+    jsonld_ok = None
+    if page_type == "product":
+        jsonld_ok = False
+        for tag in soup.find_all("script", type="application/ld+json"):
+            try:
+                data = json.loads(tag.string or "{}")
+            except Exception:
+                continue
+            candidates = data if isinstance(data, list) else [data]
+            for obj in candidates:
+                t = obj.get("@type") or obj.get("@graph", [{}])[0].get("@type")
+                if (t == "Product") or (isinstance(t, list) and "Product" in t):
+                    sku = obj.get("sku")
+                    gtin = obj.get("gtin") or obj.get("gtin13") or obj.get("gtin8") or obj.get("gtin14")
+                    offers = obj.get("offers") or {}
+                    price = (offers.get("price") if isinstance(offers, dict) else None)
+                    if sku and (gtin or price):
+                        jsonld_ok = True
+                        break
+            if jsonld_ok:
+                break
+
+    sanity = {
+        "title_ok": 30 <= len(title) <= 65, "title_len": len(title),
+        "meta_desc_ok": 80 <= len(meta_desc) <= 160, "meta_desc_len": len(meta_desc),
+        "h1_ok": h1_ok, "canonical_ok": canonical_ok,
+        "jsonld_product_ok": jsonld_ok, "blocking_scripts_in_head": blocking,
+    }
+    warn_keys = [k for k in ("title_ok", "meta_desc_ok", "h1_ok", "canonical_ok") if not sanity[k]]
+    if sanity["blocking_scripts_in_head"] > 0:
+        warn_keys.append("blocking_scripts_in_head")
+    warn = sum(1 for k in warn_keys if k not in ignore_warn_keys)
+    crit = 0
+    if sanity["jsonld_product_ok"] is False:
+        if jsonld_critical:
+            crit += 1
+        else:
+            warn += 1
+    return sanity, crit, warn
+
+
+def _synthetic_page(kind: str, target_bytes: int, *, h1_last: bool = False) -> str:
+    head = [
+        "<!DOCTYPE html><html lang=\"pt\"><head><meta charset=\"utf-8\">",
+        "<title>Portátil Ultra 14&quot; &ndash; Loja de Informática Online</title>",
+        '<meta name="description" content="' + "Compre online o melhor equipamento informático com entrega rápida em Portugal. " * 1 + '">',
+        '<link rel="canonical" href="https://www.example.pt/pt/">',
+        '<link rel="stylesheet" href="/themes/a.css">' * 12,
+        '<script src="/js/jquery.js"></script><script src="/js/theme.js" defer></script>',
+        "<style>" + ".c{color:#333;margin:0 auto}" * 400 + "</style>",
+        "<script>var prestashop = " + json.dumps({"cart": {"products": []}, "k": "v" * 2000}) + ";</script>",
+    ]
+    if kind == "product":
+        head.append('<script type="application/ld+json">' + json.dumps({
+            "@context": "https://schema.org", "@type": "Product", "name": "Portátil",
+            "sku": "PT-1400", "gtin13": "5600000000000", "offers": {"@type": "Offer", "price": "899.90"},
+        }) + "</script>")
+    head.append("</head><body id=\"index\"><header><nav><ul>")
+    h1 = "<h1 class=\"page-title\">Destaques</h1>"
+    body = [] if h1_last else [h1]
+    card = (
+        '<article class="product-miniature" data-id-product="{i}"><div class="thumbnail-container">'
+        '<a href="/pt/p/{i}-produto.html"><img src="/img/p/{i}.jpg" alt="Produto {i}" loading="lazy"></a>'
+        '<div class="product-description"><h2 class="h3 product-title"><a href="/pt/p/{i}">Produto &amp; acessório {i}</a></h2>'
+        '<div class="product-price-and-shipping"><span class="price">{i},99&nbsp;€</span></div></div></div></article>\n'
+    )
+    i = 0
+    size = sum(len(x) for x in head)
+    while size < target_bytes:
+        chunk = card.format(i=i)
+        body.append(chunk)
+        size += len(chunk)
+        i += 1
+    if h1_last:
+        body.append(h1)
+    body.append("</ul></nav></header><footer><script src=\"/js/footer.js\"></script></footer></body></html>")
+    return "".join(head) + "".join(body)
+
+
+def _fixtures(folder: str | None) -> list[tuple[str, str, str]]:
+    if folder:
+        out = []
+        for p in sorted(Path(folder).glob("*.html")):
+            kind = "product" if "product" in p.name.lower() else "home"
+            out.append((p.name, kind, p.read_text(encoding="utf-8", errors="replace")))
+        return out
+    return [
+        ("home_450k", "home", _synthetic_page("home", 450_000)),
+        ("product_320k", "product", _synthetic_page("product", 320_000)),
+        ("product_900k", "product", _synthetic_page("product", 900_000)),
+        # h1 só no fim: sem paragem antecipada, mede a passagem completa
+        ("product_900k_h1", "product", _synthetic_page("product", 900_000, h1_last=True)),
+    ]
+
+
+def _measure(fn, html: str, kind: str, repeat: int) -> tuple[float, float, tuple]:
+    cpu = []
+    for _ in range(repeat):
+        t0 = time.process_time()
+        res = fn(html, kind, jsonld_critical=False)
+        cpu.append(time.process_time() - t0)
+    tracemalloc.start()
+    fn(html, kind, jsonld_critical=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(cpu) * 1000, peak / 1024 / 1024, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--fixtures", help="pasta com páginas *.html guardadas")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'página':<16} {'KB':>6}  {'bs4 cpu':>9} {'bs4 pico':>9}  {'1-pass cpu':>10} {'1-pass pico':>11}")
+    for name, kind, html in _fixtures(args.fixtures):
+        cpu_old, mem_old, res_old = _measure(_legacy_sanity, html, kind, args.repeat)
+        cpu_new, mem_new, res_new = _measure(_sanity_from_html, html, kind, args.repeat)
+        assert res_old == res_new, f"{name}: resultados diferentes\n{res_old}\n{res_new}"
+        print(f"{name:<16} {len(html.encode()) / 1024:6.0f}  {cpu_old:7.1f}ms {mem_old:7.1f}MB  "
+              f"{cpu_new:8.1f}ms {mem_new:9.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
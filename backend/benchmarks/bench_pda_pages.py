@@ -0,0 +1,123 @@
+# benchmarks/bench_pda_pages.py
+"""
+Latência de uma página do /tools/pda em função do nº de relatórios: lista
+inteira do PDA mapeada e fatiada em memória (antes) vs cópia local
+pda_reports com paginação keyset.
+
+    python -m benchmarks.bench_pda_pages [--sizes 1000,10000,100000] [--page-size 50]
+
+"Antes" não inclui a ida ao PDA (só o parse do JSON já descarregado, o
+raw_row_to_domain e o json.dumps de cada context), por isso fica por baixo
+do custo real. "Depois" mede PdaQueryService na primeira página, numa
+página funda via cursor (a meio da lista) e com filtro por estado, mais o
+custo de uma sync incremental com 20 relatórios alterados.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.bootstrap import init_sqlite_pragmas  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.domains.tools.pda.mappers import context_to_json, raw_row_to_domain  # noqa: E402
+from app.services.commands.pda import sync_reports  # noqa: E402
+from app.services.queries.tools.pda_query_service import PdaQueryService  # noqa: E402
+
+STATES = ("new", "seen", "resolved", "ignored")
+BASE = datetime(2025, 1, 1, 8, 0, 0)
+
+
+def _raw(i: int, rnd: random.Random, bump: int = 0) -> dict:
+    return {
+        "id": i, "code": f"E{rnd.randint(100, 160)}", "message": "falha ao ler etiqueta",
+        "context_json": json.dumps({"device": f"pda-{i % 40}", "screen": "picking", "stack": ["a", "b"] * 5}),
+        "error_text": "TimeoutError", "stack_text": "at x\nat y", "log_mode": "error",
+        "ts_client": str(BASE + timedelta(minutes=i)), "state": STATES[i % 4],
+        "date_add": str(BASE + timedelta(minutes=i)), "date_upd": str(BASE + timedelta(minutes=i + bump)),
+    }
+
+
+class FakePda:
+    rows: list[dict] = []
+
+    async def fetch_reports(self, updated_since=None):
+        if updated_since is None:
+            return FakePda.rows
+        return [r for r in FakePda.rows if r["date_upd"] >= updated_since]
+
+
+def _legacy_page(body: bytes, page: int, page_size: int) -> list:
+    rows = [raw_row_to_domain(r) for r in json.loads(body)]
+    out = []
+    for d in rows:
+        context_to_json(d.context)  # o serviço antigo serializava antes de fatiar
+        out.append(d)
+    return out[(page - 1) * page_size:page * page_size]
+
+
+def _ms(fn, reps: int = 5) -> float:
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--page-size", type=int, default=50)
+    args = ap.parse_args()
+    ps = args.page_size
+    sync_reports.PdaClient = FakePda
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        init_sqlite_pragmas(engine)
+        print(f"{'relatórios':>10}  {'antes p1':>9}  {'p1':>7}  {'meio':>7}  {'estado':>7}  {'sync 20':>8}")
+        rnd = random.Random(5)
+        for n in (int(x) for x in args.sizes.split(",")):
+            FakePda.rows = [_raw(i, rnd) for i in range(1, n + 1)]
+            body = json.dumps(FakePda.rows).encode()
+            asyncio.run(sync_reports.run(SessionLocal, full=True))
+
+            before = _ms(lambda: _legacy_page(body, 1, ps), reps=2)
+            db = SessionLocal()
+            svc = PdaQueryService(db)
+            cur, page = None, None
+            for _ in range(min(n // ps // 2, 1000)):  # cursor a meio (até 1000 páginas)
+                page = svc.get_pda_report(page_size=ps, cursor=cur)
+                cur = page.meta.next_cursor
+            first = _ms(lambda: svc.get_pda_report(page_size=ps))
+            mid = _ms(lambda: svc.get_pda_report(page_size=ps, cursor=cur))
+            by_state = _ms(lambda: svc.get_pda_report(page_size=ps, state="resolved"))
+            db.close()
+
+            for i in rnd.sample(range(1, n + 1), 20):
+                FakePda.rows[i - 1] = _raw(i, rnd, bump=n + 10)
+            t0 = time.perf_counter()
+            asyncio.run(sync_reports.run(SessionLocal))
+            sync_ms = (time.perf_counter() - t0) * 1000
+            print(f"{n:>10}  {before:7.1f}ms  {first:5.1f}ms  {mid:5.1f}ms  {by_state:5.1f}ms  {sync_ms:6.1f}ms")
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
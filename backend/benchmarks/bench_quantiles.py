@@ -0,0 +1,98 @@
+# benchmarks/bench_quantiles.py
+"""
+QuantileSketch (app/shared/quantiles.py) vs ordenação exata, em latências
+sintéticas de 10k, 100k e 1M amostras.
+
+    python -m benchmarks.bench_quantiles [--sizes 10000,100000,1000000] [--parts 100]
+
+Para cada distribuição mede:
+  - exato: o antigo _pct (copia + ordena a lista em cada percentil, 3 percentis)
+  - sketch: construção (extend), p50/p90/p95/p99, junção de --parts
+    sketches parciais (como os baldes dos agregados) e tamanho em JSON
+  - erro relativo máximo do sketch face ao valor exato, por percentil
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from app.shared.quantiles import ALPHA, QuantileSketch
+
+PS = (0.50, 0.90, 0.95, 0.99)
+
+
+def _pct(values: list[int], p: float) -> int:
+    # cópia da implementação anterior de app/services/queries/pagespeed/summary.py
+    vals = [int(v) for v in values if v is not None]
+    if not vals:
+        return 0
+    vals.sort()
+    idx = int(round(p * (len(vals) - 1)))
+    return vals[idx]
+
+
+def _dists(rnd: random.Random):
+    # TTFB típico (lognormal), cauda pesada (pareto) e ruído uniforme
+    return {
+        "lognormal": lambda: int(rnd.lognormvariate(6.0, 0.6)),
+        "pareto": lambda: int(50 * rnd.paretovariate(1.5)),
+        "uniform": lambda: rnd.randint(1, 5000),
+    }
+
+
+def _ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000
+
+
+def _bench(values: list[int], parts: int) -> dict:
+    t0 = time.perf_counter()
+    exact3 = [_pct(values, p) for p in PS[:3]]
+    t_exact3 = _ms(t0)
+    srt = sorted(values)
+    exact = {p: srt[int(round(p * (len(srt) - 1)))] for p in PS}
+    assert exact3 == [exact[p] for p in PS[:3]]
+
+    t0 = time.perf_counter()
+    sk = QuantileSketch.of(values)
+    t_build = _ms(t0)
+    t0 = time.perf_counter()
+    approx = {p: sk.quantile(p) for p in PS}
+    t_query = _ms(t0)
+
+    step = max(1, len(values) // parts)
+    partial = [QuantileSketch.of(values[i:i + step]).to_dict() for i in range(0, len(values), step)]
+    t0 = time.perf_counter()
+    merged = QuantileSketch.merged(QuantileSketch.from_dict(d) for d in partial)
+    t_merge = _ms(t0)
+    assert merged.count == sk.count and all(merged.quantile(p) == approx[p] for p in PS)
+
+    err = {p: abs(approx[p] - exact[p]) / exact[p] if exact[p] else 0.0 for p in PS}
+    return {
+        "exact3": t_exact3, "build": t_build, "query": t_query, "merge": t_merge,
+        "bytes": len(json.dumps(sk.to_dict())), "bins": len(sk.bins), "err": err,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--parts", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    print(f"alpha={ALPHA}  junção de {args.parts} sketches parciais")
+    print(f"{'dist':<10} {'n':>8}  {'exato 3p':>9} {'build':>9} {'4p':>7} {'merge':>8} {'json':>7} {'bins':>5}  "
+          + "  ".join(f"{'err p' + str(int(p * 100)):>9}" for p in PS))
+    for n in (int(x) for x in args.sizes.split(",")):
+        for name, gen in _dists(rnd).items():
+            values = [gen() for _ in range(n)]
+            r = _bench(values, args.parts)
+            print(f"{name:<10} {n:>8}  {r['exact3']:7.1f}ms {r['build']:7.1f}ms {r['query']:5.2f}ms {r['merge']:6.2f}ms "
+                  f"{r['bytes']:>6}B {r['bins']:>5}  " + "  ".join(f"{r['err'][p] * 100:8.2f}%" for p in PS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/bench_run_ledger.py
+"""
+Commits na SQLite por job: run gravada numa transação própria depois do
+commit do job, com refresh para ler o id (antes) vs RunsWriteRepo.record_run
+na transação das snapshots vs RUNS_BUFFERED com flush em lote.
+
+    python -m benchmarks.bench_run_ledger [--jobs 200] [--fail-every 10] [--flush-every 20]
+
+O job é o prestashop.orders_delayed com o PrestaShop simulado (50
+encomendas por run; uma run em cada --fail-every falha no upstream). "Antes"
+é uma cópia do comando anterior. Conta-se cada COMMIT que chega à SQLite com
+uma transação de escrita aberta, as queries a check_runs e o tempo por job
+(journal WAL, synchronous como em init_sqlite_pragmas).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+
+from datetime import datetime, timedelta  # noqa: E402
+from zoneinfo import ZoneInfo  # noqa: E402
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.bootstrap import init_sqlite_pragmas  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.domains.prestashop.orders.mappers import map_order_row_to_entity  # noqa: E402
+from app.models.runs import CheckRun  # noqa: E402
+from app.repos.prestashop.orders_write import OrdersWriteRepo  # noqa: E402
+from app.repos.runs.buffer import RUN_BUFFER  # noqa: E402
+from app.repos.shared.pointers import SnapshotPointerRepo  # noqa: E402
+from app.services.commands.prestashop import ingest_orders_delayed  # noqa: E402
+from app.services.commands.runs import flush  # noqa: E402
+
+CHECK_NAME = ingest_orders_delayed.CHECK_NAME
+
+
+class Counters:
+    commits = 0
+    run_queries = 0
+
+
+@event.listens_for(engine, "commit")
+def _on_commit(conn):
+    if conn.connection.dbapi_connection.in_transaction:  # só os que fecham uma escrita
+        Counters.commits += 1
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _on_execute(conn, cursor, statement, *args):
+    if "check_runs" in statement:
+        Counters.run_queries += 1
+
+
+class FakeClient:
+    job = 0
+    fail_every = 10
+
+    def _rows(self) -> list[dict]:
+        FakeClient.job += 1
+        if FakeClient.fail_every and FakeClient.job % FakeClient.fail_every == 0:
+            raise RuntimeError("upstream 503")
+        base = datetime.now() - timedelta(days=3)
+        return [{"id_order": i, "reference": f"R{i}", "date_add": base.strftime("%Y-%m-%d %H:%M:%S"),
+                 "days_passed": 3, "id_state": 2, "state_name": "Pago", "dropshipping": i % 5 == 0}
+                for i in range(50)]
+
+    async def fetch_delayed_orders(self) -> list[dict]:
+        return self._rows()
+
+    async def iter_delayed_orders(self):
+        for r in self._rows():
+            yield r
+
+
+# ---------------- comando anterior ----------------
+def _legacy_insert_run(db, check_name: str, status: str, duration_ms: int, payload_json: dict | None) -> int:
+    row = CheckRun(check_name=check_name, status="ok" if status == "ok" else "error",
+                   duration_ms=duration_ms, payload_json=payload_json or {})
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row.id
+
+
+async def _legacy_run(db_session_factory):
+    db = db_session_factory()
+    repo = OrdersWriteRepo(db)
+    t0 = time.perf_counter()
+    try:
+        tz = ZoneInfo(settings.TIMEZONE)
+        now_dt = datetime.now(tz)
+        rows = await FakeClient().fetch_delayed_orders()
+        items = [map_order_row_to_entity(r, tz, settings.PS_ORDERS_WARN_DS_STD, settings.PS_ORDERS_CRIT_DS_STD,
+                                         settings.PS_ORDERS_WARN_DS_DROPSHIP, settings.PS_ORDERS_CRIT_DS_DROPSHIP)
+                 for r in rows]
+        order = {"ok": 0, "warning": 1, "critical": 2}
+        worst = max((it.status.value for it in items), default="ok", key=lambda s: order[s])
+        repo.insert_many(items, observed_at=now_dt)
+        SnapshotPointerRepo(db).publish(CHECK_NAME, now_dt, len(items), worst)
+        db.commit()
+        _legacy_insert_run(db, CHECK_NAME, "ok", int((time.perf_counter() - t0) * 1000),
+                           {"count": len(items), "worst": worst})
+        return True
+    except Exception as e:
+        db.rollback()
+        _legacy_insert_run(db, CHECK_NAME, "error", int((time.perf_counter() - t0) * 1000), {"error": str(e)})
+        return False
+    finally:
+        db.close()
+
+
+# ---------------- medição ----------------
+def _measure(label: str, job, jobs: int, flush_every: int = 0) -> None:
+    Counters.commits = Counters.run_queries = 0
+    FakeClient.job = 0
+    with SessionLocal() as db:
+        runs_before = db.execute(select(func.count()).select_from(CheckRun)).scalar_one()
+    Counters.run_queries = 0
+    t0 = time.perf_counter()
+    for i in range(1, jobs + 1):
+        asyncio.run(job(SessionLocal))
+        if flush_every and i % flush_every == 0:
+            flush.run(SessionLocal)
+    if flush_every:
+        flush.run(SessionLocal)  # o do shutdown
+    ms = (time.perf_counter() - t0) * 1000 / jobs
+    commits, queries = Counters.commits, Counters.run_queries
+    with SessionLocal() as db:
+        runs = db.execute(select(func.count()).select_from(CheckRun)).scalar_one() - runs_before
+    assert runs == jobs and len(RUN_BUFFER) == 0, (label, runs, jobs)
+    print(f"  {label:<26} {commits / jobs:6.2f} {queries / jobs:12.2f} {ms:9.2f}ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--jobs", type=int, default=200)
+    ap.add_argument("--fail-every", type=int, default=10)
+    ap.add_argument("--flush-every", type=int, default=20)
+    args = ap.parse_args()
+    FakeClient.fail_every = args.fail_every
+    ingest_orders_delayed.PrestashopClient = FakeClient
+    logging.getLogger("wd.jobs.ps.orders").disabled = True  # as falhas são de propósito
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        init_sqlite_pragmas(engine)
+        print(f"{args.jobs} jobs, 1 falha em cada {args.fail_every}")
+        print(f"  {'':<26} {'commits':>6} {'check_runs q.':>12} {'por job':>11}")
+        settings.RUNS_BUFFERED = False
+        _measure("antes (insert_run)", _legacy_run, args.jobs)
+        _measure("record_run na transação", ingest_orders_delayed.run, args.jobs)
+        settings.RUNS_BUFFERED = True
+        _measure(f"buffered, flush a cada {args.flush_every}", ingest_orders_delayed.run, args.jobs,
+                 flush_every=args.flush_every)
+        print("  todas as runs gravadas em check_runs")
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/bench_store_aggregation.py
+"""
+Agregação dos eventos do frontInvoiceAudit: to_timeseries_daily,
+to_employee_performance e to_doc_type_daily cada uma a percorrer a lista
+(antes) vs aggregate_events numa só passagem, em Python e com NumPy.
+
+    python -m benchmarks.bench_store_aggregation [--events 100000,1000000] [--runs 3]
+
+"Antes" são cópias das funções to_* anteriores (strptime por formato em
+cada evento e total via str().replace() em cada função). Os eventos são
+simulados como em bench_store_metrics (90 dias, ~10% que não são
+document_created, alguns totais numéricos e datas ISO). No fim confirma-se
+que os três caminhos dão o mesmo resultado.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.domains.kpi.store import mappers
+from app.domains.kpi.store.types import StoreBucket, StoreDocTypeDaily, StoreEmployeePerformance
+
+NOW = datetime(2025, 11, 21, 18, 0, 0)
+
+
+# ---------------- cálculo antigo ----------------
+def _old_parse_date(d: str) -> str:
+    d = (d or "").strip()
+    if not d:
+        return ""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(d, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return d.split(" ")[0]
+
+
+def _old_to_float(v: Any) -> float:
+    try:
+        return float(str(v).replace(",", "."))
+    except Exception:
+        return 0.0
+
+
+def _old_timeseries(rows: List[Dict[str, Any]]) -> List[StoreBucket]:
+    by_date: Dict[str, Dict[str, float]] = defaultdict(lambda: {"n": 0, "total": 0.0})
+    for r in rows:
+        if r.get("event_type") != "document_created":
+            continue
+        date_key = _old_parse_date(r.get("document_creation_date") or "")
+        if not date_key:
+            continue
+        agg = by_date[date_key]
+        agg["n"] += 1
+        agg["total"] += _old_to_float(r.get("document_total"))
+    return [StoreBucket(bucket=k, n_orders=int(a["n"]), total_amount=round(a["total"], 2))
+            for k, a in sorted(by_date.items())]
+
+
+def _old_employees(rows: List[Dict[str, Any]]) -> List[StoreEmployeePerformance]:
+    by_emp: Dict[int, Dict[str, Any]] = defaultdict(lambda: {"name": "", "n": 0, "total": 0.0})
+    for r in rows:
+        if r.get("event_type") != "document_created":
+            continue
+        emp_id = int(r.get("employee_id") or 0)
+        if emp_id <= 0:
+            continue
+        slot = by_emp[emp_id]
+        slot["name"] = (r.get("employee_name") or slot["name"] or f"#{emp_id}").strip()
+        slot["n"] += 1
+        slot["total"] += _old_to_float(r.get("document_total"))
+    out = [StoreEmployeePerformance(employee_id=i, employee_name=s["name"] or f"#{i}", n_orders=s["n"],
+                                    total_amount=round(s["total"], 2), avg_ticket=round(s["total"] / s["n"], 2))
+           for i, s in by_emp.items()]
+    out.sort(key=lambda e: (-e.total_amount, e.employee_name.lower(), e.employee_id))
+    return out
+
+
+def _old_doc_types(rows: List[Dict[str, Any]]) -> List[StoreDocTypeDaily]:
+    key_agg: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"n": 0, "total": 0.0})
+    for r in rows:
+        if r.get("event_type") != "document_created":
+            continue
+        date_key = _old_parse_date(r.get("document_creation_date") or "")
+        if not date_key:
+            continue
+        doc_type = (r.get("document_type") or "").strip() or "UNK"
+        agg = key_agg[(date_key, doc_type)]
+        agg["n"] += 1
+        agg["total"] += _old_to_float(r.get("document_total"))
+    return [StoreDocTypeDaily(date=d, document_type=dt, n_orders=int(a["n"]), total_amount=round(a["total"], 2),
+                              avg_ticket=round(a["total"] / a["n"], 2))
+            for (d, dt), a in sorted(key_agg.items())]
+
+
+def _legacy(rows: List[Dict[str, Any]]) -> tuple:
+    return len(rows), _old_timeseries(rows), _old_employees(rows), _old_doc_types(rows)
+
+
+# ---------------- dados ----------------
+def _events(n: int, rnd: random.Random) -> List[Dict[str, Any]]:
+    start = NOW - timedelta(days=90)
+    step = (NOW - start) / n
+    out = []
+    for i in range(n):
+        emp = rnd.randint(0, 15)  # 0 = sem funcionário
+        at = (start + step * i).strftime("%Y-%m-%dT%H:%M:%S" if i % 10 == 0 else "%Y-%m-%d %H:%M:%S")
+        total = rnd.uniform(2, 300)
+        out.append({
+            "id": i, "event_type": "document_created" if rnd.random() < 0.9 else "document_printed",
+            "document_creation_date": at, "employee_id": emp, "employee_name": f"Loja E{emp}",
+            "document_type": rnd.choice(("FR", "FS", "NC", "")),
+            "document_total": round(total, 2) if i % 7 == 0 else f"{total:.2f}".replace(".", ","),
+        })
+    return out
+
+
+def _best(fn, runs: int) -> tuple[float, Any]:
+    best, out = float("inf"), None
+    for _ in range(runs):
+        mappers._iso_day.cache_clear()  # o memo não passa de uma corrida para a outra
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--events", default="100000,1000000")
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    has_np = mappers._HAS_NUMPY
+    print(f"NumPy: {'sim' if has_np else 'não instalado'}")
+    print(f"{'eventos':>8}  {'antes':>9}  {'python':>9}  {'numpy':>9}")
+    for n in (int(x) for x in args.events.split(",")):
+        rows = _events(n, random.Random(3))
+        before, old = _best(lambda: _legacy(rows), args.runs)
+
+        mappers._HAS_NUMPY = False
+        py_ms, py = _best(lambda: mappers.aggregate_events(rows), args.runs)
+        assert repr(py) == repr(old), n
+        np_col = "-"
+        if has_np:
+            mappers._HAS_NUMPY, limit, mappers.NUMPY_MIN_ROWS = True, mappers.NUMPY_MIN_ROWS, 0
+            np_ms, vec = _best(lambda: mappers.aggregate_events(rows), args.runs)
+            mappers.NUMPY_MIN_ROWS = limit
+            assert repr(vec) == repr(old), n
+            np_col = f"{np_ms:7.0f}ms"
+        mappers._HAS_NUMPY = has_np
+        print(f"{n:>8}  {before:7.0f}ms  {py_ms:7.0f}ms  {np_col:>9}")
+    print("  resultado igual ao cálculo antigo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_store_metrics.py
+"""
+/kpi/reports/employees/store-metrics: agregar a lista crua de eventos do
+frontInvoiceAudit em cada pedido (antes) vs ler store_audit_daily mantido
+pelo job kpi.sync_store_audit.
+
+    python -m benchmarks.bench_store_metrics [--events 20000,200000] [--ticks 12]
+
+O frontInvoiceAudit é simulado em memória (eventos ao longo de 90 dias,
+~10% que não são document_created). "Antes" mede só o json.loads da
+resposta e as funções to_* anteriores (as cópias de
+bench_store_aggregation); a ida ao upstream fica de fora. Depois da carga
+inicial correm --ticks syncs incrementais com eventos novos, e no fim
+compara-se o resultado com o cálculo antigo: since por omissão, um dia
+inteiro e um since a meio do dia.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+_fd, _DB = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.bootstrap import init_sqlite_pragmas  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.domains.kpi.store.mappers import parse_creation_dt  # noqa: E402
+from app.services.commands.kpi import sync_store_audit  # noqa: E402
+from app.services.queries.kpi.store_metrics_query_service import StoreMetricsQueryService, normalize_since  # noqa: E402
+from benchmarks.bench_store_aggregation import _legacy as _legacy_aggregate  # noqa: E402
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+class FakeAudit:
+    events: list[dict] = []
+
+    async def fetch_events(self, *, since_iso=None):
+        return [e for e in FakeAudit.events if e["document_creation_date"] >= since_iso.replace("T", " ")]
+
+
+def _event(i: int, at: datetime, rnd: random.Random) -> dict:
+    emp = rnd.randint(1, 15)
+    return {
+        "id": i, "event_type": "document_created" if rnd.random() < 0.9 else "document_printed",
+        "document_creation_date": at.strftime("%Y-%m-%d %H:%M:%S"), "employee_id": emp,
+        "employee_name": f"Loja E{emp}", "document_type": rnd.choice(("FR", "FS", "NC")),
+        "document_total": f"{rnd.uniform(2, 300):.2f}".replace(".", ","),
+    }
+
+
+def _legacy(events: list[dict], since: str) -> dict:
+    rows = [e for e in json.loads(json.dumps(events)) if e["document_creation_date"] >= since.replace("T", " ")]
+    count, ts, emps, docs = _legacy_aggregate(rows)
+    return {"count_events": count, "timeseries_daily": ts, "employees": emps, "doc_type_daily": docs}
+
+
+def _same(a: dict, b: dict) -> bool:
+    def norm(x):
+        return {k: [repr(i) for i in v] if isinstance(v, list) else v for k, v in x.items() if k != "since"}
+    return norm(a) == norm(b)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--events", default="20000,200000")
+    ap.add_argument("--ticks", type=int, default=12)
+    args = ap.parse_args()
+    sync_store_audit.FrontInvoiceAuditClient = FakeAudit
+
+    try:
+        init_sqlite_pragmas(engine)
+        print(f"{'eventos':>8}  {'antes':>9}  {'depois':>8}  {'sync inicial':>12}  {'sync incr.':>10}")
+        for n in (int(x) for x in args.events.split(",")):
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            rnd = random.Random(9)
+            start = NOW - timedelta(days=90)
+            step = (NOW - timedelta(hours=2) - start) / n
+            FakeAudit.events = [_event(i, start + step * i, rnd) for i in range(n)]
+
+            t0 = time.perf_counter()
+            asyncio.run(sync_store_audit.run(SessionLocal))
+            initial = (time.perf_counter() - t0) * 1000
+            incr = []
+            for k in range(args.ticks):
+                base = len(FakeAudit.events)
+                at = NOW - timedelta(hours=2) + timedelta(minutes=5 * k)
+                FakeAudit.events += [_event(base + j, at + timedelta(seconds=j), rnd) for j in range(20)]
+                t0 = time.perf_counter()
+                asyncio.run(sync_store_audit.run(SessionLocal))
+                incr.append((time.perf_counter() - t0) * 1000)
+
+            since = normalize_since(None)
+            t0 = time.perf_counter()
+            old = _legacy(FakeAudit.events, since)
+            before = (time.perf_counter() - t0) * 1000
+            db = SessionLocal()
+            svc = StoreMetricsQueryService(db)
+            t0 = time.perf_counter()
+            for _ in range(10):
+                new = svc.instore_metrics()
+            after = (time.perf_counter() - t0) * 100
+
+            mid = (parse_creation_dt(since) - timedelta(days=3, hours=-13, minutes=-7)).strftime("%Y-%m-%dT%H:%M:%S")
+            for s in (None, since[:10], mid):
+                assert _same(_legacy(FakeAudit.events, normalize_since(s)), svc.instore_metrics(since=s)), s
+            assert _same(old, new)
+            db.close()
+            print(f"{n:>8}  {before:7.1f}ms  {after:6.1f}ms  {initial:10.0f}ms  {sum(incr) / len(incr):8.1f}ms")
+        print("  resultado igual ao cálculo antigo (since por omissão, dia inteiro, a meio do dia)")
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_DB + suffix):
+                os.remove(_DB + suffix)
+
+
+if __name__ == "__main__":
+    main()
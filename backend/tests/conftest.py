@@ -0,0 +1,33 @@
+# tests/conftest.py
+"""
+Corre a partir de backend/:  python -m pytest -q tests
+
+A app lê DATABASE_URL ao importar app.core.db; os testes nunca tocam na
+base de dados de desenvolvimento (cada teste que precisa de SQLite abre a
+sua, em memória, no fixture `db`).
+"""
+from __future__ import annotations
+
+import os
+
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.db import Base  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,143 @@
+# tests/test_compact.py
+"""
+maintenance.compact: agregar e apagar as linhas antigas não pode mudar o
+que os summaries leem, nem apagar a última snapshot de cada entidade, e
+uma segunda execução não faz nada.
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.domains.prestashop.carts.types import AbandonedCart
+from app.domains.prestashop.eol.types import EOLProduct
+from app.domains.prestashop.orders.types import DelayedOrder
+from app.domains.prestashop.pagespeed.types import PageSpeed
+from app.domains.prestashop.payments.types import PaymentMethod
+from app.models.prestashop import (AbandonedCartSnapshot, DelayedOrderSnapshot, EOLProductSnapshot,
+                                   PageSpeedSnapshot, PaymentMethodStatus)
+from app.models.rollups import SnapshotRollup
+from app.models.snapshots import SnapshotInterval, SnapshotObservation
+from app.repos.prestashop.carts_read import CartsReadRepo
+from app.repos.prestashop.carts_write import CartsWriteRepo
+from app.repos.prestashop.eol_read import EOLOutReadRepo
+from app.repos.prestashop.eol_write import EOLOutWriteRepo
+from app.repos.prestashop.orders_read import OrdersReadRepo
+from app.repos.prestashop.orders_write import OrdersWriteRepo
+from app.repos.prestashop.pagespeed_read import PageSpeedReadRepo
+from app.repos.prestashop.pagespeed_write import PageSpeedWriteRepo
+from app.repos.prestashop.payments_read import PaymentsReadRepo
+from app.repos.prestashop.payments_write import PaymentsWriteRepo
+from app.services.commands.maintenance import compact
+from app.shared.status import Status
+
+DAYS = 20
+KEEP = 7
+_ST = (Status.OK, Status.WARNING, Status.CRITICAL)
+
+
+@pytest.fixture
+def retention(monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_ENABLED", True)
+    monkeypatch.setattr(settings, "RETENTION_RAW_DAYS", {s: KEEP for s in (
+        "page_speeds", "payment_method_status", "delayed_orders", "abandoned_carts", "eol_products")})
+    monkeypatch.setattr(settings, "RETENTION_DELETE_CHUNK", 7)  # vários lotes
+    monkeypatch.setattr(settings, "RETENTION_CHUNK_PAUSE_MS", 0)
+    monkeypatch.setattr(settings, "RUNS_BUFFERED", False)
+
+
+def _seed(db, seed: int = 8) -> datetime:
+    rnd = random.Random(seed)
+    today = datetime.now(ZoneInfo(settings.TIMEZONE)).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=DAYS)
+    orders, carts, eol = OrdersWriteRepo(db), CartsWriteRepo(db), EOLOutWriteRepo(db)
+    pays, speeds = PaymentsWriteRepo(db), PageSpeedWriteRepo(db)
+    order_st = {i: rnd.choice(_ST) for i in range(1, 31)}
+    for day in range(DAYS):
+        for hour in (9, 15):
+            at = start + timedelta(days=day, hours=hour)
+            for i in order_st:
+                if rnd.random() < 0.1:
+                    order_st[i] = rnd.choice(_ST)
+            orders.insert_many([
+                DelayedOrder(id_order=i, reference=f"R{i}", date_add=start - timedelta(days=i), days_passed=day + i,
+                             id_state=2, state_name="Pago", dropshipping=i % 3 == 0, status=st)
+                for i, st in order_st.items() if rnd.random() > 0.2
+            ], observed_at=at)
+            carts.insert_many([
+                AbandonedCart(id_cart=c, id_customer=c, hours_stale=hour + c, items=1, status=rnd.choice(_ST[1:]))
+                for c in range(1, 15) if rnd.random() > 0.3
+            ], observed_at=at)
+            # "paypal" deixa de vir a meio; o último estado tem de sobreviver à retenção
+            pays.insert_many([
+                PaymentMethod(method=m, last_payment_at=at - timedelta(hours=1), hours_since_last=1.0 + day,
+                              status=Status.OK)
+                for m in ("card", "mb") + (("paypal",) if day < 5 else ())
+            ], observed_at=at)
+            speeds.insert_many([
+                PageSpeed(page_type="home", url=u, status_code=200, ttfb_ms=rnd.randint(100, 900), total_ms=1000,
+                          html_bytes=1, headers={}, sanity={}, status=Status.OK)
+                for u in ("https://x/", ) + (("https://x/old",) if day < 3 else ())
+            ], observed_at=at)
+        if day % 7 == 0:  # EOL semanal: a última run (dia 14) fica antes do corte
+            eol.insert_many([
+                EOLProduct(id_product=p, name=f"P{p}", reference=f"E{p}", ean13="", upc="", price=Decimal("9.5"),
+                           last_in_stock_at=start, days_since=day + p, status=rnd.choice(_ST))
+                for p in range(1, 12) if p > day // 7 * 3  # saem produtos a cada semana
+            ], observed_at=start + timedelta(days=day, hours=6))
+    db.commit()
+    return start
+
+
+def _reads(db, start: datetime) -> dict:
+    orders, carts, eol = OrdersReadRepo(db), CartsReadRepo(db), EOLOutReadRepo(db)
+    return {
+        "orders_daily": orders.daily_series_since(start),
+        "orders_latest": sorted(orders.latest_by_run(include_ok=True), key=lambda r: r["id_order"]),
+        "carts_daily": carts.daily_series_since(start),
+        "eol_daily": eol.daily_counts_since(start),
+        "eol_counts": eol.counts(),
+        "eol_latest": sorted(eol.latest_by_product(), key=lambda r: r["id_product"]),
+        "payments_latest": sorted(PaymentsReadRepo(db).latest_by_method(), key=lambda r: r["method"]),
+        "pagespeed_latest": PageSpeedReadRepo(db).latest_by_url(),
+    }
+
+
+def _sizes(db) -> dict:
+    tables = (DelayedOrderSnapshot, AbandonedCartSnapshot, EOLProductSnapshot, PaymentMethodStatus,
+              PageSpeedSnapshot, SnapshotInterval, SnapshotObservation)
+    out = {t.__tablename__: db.execute(select(func.count()).select_from(t)).scalar_one() for t in tables}
+    out["rollups"] = db.execute(
+        select(SnapshotRollup.source, SnapshotRollup.bucket_start, SnapshotRollup.key, SnapshotRollup.n,
+               SnapshotRollup.n_distinct, SnapshotRollup.v_sum)
+        .order_by(SnapshotRollup.source, SnapshotRollup.bucket_start, SnapshotRollup.key)
+    ).all()
+    return out
+
+
+@pytest.mark.parametrize("storage", ["full", "delta"])
+def test_compact_keeps_reads_and_is_idempotent(db, retention, monkeypatch, storage):
+    monkeypatch.setattr(settings, "PS_SNAPSHOT_STORAGE", storage)
+    factory = sessionmaker(bind=db.get_bind(), autoflush=False, expire_on_commit=False)
+    start = _seed(db)
+    before, size0 = _reads(db, start), _sizes(db)
+
+    assert compact.run(factory) is True
+    size1 = _sizes(db)
+    assert size1["rollups"], "nada foi agregado"
+    raw = "delayed_orders" if storage == "full" else "snapshot_intervals"
+    assert size1[raw] < size0[raw], "nada foi apagado"
+    after = _reads(db, start)
+    for k in before:
+        assert after[k] == before[k], k
+
+    assert compact.run(factory) is True
+    assert _sizes(db) == size1
+    assert _reads(db, start) == before
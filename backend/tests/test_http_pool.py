@@ -0,0 +1,41 @@
+# tests/test_http_pool.py
+"""A verificação TLS do PrestaShop (PS_VERIFY_SSL) não se estende ao resto do pool."""
+from __future__ import annotations
+
+import asyncio
+
+from app.core.config import settings
+from app.external import http_pool
+from app.external.pda_client import PdaClient
+from app.external.prestashop_client import PrestashopClient
+
+
+def _verifies(client) -> bool:
+    return client._transport._pool._ssl_context.verify_mode.name == "CERT_REQUIRED"
+
+
+def test_ps_verify_ssl_is_scoped_to_prestashop(monkeypatch):
+    monkeypatch.setattr(settings, "PS_VERIFY_SSL", "false")
+
+    async def go():
+        try:
+            ps, pda, shared = PrestashopClient().http, PdaClient().http, http_pool.get_http_client()
+            assert ps is pda and ps is not shared
+            assert not _verifies(ps) and _verifies(shared)
+            assert http_pool.get_http_client(verify=False) is ps
+        finally:
+            await http_pool.close_http_client()
+
+    asyncio.run(go())
+
+
+def test_one_client_when_verification_is_on(monkeypatch):
+    monkeypatch.setattr(settings, "PS_VERIFY_SSL", "true")
+
+    async def go():
+        try:
+            assert PrestashopClient().http is http_pool.get_http_client()
+        finally:
+            await http_pool.close_http_client()
+
+    asyncio.run(go())
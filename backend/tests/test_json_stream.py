@@ -0,0 +1,106 @@
+# tests/test_json_stream.py
+"""JsonArrayStream com o corpo partido em todos os sítios possíveis."""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+
+import pytest
+
+from app.external import json_stream
+from app.external.json_stream import JsonArrayStream, JsonStreamError
+
+DOCS = [
+    {"ok": True, "count": 3, "data": [{"id": 1, "v": 12.5}, {"id": 2, "v": -3}, {"id": 3, "v": 1e3}]},
+    # meta depois dos dados, arrays vazios e um array que não é pedido
+    {"data": [], "extra": [1, 2], "meta": {"page": 1}},
+    {"data": [{"id": 1}], "total": 1200, "next": None},
+    # '},' dentro de strings e de objetos aninhados (o corte em bloco tem de falhar e seguir item a item)
+    {"data": [{"s": "a},{b", "n": {"x": [{"y": 1}, {"z": "},"}]}}, {"s": "\"},\" ç ão €"}, {"e": {}}]},
+    # números e literais colados ao fim do chunk
+    {"data": [1, 22, 333.5, -4e-2, True, False, None, "x", [1, [2]]], "n": 1234567},
+    [{"id": 1, "nome": "José"}, {"id": 2, "nome": "日本"}],
+    [],
+    {},
+]
+
+
+async def _aiter(chunks):
+    for c in chunks:
+        yield c
+
+
+def _run(chunks, arrays=("data",)):
+    async def go():
+        stream = JsonArrayStream(_aiter(chunks), arrays)
+        items = [x async for x in stream]
+        return items, stream.meta
+    return asyncio.run(go())
+
+
+def _expected(doc, arrays=("data",)):
+    if isinstance(doc, list):
+        return [(None, x) for x in doc], {}
+    items = [(k, x) for k, v in doc.items() if k in arrays and isinstance(v, list) for x in v]
+    meta = {k: v for k, v in doc.items() if not (k in arrays and isinstance(v, list))}
+    return items, meta
+
+
+@pytest.mark.parametrize("doc", DOCS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_split_point(doc, indent):
+    body = json.dumps(doc, ensure_ascii=False, indent=indent).encode()
+    want = _expected(doc)
+    assert _run([body]) == want
+    for i in range(len(body) + 1):  # inclui os cortes a meio de um carácter UTF-8
+        assert _run([body[:i], body[i:]]) == want, i
+
+
+@pytest.mark.parametrize("doc", DOCS)
+def test_one_byte_chunks(doc):
+    body = json.dumps(doc, ensure_ascii=False).encode()
+    assert _run([body[i:i + 1] for i in range(len(body))]) == _expected(doc)
+
+
+def test_several_arrays():
+    doc = {"a": [{"x": 1}], "meta": 1, "b": [2, 3], "c": [4]}
+    body = json.dumps(doc).encode()
+    assert _run([body[:9], body[9:]], arrays=("a", "b")) == _expected(doc, ("a", "b"))
+
+
+def test_random_chunks_over_trim_threshold(monkeypatch):
+    # buffer consumido descartado a meio: corpo bem maior do que _TRIM_AT
+    monkeypatch.setattr(json_stream, "_TRIM_AT", 256)
+    rnd = random.Random(24)
+    doc = {"ok": 1, "data": [{"id": i, "name": f"Funcionário {i}", "v": rnd.uniform(-1, 1), "t": [i] * (i % 3)}
+                             for i in range(2000)], "rows": 2000}
+    body = json.dumps(doc, ensure_ascii=False).encode()
+    chunks, i = [], 0
+    while i < len(body):
+        n = rnd.randint(1, 700)
+        chunks.append(body[i:i + n])
+        i += n
+    assert _run(chunks) == _expected(doc)
+
+
+def test_rows_share_keys():
+    body = json.dumps({"data": [{"employee_id": i} for i in range(50)]}).encode()
+    items, _ = _run([body[i:i + 7] for i in range(0, len(body), 7)])
+    keys = {id(next(iter(x))) for _, x in items}
+    assert len(keys) == 1
+
+
+@pytest.mark.parametrize("body", [
+    b"",
+    b"42",
+    b'{"data": [1, 2',
+    b'{"data": [1 2]}',
+    b'{"data": [{"a": 1}}',
+    b'{"data": []} x',
+    b'{1: 2}',
+    b'{"data": [1], "ok": tru',
+])
+def test_malformed(body):
+    with pytest.raises(JsonStreamError):
+        _run([body[:5], body[5:]])
@@ -0,0 +1,19 @@
+# tests/test_pagespeed_targets.py
+from __future__ import annotations
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.services.commands.prestashop.ingest_pagespeed import pagespeed_targets
+
+
+def test_long_group_names_are_rejected():
+    with pytest.raises(ValidationError, match="1-16 chars"):
+        Settings(PS_PAGESPEED_URLS={"category_landing_a": ["https://x/a"], "category_landing_b": ["https://x/b"]})
+
+
+def test_group_names_are_kept_whole(monkeypatch):
+    monkeypatch.setattr(settings, "PS_PAGESPEED_URLS", {"sixteen_chars_ok": ["https://x/a", "https://x/a"],
+                                                        "home": ["https://x/"]})
+    assert pagespeed_targets() == [("sixteen_chars_ok", "https://x/a"), ("home", "https://x/")]
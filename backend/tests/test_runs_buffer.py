@@ -0,0 +1,85 @@
+# tests/test_runs_buffer.py
+"""RUNS_BUFFERED: a run só chega ao RUN_BUFFER se a transação do job fizer commit."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.prestashop import DelayedOrderSnapshot
+from app.repos.runs.buffer import RUN_BUFFER
+from app.repos.runs.write import RunsWriteRepo
+from app.services.commands.prestashop import ingest_orders_delayed
+
+
+class FakeClient:
+    async def iter_delayed_orders(self):
+        at = (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d %H:%M:%S")
+        for i in range(5):
+            yield {"id_order": i, "reference": f"R{i}", "date_add": at, "days_passed": 3,
+                   "id_state": 2, "state_name": "Pago", "dropshipping": False}
+
+
+@pytest.fixture
+def buffered(monkeypatch):
+    monkeypatch.setattr(settings, "RUNS_BUFFERED", True)
+    monkeypatch.setattr(settings, "PS_SNAPSHOT_STORAGE", "full")
+    monkeypatch.setattr(ingest_orders_delayed, "PrestashopClient", FakeClient)
+    RUN_BUFFER.drain()
+    yield
+    RUN_BUFFER.drain()
+
+
+def _factory(db, fail_commits: int = 0):
+    make = sessionmaker(bind=db.get_bind(), autoflush=False, expire_on_commit=False)
+    left = [fail_commits]
+
+    def factory():
+        s = make()
+
+        @event.listens_for(s, "before_commit")
+        def _locked(session):
+            if left[0] > 0:
+                left[0] -= 1
+                raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+        return s
+    return factory
+
+
+def test_failed_commit_leaves_only_the_error_run(db, buffered):
+    assert asyncio.run(ingest_orders_delayed.run(_factory(db, fail_commits=1))) is False
+
+    rows = RUN_BUFFER.drain()
+    assert [(r["check_name"], r["status"]) for r in rows] == [(ingest_orders_delayed.CHECK_NAME, "error")]
+    assert "locked" in rows[0]["payload_json"]["error"]
+    assert db.execute(select(func.count()).select_from(DelayedOrderSnapshot)).scalar_one() == 0
+
+
+def test_run_reaches_the_buffer_only_after_commit(db, buffered):
+    s = _factory(db)()
+    RunsWriteRepo(s).record_run("x", "ok", 1, None)
+    assert len(RUN_BUFFER) == 0
+    s.commit()
+    assert [r["check_name"] for r in RUN_BUFFER.drain()] == ["x"]
+
+    RunsWriteRepo(s).record_run("y", "ok", 1, None)
+    s.rollback()
+    s.commit()
+    assert len(RUN_BUFFER) == 0
+
+    RunsWriteRepo(s).record_run("z", "ok", 1, None)
+    s.close()  # sem commit
+    s.commit()
+    assert len(RUN_BUFFER) == 0
+
+
+def test_successful_job_buffers_one_ok_run(db, buffered):
+    assert asyncio.run(ingest_orders_delayed.run(_factory(db))) is True
+    assert [r["status"] for r in RUN_BUFFER.drain()] == ["ok"]
+    assert db.execute(select(func.count()).select_from(DelayedOrderSnapshot)).scalar_one() == 5
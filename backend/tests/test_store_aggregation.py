@@ -0,0 +1,98 @@
+# tests/test_store_aggregation.py
+"""
+aggregate_events (Python e NumPy) e from_daily contra as funções to_*
+anteriores (cópias em benchmarks.bench_store_aggregation).
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import asdict
+
+import pytest
+
+from app.domains.kpi.store import mappers
+from benchmarks.bench_store_aggregation import _events, _legacy
+
+# datas que o caminho rápido não reconhece, sem data, e funcionários sem id
+_ODD = [
+    {"event_type": "document_created", "document_creation_date": "", "employee_id": 3,
+     "employee_name": "Loja E3", "document_type": "FR", "document_total": "10,50"},
+    {"event_type": "document_created", "document_creation_date": None, "employee_id": 0,
+     "employee_name": "", "document_type": "FS", "document_total": 4},
+    {"event_type": "document_created", "document_creation_date": "2025-11-31 10:00:00", "employee_id": 3,
+     "employee_name": " Loja E3 ", "document_type": " ", "document_total": "x"},
+    {"event_type": "document_created", "document_creation_date": "21/11/2025", "employee_id": 99,
+     "employee_name": "", "document_type": "NC", "document_total": "2.5"},
+    {"event_type": "document_created", "document_creation_date": "2025-1-5T9:05:07", "employee_id": 5,
+     "employee_name": "Loja E5", "document_type": "FR", "document_total": 1},
+    {"event_type": "document_printed", "document_creation_date": "", "employee_id": 5,
+     "employee_name": "Loja E5", "document_type": "FR", "document_total": 100},
+]
+
+
+def _rows(n: int, seed: int = 3) -> list[dict]:
+    rows = _events(n, random.Random(seed)) if n else []
+    for i, r in enumerate(_ODD):
+        rows.insert(i * 7 % (len(rows) + 1), dict(r))
+    return rows
+
+
+@pytest.fixture(params=["python", "numpy"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        if not mappers._HAS_NUMPY:
+            pytest.skip("NumPy não instalado")
+        monkeypatch.setattr(mappers, "NUMPY_MIN_ROWS", 0)
+    else:
+        monkeypatch.setattr(mappers, "_HAS_NUMPY", False)
+    return request.param
+
+
+@pytest.mark.parametrize("n", [0, 1, 500, 5000])
+def test_aggregate_events_matches_legacy(engine, n):
+    rows = _rows(n)
+    assert repr(mappers.aggregate_events(rows)) == repr(_legacy(rows))
+
+
+def test_aggregate_events_without_created_events(engine):
+    rows = [dict(r, event_type="document_printed") for r in _rows(50)]
+    assert mappers.aggregate_events(rows) == (len(rows), [], [], [])
+
+
+def test_aggregate_events_accepts_iterators(engine):
+    rows = _rows(300)
+    assert repr(mappers.aggregate_events(iter(rows))) == repr(_legacy(rows))
+
+
+def _close(a, b) -> None:
+    # somar por dia e depois por funcionário muda a ordem das somas: os totais batem a ±0.01
+    assert a[0] == b[0]
+    for xs, ys in zip(a[1:], b[1:]):
+        assert len(xs) == len(ys)
+        for x, y in zip(xs, ys):
+            dx, dy = asdict(x), asdict(y)
+            for k, v in dx.items():
+                if isinstance(v, float):
+                    assert v == pytest.approx(dy[k], abs=0.011), (k, x, y)
+                else:
+                    assert v == dy[k], (k, x, y)
+
+
+@pytest.mark.parametrize("n", [0, 500, 5000])
+def test_from_daily_matches_legacy(n):
+    rows = _rows(n)
+    _close(mappers.from_daily(mappers.fold_daily(rows)), _legacy(rows))
+
+
+def test_from_daily_counts_undated_events_per_employee():
+    rows = [
+        {"event_type": "document_created", "document_creation_date": "", "employee_id": 7,
+         "employee_name": "Loja E7", "document_type": "FR", "document_total": "5"},
+        {"event_type": "document_created", "document_creation_date": "2025-11-20 10:00:00", "employee_id": 7,
+         "employee_name": "Loja E7", "document_type": "FR", "document_total": "3"},
+    ]
+    count, ts, emps, docs = mappers.from_daily(mappers.fold_daily(rows))
+    assert count == 2
+    assert [(b.bucket, b.n_orders) for b in ts] == [("2025-11-20", 1)]
+    assert [(e.employee_id, e.n_orders, e.total_amount) for e in emps] == [(7, 2, 8.0)]
+    assert len(docs) == 1
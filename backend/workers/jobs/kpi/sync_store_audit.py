@@ -0,0 +1,5 @@
+# workers/jobs/kpi/sync_store_audit.py
+
+async def run(db_session_factory):
+    from app.services.commands.kpi.sync_store_audit import run as usecase_run
+    return await usecase_run(db_session_factory)
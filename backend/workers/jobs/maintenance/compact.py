@@ -0,0 +1,6 @@
+# workers/jobs/maintenance/compact.py
+
+def run(db_session_factory):
+    # síncrono: o AsyncIOScheduler corre-o no thread pool, fora do event loop
+    from app.services.commands.maintenance.compact import run as usecase_run
+    return usecase_run(db_session_factory)
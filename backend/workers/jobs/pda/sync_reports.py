@@ -0,0 +1,5 @@
+# workers/jobs/pda/sync_reports.py
+
+async def run(db_session_factory, full: bool = False):
+    from app.services.commands.pda.sync_reports import run as usecase_run
+    return await usecase_run(db_session_factory, full=full)
@@ -1,3 +1,3 @@
-def run(db_session_factory):
+async def run(db_session_factory):
     from app.services.commands.prestashop.ingest_eol import run as usecase_run
-    usecase_run(db_session_factory)
\ No newline at end of file
+    await usecase_run(db_session_factory)
\ No newline at end of file
@@ -0,0 +1,6 @@
+# workers/jobs/runs/flush.py
+
+def run(db_session_factory):
+    # síncrono: o AsyncIOScheduler corre-o no thread pool, fora do event loop
+    from app.services.commands.runs.flush import run as usecase_run
+    return usecase_run(db_session_factory)
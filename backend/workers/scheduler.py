@@ -1,5 +1,6 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from pytz import timezone
 
 TZ = timezone("Europe/Lisbon")
@@ -13,6 +14,11 @@ def register_jobs(sched: AsyncIOScheduler, db_session_factory):
     from workers.jobs.prestashop.prestashop_pagespeed import run as ps_pagespeed_run
     from workers.jobs.prestashop.prestashop_carts_stale import run as ps_carts_run
     from workers.jobs.patife.healthz import run as pt_healthz_run
+    from workers.jobs.pda.sync_reports import run as pda_sync_run
+    from workers.jobs.kpi.sync_store_audit import run as kpi_store_audit_run
+    from workers.jobs.maintenance.compact import run as mt_compact_run
+    from workers.jobs.runs.flush import run as runs_flush_run
+    from app.core.config import settings
 
     common = dict(
         replace_existing=True,
@@ -67,3 +73,45 @@ def register_jobs(sched: AsyncIOScheduler, db_session_factory):
         id="patife.healthz",
         **common,
     )
+
+    # pda: cópia local incremental a cada 5 min no segundo 25; completa (apaga removidos) 1x dia às 04:50:50
+    sched.add_job(
+        pda_sync_run,
+        CronTrigger(minute="*/5", second=25, timezone=TZ),
+        id="pda.sync_reports",
+        **common,
+    )
+    sched.add_job(
+        pda_sync_run,
+        CronTrigger(hour=4, minute=50, second=50, timezone=TZ),
+        id="pda.sync_reports.full",
+        **{**common, "kwargs": {**common["kwargs"], "full": True}},
+    )
+
+    # KPI
+    # eventos da loja (frontInvoiceAudit) a cada 5 min no segundo 35
+    sched.add_job(
+        kpi_store_audit_run,
+        CronTrigger(minute="*/5", second=35, timezone=TZ),
+        id="kpi.sync_store_audit",
+        **common,
+    )
+
+    # Runs
+    # com RUNS_BUFFERED as runs ficam em memória e são gravadas em lote a cada N s (e no shutdown)
+    if settings.RUNS_BUFFERED:
+        sched.add_job(
+            runs_flush_run,
+            IntervalTrigger(seconds=max(1, settings.RUNS_FLUSH_INTERVAL_S), timezone=TZ),
+            id="runs.flush",
+            **common,
+        )
+
+    # Manutenção
+    # retenção/compactação 1x dia às 04:40:40 (depois do EOL de segunda às 04:10)
+    sched.add_job(
+        mt_compact_run,
+        CronTrigger(hour=4, minute=40, second=40, timezone=TZ),
+        id="maintenance.compact",
+        **common,
+    )
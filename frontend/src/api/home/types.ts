@@ -42,6 +42,11 @@ export interface PagespeedBucket {
   p95_ttfb_ms: number;
   last_status: PagespeedStatus;
 }
+export interface PagespeedGroup extends PagespeedBucket {
+  urls: number;
+  samples: number;
+  worst_urls: { url: string; p95_ttfb_ms: number; samples: number }[];
+}
 export interface PagespeedSeriesPoint {
   ts: string;
   home_ttfb_ms?: number;
@@ -50,6 +55,7 @@ export interface PagespeedSeriesPoint {
 export interface PagespeedKpi {
   home: PagespeedBucket;
   product: PagespeedBucket;
+  groups?: Record<string, PagespeedGroup>;
   series: PagespeedSeriesPoint[];
 }
 
@@ -1,7 +1,7 @@
 // src/api/system/service.ts
 import { HttpClient } from "@/lib/http-client";
 import { Endpoints } from "@/constants/endpoints";
-import type { HealthzResponse, RunsReponse } from "./types";
+import type { HealthzResponse, RunsReponse, StreamTicketResponse } from "./types";
 import { http as defaultHttp } from "@/lib/http";
 
 export class SystemService {
@@ -17,4 +17,9 @@ export class SystemService {
     };
     return this.http.get<RunsReponse>(Endpoints.RUNS, { params });
   }
+
+  // ticket de uso único para o EventSource do /stream (não leva headers)
+  getStreamTicket() {
+    return this.http.post<StreamTicketResponse>(Endpoints.STREAM_TICKET);
+  }
 }
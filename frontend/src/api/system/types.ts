@@ -27,3 +27,8 @@ export interface RunsReponse {
   count: number;
   runs: Run[];
 }
+
+export interface StreamTicketResponse {
+  ticket: string;
+  expires_in: number;
+}
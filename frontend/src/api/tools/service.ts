@@ -8,7 +8,13 @@ export class ToolsService {
 
   // Pda
   // - Reports
-  getPdaReports(params: { page: number; page_size: number }) {
+  getPdaReports(params: {
+    page: number;
+    page_size: number;
+    cursor?: string;
+    state?: string;
+    code?: string;
+  }) {
     return this.http.get<PdaReportsResponse>(Endpoints.PDA_REPORT, { params });
   }
 
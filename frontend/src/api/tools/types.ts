@@ -6,13 +6,14 @@ export interface Pagination {
   total: number; // <-- era 12
   has_next: boolean;
   has_prev: boolean;
+  next_cursor?: string | null; // keyset (/tools/pda): passar como `cursor` na página seguinte
 }
 
 // Pda
 export interface PdaReport {
   id: number;
   code: string;
-  context_json: string;
+  context_json: string | null;
   error_text: string;
   stack_text: string;
   log_mode: string;
@@ -21,6 +21,11 @@ export const Endpoints = Object.freeze({
   // --------------------------------
   HOME_SUMMARY: import.meta.env.VITE_API_HOME_SUMMARY || "/home/summary",
   // --------------------------------
+  // ------- Stream (SSE) -----------
+  // --------------------------------
+  STREAM: import.meta.env.VITE_API_STREAM || "/stream",
+  STREAM_TICKET: import.meta.env.VITE_API_STREAM_TICKET || "/stream/ticket",
+  // --------------------------------
   // ------- System Endpoints -------
   // --------------------------------
   AUTH_LOGIN: import.meta.env.VITE_API_AUTH_LOGIN || "/auth/login",
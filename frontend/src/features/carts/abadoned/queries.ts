@@ -1,4 +1,5 @@
 import { useQuery } from "@tanstack/react-query";
+import { liveInterval, liveStaleTime } from "@/lib/live-updates";
 import { prestashopClient } from "@/api/prestashop";
 
 export function useAbandonedCarts() {
@@ -10,7 +11,7 @@ export function useAbandonedCarts() {
       const elapsedMs = Math.max(0, performance.now() - started);
       return { ...data, elapsedMs };
     },
-    refetchInterval: 60_000,
-    staleTime: 55_000,
+    refetchInterval: liveInterval(60_000),
+    staleTime: liveStaleTime(55_000),
   });
 }
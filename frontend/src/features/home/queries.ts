@@ -3,6 +3,7 @@ import { useMemo } from "react";
 import { useQuery, keepPreviousData } from "@tanstack/react-query";
 import { homeClient } from "@/api/home";
 import type { HomeSummary } from "@/api/home";
+import { liveInterval } from "@/lib/live-updates";
 
 function defaultRefetchInterval(window: string) {
   const w = window.toLowerCase();
@@ -10,7 +11,7 @@ function defaultRefetchInterval(window: string) {
 }
 
 export function useHomeSummary(window: string) {
-  const refetchEvery = useMemo(() => defaultRefetchInterval(window), [window]);
+  const refetchEvery = useMemo(() => liveInterval(defaultRefetchInterval(window)), [window]);
 
   return useQuery<HomeSummary>({
     queryKey: ["home", "summary", window],
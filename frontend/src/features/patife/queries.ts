@@ -1,6 +1,7 @@
 // features/patife/queries.ts
 
 import { useQuery } from "@tanstack/react-query";
+import { liveInterval, liveStaleTime } from "@/lib/live-updates";
 import { toolsClient } from "@/api/tools";
 
 export function usePatifeHealthz(params: { page: number; page_size: number }) {
@@ -12,7 +13,7 @@ export function usePatifeHealthz(params: { page: number; page_size: number }) {
       const elapsedMs = Math.max(0, performance.now() - started);
       return { ...data, elapsedMs };
     },
-    refetchInterval: 60_000,
-    staleTime: 55_000,
+    refetchInterval: liveInterval(60_000),
+    staleTime: liveStaleTime(55_000),
   });
 }
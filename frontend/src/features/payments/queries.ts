@@ -1,6 +1,7 @@
 // features/payments/queries.ts
 
 import { useQuery } from "@tanstack/react-query";
+import { liveInterval, liveStaleTime } from "@/lib/live-updates";
 import { prestashopClient } from "@/api/prestashop";
 
 export function usePayments() {
@@ -12,7 +13,7 @@ export function usePayments() {
       const elapsedMs = Math.max(0, performance.now() - started);
       return { ...data, elapsedMs };
     },
-    refetchInterval: 60_000,
-    staleTime: 55_000,
+    refetchInterval: liveInterval(60_000),
+    staleTime: liveStaleTime(55_000),
   });
 }
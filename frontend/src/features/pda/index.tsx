@@ -36,6 +36,9 @@ export default function PdaPage() {
   // Paginação servidor
   const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState<10 | 25 | 50>(25);
+  // cursores keyset já vistos: cursors[p - 1] abre a página p (a 1 não tem)
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined]);
+  const [stateFilter, setStateFilter] = useState<"all" | string>("all");
   const scrollRef = useRef<HTMLDivElement | null>(null);
   const scrollTop = () =>
     scrollRef.current?.scrollTo({ top: 0, behavior: "smooth" });
@@ -43,6 +46,8 @@ export default function PdaPage() {
   const { data, isFetching, isError, refetch } = usePdaReports({
     page,
     page_size: pageSize,
+    cursor: cursors[page - 1],
+    state: stateFilter === "all" ? undefined : stateFilter,
   }) as {
     data?: PdaReportsResponse & { elapsedMs?: number };
     isFetching: boolean;
@@ -66,7 +71,6 @@ export default function PdaPage() {
 
   // Filtros
   const [q, setQ] = useState("");
-  const [stateFilter, setStateFilter] = useState<"all" | string>("all");
   const [logModeFilter, setLogModeFilter] = useState<"all" | string>("all");
 
   // Dados
@@ -75,6 +79,20 @@ export default function PdaPage() {
     ? data?.meta[0] ?? null
     : data?.meta ?? null;
 
+  // Paginação: guarda o next_cursor ao avançar; mudar tamanho/estado recomeça
+  const goToPage = (p: number) => {
+    if (p === page + 1 && meta?.next_cursor) {
+      const next = cursors.slice(0, page);
+      next[page] = meta.next_cursor;
+      setCursors(next);
+    }
+    setPage(p);
+  };
+  const resetPaging = () => {
+    setCursors([undefined]);
+    setPage(1);
+  };
+
   // Última atualização
   const lastUpdated = useMemo(() => {
     let max = 0;
@@ -96,27 +114,24 @@ export default function PdaPage() {
             r.error_text?.toLowerCase().includes(text)
           : true
       )
-      .filter((r) =>
-        stateFilter === "all"
-          ? true
-          : (r.state ?? "").toLowerCase() === stateFilter.toLowerCase()
-      )
       .filter((r) =>
         logModeFilter === "all"
           ? true
           : (r.log_mode ?? "").toLowerCase() === logModeFilter.toLowerCase()
       )
       .sort((a, b) => Date.parse(b.date_updated) - Date.parse(a.date_updated));
-  }, [reports, q, stateFilter, logModeFilter]);
+  }, [reports, q, logModeFilter]);
 
   // Estados únicos para filtros
   const uniqueStates = useMemo(() => {
     const set = new Set<string>();
     for (const r of reports) {
-      if (r.state) set.add(r.state.toLowerCase());
+      if (r.state) set.add(r.state);
     }
+    // filtro no servidor: a página só traz o estado escolhido, mantém-no na lista
+    if (stateFilter !== "all") set.add(stateFilter);
     return Array.from(set).sort();
-  }, [reports]);
+  }, [reports, stateFilter]);
 
   const uniqueLogModes = useMemo(() => {
     const set = new Set<string>();
@@ -166,6 +181,7 @@ export default function PdaPage() {
                   setQ("");
                   setStateFilter("all");
                   setLogModeFilter("all");
+                  resetPaging();
                 }}
               >
                 Limpar filtros
@@ -205,7 +221,13 @@ export default function PdaPage() {
           </div>
 
           {/* Estado */}
-          <Select value={stateFilter} onValueChange={(v) => setStateFilter(v)}>
+          <Select
+            value={stateFilter}
+            onValueChange={(v) => {
+              setStateFilter(v);
+              resetPaging();
+            }}
+          >
             <SelectTrigger className="w-full">
               <SelectValue placeholder="Estado" />
             </SelectTrigger>
@@ -245,8 +267,11 @@ export default function PdaPage() {
         pageSize={pageSize}
         meta={meta}
         currentItemsCount={reports.length}
-        onPageChange={setPage}
-        onPageSizeChange={setPageSize}
+        onPageChange={goToPage}
+        onPageSizeChange={(size) => {
+          setPageSize(size);
+          setCursors([undefined]);
+        }}
         onScrollTop={scrollTop}
       />
 
@@ -265,8 +290,11 @@ export default function PdaPage() {
         pageSize={pageSize}
         meta={meta}
         currentItemsCount={reports.length}
-        onPageChange={setPage}
-        onPageSizeChange={setPageSize}
+        onPageChange={goToPage}
+        onPageSizeChange={(size) => {
+          setPageSize(size);
+          setCursors([undefined]);
+        }}
         onScrollTop={scrollTop}
       />
     </div>
@@ -3,9 +3,14 @@
 import { useQuery } from "@tanstack/react-query";
 import { toolsClient } from "@/api/tools";
 
-export function usePdaReports(params: { page: number; page_size: number }) {
+export function usePdaReports(params: {
+  page: number;
+  page_size: number;
+  cursor?: string;
+  state?: string;
+}) {
   return useQuery({
-    queryKey: ["pda", "reports", params.page, params.page_size],
+    queryKey: ["pda", "reports", params.page, params.page_size, params.cursor ?? null, params.state ?? null],
     queryFn: async () => {
       const started = performance.now();
       const data = await toolsClient.getPdaReports(params);
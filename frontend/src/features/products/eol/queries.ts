@@ -2,6 +2,7 @@
 
 import {useQuery} from "@tanstack/react-query";
 import {prestashopClient} from "@/api/prestashop";
+import {liveInterval, liveStaleTime} from "@/lib/live-updates";
 
 export function useProductsEol() {
     return useQuery({
@@ -12,7 +13,7 @@ export function useProductsEol() {
             const elapsedMs = Math.max(0, performance.now() - started);
             return {...data, elapsedMs}
         },
-        refetchInterval: 60_000,
-        staleTime: 55_000
+        refetchInterval: liveInterval(60_000),
+        staleTime: liveStaleTime(55_000)
     })
 }
\ No newline at end of file
@@ -1,6 +1,7 @@
 //features/system/runs/queries.ts
 
 import { useQuery } from "@tanstack/react-query";
+import { liveInterval, liveStaleTime } from "@/lib/live-updates";
 import { systemClient } from "@/api/system";
 
 export function useSystemRuns() {
@@ -12,7 +13,7 @@ export function useSystemRuns() {
       const elapsedMs = Math.max(0, performance.now() - started);
       return { ...data, elapsedMs };
     },
-    refetchInterval: 60_000,
-    staleTime: 55_000,
+    refetchInterval: liveInterval(60_000),
+    staleTime: liveStaleTime(55_000),
   });
 }
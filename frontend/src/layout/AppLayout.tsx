@@ -3,10 +3,12 @@ import { Outlet } from "react-router-dom";
 import Topbar from "./Topbar";
 import Sidebar from "./Sidebar";
 import Footer from "./Footer";
+import { useLiveUpdates } from "@/lib/live-updates";
 
 const STORAGE_KEY = "sidebar_mini_v1";
 
 const AppLayout: React.FC = () => {
+  useLiveUpdates();
   const [mini, setMini] = useState<boolean>(() => {
     return localStorage.getItem(STORAGE_KEY) === "1";
   });
@@ -0,0 +1,144 @@
+// src/lib/live-updates.ts
+// Stream SSE do backend (/stream): cada snapshot/run nova chega como evento
+// `check` e invalida só as queries desse check. Com o stream aberto as
+// queries deixam de fazer polling; se cair, voltam ao intervalo normal.
+import { useEffect, useSyncExternalStore } from "react";
+import { useQueryClient, type QueryKey } from "@tanstack/react-query";
+import { Endpoints } from "@/constants/endpoints";
+import { systemClient } from "@/api/system";
+import { authStore } from "./auth-store";
+
+export type CheckEvent = {
+  kind: "snapshot" | "run";
+  check_name: string;
+  observed_at: string;
+  status: string;
+  row_count: number | null;
+};
+
+// check_name -> queries afetadas (prefixos de queryKey)
+const CHECK_QUERIES: Record<string, QueryKey[]> = {
+  "prestashop.payments": [["payments"]],
+  "prestashop.orders_delayed": [["orders", "delayed"]],
+  "prestashop.carts_stale": [["carts", "abandoned"]],
+  "prestashop.eol_products": [["products", "eol"]],
+  "prestashop.pagespeed": [["pages", "speed"]],
+  "patife.ingest_healthz": [["patife"]],
+};
+
+// ---- estado da ligação (partilhado pelas queries) ----
+type Listener = (connected: boolean) => void;
+let _connected = false;
+const listeners = new Set<Listener>();
+
+function setConnected(v: boolean) {
+  if (_connected === v) return;
+  _connected = v;
+  listeners.forEach((fn) => fn(v));
+}
+
+export const liveStore = {
+  get: () => _connected,
+  subscribe: (fn: Listener) => {
+    listeners.add(fn);
+    return () => listeners.delete(fn);
+  },
+};
+
+export function useLiveConnected() {
+  return useSyncExternalStore(liveStore.subscribe, liveStore.get, liveStore.get);
+}
+
+// refetchInterval/staleTime: sem polling enquanto o stream estiver aberto
+export function liveInterval(fallbackMs: number) {
+  return () => (_connected ? false : fallbackMs);
+}
+
+export function liveStaleTime(fallbackMs: number) {
+  return () => (_connected ? Infinity : fallbackMs);
+}
+
+export function queriesForEvent(e: CheckEvent): QueryKey[] {
+  const keys: QueryKey[] = [...(CHECK_QUERIES[e.check_name] ?? [])];
+  if (e.kind === "run") keys.push(["system", "runs"]);
+  keys.push(["home"]); // o resumo agrega todos os checks
+  return keys;
+}
+
+// o EventSource não envia headers: a query string leva um ticket de uso único
+// (POST /stream/ticket com o JWT no header) e não o token de acesso
+async function streamUrl() {
+  const { ticket } = await systemClient.getStreamTicket();
+  const url = new URL(`${Endpoints.BASE_URL}${Endpoints.STREAM}`);
+  url.searchParams.set("ticket", ticket);
+  return url.toString();
+}
+
+const RECONNECT_MS = 5000;
+
+/** Abre o EventSource (um por tab) enquanto houver token. Usar no layout autenticado. */
+export function useLiveUpdates() {
+  const qc = useQueryClient();
+  const token = useSyncExternalStore(authStore.subscribe, authStore.get, authStore.get);
+
+  useEffect(() => {
+    if (!token || typeof EventSource === "undefined") return;
+
+    let es: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+    let dropped = false;
+
+    const reconnect = () => {
+      dropped = true;
+      setConnected(false);
+      if (!closed) retry = setTimeout(connect, RECONNECT_MS);
+    };
+
+    async function connect() {
+      let url: string;
+      try {
+        url = await streamUrl();
+      } catch {
+        reconnect();
+        return;
+      }
+      if (closed) return;
+      es = new EventSource(url);
+
+      es.addEventListener("ready", () => {
+        // reconexão: podemos ter perdido eventos enquanto estivemos fora
+        if (dropped) qc.invalidateQueries();
+        dropped = false;
+        setConnected(true);
+      });
+
+      es.addEventListener("check", (msg) => {
+        let e: CheckEvent;
+        try {
+          e = JSON.parse((msg as MessageEvent<string>).data);
+        } catch {
+          return;
+        }
+        queriesForEvent(e).forEach((queryKey) => qc.invalidateQueries({ queryKey }));
+      });
+
+      es.onerror = () => {
+        // o ticket já foi gasto: o retry automático do browser daria 401,
+        // por isso fecha-se e reabre-se com um ticket novo
+        es?.close();
+        es = null;
+        reconnect();
+      };
+    }
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      es?.close();
+      setConnected(false);
+    };
+  }, [token, qc]);
+}